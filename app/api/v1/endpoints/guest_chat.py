@@ -7,8 +7,9 @@ from fastapi.responses import JSONResponse
 from typing import Optional, List, Dict, Any
 import logging
 import re
-from openai import OpenAI
 from app.core.config import get_settings
+from app.core.intent_matcher import match_response_tables, matching_tables
+from app.core.llm_client import get_llm_client_pool
 from app.services.integration.twilio_service import get_twilio_service
 from pydantic import BaseModel
 import json
@@ -953,8 +954,8 @@ async def guest_chat_message(
                 detail="OpenAI API key not configured"
             )
         
-        # Initialize OpenAI client
-        client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        # Shared pooled LLM client (keep-alive connections, per-model limits)
+        llm = get_llm_client_pool()
         
         # Prepare messages for OpenAI
         messages = []
@@ -1058,15 +1059,14 @@ async def guest_chat_message(
         ]
         
         # Check if this is a lesson plan request early (needed for context limiting)
-        message_lower = request.message.lower()
+        # One scan of the message covers every keyword table used below (see app.core.intent_matcher)
+        message_tables = matching_tables(request.message)
         # Check for health/nutrition requests first to avoid false matches
-        health_keywords = ["meal plan", "meal planning", "nutrition", "diet", "diet plan", "calorie", "calories", "protein", "carb", "macros", "meal prep", "eating plan", "food plan", "nutrition plan", "wrestler", "weight loss", "weight gain", "cutting", "bulking", "meal", "breakfast", "lunch", "dinner", "snack", "nutritional"]
-        is_health_request_early = any(keyword in message_lower for keyword in health_keywords)
+        is_health_request_early = "chat_health" in message_tables
         
         # Lesson plan keywords - make more specific to avoid matching "meal plan"
-        lesson_keywords = ["lesson plan", "lesson planning", "curriculum", "teaching", "class", "student", "grade", "learning objective", "education", "pedagogy", "instruction", "teaching plan"]
         # Exclude health requests to avoid false matches
-        is_lesson_request = any(keyword in message_lower for keyword in lesson_keywords) and not is_health_request_early
+        is_lesson_request = "chat_lesson" in message_tables and not is_health_request_early
         
         # Add conversation context if provided (limit to prevent token overflow)
         # CRITICAL: For lesson plans, system prompt is very long (~4500 tokens), so limit context even more
@@ -1195,14 +1195,14 @@ async def guest_chat_message(
             logger.info(f"Using model: {model_name} for {'lesson plan' if is_lesson_request else 'regular'} request")
             
             response = await asyncio.wait_for(
-                asyncio.to_thread(
-                    client.chat.completions.create,
+                llm.chat_completion(
                     model=model_name,
                     messages=messages,
                     temperature=0.7,
                     max_tokens=max_tokens_value,
                     tools=[{"type": "function", "function": func["function"]} for func in functions],
-                    tool_choice="auto"
+                    tool_choice="auto",
+                    timeout=timeout_seconds
                 ),
                 timeout=timeout_seconds
             )
@@ -1364,14 +1364,14 @@ async def guest_chat_message(
             # Get final response from AI after function execution (with timeout)
             try:
                 final_response = await asyncio.wait_for(
-                    asyncio.to_thread(
-                        client.chat.completions.create,
+                    llm.chat_completion(
                         model="gpt-4",
                         messages=messages,
                         temperature=0.7,
                         max_tokens=2000,
                         tools=[{"type": "function", "function": func["function"]} for func in functions],
-                        tool_choice="auto"
+                        tool_choice="auto",
+                        timeout=30.0
                     ),
                     timeout=30.0  # 30 second timeout
                 )
@@ -1403,8 +1403,8 @@ async def guest_chat_message(
         # GUEST USERS: Limited functionality - basic chat only, no advanced lesson plan generation
         # Advanced features (worksheets, rubrics, 3-step generation) are ONLY for authenticated/paying users
         widget_data = None
-        message_lower = request.message.lower()
-        response_lower = (ai_response or "").lower()
+        # Long responses only need the small response_* tables; plain substring checks are cheaper there
+        response_tables = match_response_tables(ai_response or "")
         
         # GUEST USERS: Widget detection - check in priority order
         # 1. Health/Nutrition/Meal Plan requests (BEFORE lesson plans to avoid false matches)
@@ -1412,14 +1412,12 @@ async def guest_chat_message(
         # 3. Fitness/workout requests
         
         # Health/Nutrition keywords - check FIRST to avoid "meal plan" being misclassified as "lesson plan"
-        health_keywords = ["meal plan", "meal planning", "nutrition plan", "nutrition planning", "nutrition", "diet", "diet plan", "calorie", "calories", "protein", "carb", "macros", "meal prep", "eating plan", "food plan", "wrestler", "weight loss plan", "weight loss", "weight gain plan", "weight gain", "cutting plan", "cutting", "bulking plan", "bulking", "meal", "breakfast", "lunch", "dinner", "snack", "nutritional"]
-        is_health_request = any(keyword in message_lower for keyword in health_keywords) or any(keyword in response_lower for keyword in ["meal", "nutrition", "diet", "calorie", "protein", "carb", "macro", "breakfast", "lunch", "dinner"])
+        is_health_request = "widget_health" in message_tables or "response_health" in response_tables
         
         # Lesson plan keywords - make more specific to avoid matching "meal plan"
-        lesson_keywords = ["lesson plan", "lesson planning", "curriculum", "teaching", "class", "student", "grade", "learning objective", "education", "pedagogy", "instruction", "teaching plan"]
         # Exclude "plan" alone to avoid matching "meal plan", "diet plan", etc.
-        is_lesson_request = (any(keyword in message_lower for keyword in lesson_keywords) or 
-                            any(keyword in response_lower for keyword in ["lesson plan", "learning objective", "students will", "grade level", "curriculum"])) and not is_health_request
+        is_lesson_request = ("chat_lesson" in message_tables or
+                             "response_lesson" in response_tables) and not is_health_request
         
         if is_health_request:
             # GUEST USERS: Create preview/teaser widget for health/nutrition
@@ -1529,8 +1527,7 @@ async def guest_chat_message(
             logger.info(f"✅ Created preview lesson plan widget for guest user")
         else:
             # Check if this is a workout/fitness related request (more specific keywords, excluding "plan" alone)
-            fitness_keywords = ["workout", "exercise", "fitness", "chest", "training", "routine", "muscle", "strength", "cardio", "gym", "weight", "lifting", "squat", "bench", "deadlift"]
-            is_fitness_request = any(keyword in message_lower for keyword in fitness_keywords) or any(keyword in response_lower for keyword in ["exercise", "workout", "sets", "reps", "push", "pull", "squat", "bench", "deadlift"])
+            is_fitness_request = "widget_fitness" in message_tables or "response_fitness" in response_tables
             
             if is_fitness_request:
                 logger.info(f"Detected workout/fitness request (message: '{request.message[:50]}...'), extracting data from response")
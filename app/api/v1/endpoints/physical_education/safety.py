@@ -331,7 +331,7 @@ async def conduct_risk_assessment(
         cache_key = f"risk_assessment:{request.class_id}:{request.activity_type}:{request.environment}"
         
         # Try to get from cache first
-        cached_result = await cache_manager.get(cache_key)
+        cached_result = await cache_manager.aget(cache_key)
         if cached_result:
             logger.info("Returning cached risk assessment")
             return JSONResponse(
@@ -350,7 +350,7 @@ async def conduct_risk_assessment(
         )
         
         # Cache the result for 1 hour
-        await cache_manager.set(cache_key, result, expire=3600)
+        await cache_manager.aset(cache_key, result, ttl=3600)
         
         return JSONResponse(
             status_code=status.HTTP_201_CREATED,
@@ -633,6 +633,76 @@ async def bulk_safety_operations(
             detail=str(e)
         )
 
+class BulkRecordUpdate(BaseModel):
+    """One record change in a bulk update."""
+    id: int = Field(..., gt=0)
+    data: Dict[str, Any] = Field(..., min_length=1)
+
+class BulkRecordUpdateRequest(BaseModel):
+    """Request model for bulk incident or risk assessment updates."""
+    updates: List[BulkRecordUpdate] = Field(..., min_items=1, max_items=10000)
+    chunk_size: Optional[conint(gt=0, le=5000)] = Field(None, description="Rows per database round trip")
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "updates": [
+                    {"id": 101, "data": {"severity": "low"}},
+                    {"id": 102, "data": {"severity": "low", "follow_up_required": False}}
+                ],
+                "chunk_size": 500
+            }
+        }
+    )
+
+@router.patch(
+    "/incidents/bulk",
+    summary="Bulk update safety incidents",
+    description="Updates many safety incidents in chunked set-based statements and reports a per-id outcome"
+)
+@rate_limit(requests=RATE_LIMIT["bulk_operations"]["requests"], period=RATE_LIMIT["bulk_operations"]["period"])
+async def bulk_update_incidents(
+    request: BulkRecordUpdateRequest,
+    token: str = Depends(oauth2_scheme)
+):
+    """Bulk update safety incidents."""
+    try:
+        result = await safety_manager.bulk_update_safety_incidents(
+            [update.model_dump() for update in request.updates],
+            chunk_size=request.chunk_size
+        )
+        return JSONResponse(content=jsonable_encoder(result))
+    except Exception as e:
+        logger.error(f"Error bulk updating safety incidents: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.patch(
+    "/risk-assessments/bulk",
+    summary="Bulk update risk assessments",
+    description="Updates many risk assessments in chunked set-based statements and reports a per-id outcome"
+)
+@rate_limit(requests=RATE_LIMIT["bulk_operations"]["requests"], period=RATE_LIMIT["bulk_operations"]["period"])
+async def bulk_update_risk_assessments(
+    request: BulkRecordUpdateRequest,
+    token: str = Depends(oauth2_scheme)
+):
+    """Bulk update risk assessments."""
+    try:
+        result = await safety_manager.bulk_update_risk_assessments(
+            [update.model_dump() for update in request.updates],
+            chunk_size=request.chunk_size
+        )
+        return JSONResponse(content=jsonable_encoder(result))
+    except Exception as e:
+        logger.error(f"Error bulk updating risk assessments: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
 # Safety Incident Endpoints
 class SafetyIncidentResponse(BaseModel):
     """Response model for safety incidents."""
@@ -721,7 +791,7 @@ async def record_incident(
         cache_key = f"incident:{request.class_id}:{request.incident_type}:{request.severity}"
         
         # Try to get from cache first
-        cached_result = await cache_manager.get(cache_key)
+        cached_result = await cache_manager.aget(cache_key)
         if cached_result:
             logger.info("Returning cached incident record")
             return JSONResponse(
@@ -744,7 +814,7 @@ async def record_incident(
         )
         
         # Cache the result for 30 minutes
-        await cache_manager.set(cache_key, result, expire=1800)
+        await cache_manager.aset(cache_key, result, ttl=1800)
         
         return JSONResponse(
             status_code=status.HTTP_201_CREATED,
@@ -844,7 +914,7 @@ async def get_incidents(
         cache_key = f"incidents:{class_id}:{start_date}:{end_date}:{severity}"
         
         # Try to get from cache first
-        cached_result = await cache_manager.get(cache_key)
+        cached_result = await cache_manager.aget(cache_key)
         if cached_result:
             logger.info("Returning cached incidents")
             return JSONResponse(
@@ -861,7 +931,7 @@ async def get_incidents(
         )
         
         # Cache the result for 15 minutes
-        await cache_manager.set(cache_key, result, expire=900)
+        await cache_manager.aset(cache_key, result, ttl=900)
         
         return JSONResponse(
             status_code=status.HTTP_200_OK,
@@ -1022,7 +1092,7 @@ async def conduct_safety_check(
         cache_key = f"safety_check:{request.class_id}:{request.check_type}"
         
         # Try to get from cache first
-        cached_result = await cache_manager.get(cache_key)
+        cached_result = await cache_manager.aget(cache_key)
         if cached_result:
             logger.info("Returning cached safety check")
             return JSONResponse(
@@ -1042,7 +1112,7 @@ async def conduct_safety_check(
         )
         
         # Cache the result for 15 minutes
-        await cache_manager.set(cache_key, result, expire=900)
+        await cache_manager.aset(cache_key, result, ttl=900)
         
         return JSONResponse(
             status_code=status.HTTP_201_CREATED,
@@ -1142,7 +1212,7 @@ async def get_safety_checks(
         cache_key = f"safety_checks:{class_id}:{check_type}:{start_date}:{end_date}"
         
         # Try to get from cache first
-        cached_result = await cache_manager.get(cache_key)
+        cached_result = await cache_manager.aget(cache_key)
         if cached_result:
             logger.info("Returning cached safety checks")
             return JSONResponse(
@@ -1159,7 +1229,7 @@ async def get_safety_checks(
         )
         
         # Cache the result for 15 minutes
-        await cache_manager.set(cache_key, result, expire=900)
+        await cache_manager.aset(cache_key, result, ttl=900)
         
         return JSONResponse(
             status_code=status.HTTP_200_OK,
@@ -1370,7 +1440,7 @@ async def record_equipment_check(
         cache_key = f"equipment_check:{request.class_id}:{request.equipment_id}"
         
         # Try to get from cache first
-        cached_result = await cache_manager.get(cache_key)
+        cached_result = await cache_manager.aget(cache_key)
         if cached_result:
             logger.info("Returning cached equipment check")
             return JSONResponse(
@@ -1391,7 +1461,7 @@ async def record_equipment_check(
         )
         
         # Cache the result for 1 hour
-        await cache_manager.set(cache_key, result, expire=3600)
+        await cache_manager.aset(cache_key, result, ttl=3600)
         
         return JSONResponse(
             status_code=status.HTTP_201_CREATED,
@@ -1491,7 +1561,7 @@ async def get_equipment_checks(
         cache_key = f"equipment_checks:{class_id}:{equipment_id}:{maintenance_status}:{damage_status}"
         
         # Try to get from cache first
-        cached_result = await cache_manager.get(cache_key)
+        cached_result = await cache_manager.aget(cache_key)
         if cached_result:
             logger.info("Returning cached equipment checks")
             return JSONResponse(
@@ -1508,7 +1578,7 @@ async def get_equipment_checks(
         )
         
         # Cache the result for 1 hour
-        await cache_manager.set(cache_key, result, expire=3600)
+        await cache_manager.aset(cache_key, result, ttl=3600)
         
         return JSONResponse(
             status_code=status.HTTP_200_OK,
@@ -1692,7 +1762,7 @@ async def get_enhanced_metrics(
         cache_key = "enhanced_metrics"
         
         # Try to get from cache first
-        cached_result = await cache_manager.get(cache_key)
+        cached_result = await cache_manager.aget(cache_key)
         if cached_result:
             logger.info("Returning cached enhanced metrics")
             return JSONResponse(
@@ -1704,7 +1774,7 @@ async def get_enhanced_metrics(
         result = await equipment_manager.get_enhanced_metrics()
         
         # Cache the result for 5 minutes (metrics can be slightly stale)
-        await cache_manager.set(cache_key, result, expire=300)
+        await cache_manager.aset(cache_key, result, ttl=300)
         
         return JSONResponse(
             status_code=status.HTTP_200_OK,
@@ -352,7 +352,7 @@ async def get_student_profile(
         cache_key = f"student_profile:{student_id}"
         
         # Try to get from cache first
-        cached_result = await cache_manager.get(cache_key)
+        cached_result = await cache_manager.aget(cache_key)
         if cached_result:
             logger.info("Returning cached student profile")
             return JSONResponse(
@@ -372,7 +372,7 @@ async def get_student_profile(
             )
         
         # Cache the result for 1 hour
-        await cache_manager.set(cache_key, result, expire=3600)
+        await cache_manager.aset(cache_key, result, ttl=3600)
         
         return JSONResponse(
             status_code=status.HTTP_200_OK,
@@ -528,7 +528,7 @@ async def get_class(
         cache_key = f"class:{class_id}"
         
         # Try to get from cache first
-        cached_result = await cache_manager.get(cache_key)
+        cached_result = await cache_manager.aget(cache_key)
         if cached_result:
             logger.info("Returning cached class")
             return JSONResponse(
@@ -548,7 +548,7 @@ async def get_class(
             )
         
         # Cache the result for 1 hour
-        await cache_manager.set(cache_key, result, expire=3600)
+        await cache_manager.aset(cache_key, result, ttl=3600)
         
         return JSONResponse(
             status_code=status.HTTP_200_OK,
@@ -630,8 +630,8 @@ async def enroll_student(
             )
         
         # Invalidate cache
-        await cache_manager.delete(f"class:{class_id}")
-        await cache_manager.delete(f"student_profile:{student_id}")
+        await cache_manager.adelete(f"class:{class_id}")
+        await cache_manager.adelete(f"student_profile:{student_id}")
         
         # Get updated class
         updated_class = await student_manager.get_class(class_id)
@@ -789,9 +789,9 @@ async def record_attendance(
         )
         
         # Invalidate cache
-        await cache_manager.delete(f"attendance_summary:{student_id}:{class_id}")
-        await cache_manager.delete(f"student_profile:{student_id}")
-        await cache_manager.delete(f"class:{class_id}")
+        await cache_manager.adelete(f"attendance_summary:{student_id}:{class_id}")
+        await cache_manager.adelete(f"student_profile:{student_id}")
+        await cache_manager.adelete(f"class:{class_id}")
         
         return JSONResponse(
             status_code=status.HTTP_201_CREATED,
@@ -870,7 +870,7 @@ async def get_attendance_summary(
         cache_key = f"attendance_summary:{student_id}:{class_id}"
         
         # Try to get from cache first
-        cached_result = await cache_manager.get(cache_key)
+        cached_result = await cache_manager.aget(cache_key)
         if cached_result:
             logger.info("Returning cached attendance summary")
             return JSONResponse(
@@ -890,7 +890,7 @@ async def get_attendance_summary(
             )
         
         # Cache the result for 1 hour
-        await cache_manager.set(cache_key, result, expire=3600)
+        await cache_manager.aset(cache_key, result, ttl=3600)
         
         return JSONResponse(
             status_code=status.HTTP_200_OK,
@@ -1076,9 +1076,9 @@ async def record_progress(
         )
         
         # Invalidate cache
-        await cache_manager.delete(f"progress_summary:{student_id}:{class_id}:{request.assessment_type}")
-        await cache_manager.delete(f"student_profile:{student_id}")
-        await cache_manager.delete(f"class:{class_id}")
+        await cache_manager.adelete(f"progress_summary:{student_id}:{class_id}:{request.assessment_type}")
+        await cache_manager.adelete(f"student_profile:{student_id}")
+        await cache_manager.adelete(f"class:{class_id}")
         
         return JSONResponse(
             status_code=status.HTTP_201_CREATED,
@@ -1159,7 +1159,7 @@ async def get_progress_summary(
         cache_key = f"progress_summary:{student_id}:{class_id}:{assessment_type}"
         
         # Try to get from cache first
-        cached_result = await cache_manager.get(cache_key)
+        cached_result = await cache_manager.aget(cache_key)
         if cached_result:
             logger.info("Returning cached progress summary")
             return JSONResponse(
@@ -1179,7 +1179,7 @@ async def get_progress_summary(
             )
         
         # Cache the result for 1 hour
-        await cache_manager.set(cache_key, result, expire=3600)
+        await cache_manager.aset(cache_key, result, ttl=3600)
         
         return JSONResponse(
             status_code=status.HTTP_200_OK,
@@ -1335,7 +1335,7 @@ async def generate_progress_report(
         cache_key = f"progress_report:{student_id}:{class_id}:{request.assessment_type}:{request.report_date}"
         
         # Try to get from cache first
-        cached_result = await cache_manager.get(cache_key)
+        cached_result = await cache_manager.aget(cache_key)
         if cached_result:
             logger.info("Returning cached progress report")
             return JSONResponse(
@@ -1363,7 +1363,7 @@ async def generate_progress_report(
             )
         
         # Cache the result for 24 hours
-        await cache_manager.set(cache_key, result, expire=86400)
+        await cache_manager.aset(cache_key, result, ttl=86400)
         
         return JSONResponse(
             status_code=status.HTTP_200_OK,
@@ -1521,7 +1521,7 @@ async def generate_student_recommendations(
         cache_key = f"student_recommendations:{student_id}:{class_id}:{request.recommendation_type}:{request.recommendation_date}"
         
         # Try to get from cache first
-        cached_result = await cache_manager.get(cache_key)
+        cached_result = await cache_manager.aget(cache_key)
         if cached_result:
             logger.info("Returning cached student recommendations")
             return JSONResponse(
@@ -1549,7 +1549,7 @@ async def generate_student_recommendations(
             )
         
         # Cache the result for 24 hours
-        await cache_manager.set(cache_key, result, expire=86400)
+        await cache_manager.aset(cache_key, result, ttl=86400)
         
         return JSONResponse(
             status_code=status.HTTP_200_OK,
@@ -6,18 +6,49 @@ Provides endpoints for generating voice samples using Azure Cognitive Services.
 
 from fastapi import APIRouter, HTTPException, Depends, Query, Header
 from fastapi.responses import StreamingResponse
-from typing import Optional, Union
+from typing import BinaryIO, Iterator, Optional, Union
 import logging
+import os
 import jwt
 from io import BytesIO
+from pathlib import Path
 
 from app.services.azure.azure_tts_service import get_azure_tts_service
+from app.services.azure.tts_audio_cache import synthesize_speech_cached
 from app.dashboard.dependencies.auth import get_current_user, JWT_SECRET, JWT_ALGORITHM
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/text-to-speech", tags=["Text-to-Speech"])
 
+AUDIO_CHUNK_SIZE = 64 * 1024
+
+
+def _cached_audio_response(audio: BinaryIO, filename: str) -> StreamingResponse:
+    """Stream an open cached audio file in chunks, closing it when done.
+
+    The file was opened by the cache, so it streams in full even if another
+    worker evicts it meanwhile. Its content address doubles as the ETag.
+    """
+    def chunks() -> Iterator[bytes]:
+        with audio:
+            while True:
+                chunk = audio.read(AUDIO_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+    return StreamingResponse(
+        chunks(),
+        media_type="audio/mpeg",  # MP3 format
+        headers={
+            "Content-Length": str(os.fstat(audio.fileno()).st_size),
+            "Content-Disposition": f"inline; filename={filename}",
+            "Cache-Control": "public, max-age=3600",  # Cache for 1 hour
+            "ETag": f'"{Path(audio.name).stem}"'
+        }
+    )
+
 
 async def get_optional_user(authorization: Optional[str] = Header(None)) -> Optional[dict]:
     """Optional authentication - returns None for guest users instead of raising 401."""
@@ -68,8 +99,9 @@ async def synthesize_speech(
                 detail="Azure TTS service is not configured. Please set AZURE_SPEECH_KEY and AZURE_SPEECH_REGION environment variables."
             )
         
-        # Synthesize speech
-        audio_data = tts_service.synthesize_speech(
+        # Synthesize speech (or reuse the cached audio for identical parameters)
+        audio = await synthesize_speech_cached(
+            tts_service,
             text=text,
             voice_name=voice_name,
             language=language,
@@ -78,22 +110,14 @@ async def synthesize_speech(
             volume=volume
         )
         
-        if audio_data is None:
+        if audio is None:
             raise HTTPException(
                 status_code=500,
                 detail="Failed to synthesize speech"
             )
         
-        # Return audio as streaming response
-        audio_data.seek(0)  # Reset to beginning
-        return StreamingResponse(
-            audio_data,
-            media_type="audio/mpeg",  # MP3 format
-            headers={
-                "Content-Disposition": "inline; filename=speech.mp3",
-                "Cache-Control": "public, max-age=3600"  # Cache for 1 hour
-            }
-        )
+        # Serve the cached file from disk
+        return _cached_audio_response(audio, "speech.mp3")
         
     except HTTPException:
         raise
@@ -545,9 +569,10 @@ async def generate_voice_sample(
             logger.info(f"Voice settings - Query params: rate={rate}, pitch={pitch}, volume={volume} | DB settings: rate={db_rate}, pitch={db_pitch}, volume={db_volume} | Final: rate={final_rate}, pitch={final_pitch}, volume={final_volume}")
             logger.info(f"Using Azure voice: {azure_voice_name} for voice_id: {voice_id} (db_voice_id: {db_voice_id}, language: {language}, voice_name: {voice_name})")
             
-            # Synthesize speech
+            # Synthesize speech (or reuse the cached audio for identical parameters)
             try:
-                audio_data = tts_service.synthesize_speech(
+                audio = await synthesize_speech_cached(
+                    tts_service,
                     text=text,
                     voice_name=azure_voice_name,
                     language=language,
@@ -556,7 +581,7 @@ async def generate_voice_sample(
                     volume=final_volume
                 )
                 
-                if audio_data is None:
+                if audio is None:
                     sample_text_preview = str(text)[:50] if text else "None"
                     logger.error(f"TTS service returned None for voice: {azure_voice_name}, text: {sample_text_preview}...")
                     raise HTTPException(
@@ -570,30 +595,9 @@ async def generate_voice_sample(
                     detail=f"Failed to synthesize speech: {str(tts_error)}"
                 )
             
-            # Return audio as streaming response with error handling for connection closures
-            audio_data.seek(0)
-            
-            # Create a generator that handles connection errors gracefully
-            def generate_audio():
-                try:
-                    while True:
-                        chunk = audio_data.read(8192)  # Read in 8KB chunks
-                        if not chunk:
-                            break
-                        yield chunk
-                except Exception as e:
-                    # Connection closed or error during streaming - log but don't raise
-                    logger.warning(f"Connection closed during audio streaming: {str(e)}")
-                    # Don't raise - just stop generating chunks
-            
-            return StreamingResponse(
-                generate_audio(),
-                media_type="audio/mpeg",  # MP3 format for faster download
-                headers={
-                    "Content-Disposition": "inline; filename=voice_sample.mp3",
-                    "Cache-Control": "public, max-age=3600"  # Cache for 1 hour
-                }
-            )
+            # Serve the cached file from disk; a client closing the connection
+            # just ends the send
+            return _cached_audio_response(audio, "voice_sample.mp3")
         finally:
             db.close()
         
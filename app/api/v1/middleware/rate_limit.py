@@ -1,57 +1,17 @@
 from fastapi import Request, HTTPException, status
-from datetime import timedelta
+from fastapi.responses import JSONResponse
 from functools import wraps
 from typing import Callable, Any, Optional
-import asyncio
-import redis.asyncio as redis
+from starlette.datastructures import MutableHeaders
+from starlette.responses import Response
+import math
 import os
 import logging
-from app.core.config import settings
+from app.core.asgi_pipeline import PipelineHook, RequestContext
+from app.core.rate_limit import get_rate_limit_engine
 
 logger = logging.getLogger(__name__)
 
-# Initialize Redis client - supports both REDIS_URL and REDIS_HOST/REDIS_PORT
-redis_client: Optional[redis.Redis] = None
-redis_available = False
-
-try:
-    # Prefer REDIS_URL if available (for Render/production)
-    # Check if REDIS_URL is set and not the default Docker value
-    redis_url_env = os.getenv("REDIS_URL")
-    if redis_url_env and redis_url_env.strip():
-        redis_client = redis.Redis.from_url(
-            redis_url_env,
-            encoding="utf-8",
-            decode_responses=True,
-            socket_connect_timeout=5,
-            socket_timeout=5,
-            retry_on_timeout=True
-        )
-        redis_available = True
-        # Mask password in log for security
-        masked_url = redis_url_env.split('@')[-1] if '@' in redis_url_env else redis_url_env.split('://')[-1]
-        logger.info(f"Redis client initialized for rate limiting using REDIS_URL (host: {masked_url})")
-    # Fall back to REDIS_HOST/REDIS_PORT (for Docker/local)
-    elif settings.REDIS_HOST:
-        redis_client = redis.Redis(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            db=settings.REDIS_DB,
-            password=settings.REDIS_PASSWORD if settings.REDIS_PASSWORD else None,
-            decode_responses=True,
-            socket_connect_timeout=5,
-            socket_timeout=5,
-            retry_on_timeout=True
-        )
-        redis_available = True
-        logger.info(f"Redis client initialized for rate limiting using REDIS_HOST/REDIS_PORT ({settings.REDIS_HOST}:{settings.REDIS_PORT})")
-    else:
-        logger.warning("Neither REDIS_URL nor REDIS_HOST configured, rate limiting will be disabled")
-except Exception as e:
-    logger.warning(f"Failed to initialize Redis client for rate limiting: {e}. Rate limiting will be disabled.")
-    redis_client = None
-    redis_available = False
-
 # Rate limiting configuration
 RATE_LIMIT_WINDOW = 60  # 1 minute window
 RATE_LIMIT_REQUESTS = 100  # Maximum requests per window
@@ -69,29 +29,14 @@ def rate_limiter(limit: int, window: int):
             if not request:
                 return await func(*args, **kwargs)
                 
-            # Skip rate limiting if Redis is not available
-            if not redis_available or not redis_client:
-                return await func(*args, **kwargs)
-                
-            try:
-                client_ip = request.client.host
-                key = f"rate_limit:{client_ip}"
-                
-                # Get current request count
-                current = await redis_client.get(key)
-                if current is None:
-                    await redis_client.setex(key, window, 1)
-                else:
-                    current = int(current)
-                    if current >= limit:
-                        raise HTTPException(
-                            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                            detail="Too many requests"
-                        )
-                    await redis_client.incr(key)
-            except (redis.ConnectionError, redis.TimeoutError, Exception) as e:
-                # If Redis fails, allow the request through (graceful degradation)
-                logger.warning(f"Rate limiting Redis error: {e}. Allowing request.")
+            client_ip = request.client.host if request.client else "unknown"
+            result = await get_rate_limit_engine().hit(f"ip:{client_ip}:{func.__name__}", limit, window)
+            if not result.allowed:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many requests",
+                    headers={"Retry-After": str(math.ceil(result.retry_after))}
+                )
             
             return await func(*args, **kwargs)
         return wrapper
@@ -109,20 +54,24 @@ SUSPICIOUS_PATHS = [
 ]
 
 async def add_rate_limiting(request: Request, call_next):
-    """Middleware for rate limiting and security."""
+    """Middleware for rate limiting and security.
+    
+    Limits are enforced by the shared sliding-window engine (app.core.rate_limit),
+    so every worker counts against the same per-IP budget when Redis is configured.
+    """
     # Skip rate limiting in test mode to prevent event loop issues
     if get_test_mode():
         response = await call_next(request)
         return response
     
-    client_ip = request.client.host
+    client_ip = request.client.host if request.client else "unknown"
     
     # Block known security scanner IPs
     if client_ip in BLOCKED_IPS:
         logger.warning(f"Blocked request from known security scanner IP: {client_ip}")
-        raise HTTPException(
+        return JSONResponse(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
+            content={"detail": "Access denied"}
         )
     
     # Check for suspicious path patterns
@@ -132,30 +81,58 @@ async def add_rate_limiting(request: Request, call_next):
         # Log but don't block - might be legitimate in some cases
         # Could add IP to watchlist here
     
-    # Skip rate limiting if Redis is not available
-    if not redis_available or not redis_client:
-        response = await call_next(request)
-        return response
-    
-    try:
-        key = f"rate_limit:{client_ip}"
-        
-        # Get current request count
-        current = await redis_client.get(key)
-        if current is None:
-            await redis_client.setex(key, RATE_LIMIT_WINDOW, 1)
-        else:
-            current = int(current)
-            if current >= RATE_LIMIT_REQUESTS:
-                logger.warning(f"Rate limit exceeded for IP: {client_ip}")
-                raise HTTPException(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    detail="Too many requests"
-                )
-            await redis_client.incr(key)
-    except (redis.ConnectionError, redis.TimeoutError, Exception) as e:
-        # If Redis fails, allow the request through (graceful degradation)
-        logger.warning(f"Rate limiting Redis error: {e}. Allowing request.")
+    # Responses are returned rather than raised: exception handlers do not run
+    # for errors raised in middleware
+    result = await get_rate_limit_engine().hit(f"ip:{client_ip}", RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW)
+    if not result.allowed:
+        logger.warning(f"Rate limit exceeded for IP: {client_ip}")
+        return JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"detail": "Too many requests"},
+            headers={"Retry-After": str(math.ceil(result.retry_after))}
+        )
     
     response = await call_next(request)
-    return response 
\ No newline at end of file
+    response.headers["X-RateLimit-Limit"] = str(result.limit)
+    response.headers["X-RateLimit-Remaining"] = str(result.remaining)
+    return response
+
+class ScannerBlockHook(PipelineHook):
+    """Pipeline hook for the scanner checks of ``add_rate_limiting``.
+
+    Requests from BLOCKED_IPS get a 403; suspicious paths are only logged.
+    """
+
+    name = "scanner_block"
+
+    async def before(self, ctx: RequestContext) -> Optional[Response]:
+        client_ip = ctx.client_host
+        if client_ip in BLOCKED_IPS:
+            logger.warning(f"Blocked request from known security scanner IP: {client_ip}")
+            return JSONResponse(
+                status_code=status.HTTP_403_FORBIDDEN,
+                content={"detail": "Access denied"}
+            )
+        path = ctx.path.lower()
+        if any(suspicious in path for suspicious in SUSPICIOUS_PATHS):
+            logger.warning(f"Suspicious path access attempt from {client_ip}: {path}")
+        return None
+
+
+class SkipInTestMode(PipelineHook):
+    """Runs ``hook`` only outside test mode (checked per request, like ``add_rate_limiting``)."""
+
+    def __init__(self, hook: PipelineHook):
+        self.hook = hook
+        self.name = hook.name
+
+    async def before(self, ctx: RequestContext) -> Optional[Response]:
+        if get_test_mode():
+            return None
+        return await self.hook.before(ctx)
+
+    def on_response(self, ctx: RequestContext, headers: MutableHeaders) -> None:
+        self.hook.on_response(ctx, headers)
+
+    async def after(self, ctx: RequestContext) -> None:
+        await self.hook.after(ctx)
@@ -6,16 +6,20 @@ Used for multi-step meal plan workflows where Jasper needs to identify allergy a
 """
 
 import logging
+from typing import AbstractSet, Optional
+
+from app.core.intent_matcher import matching_tables
 
 logger = logging.getLogger(__name__)
 
 
-def detect_allergy_answer(message: str) -> bool:
+def detect_allergy_answer(message: str, matched_tables: Optional[AbstractSet[str]] = None) -> bool:
     """
     Detect if a user message is an allergy answer.
     
     Returns True if the message contains allergy information or
-    dietary restrictions, otherwise False.
+    dietary restrictions, otherwise False. ``matched_tables`` is the result
+    of ``intent_matcher.matching_tables`` for this message, if already known.
     
     Examples:
         >>> detect_allergy_answer("he is allergic to tree nuts")
@@ -34,28 +38,12 @@ def detect_allergy_answer(message: str) -> bool:
     
     msg_lower = message.lower().strip()
     
-    # Common keywords
-    allergy_keywords = [
-        "allerg", "allergic", "dietary", "restriction", "avoid",
-        "tree nuts", "tree nut", "peanuts", "peanut", "shellfish",
-        "dairy", "eggs", "soy", "wheat", "gluten",
-        "fish", "sesame", "milk", "lactose", "celiac",
-        "nuts", "nut", "intolerant", "intolerance"
-    ]
-    
-    # Common phrases
-    allergy_phrases = [
-        "i am allergic", "i'm allergic", "i have an allergy", "i have allergies",
-        "allergic to", "allergy to", "i avoid", "i can't eat", "i cannot eat",
-        "no allergies", "no allerg", "not allergic", "no restrictions",
-        "student is allergic", "he is allergic", "she is allergic", "they are allergic",
-        "the student is allergic", "the student has an allergy", "student has allergies",
-        "is allergic to", "has an allergy", "has allergies"
-    ]
-    
-    # Check for keywords or phrases
-    contains_keyword = any(keyword in msg_lower for keyword in allergy_keywords)
-    contains_phrase = any(phrase in msg_lower for phrase in allergy_phrases)
+    # Keywords and phrases are matched in one pass by the shared intent matcher;
+    # callers that already scanned the message can pass the matched tables
+    if matched_tables is None:
+        matched_tables = matching_tables(msg_lower)
+    contains_keyword = "allergy_keyword" in matched_tables
+    contains_phrase = "allergy_phrase" in matched_tables
     
     # Short answers like "none" or "no" might indicate no allergies
     short_no_answer = msg_lower in ["none", "no", "nothing", "no allergies", "no restrictions"]
@@ -0,0 +1,466 @@
+"""
+Fused ASGI middleware pipeline.
+
+``PipelineMiddleware`` runs the cross-cutting request concerns (request id,
+timing, metrics, logging, security headers, circuit breaking, auth, rate
+limiting, feature flags, audit) as ordered hooks inside one pure-ASGI layer,
+instead of one ``BaseHTTPMiddleware`` per concern. Each hook has three phases:
+
+* ``before(ctx)`` runs in order before the app; returning a response
+  short-circuits the request (later hooks and the app are skipped).
+* ``on_response(ctx, headers)`` runs in reverse order when the response
+  starts, and may edit the outgoing headers.
+* ``after(ctx)`` runs in reverse order once the response is finished (or
+  failed), for metrics, logs and audit records.
+
+Only hooks whose ``before`` ran get the later phases, so a short-circuit
+behaves like returning early from nested middleware. Request and response
+bodies are never read or buffered: ``receive`` is handed to the app untouched
+and body messages are forwarded as they arrive, so streaming responses keep
+streaming.
+
+Hooks can be switched on per route with ``routes``, a mapping of path prefix
+to the hook names enabled under it; the longest matching prefix wins and
+paths with no match run every hook.
+"""
+
+import json
+import logging
+import math
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.auth import decode_access_token
+from app.core.cache import get_cache
+from app.core.config import settings
+from app.core.logging import queue_audit_event
+from app.core.monitoring import ERROR_COUNT, REQUEST_COUNT, REQUEST_LATENCY, performance_monitor
+from app.core.rate_limit import RateLimitEngine, get_rate_limit_engine
+from app.core.security import SECURITY_HEADERS
+
+logger = logging.getLogger(__name__)
+
+# Resolved hook lists are cached per path; cleared when it grows past this
+ROUTE_CACHE_SIZE = 2048
+
+
+class RequestContext:
+    """Per-request data shared by the hooks of one pipeline run."""
+
+    __slots__ = (
+        "scope", "method", "path", "headers", "state", "notes",
+        "start", "status_code", "response_headers", "error"
+    )
+
+    def __init__(self, scope: Scope):
+        self.scope = scope
+        self.method: str = scope["method"]
+        self.path: str = scope["path"]
+        self.headers = Headers(scope=scope)
+        # Same dict as ``request.state`` inside the app
+        self.state: Dict[str, Any] = scope.setdefault("state", {})
+        # Scratch space for hooks, not visible to the app
+        self.notes: Dict[str, Any] = {}
+        self.start = time.perf_counter()
+        self.status_code: Optional[int] = None
+        self.response_headers: Optional[MutableHeaders] = None
+        self.error: Optional[BaseException] = None
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    @property
+    def route_path(self) -> str:
+        """Route template once the router has matched (bounded label cardinality)."""
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or "<unmatched>"
+
+    @property
+    def user_id(self) -> Optional[Any]:
+        user_id = self.state.get("user_id")
+        if user_id is None:
+            user = self.state.get("user")
+            user_id = getattr(user, "id", None) or (user.get("sub") or user.get("id") if isinstance(user, dict) else None)
+        return user_id
+
+    @property
+    def client_host(self) -> str:
+        client = self.scope.get("client")
+        return client[0] if client else "unknown"
+
+
+class PipelineHook:
+    """Base class for pipeline hooks; override only the phases you need."""
+
+    name = "hook"
+
+    async def before(self, ctx: RequestContext) -> Optional[Response]:
+        return None
+
+    def on_response(self, ctx: RequestContext, headers: MutableHeaders) -> None:
+        pass
+
+    async def after(self, ctx: RequestContext) -> None:
+        pass
+
+
+def _overrides(hook: PipelineHook, phase: str) -> bool:
+    return getattr(type(hook), phase) is not getattr(PipelineHook, phase)
+
+
+class PipelineMiddleware:
+    """Pure-ASGI middleware running ``hooks`` in order for every HTTP request."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        hooks: Optional[Sequence[PipelineHook]] = None,
+        routes: Optional[Dict[str, Iterable[str]]] = None
+    ):
+        self.app = app
+        self.hooks: Tuple[PipelineHook, ...] = tuple(default_hooks() if hooks is None else hooks)
+        names = [hook.name for hook in self.hooks]
+        if len(set(names)) != len(names):
+            raise ValueError("Pipeline hook names must be unique")
+        self.routes: List[Tuple[str, frozenset]] = []
+        for prefix, enabled in (routes or {}).items():
+            unknown = set(enabled) - set(names)
+            if unknown:
+                raise ValueError(f"Unknown pipeline hooks for {prefix}: {sorted(unknown)}")
+            self.routes.append((prefix, frozenset(enabled)))
+        self.routes.sort(key=lambda route: len(route[0]), reverse=True)
+        self._route_cache: Dict[str, Tuple[PipelineHook, ...]] = {}
+        # Phases a hook leaves as the base no-op are skipped per request
+        self._before = {hook for hook in self.hooks if _overrides(hook, "before")}
+        self._on_response = {hook for hook in self.hooks if _overrides(hook, "on_response")}
+        self._after = {hook for hook in self.hooks if _overrides(hook, "after")}
+
+    def hooks_for(self, path: str) -> Tuple[PipelineHook, ...]:
+        """Hooks enabled for ``path``, in pipeline order."""
+        hooks = self._route_cache.get(path)
+        if hooks is None:
+            hooks = self.hooks
+            for prefix, enabled in self.routes:
+                if path.startswith(prefix):
+                    hooks = tuple(hook for hook in self.hooks if hook.name in enabled)
+                    break
+            if len(self._route_cache) >= ROUTE_CACHE_SIZE:
+                self._route_cache.clear()
+            self._route_cache[path] = hooks
+        return hooks
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        hooks = self.hooks_for(scope["path"])
+        if not hooks:
+            await self.app(scope, receive, send)
+            return
+
+        ctx = RequestContext(scope)
+        entered: List[PipelineHook] = []
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                ctx.status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                ctx.response_headers = headers
+                for hook in reversed(entered):
+                    if hook in self._on_response:
+                        hook.on_response(ctx, headers)
+            await send(message)
+
+        try:
+            short_circuit = None
+            for hook in hooks:
+                entered.append(hook)
+                if hook in self._before:
+                    short_circuit = await hook.before(ctx)
+                    if short_circuit is not None:
+                        break
+            if short_circuit is not None:
+                await short_circuit(scope, receive, send_wrapper)
+            else:
+                await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            ctx.error = exc
+            logger.error(
+                f"Request failed: {ctx.state.get('request_id')} - {exc}",
+                extra={"request_id": ctx.state.get("request_id"), "path": ctx.path, "error": str(exc)}
+            )
+            if response_started:
+                raise
+            await PlainTextResponse("Internal Server Error", status_code=500)(scope, receive, send_wrapper)
+        finally:
+            for hook in reversed(entered):
+                if hook in self._after:
+                    try:
+                        await hook.after(ctx)
+                    except Exception as exc:
+                        logger.error(f"Pipeline hook {hook.name} failed: {exc}")
+
+
+class RequestIDHook(PipelineHook):
+    """Reuses an incoming ``X-Request-ID`` or assigns a new one."""
+
+    name = "request_id"
+
+    async def before(self, ctx: RequestContext) -> Optional[Response]:
+        ctx.state["request_id"] = ctx.headers.get("x-request-id") or str(uuid.uuid4())
+        return None
+
+    def on_response(self, ctx: RequestContext, headers: MutableHeaders) -> None:
+        headers["X-Request-ID"] = ctx.state["request_id"]
+
+
+class TimingHook(PipelineHook):
+    """Adds ``X-Process-Time`` (seconds until the response started)."""
+
+    name = "timing"
+
+    def on_response(self, ctx: RequestContext, headers: MutableHeaders) -> None:
+        headers["X-Process-Time"] = str(ctx.elapsed)
+
+
+class MetricsHook(PipelineHook):
+    """Prometheus request count, latency and errors, labelled by route template.
+
+    Latency also goes into ``performance_monitor``'s per-route sketches, which
+    back the percentiles in ``/metrics/summary``.
+    """
+
+    name = "metrics"
+
+    async def after(self, ctx: RequestContext) -> None:
+        endpoint = ctx.route_path
+        elapsed = ctx.elapsed
+        failed = ctx.error is not None or (ctx.status_code or 500) >= 500
+        REQUEST_COUNT.labels(endpoint=endpoint, status="error" if failed else "success").inc()
+        REQUEST_LATENCY.labels(endpoint=endpoint).observe(elapsed)
+        performance_monitor.track_response_time(endpoint, elapsed)
+        if ctx.error is not None:
+            ERROR_COUNT.labels(endpoint=endpoint, error_type=type(ctx.error).__name__).inc()
+
+
+class RequestLoggingHook(PipelineHook):
+    """One log line per finished request."""
+
+    name = "logging"
+
+    async def after(self, ctx: RequestContext) -> None:
+        request_id = ctx.state.get("request_id")
+        logger.info(
+            f"Request completed: {request_id} - {ctx.method} {ctx.path} {ctx.status_code}",
+            extra={
+                "request_id": request_id,
+                "method": ctx.method,
+                "path": ctx.path,
+                "status_code": ctx.status_code,
+                "process_time": ctx.elapsed,
+                "client": ctx.client_host
+            }
+        )
+
+
+class SecurityHeadersHook(PipelineHook):
+    """Adds ``SECURITY_HEADERS`` to every response."""
+
+    name = "security_headers"
+
+    def __init__(self, security_headers: Optional[Dict[str, str]] = None):
+        self.security_headers = dict(SECURITY_HEADERS if security_headers is None else security_headers)
+
+    def on_response(self, ctx: RequestContext, headers: MutableHeaders) -> None:
+        for header, value in self.security_headers.items():
+            headers[header] = value
+
+
+def _cached_json(value: Any) -> Any:
+    """Cache entries may hold decoded values or JSON strings written by older code."""
+    return json.loads(value) if isinstance(value, (str, bytes)) else value
+
+
+class CircuitBreakerHook(PipelineHook):
+    """Rejects calls from an ``X-Service-ID`` whose breaker is open."""
+
+    name = "circuit_breaker"
+
+    async def before(self, ctx: RequestContext) -> Optional[Response]:
+        service_id = ctx.headers.get("x-service-id")
+        if not service_id:
+            return None
+        try:
+            breaker = _cached_json(await get_cache().aget(f"circuit_breaker:{service_id}"))
+        except Exception as e:
+            logger.error(f"Circuit breaker check failed: {str(e)}")
+            return None
+        if breaker and breaker.get("state") == "open":
+            return JSONResponse(status_code=503, content={"detail": "Circuit breaker is open"})
+        return None
+
+
+def _is_public(path: str, public_paths: Tuple[str, ...]) -> bool:
+    """Whether ``path`` is one of ``public_paths`` or below one of them.
+
+    Matching is per path segment (``/login`` does not cover ``/login-admin``)
+    and ``/`` only covers the root itself.
+    """
+    for public in public_paths:
+        prefix = public.rstrip("/")
+        if path == public or (prefix and path.startswith(prefix + "/")):
+            return True
+    return False
+
+
+class AuthenticationHook(PipelineHook):
+    """Requires a valid bearer token outside ``public_paths``.
+
+    Tokens are checked with the key that signs them at login
+    (``app.core.auth``). CORS preflights carry no credentials and always pass.
+    """
+
+    name = "authentication"
+
+    def __init__(self, public_paths: Optional[Iterable[str]] = None):
+        self.public_paths = tuple(settings.PUBLIC_PATHS if public_paths is None else public_paths)
+
+    async def before(self, ctx: RequestContext) -> Optional[Response]:
+        if _is_public(ctx.path, self.public_paths):
+            return None
+        if ctx.method == "OPTIONS" and "access-control-request-method" in ctx.headers:
+            return None
+        auth_header = ctx.headers.get("authorization", "")
+        if not auth_header.startswith("Bearer "):
+            return JSONResponse(status_code=401, content={"detail": "Invalid authentication credentials"})
+        try:
+            payload = decode_access_token(auth_header[len("Bearer "):])
+        except Exception as e:
+            return JSONResponse(
+                status_code=401,
+                content={"detail": getattr(e, "detail", None) or str(e)},
+                headers={"WWW-Authenticate": "Bearer"}
+            )
+        ctx.state["user"] = payload
+        ctx.state["user_id"] = payload.get("sub") if isinstance(payload, dict) else None
+        return None
+
+
+class RateLimitHook(PipelineHook):
+    """Sliding-window limit per user (or client address), as ``RateLimitMiddleware``."""
+
+    name = "rate_limit"
+
+    def __init__(
+        self,
+        limit: Optional[int] = None,
+        window: Optional[int] = None,
+        engine: Optional[RateLimitEngine] = None,
+        exempt_paths: Optional[Iterable[str]] = None
+    ):
+        self.limit = limit or settings.RATE_LIMIT_CALLS
+        self.window = window or settings.RATE_LIMIT_PERIOD
+        self.engine = engine
+        self.exempt_paths = tuple(settings.RATE_LIMIT_EXEMPT_PATHS if exempt_paths is None else exempt_paths)
+
+    async def before(self, ctx: RequestContext) -> Optional[Response]:
+        if ctx.path.startswith(self.exempt_paths):
+            return None
+        user_id = ctx.user_id
+        key = f"user:{user_id}" if user_id is not None else f"ip:{ctx.client_host}"
+        result = await (self.engine or get_rate_limit_engine()).hit(key, self.limit, self.window)
+        ctx.notes["rate_limit"] = result
+        if not result.allowed:
+            return JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests"},
+                headers={"Retry-After": str(math.ceil(result.retry_after))}
+            )
+        return None
+
+    def on_response(self, ctx: RequestContext, headers: MutableHeaders) -> None:
+        result = ctx.notes.get("rate_limit")
+        if result is not None:
+            headers["X-RateLimit-Limit"] = str(result.limit)
+            headers["X-RateLimit-Remaining"] = str(result.remaining)
+
+
+class FeatureFlagHook(PipelineHook):
+    """Loads the authenticated user's feature flags into ``request.state.feature_flags``."""
+
+    name = "feature_flags"
+
+    async def before(self, ctx: RequestContext) -> Optional[Response]:
+        user_id = ctx.user_id
+        if user_id is None:
+            return None
+        try:
+            flags = _cached_json(await get_cache().aget(f"user_flags:{user_id}"))
+        except Exception as e:
+            logger.error(f"Feature flag check failed: {str(e)}")
+            return None
+        if flags:
+            ctx.state["feature_flags"] = flags
+        return None
+
+
+class AuditHook(PipelineHook):
+    """Emits one audit record per request once the response is finished.
+
+    ``sink`` receives the record; by default it is queued on the batched log
+    writer, so persisting it never adds to request latency.
+    """
+
+    name = "audit"
+
+    def __init__(self, sink: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None):
+        self.sink = sink
+
+    async def after(self, ctx: RequestContext) -> None:
+        record = {
+            "action": "request",
+            "request_id": ctx.state.get("request_id"),
+            "user_id": ctx.user_id,
+            "method": ctx.method,
+            "resource_type": ctx.path,
+            "status_code": ctx.status_code,
+            "duration": ctx.elapsed,
+            "error": type(ctx.error).__name__ if ctx.error is not None else None
+        }
+        if self.sink is not None:
+            await self.sink(record)
+            return
+        action, resource_type, user_id = record.pop("action"), record.pop("resource_type"), record.pop("user_id")
+        queue_audit_event(
+            action=action,
+            resource_type=resource_type,
+            details=record,
+            user_id=user_id,
+            ip_address=ctx.client_host,
+            user_agent=ctx.headers.get("user-agent")
+        )
+
+
+def default_hooks() -> List[PipelineHook]:
+    """Hooks in the order ``setup_middleware`` installs them."""
+    return [
+        RequestIDHook(),
+        TimingHook(),
+        MetricsHook(),
+        RequestLoggingHook(),
+        SecurityHeadersHook(),
+        CircuitBreakerHook(),
+        AuthenticationHook(),
+        RateLimitHook(),
+        FeatureFlagHook(),
+        AuditHook()
+    ]
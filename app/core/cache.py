@@ -1,5 +1,8 @@
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, Tuple
 import json
+import queue
+import threading
+import time
 import redis
 from functools import wraps
 import logging
@@ -7,6 +10,7 @@ import asyncio
 from prometheus_client import Counter, Histogram
 from app.core.config import get_settings
 from app.core.regional_failover import Region, RegionalFailoverManager
+from app.core.ttl_cache import TTLCache
 
 # Initialize settings and failover manager
 settings = get_settings()
@@ -16,6 +20,7 @@ failover_manager = RegionalFailoverManager()
 try:
     cache_hits = Counter('cache_hits_total', 'Number of cache hits')
     cache_misses = Counter('cache_misses_total', 'Number of cache misses')
+    l1_cache_hits = Counter('cache_l1_hits_total', 'Number of cache hits served from the in-process tier')
     cache_operation_duration = Histogram('cache_operation_duration_seconds', 'Time spent in cache operations')
     replication_latency = Histogram('cache_replication_latency_seconds', 'Time spent in cache replication')
 except ValueError:
@@ -28,6 +33,8 @@ except ValueError:
                 cache_hits = collector
             elif collector._name == 'cache_misses_total':
                 cache_misses = collector
+            elif collector._name == 'cache_l1_hits_total':
+                l1_cache_hits = collector
             elif collector._name == 'cache_operation_duration_seconds':
                 cache_operation_duration = collector
             elif collector._name == 'cache_replication_latency_seconds':
@@ -151,10 +158,155 @@ class RedisCluster:
         except Exception as e:
             logger.error(f"Replication failed: {e}")
 
+class ReplicationQueue:
+    """Replicates cache writes to secondary regions from a background thread.
+
+    Callers enqueue without waiting on the network. The worker coalesces
+    writes per key and sends each batch to every secondary region in a single
+    pipeline.
+    """
+
+    def __init__(
+        self,
+        cluster: RedisCluster,
+        maxsize: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 0.05
+    ):
+        self.cluster = cluster
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Tuple[str, Optional[str], Optional[int]]]" = queue.Queue(maxsize=maxsize)
+        self._worker: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.stats = {
+            "enqueued": 0,
+            "dropped": 0,
+            "replicated": 0,
+            "batches": 0,
+            "errors": 0
+        }
+
+    def enqueue(self, key: str, payload: Optional[str], ttl: Optional[int] = None) -> bool:
+        """Queue a JSON ``payload`` for replication; ``None`` replicates a delete."""
+        if not self.cluster.replication_enabled or not self.cluster.is_available:
+            return False
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((key, payload, ttl))
+        except queue.Full:
+            self.stats["dropped"] += 1
+            logger.warning(f"Replication queue full, dropping write for {key}")
+            return False
+        self.stats["enqueued"] += 1
+        return True
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._stop.clear()
+                self._worker = threading.Thread(target=self._run, name="cache-replication", daemon=True)
+                self._worker.start()
+
+    def _next_batch(self) -> Tuple[Dict[str, Tuple[Optional[str], Optional[int]]], int]:
+        """Collect up to ``batch_size`` writes, keeping only the latest per key.
+
+        Returns the coalesced batch and the number of queue items it consumed.
+        """
+        batch: Dict[str, Tuple[Optional[str], Optional[int]]] = {}
+        try:
+            key, payload, ttl = self._queue.get(timeout=1.0)
+        except queue.Empty:
+            return batch, 0
+        batch[key] = (payload, ttl)
+        taken = 1
+        deadline = time.monotonic() + self.flush_interval
+        while taken < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                key, payload, ttl = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.pop(key, None)
+            batch[key] = (payload, ttl)
+            taken += 1
+        return batch, taken
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch, taken = self._next_batch()
+            if not batch:
+                continue
+            try:
+                self._replicate_batch(batch)
+            finally:
+                for _ in range(taken):
+                    self._queue.task_done()
+
+    def _replicate_batch(self, batch: Dict[str, Tuple[Optional[str], Optional[int]]]):
+        """Write one batch to each secondary region with a pipeline."""
+        for region in Region:
+            if region == self.cluster.primary_region:
+                continue
+            client = self.cluster.clients.get(region.value)
+            if client is None:
+                continue
+            try:
+                with replication_latency.time():
+                    pipe = client.pipeline(transaction=False)
+                    for key, (payload, ttl) in batch.items():
+                        if payload is None:
+                            pipe.delete(key)
+                        elif ttl is not None:
+                            pipe.setex(key, ttl, payload)
+                        else:
+                            pipe.set(key, payload)
+                    pipe.execute()
+                self.stats["replicated"] += len(batch)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Replication to region {region.value} failed: {e}")
+        self.stats["batches"] += 1
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until queued writes are replicated; returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self._queue.unfinished_tasks
+
+    def stop(self, timeout: float = 5.0):
+        """Flush pending writes and stop the worker thread."""
+        self.flush(timeout)
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join(timeout=timeout)
+            self._worker = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and replication counters."""
+        return {
+            **self.stats,
+            "pending": self._queue.qsize()
+        }
+
 # Initialize Redis cluster
 redis_cluster = RedisCluster()
 redis_cluster.initialize()
 
+# Background replication shared by all cache instances
+replication_queue = ReplicationQueue(
+    redis_cluster,
+    maxsize=settings.CACHE_REPLICATION_QUEUE_SIZE,
+    batch_size=settings.CACHE_REPLICATION_BATCH_SIZE,
+    flush_interval=settings.CACHE_REPLICATION_FLUSH_INTERVAL
+)
+
 # Initialize default Redis client (for backward compatibility)
 # This may be None if Redis is not available
 redis_client = redis_cluster.get_client(redis_cluster.primary_region)
@@ -166,92 +318,150 @@ def get_cache_key(prefix: str, *args, **kwargs) -> str:
     key_parts.extend(f"{k}:{v}" for k, v in sorted(kwargs.items()))
     return ":".join(key_parts)
 
+# Sentinel for cache misses (a cached value may legitimately be None)
+_MISSING = object()
+
+class _LocalValue:
+    """L1 entry for a value that cannot be JSON-encoded and so never reaches Redis."""
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+def _decode(payload: Any) -> Any:
+    if isinstance(payload, _LocalValue):
+        return payload.value
+    return json.loads(payload)
+
 class Cache:
-    """Cache manager class for handling Redis operations with regional support."""
+    """Two-tier cache: a bounded in-process L1 in front of Redis (L2).
+
+    Reads are served from L1 without touching the network when possible.
+    Writes update L1 and the primary region and return; replication to the
+    other regions is queued. Values are stored JSON-encoded in both tiers so
+    callers never share mutable objects; values that are not JSON-serializable
+    are kept as-is in L1 only, as the in-memory fallback always allowed.
+    """
     
-    def __init__(self, redis_client: Optional[redis.Redis] = None, replicate: bool = True):
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis] = None,
+        replicate: bool = True,
+        l1_maxsize: Optional[int] = None,
+        l1_ttl: Optional[int] = None,
+        replication: Optional[ReplicationQueue] = None
+    ):
         self.redis = redis_client or redis_cluster.get_client()
         self.replicate = replicate
+        self.replication = replication or replication_queue
         self.logger = logging.getLogger(__name__)
-        self._in_memory_cache: Dict[str, Any] = {}  # Fallback in-memory cache
+        self.l1_ttl = settings.CACHE_L1_TTL if l1_ttl is None else l1_ttl
+        # L1 tier; also the only store when Redis is unavailable
+        self._in_memory_cache = TTLCache(
+            maxsize=l1_maxsize or settings.CACHE_L1_MAX_ENTRIES,
+            name="cache_l1"
+        )
     
-    def get(self, key: str) -> Optional[Any]:
-        """Get value from cache."""
-        # If Redis is not available, use in-memory cache
+    def _l1_ttl_for(self, ttl: Optional[int]) -> Optional[float]:
+        """L1 entries live at most ``l1_ttl`` when Redis holds the authoritative copy."""
         if self.redis is None:
-            return self._in_memory_cache.get(key)
-            
+            return ttl
+        return min(ttl, self.l1_ttl) if ttl is not None else self.l1_ttl
+    
+    def _l1_set(self, key: str, value: Any, ttl: int) -> Any:
+        """Store ``value`` in L1 and return its Redis payload, or ``_MISSING`` if it is local-only."""
+        try:
+            payload = json.dumps(value)
+        except (TypeError, ValueError):
+            self.logger.debug(f"Cache value for {key} is not JSON-serializable; keeping it in L1 only")
+            self._in_memory_cache.set(key, _LocalValue(value), ttl=ttl)
+            return _MISSING
+        self._in_memory_cache.set(key, payload, ttl=self._l1_ttl_for(ttl))
+        return payload
+    
+    def _l1_get(self, key: str) -> Any:
+        payload = self._in_memory_cache.get(key, _MISSING)
+        if payload is not _MISSING:
+            l1_cache_hits.inc()
+            cache_hits.inc()
+        return payload
+    
+    def _l2_get(self, key: str) -> Any:
+        """Read ``key`` from Redis and promote it to L1."""
+        if self.redis is None:
+            cache_misses.inc()
+            return _MISSING
         try:
             with cache_operation_duration.time():
-                value = self.redis.get(key)
-                if value:
-                    cache_hits.inc()
-                    return json.loads(value)
-                cache_misses.inc()
-                return None
+                payload = self.redis.get(key)
         except redis.RedisError as e:
             self.logger.error(f"Cache get error: {str(e)}")
-            # Fallback to in-memory cache
-            return self._in_memory_cache.get(key)
+            return _MISSING
+        if payload is None:
+            cache_misses.inc()
+            return _MISSING
+        cache_hits.inc()
+        self._in_memory_cache.set(key, payload, ttl=self.l1_ttl)
+        return payload
     
-    def set(self, key: str, value: Any, ttl: int = 3600) -> bool:
-        """Set value in cache with TTL and optional replication."""
-        # If Redis is not available, use in-memory cache
+    def _l2_set(self, key: str, payload: str, ttl: int, replicate: bool) -> bool:
         if self.redis is None:
-            self._in_memory_cache[key] = value
             return True
-            
         try:
             with cache_operation_duration.time():
-                success = self.redis.setex(
-                    key,
-                    ttl,
-                    json.dumps(value)
-                )
-                
-                if success and self.replicate:
-                    asyncio.run(redis_cluster.replicate(key, value, ttl))
-                    
-                return success
+                success = self.redis.setex(key, ttl, payload)
         except redis.RedisError as e:
             self.logger.error(f"Cache set error: {str(e)}")
-            # Fallback to in-memory cache
-            self._in_memory_cache[key] = value
+            # L1 still holds the value
             return True
+        if success and replicate:
+            self.replication.enqueue(key, payload, ttl)
+        return bool(success)
     
-    def delete(self, key: str) -> bool:
-        """Delete value from cache."""
-        # If Redis is not available, use in-memory cache
+    def _l2_delete(self, key: str) -> bool:
         if self.redis is None:
-            if key in self._in_memory_cache:
-                del self._in_memory_cache[key]
-                return True
             return False
-            
         try:
             with cache_operation_duration.time():
                 success = bool(self.redis.delete(key))
-                
-                if success and self.replicate:
-                    asyncio.run(redis_cluster.replicate(key, None))
-                
-                # Also remove from in-memory cache
-                self._in_memory_cache.pop(key, None)
-                    
-                return success
         except redis.RedisError as e:
             self.logger.error(f"Cache delete error: {str(e)}")
-            # Fallback to in-memory cache
-            if key in self._in_memory_cache:
-                del self._in_memory_cache[key]
-                return True
             return False
+        if success and self.replicate:
+            self.replication.enqueue(key, None)
+        return success
+    
+    def lookup(self, key: str) -> Tuple[bool, Any]:
+        """Return ``(found, value)`` so cached ``None`` values can be told apart from misses."""
+        payload = self._l1_get(key)
+        if payload is _MISSING:
+            payload = self._l2_get(key)
+        if payload is _MISSING:
+            return False, None
+        return True, _decode(payload)
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Get value from cache."""
+        return self.lookup(key)[1]
+    
+    def set(self, key: str, value: Any, ttl: int = 3600, replicate: Optional[bool] = None) -> bool:
+        """Set value in cache with TTL and optional replication."""
+        payload = self._l1_set(key, value, ttl)
+        if payload is _MISSING:
+            # Drop any older Redis copy so it cannot resurface after L1 expiry
+            self._l2_delete(key)
+            return True
+        return self._l2_set(key, payload, ttl, self.replicate if replicate is None else replicate)
+    
+    def delete(self, key: str) -> bool:
+        """Delete value from cache."""
+        in_l1 = self._in_memory_cache.delete(key)
+        return self._l2_delete(key) or in_l1
     
     def clear(self) -> bool:
         """Clear all cache entries."""
-        # If Redis is not available, clear in-memory cache
+        self._in_memory_cache.clear()
         if self.redis is None:
-            self._in_memory_cache.clear()
             return True
             
         try:
@@ -265,16 +475,64 @@ class Cache:
                             client = redis_cluster.get_client(region)
                             if client:
                                 client.flushdb()
-                
-                # Also clear in-memory cache
-                self._in_memory_cache.clear()
                     
                 return success
         except redis.RedisError as e:
             self.logger.error(f"Cache clear error: {str(e)}")
-            # Fallback to in-memory cache
-            self._in_memory_cache.clear()
             return True
+    
+    async def alookup(self, key: str) -> Tuple[bool, Any]:
+        """Async ``lookup``; only L1 misses leave the event loop thread."""
+        payload = self._l1_get(key)
+        if payload is _MISSING:
+            payload = await asyncio.to_thread(self._l2_get, key)
+        if payload is _MISSING:
+            return False, None
+        return True, _decode(payload)
+    
+    async def aget(self, key: str) -> Optional[Any]:
+        """Async ``get``."""
+        return (await self.alookup(key))[1]
+    
+    async def aset(self, key: str, value: Any, ttl: int = 3600, replicate: Optional[bool] = None) -> bool:
+        """Async ``set``: returns once L1 and the primary region are written."""
+        payload = self._l1_set(key, value, ttl)
+        if payload is _MISSING:
+            await asyncio.to_thread(self._l2_delete, key)
+            return True
+        return await asyncio.to_thread(
+            self._l2_set, key, payload, ttl, self.replicate if replicate is None else replicate
+        )
+    
+    async def adelete(self, key: str) -> bool:
+        """Async ``delete``."""
+        in_l1 = self._in_memory_cache.delete(key)
+        return await asyncio.to_thread(self._l2_delete, key) or in_l1
+    
+    async def aclear(self) -> bool:
+        """Async ``clear``."""
+        return await asyncio.to_thread(self.clear)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get L1 counters, Redis availability and replication queue stats."""
+        return {
+            "l1": self._in_memory_cache.get_stats(),
+            "redis_available": self.redis is not None,
+            "replication": self.replication.get_stats()
+        }
+    
+    async def check_health(self) -> Dict[str, Any]:
+        """Ping Redis and report the state of both tiers."""
+        healthy = False
+        if self.redis is not None:
+            try:
+                healthy = bool(await asyncio.to_thread(self.redis.ping))
+            except redis.RedisError as e:
+                self.logger.warning(f"Cache health check failed: {str(e)}")
+        return {
+            "status": "healthy" if healthy else "degraded",
+            **self.get_stats()
+        }
 
 # Singleton instance of Cache
 _cache_instance = None
@@ -291,54 +549,48 @@ def get_cache() -> Cache:
         _cache_instance = Cache(redis_client=redis_client)
     return _cache_instance
 
+def shutdown_cache_replication(timeout: float = 5.0):
+    """Flush queued replication writes and stop the worker (application shutdown)."""
+    replication_queue.stop(timeout)
+
 def cached(prefix: str, ttl: int = 3600, replicate: bool = True):
     """
     Decorator for caching function results with optional replication.
     
+    Works on both regular functions and coroutines; coroutine results are
+    read and written through the async cache API.
+    
     Args:
         prefix: Prefix for cache key
         ttl: Time to live in seconds (default: 1 hour)
         replicate: Whether to replicate to other regions (default: True)
     """
     def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                cache = get_cache()
+                cache_key = get_cache_key(prefix, *args, **kwargs)
+                found, value = await cache.alookup(cache_key)
+                if found:
+                    return value
+                
+                result = await func(*args, **kwargs)
+                await cache.aset(cache_key, result, ttl, replicate=replicate)
+                return result
+            return async_wrapper
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
+            cache = get_cache()
             cache_key = get_cache_key(prefix, *args, **kwargs)
+            found, value = cache.lookup(cache_key)
+            if found:
+                return value
             
-            # If Redis is not available, just execute the function
-            if redis_client is None:
-                return func(*args, **kwargs)
-            
-            try:
-                with cache_operation_duration.time():
-                    # Try to get from cache
-                    cached_value = redis_client.get(cache_key)
-                    
-                    if cached_value:
-                        cache_hits.inc()
-                        return json.loads(cached_value)
-                    
-                    cache_misses.inc()
-                    # If not in cache, execute function
-                    result = func(*args, **kwargs)
-                    
-                    # Store in cache
-                    redis_client.setex(
-                        cache_key,
-                        ttl,
-                        json.dumps(result)
-                    )
-                    
-                    # Replicate if enabled
-                    if replicate:
-                        asyncio.run(redis_cluster.replicate(cache_key, result, ttl))
-                    
-                    return result
-                    
-            except redis.RedisError as e:
-                logger.error(f"Cache error: {str(e)}")
-                # If cache fails, execute function without caching
-                return func(*args, **kwargs)
+            result = func(*args, **kwargs)
+            cache.set(cache_key, result, ttl, replicate=replicate)
+            return result
                 
         return wrapper
     return decorator
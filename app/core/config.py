@@ -148,6 +148,12 @@ class Settings(BaseSettings):
     
     # OpenAI settings
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    OPENAI_BASE_URL: Optional[str] = os.getenv("OPENAI_BASE_URL") or None  # e.g. a local stub server for load tests
+    OPENAI_TIMEOUT: float = float(os.getenv("OPENAI_TIMEOUT", "60"))
+    OPENAI_MAX_RETRIES: int = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+    OPENAI_MAX_CONNECTIONS: int = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    OPENAI_MODEL_CONCURRENCY: int = int(os.getenv("OPENAI_MODEL_CONCURRENCY", "16"))  # in-flight requests per model
     GPT_MODEL: str = os.getenv("GPT_MODEL", "gpt-4")
     MAX_TOKENS: int = int(os.getenv("MAX_TOKENS", "2000"))
     TEMPERATURE: float = float(os.getenv("TEMPERATURE", "0.7"))
@@ -166,6 +172,17 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     LOG_FORMAT: str = os.getenv("LOG_FORMAT", "%(asctime)s - %(name)s - %(levelname)s - %(message)s")
     LOG_DIR: str = os.getenv("LOG_DIR", "/tmp/faraday-ai/logs")
+    LOG_WRITER_QUEUE_SIZE: int = Field(default=10000)  # log rows buffered before new ones are dropped
+    LOG_WRITER_BATCH_SIZE: int = Field(default=500)  # rows per multi-row INSERT round
+    LOG_WRITER_FLUSH_INTERVAL: float = Field(default=1.0)  # seconds a partial batch waits
+    LOG_QUEUE_ENABLED: bool = Field(default=True)  # format and write log records on a background thread
+    LOG_QUEUE_SIZE: int = Field(default=10000)  # records buffered before new ones are dropped
+    LOG_DEBUG_SAMPLE_RATE: float = Field(default=1.0)  # fraction of DEBUG records kept
+    LOG_SITE_RATE_LIMIT: float = Field(default=20.0)  # DEBUG/INFO records per second per source line; 0 disables
+    LOG_SITE_BURST: float = Field(default=100.0)  # records a quiet source line may emit at once
+    LOG_SAMPLING_EXEMPT_LOGGERS: List[str] = Field(
+        default_factory=lambda: ["audit", "security"]
+    )  # loggers (and their children) never sampled or rate limited
     
     # District Settings (Generic for development)
     DISTRICT_NAME: str = os.getenv("DISTRICT_NAME", "Development District")
@@ -191,6 +208,8 @@ class Settings(BaseSettings):
     # Azure Speech Services (Text-to-Speech)
     AZURE_SPEECH_KEY: Optional[str] = os.getenv("AZURE_SPEECH_KEY", "")
     AZURE_SPEECH_REGION: Optional[str] = os.getenv("AZURE_SPEECH_REGION", "")
+    TTS_CACHE_DIR: str = os.getenv("TTS_CACHE_DIR", "/tmp/faraday-ai/tts-cache")  # content-addressed synthesized audio files
+    TTS_CACHE_MAX_BYTES: int = Field(default=512 * 1024 * 1024)  # least recently used audio is evicted past this
 
     # ML Model Settings
     MODEL_PATH: str = "/app/models"  # Default path for ML models
@@ -225,6 +244,30 @@ class Settings(BaseSettings):
     RATELIMIT_STORAGE_URL: str = Field(default="memory://")
     RATELIMIT_DEFAULT: str = Field(default="100/minute")
     RATELIMIT_STRATEGY: str = Field(default="fixed-window")
+    RATE_LIMIT_SHARDS: int = Field(default=16)  # lock shards of the in-process limiter
+    RATE_LIMIT_EXEMPT_PATHS: List[str] = Field(default_factory=lambda: ["/health", "/metrics"])
+    
+    # Request Pipeline Settings
+    PUBLIC_PATHS: List[str] = Field(
+        default_factory=lambda: ["/health", "/metrics", "/docs", "/redoc", "/openapi.json", "/static"]
+    )  # paths (and everything below them) served without a bearer token; "/" is the root only
+    MIDDLEWARE_ROUTE_HOOKS: Dict[str, List[str]] = Field(
+        default_factory=lambda: {
+            # Routes authenticate through their own dependencies; the pipeline
+            # requires a bearer token only where "authentication" is enabled
+            "/": [
+                "request_id", "timing", "metrics", "logging", "security_headers",
+                "circuit_breaker", "rate_limit", "feature_flags", "audit"
+            ],
+            "/api/v1/access-control": [
+                "request_id", "timing", "metrics", "logging", "security_headers",
+                "circuit_breaker", "authentication", "rate_limit", "feature_flags", "audit"
+            ],
+            "/health": ["request_id", "timing"],
+            "/metrics": ["request_id", "timing"],
+            "/static": ["request_id", "timing", "security_headers"]
+        }
+    )  # path prefix -> pipeline hooks enabled under it (longest prefix wins)
     
     # CORS Settings
     CORS_ORIGINS: List[str] = Field(
@@ -235,6 +278,18 @@ class Settings(BaseSettings):
     # WebSocket Settings
     WS_HEARTBEAT_INTERVAL: int = Field(default=30)
     WS_MAX_CONNECTIONS: int = Field(default=1000)
+    WS_SEND_QUEUE_SIZE: int = Field(default=256)  # outbound messages buffered per connection
+    WS_SEND_TIMEOUT: float = Field(default=10.0)  # seconds before a stalled send drops the connection
+    WS_SLOW_CONSUMER_POLICY: str = Field(default="drop_oldest")  # drop_oldest, drop_newest or disconnect
+    COLLABORATION_BACKPLANE: str = Field(default="memory")  # "redis" shares sessions across workers
+    COLLABORATION_SESSION_TTL: int = Field(default=86400)
+    
+    # Access Control Settings
+    PERMISSION_CACHE_MAX_USERS: int = Field(default=10000)
+    PERMISSION_CACHE_TTL: int = Field(default=300)  # bounds staleness across workers
+    
+    # Safety Settings
+    SAFETY_BULK_UPDATE_CHUNK_SIZE: int = Field(default=500)  # rows per prefetch/UPDATE/commit round
     
     # SMTP Settings
     SMTP_HOST: str = os.getenv("SMTP_HOST", "localhost")
@@ -275,6 +330,22 @@ class Settings(BaseSettings):
     CACHE_DEFAULT_TIMEOUT: int = Field(default=300)  # 5 minutes
     CACHE_KEY_PREFIX: str = Field(default="faraday:")
     CACHE_OPTIONS: Dict[str, Any] = Field(default_factory=dict)
+    CACHE_L1_MAX_ENTRIES: int = Field(default=10000)  # in-process tier in front of Redis
+    CACHE_L1_TTL: int = Field(default=30)  # seconds; bounds staleness across workers
+    CACHE_REPLICATION_QUEUE_SIZE: int = Field(default=10000)
+    CACHE_REPLICATION_BATCH_SIZE: int = Field(default=200)
+    CACHE_REPLICATION_FLUSH_INTERVAL: float = Field(default=0.05)  # seconds
+    RESPONSE_CACHE_MAX_BYTES: int = Field(default=64 * 1024 * 1024)  # in-process response cache budget
+    RESPONSE_CACHE_MAX_ENTRY_BYTES: int = Field(default=1024 * 1024)  # larger responses are never cached
+    RESPONSE_CACHE_REDIS_URL: str = Field(default="")  # empty keeps cached responses in process only
+    RESPONSE_CACHE_TAG_REFRESH: float = Field(default=1.0)  # seconds a worker trusts its tag versions
+    RESPONSE_CACHE_RULES: Dict[str, Dict[str, Any]] = Field(
+        default_factory=lambda: {
+            "/api/v1/dashboard": {"ttl": 15, "tags": ["dashboard"]},
+            "/api/v1/lesson-plans": {"ttl": 300, "tags": ["curriculum"]},
+            "/api/v1/educational": {"ttl": 300, "tags": ["curriculum"]}
+        }
+    )  # path prefix -> ttl, invalidation tags, vary_headers, per_principal
     
     # Session Settings
     SESSION_TYPE: str = Field(default="redis")
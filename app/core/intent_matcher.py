@@ -0,0 +1,220 @@
+"""
+Compiled Intent Keyword Matcher
+Matches a message against every intent, widget, health, lesson and allergy
+keyword table in a single linear scan.
+
+All keywords are folded into one prefix-trie shaped regular expression wrapped
+in a lookahead, so ``finditer`` visits each character position once and
+reports the longest keyword starting there. Shorter keywords that are prefixes
+of that match are resolved from a precomputed table, so every keyword
+occurrence (including overlapping ones) is returned with its position.
+
+The combined scan pays off on short user messages checked against every
+table. Long model responses are only tested against the three small
+``response_*`` tables, where per-keyword substring searches that stop at the
+first hit are cheaper; use ``match_response_tables`` for those.
+"""
+
+import re
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+# Keyword tables, keyed by the name callers test for
+KEYWORD_TABLES: Dict[str, Tuple[str, ...]] = {
+    # prompt_loader.classify_intent
+    "allergy_prompted": (
+        "allergy", "allergic", "food restriction", "intolerance", "avoid", "dietary restriction"
+    ),
+    "meal_plan": (
+        "meal plan", "nutrition", "diet", "meal", "food plan", "eating plan", "calories", "macros",
+        "micronutrients"
+    ),
+    "workout": (
+        "workout", "training", "lifting", "exercise plan", "fitness plan", "strength training", "cardio",
+        "conditioning"
+    ),
+    "lesson_plan": (
+        "lesson plan", "teach", "unit plan", "curriculum", "lesson", "teaching plan", "class plan"
+    ),
+    "widget": (
+        "attendance", "teams", "adaptive", "analytics", "skill", "video",
+        "schedule", "tracking", "progress", "heart rate", "challenge",
+        "fitness goal", "export", "safety report", "widget", "capabilities",
+        "what can you do", "features", "tools"
+    ),
+    # allergy_detection.detect_allergy_answer
+    "allergy_keyword": (
+        "allerg", "allergic", "dietary", "restriction", "avoid",
+        "tree nuts", "tree nut", "peanuts", "peanut", "shellfish",
+        "dairy", "eggs", "soy", "wheat", "gluten",
+        "fish", "sesame", "milk", "lactose", "celiac",
+        "nuts", "nut", "intolerant", "intolerance"
+    ),
+    "allergy_phrase": (
+        "i am allergic", "i'm allergic", "i have an allergy", "i have allergies",
+        "allergic to", "allergy to", "i avoid", "i can't eat", "i cannot eat",
+        "no allergies", "no allerg", "not allergic", "no restrictions",
+        "student is allergic", "he is allergic", "she is allergic", "they are allergic",
+        "the student is allergic", "the student has an allergy", "student has allergies",
+        "is allergic to", "has an allergy", "has allergies"
+    ),
+    # guest_chat request routing (before the model call)
+    "chat_health": (
+        "meal plan", "meal planning", "nutrition", "diet", "diet plan", "calorie", "calories", "protein",
+        "carb", "macros", "meal prep", "eating plan", "food plan", "nutrition plan", "wrestler",
+        "weight loss", "weight gain", "cutting", "bulking", "meal", "breakfast", "lunch", "dinner",
+        "snack", "nutritional"
+    ),
+    "chat_lesson": (
+        "lesson plan", "lesson planning", "curriculum", "teaching", "class", "student", "grade",
+        "learning objective", "education", "pedagogy", "instruction", "teaching plan"
+    ),
+    # guest_chat widget detection (after the model call)
+    "widget_health": (
+        "meal plan", "meal planning", "nutrition plan", "nutrition planning", "nutrition", "diet",
+        "diet plan", "calorie", "calories", "protein", "carb", "macros", "meal prep", "eating plan",
+        "food plan", "wrestler", "weight loss plan", "weight loss", "weight gain plan", "weight gain",
+        "cutting plan", "cutting", "bulking plan", "bulking", "meal", "breakfast", "lunch", "dinner",
+        "snack", "nutritional"
+    ),
+    "widget_fitness": (
+        "workout", "exercise", "fitness", "chest", "training", "routine", "muscle", "strength", "cardio",
+        "gym", "weight", "lifting", "squat", "bench", "deadlift"
+    ),
+    "response_health": (
+        "meal", "nutrition", "diet", "calorie", "protein", "carb", "macro", "breakfast", "lunch", "dinner"
+    ),
+    "response_lesson": (
+        "lesson plan", "learning objective", "students will", "grade level", "curriculum"
+    ),
+    "response_fitness": (
+        "exercise", "workout", "sets", "reps", "push", "pull", "squat", "bench", "deadlift"
+    ),
+}
+
+
+# Tables checked against model output (guest_chat widget detection)
+RESPONSE_TABLES: Tuple[str, ...] = ("response_health", "response_lesson", "response_fitness")
+
+
+class KeywordMatch(NamedTuple):
+    """A keyword occurrence in the scanned text."""
+    keyword: str
+    start: int
+    end: int
+    tables: Tuple[str, ...]
+
+
+def _trie_pattern(node: Dict[str, dict]) -> str:
+    """Render a character trie as a regex that matches the longest keyword."""
+    branches = [
+        re.escape(char) + _trie_pattern(child)
+        for char, child in sorted(node.items())
+        if char != ""
+    ]
+    if not branches:
+        return ""
+    pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        # Keyword ends here; longer continuations are optional (greedy)
+        if len(branches) == 1:
+            pattern = "(?:" + pattern + ")"
+        pattern += "?"
+    return pattern
+
+
+class KeywordMatcher:
+    """Multi-table keyword matcher compiled once into a single regex."""
+
+    def __init__(self, tables: Dict[str, Iterable[str]]):
+        keyword_tables: Dict[str, List[str]] = {}
+        for table, keywords in tables.items():
+            for keyword in keywords:
+                keyword_tables.setdefault(keyword.lower(), []).append(table)
+
+        self.tables = {table: tuple(keywords) for table, keywords in tables.items()}
+        self._keyword_tables = {keyword: tuple(names) for keyword, names in keyword_tables.items()}
+
+        trie: Dict[str, dict] = {}
+        for keyword in self._keyword_tables:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        self._pattern = re.compile("(?=(" + _trie_pattern(trie) + "))")
+
+        # Every keyword that is a prefix of a longer one matches at the same position
+        self._prefix_keywords = {
+            keyword: tuple(
+                prefix for prefix in self._keyword_tables
+                if keyword.startswith(prefix)
+            )
+            for keyword in self._keyword_tables
+        }
+        self._matched_tables = {
+            keyword: frozenset(
+                table
+                for prefix in prefixes
+                for table in self._keyword_tables[prefix]
+            )
+            for keyword, prefixes in self._prefix_keywords.items()
+        }
+
+    def matching_tables(self, text: str) -> FrozenSet[str]:
+        """Return the names of all tables with a keyword in ``text``.
+
+        Fast path for routing decisions that do not need match positions.
+        """
+        tables: FrozenSet[str] = frozenset()
+        for keyword in set(self._pattern.findall((text or "").lower())):
+            tables |= self._matched_tables[keyword]
+        return tables
+
+    def scan(self, text: str) -> List[KeywordMatch]:
+        """Return every keyword occurrence in ``text`` (case-insensitive)."""
+        matches = []
+        for found in self._pattern.finditer((text or "").lower()):
+            start = found.start()
+            for keyword in self._prefix_keywords[found.group(1)]:
+                matches.append(KeywordMatch(
+                    keyword,
+                    start,
+                    start + len(keyword),
+                    self._keyword_tables[keyword]
+                ))
+        return matches
+
+    def match_tables(self, text: str, tables: Optional[Iterable[str]] = None) -> Dict[str, List[KeywordMatch]]:
+        """Group the matches of ``text`` by table, optionally restricted to ``tables``."""
+        wanted = set(tables) if tables is not None else None
+        grouped: Dict[str, List[KeywordMatch]] = {}
+        for match in self.scan(text):
+            for table in match.tables:
+                if wanted is None or table in wanted:
+                    grouped.setdefault(table, []).append(match)
+        return grouped
+
+
+intent_matcher = KeywordMatcher(KEYWORD_TABLES)
+
+
+def match_keyword_tables(text: str) -> Dict[str, List[KeywordMatch]]:
+    """Match ``text`` against all keyword tables in one pass."""
+    return intent_matcher.match_tables(text)
+
+
+def matching_tables(text: str) -> FrozenSet[str]:
+    """Names of all keyword tables matched by ``text``, in one pass."""
+    return intent_matcher.matching_tables(text)
+
+
+def match_response_tables(text: str, tables: Iterable[str] = RESPONSE_TABLES) -> FrozenSet[str]:
+    """Names of ``tables`` with a keyword in ``text``, one substring search per keyword.
+
+    Meant for long texts checked against a few small tables, where the
+    short-circuiting per-table checks beat a full scan of the combined matcher.
+    """
+    lower = (text or "").lower()
+    return frozenset(
+        table for table in tables
+        if any(keyword in lower for keyword in KEYWORD_TABLES[table])
+    )
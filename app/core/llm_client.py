@@ -0,0 +1,365 @@
+"""
+Shared LLM Client Layer
+Process-wide OpenAI clients with pooled keep-alive connections, per-model
+concurrency limits, timeouts and retry budgets.
+
+Every chat endpoint and AI service should obtain its client from here instead
+of constructing ``OpenAI(...)`` per request, so TLS connections are reused and
+a local stub server (``OPENAI_BASE_URL``) can stand in for the provider.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class _LimitedAsyncStream:
+    """Async stream that holds its concurrency permit until exhausted or closed."""
+
+    def __init__(self, stream: Any, release: Callable[[Optional[BaseException]], None]):
+        self._stream = stream
+        self._release = release
+        self._released = False
+
+    def _finish(self, error: Optional[BaseException] = None):
+        if not self._released:
+            self._released = True
+            self._release(error)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Any:
+        try:
+            return await self._stream.__anext__()
+        except StopAsyncIteration:
+            self._finish()
+            raise
+        except BaseException as e:
+            self._finish(e)
+            raise
+
+    async def close(self):
+        try:
+            await self._stream.close()
+        finally:
+            self._finish()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+    def __del__(self):
+        # Abandoned without being drained or closed: give the permit back.
+        self._finish()
+
+
+class _LimitedStream:
+    """Sync stream that holds its concurrency permit until exhausted or closed."""
+
+    def __init__(self, stream: Any, release: Callable[[Optional[BaseException]], None]):
+        self._stream = stream
+        self._release = release
+        self._released = False
+
+    def _finish(self, error: Optional[BaseException] = None):
+        if not self._released:
+            self._released = True
+            self._release(error)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> Any:
+        try:
+            return next(self._stream)
+        except StopIteration:
+            self._finish()
+            raise
+        except BaseException as e:
+            self._finish(e)
+            raise
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            self._finish()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+    def __del__(self):
+        self._finish()
+
+
+class LLMClientPool:
+    """Owns the shared sync/async OpenAI clients and their connection pools."""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        timeout: float = 60.0,
+        max_retries: int = 2,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        default_concurrency: int = 16,
+        model_concurrency: Optional[Dict[str, int]] = None
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self.default_concurrency = default_concurrency
+        self.model_concurrency = dict(model_concurrency or {})
+
+        self._async_client: Optional[AsyncOpenAI] = None
+        self._sync_client: Optional[OpenAI] = None
+        # asyncio primitives are bound to the loop they are first used on, so
+        # the async limits are kept per event loop.
+        self._async_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._sync_limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """Shared AsyncOpenAI client backed by a pooled keep-alive transport."""
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    self._async_client = AsyncOpenAI(
+                        api_key=self.api_key,
+                        base_url=self.base_url,
+                        timeout=self.timeout,
+                        max_retries=self.max_retries,
+                        http_client=httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+                    )
+        return self._async_client
+
+    @property
+    def sync_client(self) -> OpenAI:
+        """Shared OpenAI client for synchronous services (e.g. widget services)."""
+        if self._sync_client is None:
+            with self._lock:
+                if self._sync_client is None:
+                    self._sync_client = OpenAI(
+                        api_key=self.api_key,
+                        base_url=self.base_url,
+                        timeout=self.timeout,
+                        max_retries=self.max_retries,
+                        http_client=httpx.Client(limits=self.limits, timeout=self.timeout)
+                    )
+        return self._sync_client
+
+    def _limit_for(self, model: str) -> int:
+        return self.model_concurrency.get(model, self.default_concurrency)
+
+    def _async_limit(self, model: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            limits = self._async_limits.get(loop)
+            if limits is None:
+                limits = {}
+                self._async_limits[loop] = limits
+            semaphore = limits.get(model)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self._limit_for(model))
+                limits[model] = semaphore
+        return semaphore
+
+    def _sync_limit(self, model: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            semaphore = self._sync_limits.get(model)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self._limit_for(model))
+                self._sync_limits[model] = semaphore
+        return semaphore
+
+    def _model_stats(self, model: str) -> Dict[str, Any]:
+        return self._stats.setdefault(model, {
+            "requests": 0,
+            "errors": 0,
+            "in_flight": 0,
+            "total_latency": 0.0
+        })
+
+    def _record(self, model: str, started: float, error: Optional[BaseException] = None):
+        stats = self._model_stats(model)
+        stats["requests"] += 1
+        stats["total_latency"] += time.perf_counter() - started
+        if error is not None:
+            stats["errors"] += 1
+
+    def _releaser(self, model: str, release_permit: Callable[[], None]) -> Callable[[Optional[BaseException]], None]:
+        """Start accounting a call and return the callback that ends it.
+
+        Streaming responses keep their permit until the stream is drained or
+        closed, so the callback is handed to the stream wrapper in that case.
+        """
+        started = time.perf_counter()
+        self._model_stats(model)["in_flight"] += 1
+
+        def release(error: Optional[BaseException]):
+            self._model_stats(model)["in_flight"] -= 1
+            self._record(model, started, error)
+            release_permit()
+
+        return release
+
+    async def chat_completion(
+        self,
+        model: str,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        **params: Any
+    ) -> Any:
+        """Create a chat completion on the shared async client.
+
+        Waits for a per-model concurrency slot; ``timeout`` and ``max_retries``
+        override the pool defaults for this call only. With ``stream=True`` the
+        slot is held until the returned stream is exhausted or closed.
+        """
+        client = self.async_client
+        if timeout is not None or max_retries is not None:
+            client = client.with_options(
+                timeout=timeout if timeout is not None else self.timeout,
+                max_retries=max_retries if max_retries is not None else self.max_retries
+            )
+
+        semaphore = self._async_limit(model)
+        await semaphore.acquire()
+        release = self._releaser(model, semaphore.release)
+        try:
+            response = await client.chat.completions.create(model=model, **params)
+        except BaseException as e:
+            release(e)
+            raise
+        if params.get("stream"):
+            return _LimitedAsyncStream(response, release)
+        release(None)
+        return response
+
+    def chat_completion_sync(
+        self,
+        model: str,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        **params: Any
+    ) -> Any:
+        """Synchronous counterpart of ``chat_completion`` for threaded callers."""
+        client = self.sync_client
+        if timeout is not None or max_retries is not None:
+            client = client.with_options(
+                timeout=timeout if timeout is not None else self.timeout,
+                max_retries=max_retries if max_retries is not None else self.max_retries
+            )
+
+        semaphore = self._sync_limit(model)
+        semaphore.acquire()
+        release = self._releaser(model, semaphore.release)
+        try:
+            response = client.chat.completions.create(model=model, **params)
+        except BaseException as e:
+            release(e)
+            raise
+        if params.get("stream"):
+            return _LimitedStream(response, release)
+        release(None)
+        return response
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-model request counts, errors, in-flight calls and latency."""
+        return {
+            "base_url": self.base_url,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "models": {
+                model: {
+                    **stats,
+                    "concurrency_limit": self._limit_for(model),
+                    "avg_latency": stats["total_latency"] / stats["requests"] if stats["requests"] else 0.0
+                }
+                for model, stats in self._stats.items()
+            }
+        }
+
+    async def aclose(self):
+        """Close pooled connections of both clients."""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
+        self._async_limits.clear()
+
+
+_llm_client_pool: Optional[LLMClientPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_llm_client_pool() -> LLMClientPool:
+    """Get the process-wide LLM client pool, creating it from settings."""
+    global _llm_client_pool
+    if _llm_client_pool is None:
+        with _pool_lock:
+            if _llm_client_pool is None:
+                settings = get_settings()
+                _llm_client_pool = LLMClientPool(
+                    api_key=settings.OPENAI_API_KEY,
+                    base_url=settings.OPENAI_BASE_URL,
+                    timeout=settings.OPENAI_TIMEOUT,
+                    max_retries=settings.OPENAI_MAX_RETRIES,
+                    max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                    default_concurrency=settings.OPENAI_MODEL_CONCURRENCY
+                )
+    return _llm_client_pool
+
+
+def get_async_openai_client() -> AsyncOpenAI:
+    """Shortcut for the shared AsyncOpenAI client."""
+    return get_llm_client_pool().async_client
+
+
+def get_openai_client() -> OpenAI:
+    """Shortcut for the shared synchronous OpenAI client."""
+    return get_llm_client_pool().sync_client
+
+
+async def close_llm_client_pool():
+    """Close the shared pool on application shutdown."""
+    global _llm_client_pool
+    if _llm_client_pool is not None:
+        await _llm_client_pool.aclose()
+        _llm_client_pool = None
+        logger.info("LLM client pool closed")
@@ -0,0 +1,179 @@
+"""
+Queue-Based Logging
+Moves log formatting and I/O off the event loop thread.
+
+``setup_logging`` installs a ``BoundedQueueHandler`` on the root logger. It
+renders each record's message (``msg % args``) and copies it onto a bounded
+queue, so later changes to the arguments cannot alter what gets logged. A
+``QueueListener`` thread formats the records (JSON included) and hands them to
+the real console and file handlers.
+
+``SamplingFilter`` runs on the calling thread before anything is queued. It
+samples DEBUG records and rate-limits chatty DEBUG/INFO call sites with a
+token bucket per source line, so one hot loop cannot flood the queue.
+WARNING and above, and records from the audit and security loggers, always
+pass.
+
+Queue depth and dropped records (sampled, rate limited, queue full) are
+exported as Prometheus metrics.
+"""
+
+import copy
+import logging
+import logging.handlers
+import queue
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from prometheus_client import Counter, Gauge
+
+try:
+    LOG_QUEUE_DEPTH = Gauge(
+        'faraday_log_queue_depth',
+        'Log records waiting for the logging writer thread'
+    )
+    LOG_RECORDS_DROPPED = Counter(
+        'faraday_log_records_dropped_total',
+        'Log records discarded before reaching a handler',
+        ['reason']
+    )
+except ValueError:
+    # Metrics already registered (module re-imported in tests)
+    from prometheus_client import REGISTRY
+    LOG_QUEUE_DEPTH = REGISTRY._names_to_collectors['faraday_log_queue_depth']
+    LOG_RECORDS_DROPPED = REGISTRY._names_to_collectors['faraday_log_records_dropped_total']
+
+
+DEFAULT_EXEMPT_LOGGERS = ("audit", "security")
+
+
+class SamplingFilter(logging.Filter):
+    """Samples DEBUG records and rate-limits DEBUG/INFO records per call site.
+
+    Records from ``exempt_loggers`` (and their children) are never dropped.
+    """
+
+    def __init__(
+        self,
+        debug_sample_rate: float = 1.0,
+        site_rate: Optional[float] = None,
+        site_burst: Optional[float] = None,
+        exempt_loggers: Sequence[str] = DEFAULT_EXEMPT_LOGGERS,
+        clock=time.monotonic
+    ):
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+        self.site_rate = site_rate
+        self.site_burst = site_burst if site_burst is not None else site_rate
+        self.exempt_loggers = tuple(exempt_loggers)
+        self._exempt_prefixes = tuple(f"{name}." for name in self.exempt_loggers)
+        self._clock = clock
+        # (pathname, lineno) -> (tokens, last refill)
+        self._buckets: Dict[Tuple[str, int], Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self.dropped = {"sampled": 0, "rate_limited": 0}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        if record.name in self.exempt_loggers or record.name.startswith(self._exempt_prefixes):
+            return True
+        if record.levelno <= logging.DEBUG and self.debug_sample_rate < 1.0:
+            if random.random() >= self.debug_sample_rate:
+                self._drop("sampled")
+                return False
+        if self.site_rate and not self._take((record.pathname, record.lineno)):
+            self._drop("rate_limited")
+            return False
+        return True
+
+    def _take(self, site: Tuple[str, int]) -> bool:
+        now = self._clock()
+        with self._lock:
+            tokens, last = self._buckets.get(site, (self.site_burst, now))
+            tokens = min(self.site_burst, tokens + (now - last) * self.site_rate)
+            allowed = tokens >= 1.0
+            self._buckets[site] = (tokens - 1.0 if allowed else tokens, now)
+        return allowed
+
+    def _drop(self, reason: str):
+        self.dropped[reason] += 1
+        LOG_RECORDS_DROPPED.labels(reason=reason).inc()
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """``QueueHandler`` that drops (and counts) records when the queue is full.
+
+    The message is rendered before the record is queued; formatting and any
+    JSON are left to the listener thread.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # A shallow copy keeps later handlers on this thread from seeing our edits;
+        # tracebacks are rendered now because the frames may be gone by the time
+        # the listener runs
+        record = copy.copy(record)
+        # Render now: the arguments may be mutated (or gone) by the time the listener runs
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            LOG_RECORDS_DROPPED.labels(reason="queue_full").inc()
+
+
+class DrainingQueueListener(logging.handlers.QueueListener):
+    """``QueueListener`` whose stop waits for room instead of failing on a full queue."""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class QueueLogging:
+    """The queue handler and listener thread installed by ``setup_logging``."""
+
+    def __init__(
+        self,
+        handlers: Sequence[logging.Handler],
+        maxsize: int = 10000,
+        sampling: Optional[SamplingFilter] = None
+    ):
+        self.queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self.handler = BoundedQueueHandler(self.queue)
+        if sampling is not None:
+            self.handler.addFilter(sampling)
+        self.sampling = sampling
+        self.handlers: List[logging.Handler] = list(handlers)
+        self.listener = DrainingQueueListener(self.queue, *self.handlers, respect_handler_level=True)
+        LOG_QUEUE_DEPTH.set_function(self.queue.qsize)
+
+    def start(self):
+        self.listener.start()
+
+    def stop(self):
+        """Write every queued record, then stop the listener thread."""
+        if self.listener._thread is not None:
+            self.listener.stop()
+        for handler in self.handlers:
+            handler.flush()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "pending": self.queue.qsize(),
+            "capacity": self.queue.maxsize,
+            "dropped_queue_full": self.handler.dropped,
+            **({f"dropped_{k}": v for k, v in self.sampling.dropped.items()} if self.sampling else {})
+        }
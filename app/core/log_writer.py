@@ -0,0 +1,260 @@
+"""
+Batched Log Writer
+Persists activity, audit, performance and security log rows off the request
+path.
+
+Callers ``submit`` a row and return immediately. A background thread drains
+the bounded queue and writes each batch with one multi-row INSERT per table
+and a single commit, flushing when ``batch_size`` rows are waiting or
+``flush_interval`` seconds have passed. If that commit fails, each table is
+retried on its own and a table that still fails is written row by row, so
+only the offending rows are dropped (and logged). When the queue is full new
+rows are dropped and counted rather than blocking the caller. ``stop`` drains what is
+left and is called on application shutdown.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from prometheus_client import Counter, Gauge
+from sqlalchemy import insert
+
+logger = logging.getLogger(__name__)
+
+try:
+    LOG_WRITER_EVENTS = Counter(
+        'faraday_log_writer_events_total',
+        'Log rows handled by the batched writer',
+        ['table', 'outcome']
+    )
+    LOG_WRITER_PENDING = Gauge(
+        'faraday_log_writer_pending',
+        'Log rows waiting in the batched writer queue'
+    )
+except ValueError:
+    # Metrics already registered (module re-imported in tests)
+    from prometheus_client import REGISTRY
+    LOG_WRITER_EVENTS = REGISTRY._names_to_collectors['faraday_log_writer_events_total']
+    LOG_WRITER_PENDING = REGISTRY._names_to_collectors['faraday_log_writer_pending']
+
+
+def _default_session_factory():
+    from app.core.database import get_session_factory
+    return get_session_factory()()
+
+
+class BatchedLogWriter:
+    """Bounded queue of log rows flushed to the database by one worker thread."""
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Any]] = None,
+        maxsize: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0
+    ):
+        self.session_factory = session_factory or _default_session_factory
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Tuple[Type, Dict[str, Any]]]" = queue.Queue(maxsize=maxsize)
+        self._worker: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        # Guards ``stats``; submit runs on request threads while the worker writes
+        self._stats_lock = threading.Lock()
+        self._last_drop_warning = 0.0
+        self.stats = {
+            "enqueued": 0,
+            "dropped": 0,
+            "written": 0,
+            "failed": 0,
+            "batches": 0,
+            "high_watermark": 0
+        }
+
+    def submit(self, model: Type, row: Dict[str, Any]) -> bool:
+        """Queue ``row`` for insertion into ``model``'s table; False if it was dropped."""
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((model, row))
+        except queue.Full:
+            with self._stats_lock:
+                self.stats["dropped"] += 1
+                dropped = self.stats["dropped"]
+                now = time.monotonic()
+                warn = now - self._last_drop_warning >= 1.0
+                if warn:
+                    self._last_drop_warning = now
+            LOG_WRITER_EVENTS.labels(table=model.__tablename__, outcome="dropped").inc()
+            if warn:
+                logger.warning(
+                    f"Log writer queue full ({self.maxsize}), dropping rows; "
+                    f"{dropped} dropped so far"
+                )
+            return False
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self.stats["enqueued"] += 1
+            if depth > self.stats["high_watermark"]:
+                self.stats["high_watermark"] = depth
+        LOG_WRITER_PENDING.set(depth)
+        return True
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._stop.clear()
+                self._worker = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._worker.start()
+
+    def _next_batch(self) -> List[Tuple[Type, Dict[str, Any]]]:
+        """Collect up to ``batch_size`` rows, waiting at most ``flush_interval`` after the first."""
+        try:
+            batch = [self._queue.get(timeout=1.0)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set() or not self._queue.empty():
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+                LOG_WRITER_PENDING.set(self._queue.qsize())
+
+    def _count(self, model: Type, outcome: str, rows: int):
+        with self._stats_lock:
+            self.stats[outcome] += rows
+        LOG_WRITER_EVENTS.labels(table=model.__tablename__, outcome=outcome).inc(rows)
+
+    def _insert(self, db: Any, model: Type, rows: List[Dict[str, Any]]) -> bool:
+        """INSERT ``rows`` into ``model``'s table and commit; rolls back and returns False on failure."""
+        try:
+            db.execute(insert(model), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            return False
+        return True
+
+    def _write_batch(self, batch: List[Tuple[Type, Dict[str, Any]]]):
+        """One multi-row INSERT per table and a single commit for the whole batch.
+
+        On failure each table is retried alone, then row by row, so one bad
+        row only costs itself.
+        """
+        by_model: Dict[Type, List[Dict[str, Any]]] = defaultdict(list)
+        for model, row in batch:
+            by_model[model].append(row)
+        db = self.session_factory()
+        try:
+            try:
+                for model, rows in by_model.items():
+                    db.execute(insert(model), rows)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Log writer batch of {len(batch)} rows failed, retrying per table: {e}")
+                for model, rows in by_model.items():
+                    self._write_table(db, model, rows)
+            else:
+                for model, rows in by_model.items():
+                    self._count(model, "written", len(rows))
+        finally:
+            db.close()
+        with self._stats_lock:
+            self.stats["batches"] += 1
+
+    def _write_table(self, db: Any, model: Type, rows: List[Dict[str, Any]]):
+        if self._insert(db, model, rows):
+            self._count(model, "written", len(rows))
+            return
+        written = 0
+        for row in rows:
+            if self._insert(db, model, [row]):
+                written += 1
+            else:
+                logger.error(f"Log writer dropped a {model.__tablename__} row that could not be written: {row!r}")
+        if written:
+            self._count(model, "written", written)
+        if written < len(rows):
+            self._count(model, "failed", len(rows) - written)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until queued rows are written (or failed); returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self._queue.unfinished_tasks
+
+    def stop(self, timeout: float = 5.0):
+        """Flush pending rows and stop the worker thread."""
+        if not self.flush(timeout):
+            logger.warning(f"Log writer stopped with {self._queue.qsize()} rows unwritten")
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join(timeout=timeout)
+            self._worker = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth, capacity and write/drop counters."""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {
+            **stats,
+            "pending": self._queue.qsize(),
+            "capacity": self.maxsize
+        }
+
+
+_writer: Optional[BatchedLogWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_log_writer() -> BatchedLogWriter:
+    """Get the process-wide writer, configured from settings."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                from app.core.config import get_settings
+                settings = get_settings()
+                _writer = BatchedLogWriter(
+                    maxsize=settings.LOG_WRITER_QUEUE_SIZE,
+                    batch_size=settings.LOG_WRITER_BATCH_SIZE,
+                    flush_interval=settings.LOG_WRITER_FLUSH_INTERVAL
+                )
+    return _writer
+
+
+def set_log_writer(writer: Optional[BatchedLogWriter]):
+    """Replace the process-wide writer (``None`` rebuilds it from settings)."""
+    global _writer
+    _writer = writer
+
+
+def shutdown_log_writer(timeout: float = 5.0):
+    """Write queued log rows and stop the worker (application shutdown)."""
+    if _writer is not None:
+        _writer.stop(timeout)
@@ -4,6 +4,7 @@ Logging Module
 This module provides comprehensive logging functionality for the Faraday AI Dashboard.
 """
 
+import atexit
 import logging
 import logging.handlers
 import json
@@ -27,6 +28,8 @@ from app.models.activity_adaptation.activity.activity_log import ActivityLog
 from app.models.audit_log import AuditLog
 from app.models.performance_log import PerformanceLog
 from app.models.security_log import SecurityLog
+from app.core.log_writer import get_log_writer
+from app.core.log_queue import QueueLogging, SamplingFilter
 
 # Log metrics
 LOG_COUNTER = Counter(
@@ -72,6 +75,15 @@ class ContextFilter(logging.Filter):
 class CustomJsonFormatter(jsonlogger.JsonFormatter):
     """Custom JSON formatter for structured logging."""
     
+    def format(self, record):
+        # Several file handlers share one formatter; serialize each record once
+        cached = record.__dict__.get('_json_cache')
+        if cached is not None and cached[0] is self:
+            return cached[1]
+        text = super().format(record)
+        record._json_cache = (self, text)
+        return text
+    
     def add_fields(self, log_record, record, message_dict):
         settings = get_settings()
         super(CustomJsonFormatter, self).add_fields(log_record, record, message_dict)
@@ -96,6 +108,8 @@ class CustomJsonFormatter(jsonlogger.JsonFormatter):
         if hasattr(record, 'security_context'):
             log_record['security_context'] = record.security_context
 
+_queue_logging: Optional[QueueLogging] = None
+
 def setup_logging():
     """Set up logging configuration."""
     settings = get_settings()
@@ -115,13 +129,15 @@ def setup_logging():
         for handler in root_logger.handlers[:]:
             root_logger.removeHandler(handler)
     
+    handlers: List[logging.Handler] = []
+    
     # Console handler - always add in non-test mode, or if no handlers exist in test mode
     if not is_test_mode or len(root_logger.handlers) == 0:
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(settings.LOG_LEVEL)
         console_formatter = logging.Formatter(settings.LOG_FORMAT)
         console_handler.setFormatter(console_formatter)
-        root_logger.addHandler(console_handler)
+        handlers.append(console_handler)
     
     # File handler with rotation
     file_handler = logging.handlers.RotatingFileHandler(
@@ -133,7 +149,7 @@ def setup_logging():
     file_handler.setLevel(settings.LOG_LEVEL)
     file_formatter = CustomJsonFormatter()
     file_handler.setFormatter(file_formatter)
-    root_logger.addHandler(file_handler)
+    handlers.append(file_handler)
     
     # Error file handler
     error_handler = logging.handlers.RotatingFileHandler(
@@ -144,7 +160,7 @@ def setup_logging():
     )
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(file_formatter)
-    root_logger.addHandler(error_handler)
+    handlers.append(error_handler)
     
     # Performance log handler
     performance_handler = logging.handlers.RotatingFileHandler(
@@ -155,7 +171,7 @@ def setup_logging():
     )
     performance_handler.setLevel(logging.INFO)
     performance_handler.setFormatter(file_formatter)
-    root_logger.addHandler(performance_handler)
+    handlers.append(performance_handler)
     
     # Security log handler
     security_handler = logging.handlers.RotatingFileHandler(
@@ -166,7 +182,7 @@ def setup_logging():
     )
     security_handler.setLevel(logging.INFO)
     security_handler.setFormatter(file_formatter)
-    root_logger.addHandler(security_handler)
+    handlers.append(security_handler)
     
     # Audit log handler
     audit_handler = logging.handlers.RotatingFileHandler(
@@ -177,7 +193,27 @@ def setup_logging():
     )
     audit_handler.setLevel(logging.INFO)
     audit_handler.setFormatter(file_formatter)
-    root_logger.addHandler(audit_handler)
+    handlers.append(audit_handler)
+    
+    # Formatting and file I/O run on a writer thread behind a bounded queue
+    global _queue_logging
+    if _queue_logging is not None:
+        root_logger.removeHandler(_queue_logging.handler)
+        _queue_logging.stop()
+        _queue_logging = None
+    if settings.LOG_QUEUE_ENABLED:
+        sampling = SamplingFilter(
+            debug_sample_rate=settings.LOG_DEBUG_SAMPLE_RATE,
+            site_rate=settings.LOG_SITE_RATE_LIMIT or None,
+            site_burst=settings.LOG_SITE_BURST or None,
+            exempt_loggers=settings.LOG_SAMPLING_EXEMPT_LOGGERS
+        )
+        _queue_logging = QueueLogging(handlers, maxsize=settings.LOG_QUEUE_SIZE, sampling=sampling)
+        _queue_logging.start()
+        root_logger.addHandler(_queue_logging.handler)
+    else:
+        for handler in handlers:
+            root_logger.addHandler(handler)
     
     # Add context filter
     context_filter = ContextFilter()
@@ -202,6 +238,8 @@ def setup_logging():
 
 # Initialize logging
 logger = setup_logging()
+# Runs before logging's own atexit hook closes the handlers
+atexit.register(lambda: shutdown_logging())
 
 class LogContext:
     """Context manager for logging with context."""
@@ -250,6 +288,13 @@ class LogContext:
         for key, value in self.old_context.items():
             setattr(logging.getLogger(), key, value)
 
+def _as_int(value: Any) -> Optional[int]:
+    """Integer foreign keys from ids that callers often pass as strings."""
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
 async def log_activity(
     db: Session,
     action: str,
@@ -259,12 +304,15 @@ async def log_activity(
     user_id: Optional[str] = None,
     org_id: Optional[str] = None,
     request_id: Optional[str] = None
-) -> ActivityLog:
+) -> bool:
     """
     Log an activity in the system.
 
+    The row is queued on the batched log writer and persisted in the
+    background, so the caller never waits on a commit.
+
     Args:
-        db: Database session
+        db: Database session (kept for compatibility; the writer uses its own)
         action: The action being performed (e.g., "create", "update", "delete")
         resource_type: Type of resource being acted upon
         resource_id: ID of the resource
@@ -274,51 +322,35 @@ async def log_activity(
         request_id: Optional ID of the request
 
     Returns:
-        ActivityLog: The created activity log entry
+        bool: True if the entry was queued, False if the writer dropped it
     """
     with LogContext(request_id, user_id, org_id):
         with LOG_LATENCY.labels(level='info', module='activity').time():
-            try:
-                # Create activity log entry
-                log_entry = ActivityLog(
-                    action=action,
-                    resource_type=resource_type,
-                    resource_id=resource_id,
-                    details=details or {},
-                    user_id=user_id,
-                    org_id=org_id,
-                    timestamp=datetime.utcnow()
-                )
-                
-                # Add to database
-                db.add(log_entry)
-                db.commit()
-                db.refresh(log_entry)
-                
-                # Log to file
-                logger.info(
-                    f"Activity logged: {action} on {resource_type} {resource_id}",
-                    extra={
-                        'activity_log_id': log_entry.id,
-                        'action': action,
-                        'resource_type': resource_type,
-                        'resource_id': resource_id,
-                        'details': details
-                    }
-                )
-                
-                return log_entry
-            except Exception as e:
-                logger.error(
-                    f"Failed to log activity: {str(e)}",
-                    exc_info=True,
-                    extra={
-                        'action': action,
-                        'resource_type': resource_type,
-                        'resource_id': resource_id
-                    }
-                )
-                raise
+            now = datetime.utcnow()
+            queued = get_log_writer().submit(ActivityLog, {
+                'action': action,
+                'resource_type': resource_type,
+                'resource_id': str(resource_id),
+                'details': details or {},
+                'user_id': _as_int(user_id),
+                'org_id': _as_int(org_id),
+                'timestamp': now,
+                'created_at': now,
+                'updated_at': now
+            })
+            
+            # Log to file
+            logger.info(
+                f"Activity logged: {action} on {resource_type} {resource_id}",
+                extra={
+                    'action': action,
+                    'resource_type': resource_type,
+                    'resource_id': resource_id,
+                    'details': details
+                }
+            )
+            
+            return queued
 
 async def log_performance(
     db: Session,
@@ -328,12 +360,15 @@ async def log_performance(
     user_id: Optional[str] = None,
     org_id: Optional[str] = None,
     request_id: Optional[str] = None
-) -> PerformanceLog:
+) -> bool:
     """
     Log performance metrics.
 
+    The row is queued on the batched log writer and persisted in the
+    background.
+
     Args:
-        db: Database session
+        db: Database session (kept for compatibility; the writer uses its own)
         operation: The operation being performed
         duration: Duration of the operation in seconds
         metrics: Additional performance metrics
@@ -342,48 +377,31 @@ async def log_performance(
         request_id: Optional ID of the request
 
     Returns:
-        PerformanceLog: The created performance log entry
+        bool: True if the entry was queued, False if the writer dropped it
     """
     with LogContext(request_id, user_id, org_id, performance_metrics=metrics):
         with LOG_LATENCY.labels(level='info', module='performance').time():
-            try:
-                # Create performance log entry
-                log_entry = PerformanceLog(
-                    operation=operation,
-                    duration=duration,
-                    metrics=metrics,
-                    user_id=user_id,
-                    org_id=org_id,
-                    timestamp=datetime.utcnow()
-                )
-                
-                # Add to database
-                db.add(log_entry)
-                db.commit()
-                db.refresh(log_entry)
-                
-                # Log to file
-                logger.info(
-                    f"Performance logged: {operation} took {duration:.2f}s",
-                    extra={
-                        'performance_log_id': log_entry.id,
-                        'operation': operation,
-                        'duration': duration,
-                        'metrics': metrics
-                    }
-                )
-                
-                return log_entry
-            except Exception as e:
-                logger.error(
-                    f"Failed to log performance: {str(e)}",
-                    exc_info=True,
-                    extra={
-                        'operation': operation,
-                        'duration': duration
-                    }
-                )
-                raise
+            queued = get_log_writer().submit(PerformanceLog, {
+                'component': metrics.get('component', 'app'),
+                'operation': operation,
+                'duration': duration,
+                'status': metrics.get('status', 'SUCCESS'),
+                'error_message': metrics.get('error'),
+                'performance_metadata': {**metrics, 'user_id': user_id, 'org_id': org_id},
+                'created_at': datetime.utcnow()
+            })
+            
+            # Log to file
+            logger.info(
+                f"Performance logged: {operation} took {duration:.2f}s",
+                extra={
+                    'operation': operation,
+                    'duration': duration,
+                    'metrics': metrics
+                }
+            )
+            
+            return queued
 
 async def log_security(
     db: Session,
@@ -393,12 +411,15 @@ async def log_security(
     user_id: Optional[str] = None,
     org_id: Optional[str] = None,
     request_id: Optional[str] = None
-) -> SecurityLog:
+) -> bool:
     """
     Log security events.
 
+    The row is queued on the batched log writer and persisted in the
+    background.
+
     Args:
-        db: Database session
+        db: Database session (kept for compatibility; the writer uses its own)
         event_type: Type of security event
         severity: Severity level of the event
         details: Additional security event details
@@ -407,48 +428,31 @@ async def log_security(
         request_id: Optional ID of the request
 
     Returns:
-        SecurityLog: The created security log entry
+        bool: True if the entry was queued, False if the writer dropped it
     """
     with LogContext(request_id, user_id, org_id, security_context=details):
         with LOG_LATENCY.labels(level='info', module='security').time():
-            try:
-                # Create security log entry
-                log_entry = SecurityLog(
-                    event_type=event_type,
-                    severity=severity,
-                    details=details,
-                    user_id=user_id,
-                    org_id=org_id,
-                    timestamp=datetime.utcnow()
-                )
-                
-                # Add to database
-                db.add(log_entry)
-                db.commit()
-                db.refresh(log_entry)
-                
-                # Log to file
-                logger.info(
-                    f"Security event logged: {event_type} ({severity})",
-                    extra={
-                        'security_log_id': log_entry.id,
-                        'event_type': event_type,
-                        'severity': severity,
-                        'details': details
-                    }
-                )
-                
-                return log_entry
-            except Exception as e:
-                logger.error(
-                    f"Failed to log security event: {str(e)}",
-                    exc_info=True,
-                    extra={
-                        'event_type': event_type,
-                        'severity': severity
-                    }
-                )
-                raise
+            queued = get_log_writer().submit(SecurityLog, {
+                'event_type': event_type,
+                'severity': severity,
+                'source_ip': details.get('ip_address'),
+                'user_id': _as_int(user_id),
+                'description': details.get('description') or event_type,
+                'security_metadata': {**details, 'org_id': org_id},
+                'created_at': datetime.utcnow()
+            })
+            
+            # Log to file
+            logger.info(
+                f"Security event logged: {event_type} ({severity})",
+                extra={
+                    'event_type': event_type,
+                    'severity': severity,
+                    'details': details
+                }
+            )
+            
+            return queued
 
 async def log_audit(
     db: Session,
@@ -459,12 +463,15 @@ async def log_audit(
     user_id: Optional[str] = None,
     org_id: Optional[str] = None,
     request_id: Optional[str] = None
-) -> AuditLog:
+) -> bool:
     """
     Log audit events.
 
+    The row is queued on the batched log writer and persisted in the
+    background.
+
     Args:
-        db: Database session
+        db: Database session (kept for compatibility; the writer uses its own)
         action: The action being performed
         resource_type: Type of resource being acted upon
         resource_id: ID of the resource
@@ -474,51 +481,72 @@ async def log_audit(
         request_id: Optional ID of the request
 
     Returns:
-        AuditLog: The created audit log entry
+        bool: True if the entry was queued, False if the writer dropped it
     """
     with LogContext(request_id, user_id, org_id):
         with LOG_LATENCY.labels(level='info', module='audit').time():
-            try:
-                # Create audit log entry
-                log_entry = AuditLog(
-                    action=action,
-                    resource_type=resource_type,
-                    resource_id=resource_id,
-                    changes=changes,
-                    user_id=user_id,
-                    org_id=org_id,
-                    timestamp=datetime.utcnow()
-                )
-                
-                # Add to database
-                db.add(log_entry)
-                db.commit()
-                db.refresh(log_entry)
-                
-                # Log to file
-                logger.info(
-                    f"Audit event logged: {action} on {resource_type} {resource_id}",
-                    extra={
-                        'audit_log_id': log_entry.id,
-                        'action': action,
-                        'resource_type': resource_type,
-                        'resource_id': resource_id,
-                        'changes': changes
-                    }
-                )
-                
-                return log_entry
-            except Exception as e:
-                logger.error(
-                    f"Failed to log audit event: {str(e)}",
-                    exc_info=True,
-                    extra={
-                        'action': action,
-                        'resource_type': resource_type,
-                        'resource_id': resource_id
-                    }
-                )
-                raise
+            queued = queue_audit_event(
+                action=action,
+                resource_type=resource_type,
+                resource_id=resource_id,
+                details={'changes': changes, 'org_id': org_id, 'request_id': request_id},
+                user_id=user_id
+            )
+            
+            # Log to file
+            logger.info(
+                f"Audit event logged: {action} on {resource_type} {resource_id}",
+                extra={
+                    'action': action,
+                    'resource_type': resource_type,
+                    'resource_id': resource_id,
+                    'changes': changes
+                }
+            )
+            
+            return queued
+
+def queue_audit_event(
+    action: str,
+    resource_type: str,
+    resource_id: Optional[Any] = None,
+    details: Optional[Dict[str, Any]] = None,
+    user_id: Optional[Any] = None,
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None
+) -> bool:
+    """
+    Queue an audit log row without touching the request's session.
+
+    Args:
+        action: The action being performed
+        resource_type: Type of resource being acted upon
+        resource_id: Optional ID of the resource (stored when numeric)
+        details: Optional additional details
+        user_id: Optional ID of the user
+        ip_address: Optional client address
+        user_agent: Optional client user agent
+
+    Returns:
+        bool: True if the entry was queued, False if the writer dropped it
+    """
+    now = datetime.utcnow()
+    details = dict(details or {})
+    if resource_id is not None and _as_int(resource_id) is None:
+        details['resource_id'] = str(resource_id)
+    if user_id is not None and _as_int(user_id) is None:
+        details['user_id'] = str(user_id)
+    return get_log_writer().submit(AuditLog, {
+        'user_id': _as_int(user_id),
+        'action': action,
+        'resource_type': resource_type,
+        'resource_id': _as_int(resource_id),
+        'details': details,
+        'ip_address': ip_address,
+        'user_agent': user_agent,
+        'created_at': now,
+        'updated_at': now
+    })
 
 def log_error(
     error: Exception,
@@ -598,6 +626,15 @@ def log_debug(
                 extra={'debug_data': data} if data else None
             )
 
+def shutdown_logging() -> None:
+    """Write queued log records and stop the logging writer thread."""
+    if _queue_logging is not None:
+        _queue_logging.stop()
+
+def get_logging_stats() -> Dict[str, int]:
+    """Queue depth and dropped-record counts of the logging backend."""
+    return _queue_logging.get_stats() if _queue_logging is not None else {}
+
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger instance.
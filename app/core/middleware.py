@@ -2,6 +2,7 @@
 Middleware components for the Faraday AI application.
 """
 
+import math
 import time
 import uuid
 import json
@@ -22,13 +23,15 @@ from app.core.security import (
     CORS_ORIGINS,
     SECURITY_HEADERS,
     add_security_headers,
-    check_rate_limit,
     log_security_event,
     verify_token,
     get_current_user
 )
 from app.core.config import settings
 from app.core.cache import get_cache
+from app.core.rate_limit import RateLimitEngine, get_rate_limit_engine
+from app.core.asgi_pipeline import PipelineMiddleware, default_hooks
+from app.core.logging import queue_audit_event
 from app.core.monitoring import (
     REQUEST_COUNT,
     REQUEST_LATENCY,
@@ -129,11 +132,56 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         return response
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Middleware for rate limiting requests."""
+    """Middleware for rate limiting requests per client.
+    
+    Uses the shared sliding-window engine, so limits hold across workers when
+    RATELIMIT_STORAGE_URL points at Redis.
+    """
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        limit: Optional[int] = None,
+        window: Optional[int] = None,
+        engine: Optional[RateLimitEngine] = None,
+        exempt_paths: Optional[list] = None
+    ):
+        super().__init__(app)
+        self.limit = limit or settings.RATE_LIMIT_CALLS
+        self.window = window or settings.RATE_LIMIT_PERIOD
+        self.engine = engine
+        self.exempt_paths = tuple(exempt_paths if exempt_paths is not None else settings.RATE_LIMIT_EXEMPT_PATHS)
+    
+    @staticmethod
+    def client_key(request: Request) -> str:
+        """Identify the caller by authenticated user, falling back to the client address."""
+        user = getattr(request.state, "user", None)
+        user_id = getattr(user, "id", None) or (user.get("id") if isinstance(user, dict) else None)
+        if user_id is not None:
+            return f"user:{user_id}"
+        return f"ip:{request.client.host if request.client else 'unknown'}"
     
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        check_rate_limit(request)
-        return await call_next(request)
+        if request.url.path.startswith(self.exempt_paths):
+            return await call_next(request)
+        
+        engine = self.engine or get_rate_limit_engine()
+        result = await engine.hit(self.client_key(request), self.limit, self.window)
+        headers = {
+            "X-RateLimit-Limit": str(result.limit),
+            "X-RateLimit-Remaining": str(result.remaining)
+        }
+        if not result.allowed:
+            headers["Retry-After"] = str(math.ceil(result.retry_after))
+            return JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests"},
+                headers=headers
+            )
+        
+        response = await call_next(request)
+        response.headers.update(headers)
+        return response
 
 class RequestIDMiddleware(BaseHTTPMiddleware):
     """Middleware for adding request ID to requests and responses."""
@@ -200,7 +248,7 @@ class CachingMiddleware(BaseHTTPMiddleware):
         
         # Try to get from cache
         cache = get_cache()
-        cached_response = await cache.get(cache_key)
+        cached_response = await cache.aget(cache_key)
         
         if cached_response:
             CACHE_HITS.labels(endpoint=request.url.path).inc()
@@ -211,7 +259,7 @@ class CachingMiddleware(BaseHTTPMiddleware):
         
         # Cache response if successful
         if response.status_code == 200:
-            await cache.set(cache_key, response.body, expire=settings.CACHE_TTL)
+            await cache.aset(cache_key, response.body, ttl=settings.CACHE_TTL)
         
         return response
 
@@ -299,34 +347,22 @@ class AuditMiddleware(BaseHTTPMiddleware):
     """Middleware for audit logging."""
     
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Get user from request state
-        user = getattr(request.state, "user", None)
+        response = await call_next(request)
         
-        # Log request
-        await log_audit_event(
+        # One audit row per request, written in the background
+        user = getattr(request.state, "user", None)
+        queue_audit_event(
             action="request",
-            user_id=user.id if user else None,
             resource_type=request.url.path,
-            resource_id=None,
             details={
                 "method": request.method,
-                "headers": dict(request.headers),
-                "query_params": dict(request.query_params)
-            }
-        )
-        
-        response = await call_next(request)
-        
-        # Log response
-        await log_audit_event(
-            action="response",
-            user_id=user.id if user else None,
-            resource_type=request.url.path,
-            resource_id=None,
-            details={
+                "query_params": dict(request.query_params),
                 "status_code": response.status_code,
-                "headers": dict(response.headers)
-            }
+                "request_id": getattr(request.state, "request_id", None)
+            },
+            user_id=getattr(user, "id", None),
+            ip_address=request.client.host if request.client else None,
+            user_agent=request.headers.get("user-agent")
         )
         
         return response
@@ -362,7 +398,7 @@ class ServiceHealthMiddleware(BaseHTTPMiddleware):
             if service_id:
                 cache = get_cache()
                 health_key = f"service_health:{service_id}"
-                health_data = await cache.get(health_key)
+                health_data = await cache.aget(health_key)
                 
                 if health_data:
                     health_data = json.loads(health_data)
@@ -386,7 +422,7 @@ class DeploymentMiddleware(BaseHTTPMiddleware):
             if service_id:
                 cache = get_cache()
                 deploy_key = f"deployment:{service_id}"
-                deploy_data = await cache.get(deploy_key)
+                deploy_data = await cache.aget(deploy_key)
                 
                 if deploy_data:
                     deploy_data = json.loads(deploy_data)
@@ -410,7 +446,7 @@ class FeatureFlagMiddleware(BaseHTTPMiddleware):
             if user_id:
                 cache = get_cache()
                 flags_key = f"user_flags:{user_id}"
-                flags_data = await cache.get(flags_key)
+                flags_data = await cache.aget(flags_key)
                 
                 if flags_data:
                     flags_data = json.loads(flags_data)
@@ -430,7 +466,7 @@ class ABTestingMiddleware(BaseHTTPMiddleware):
             if user_id:
                 cache = get_cache()
                 tests_key = f"user_tests:{user_id}"
-                tests_data = await cache.get(tests_key)
+                tests_data = await cache.aget(tests_key)
                 
                 if tests_data:
                     tests_data = json.loads(tests_data)
@@ -473,7 +509,7 @@ class AlertMiddleware(BaseHTTPMiddleware):
             if service_id:
                 cache = get_cache()
                 alerts_key = f"service_alerts:{service_id}"
-                alerts_data = await cache.get(alerts_key)
+                alerts_data = await cache.aget(alerts_key)
                 
                 if alerts_data:
                     alerts_data = json.loads(alerts_data)
@@ -494,7 +530,7 @@ class CircuitBreakerMiddleware(BaseHTTPMiddleware):
             if service_id:
                 cache = get_cache()
                 breaker_key = f"circuit_breaker:{service_id}"
-                breaker_data = await cache.get(breaker_key)
+                breaker_data = await cache.aget(breaker_key)
                 
                 if breaker_data:
                     breaker_data = json.loads(breaker_data)
@@ -533,28 +569,13 @@ def setup_middleware(app: FastAPI) -> None:
         https_only=settings.SESSION_SECURE
     )
     
-    # Add custom middleware
-    app.add_middleware(RequestLoggingMiddleware)
-    app.add_middleware(ErrorHandlingMiddleware)
-    app.add_middleware(SecurityHeadersMiddleware)
-    app.add_middleware(RateLimitMiddleware)
-    app.add_middleware(RequestIDMiddleware)
-    app.add_middleware(TimingMiddleware)
-    app.add_middleware(AuthenticationMiddleware)
-    app.add_middleware(CachingMiddleware)
-    app.add_middleware(MonitoringMiddleware)
-    app.add_middleware(ValidationMiddleware)
-    app.add_middleware(AuditMiddleware)
-    app.add_middleware(PerformanceMiddleware)
-    
-    # Add new middleware
-    app.add_middleware(ServiceHealthMiddleware)
-    app.add_middleware(DeploymentMiddleware)
-    app.add_middleware(FeatureFlagMiddleware)
-    app.add_middleware(ABTestingMiddleware)
-    app.add_middleware(AnalyticsMiddleware)
-    app.add_middleware(AlertMiddleware)
-    app.add_middleware(CircuitBreakerMiddleware)
+    # Request id, timing, metrics, logging, security headers, circuit breaking,
+    # auth, rate limiting, feature flags and audit run as hooks of one ASGI layer
+    app.add_middleware(
+        PipelineMiddleware,
+        hooks=default_hooks(),
+        routes=settings.MIDDLEWARE_ROUTE_HOOKS
+    )
     
     # Log middleware setup
     logger.info("Middleware setup completed") 
\ No newline at end of file
@@ -3,6 +3,8 @@ Monitoring components for the Faraday AI application.
 """
 
 from prometheus_client import Counter, Histogram, Gauge, Summary
+import asyncio
+import json
 import time
 import logging
 from typing import Dict, Any, Optional, List
@@ -17,6 +19,7 @@ import redis
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.quantile_sketch import QuantileSketch
 
 logger = logging.getLogger(__name__)
 
@@ -311,23 +314,83 @@ class ErrorMonitor:
         recent_errors = len([ts for ts in self.error_timestamps if ts > one_minute_ago])
         return recent_errors / 60.0
 
+# Each worker publishes its latency sketches under this prefix; keys of
+# workers that stop publishing expire after the TTL
+LATENCY_SKETCH_KEY_PREFIX = "latency_sketches"
+LATENCY_SKETCH_TTL = 120  # seconds
+LATENCY_SKETCH_PUBLISH_INTERVAL = 15  # seconds
+
 class PerformanceMonitor:
-    def __init__(self):
-        """Initialize performance monitor."""
-        self.response_times: Dict[str, List[float]] = {}
+    def __init__(self, relative_accuracy: float = 0.01):
+        """Initialize performance monitor with one latency sketch per endpoint."""
+        self.relative_accuracy = relative_accuracy
+        self.response_times: Dict[str, QuantileSketch] = {}
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
 
     def track_response_time(self, endpoint: str, response_time: float):
         """Track response time."""
-        if endpoint not in self.response_times:
-            self.response_times[endpoint] = []
-        self.response_times[endpoint].append(response_time)
-        self._cleanup_old_metrics()
-
-    def _cleanup_old_metrics(self):
-        """Clean up old metrics."""
-        for endpoint in self.response_times:
-            if len(self.response_times[endpoint]) > 1000:
-                self.response_times[endpoint] = self.response_times[endpoint][-1000:]
+        sketch = self.response_times.get(endpoint)
+        if sketch is None:
+            sketch = self.response_times[endpoint] = QuantileSketch(self.relative_accuracy)
+        sketch.add(response_time)
+
+    def get_latency_percentiles(self, endpoint: Optional[str] = None) -> Dict[str, Any]:
+        """p50/p95/p99 for one endpoint, or across all endpoints when none is given."""
+        if endpoint is not None:
+            sketch = self.response_times.get(endpoint) or QuantileSketch(self.relative_accuracy)
+        else:
+            sketch = QuantileSketch(self.relative_accuracy)
+            for endpoint_sketch in self.response_times.values():
+                sketch.merge(endpoint_sketch)
+        return sketch.summary()
+
+    def export_sketches(self) -> Dict[str, Dict[str, Any]]:
+        """Serialized sketches, for merging into another worker's monitor."""
+        return {endpoint: sketch.to_dict() for endpoint, sketch in self.response_times.items()}
+
+    def merge_sketches(self, sketches: Dict[str, Dict[str, Any]]):
+        """Merge sketches exported by another worker."""
+        for endpoint, data in sketches.items():
+            incoming = QuantileSketch.from_dict(data)
+            if endpoint in self.response_times:
+                self.response_times[endpoint].merge(incoming)
+            else:
+                self.response_times[endpoint] = incoming
+
+    async def publish_sketches(self, client, ttl: int = LATENCY_SKETCH_TTL):
+        """Store this worker's sketches in Redis (async client) for cluster-wide percentiles."""
+        await client.set(
+            f"{LATENCY_SKETCH_KEY_PREFIX}:{self.worker_id}",
+            json.dumps(self.export_sketches()),
+            ex=ttl
+        )
+
+    async def get_cluster_latency_percentiles(self, client, endpoint: Optional[str] = None) -> Dict[str, Any]:
+        """Like ``get_latency_percentiles``, merged over every worker's published sketches.
+
+        This worker contributes its live sketches rather than its last published copy.
+        """
+        merged = PerformanceMonitor(self.relative_accuracy)
+        merged.merge_sketches(self.export_sketches())
+        own_key = f"{LATENCY_SKETCH_KEY_PREFIX}:{self.worker_id}"
+        async for key in client.scan_iter(match=f"{LATENCY_SKETCH_KEY_PREFIX}:*"):
+            if isinstance(key, bytes):
+                key = key.decode()
+            if key == own_key:
+                continue
+            payload = await client.get(key)
+            if payload:
+                merged.merge_sketches(json.loads(payload))
+        return merged.get_latency_percentiles(endpoint)
+
+    async def run_sketch_publisher(self, client, interval: float = LATENCY_SKETCH_PUBLISH_INTERVAL):
+        """Publish sketches every ``interval`` seconds until cancelled."""
+        while True:
+            try:
+                await self.publish_sketches(client)
+            except Exception as e:
+                logger.warning(f"Could not publish latency sketches: {str(e)}")
+            await asyncio.sleep(interval)
 
     def calculate_performance_score(self) -> float:
         """Calculate performance score."""
@@ -337,10 +400,9 @@ class PerformanceMonitor:
         total_score = 0
         count = 0
         
-        for endpoint, times in self.response_times.items():
-            if times:
-                avg_time = sum(times) / len(times)
-                score = 100.0 * (1.0 / (1.0 + avg_time))
+        for endpoint, sketch in self.response_times.items():
+            if sketch.count:
+                score = 100.0 * (1.0 / (1.0 + sketch.mean))
                 total_score += score
                 count += 1
         
@@ -5,22 +5,45 @@ Reduces token usage and improves response time by caching frequently accessed da
 
 import hashlib
 import logging
-from typing import Optional, Dict, Tuple
-from functools import lru_cache
-from datetime import datetime, timedelta
+from typing import Optional, Dict, Any
+from datetime import timedelta
 
-logger = logging.getLogger(__name__)
+from app.core.ttl_cache import TTLCache
 
-# In-memory cache (can be upgraded to Redis later)
-_intent_cache: Dict[str, Tuple[str, datetime]] = {}
-_prompt_cache: Dict[str, Tuple[str, datetime]] = {}
-_metadata_cache: Dict[str, Tuple[Dict, datetime]] = {}
+logger = logging.getLogger(__name__)
 
 # Cache TTL (time to live)
 INTENT_CACHE_TTL = timedelta(minutes=5)
 PROMPT_CACHE_TTL = timedelta(hours=1)
 METADATA_CACHE_TTL = timedelta(minutes=10)
 
+# Maximum entries per cache; least recently used entries are evicted beyond this
+INTENT_CACHE_MAX_ENTRIES = 10000
+PROMPT_CACHE_MAX_ENTRIES = 256
+METADATA_CACHE_MAX_ENTRIES = 2000
+
+# Interval of the background sweep that drops expired entries
+CACHE_SWEEP_INTERVAL = timedelta(minutes=1)
+
+# Bounded in-memory caches (can be upgraded to Redis later)
+_intent_cache = TTLCache(
+    maxsize=INTENT_CACHE_MAX_ENTRIES,
+    ttl=INTENT_CACHE_TTL.total_seconds(),
+    sweep_interval=CACHE_SWEEP_INTERVAL.total_seconds(),
+    name="intent_cache"
+)
+_prompt_cache = TTLCache(
+    maxsize=PROMPT_CACHE_MAX_ENTRIES,
+    ttl=PROMPT_CACHE_TTL.total_seconds(),
+    name="prompt_cache"
+)
+_metadata_cache = TTLCache(
+    maxsize=METADATA_CACHE_MAX_ENTRIES,
+    ttl=METADATA_CACHE_TTL.total_seconds(),
+    sweep_interval=CACHE_SWEEP_INTERVAL.total_seconds(),
+    name="metadata_cache"
+)
+
 
 def _cache_key(text: str, prefix: str = "") -> str:
     """Generate cache key from text."""
@@ -38,24 +61,16 @@ def get_cached_intent(user_message: str) -> Optional[str]:
     Returns:
         Cached intent or None if not found/expired
     """
-    cache_key = _cache_key(user_message, "intent")
-    
-    if cache_key in _intent_cache:
-        intent, cached_time = _intent_cache[cache_key]
-        if datetime.now() - cached_time < INTENT_CACHE_TTL:
-            logger.debug(f"✅ Cache hit for intent: {intent}")
-            return intent
-        else:
-            # Expired, remove from cache
-            del _intent_cache[cache_key]
-    
-    return None
+    intent = _intent_cache.get(_cache_key(user_message, "intent"))
+    if intent is not None:
+        logger.debug(f"✅ Cache hit for intent: {intent}")
+    return intent
 
 
 def cache_intent(user_message: str, intent: str):
     """Cache intent classification result."""
     cache_key = _cache_key(user_message, "intent")
-    _intent_cache[cache_key] = (intent, datetime.now())
+    _intent_cache.set(cache_key, intent)
     logger.debug(f"💾 Cached intent: {intent} for message: {user_message[:50]}...")
 
 
@@ -69,21 +84,15 @@ def get_cached_prompt(prompt_key: str) -> Optional[str]:
     Returns:
         Cached prompt content or None if not found/expired
     """
-    if prompt_key in _prompt_cache:
-        content, cached_time = _prompt_cache[prompt_key]
-        if datetime.now() - cached_time < PROMPT_CACHE_TTL:
-            logger.debug(f"✅ Cache hit for prompt: {prompt_key}")
-            return content
-        else:
-            # Expired, remove from cache
-            del _prompt_cache[prompt_key]
-    
-    return None
+    content = _prompt_cache.get(prompt_key)
+    if content is not None:
+        logger.debug(f"✅ Cache hit for prompt: {prompt_key}")
+    return content
 
 
 def cache_prompt(prompt_key: str, content: str):
     """Cache prompt content."""
-    _prompt_cache[prompt_key] = (content, datetime.now())
+    _prompt_cache.set(prompt_key, content)
     logger.debug(f"💾 Cached prompt: {prompt_key} ({len(content)} chars)")
 
 
@@ -97,38 +106,34 @@ def get_cached_metadata(metadata_key: str) -> Optional[Dict]:
     Returns:
         Cached metadata dict or None if not found/expired
     """
-    if metadata_key in _metadata_cache:
-        data, cached_time = _metadata_cache[metadata_key]
-        if datetime.now() - cached_time < METADATA_CACHE_TTL:
-            logger.debug(f"✅ Cache hit for metadata: {metadata_key}")
-            return data
-        else:
-            # Expired, remove from cache
-            del _metadata_cache[metadata_key]
-    
-    return None
+    data = _metadata_cache.get(metadata_key)
+    if data is not None:
+        logger.debug(f"✅ Cache hit for metadata: {metadata_key}")
+    return data
 
 
 def cache_metadata(metadata_key: str, data: Dict):
     """Cache metadata."""
-    _metadata_cache[metadata_key] = (data, datetime.now())
+    _metadata_cache.set(metadata_key, data)
     logger.debug(f"💾 Cached metadata: {metadata_key}")
 
 
 def clear_cache():
     """Clear all caches (useful for testing or memory management)."""
-    global _intent_cache, _prompt_cache, _metadata_cache
     _intent_cache.clear()
     _prompt_cache.clear()
     _metadata_cache.clear()
     logger.info("🗑️ Cleared all caches")
 
 
-def get_cache_stats() -> Dict[str, int]:
-    """Get cache statistics."""
+def get_cache_stats() -> Dict[str, Any]:
+    """Get cache sizes plus hit/miss/eviction/expiration counters per cache."""
     return {
         "intent_cache_size": len(_intent_cache),
         "prompt_cache_size": len(_prompt_cache),
-        "metadata_cache_size": len(_metadata_cache)
+        "metadata_cache_size": len(_metadata_cache),
+        "intent_cache": _intent_cache.get_stats(),
+        "prompt_cache": _prompt_cache.get_stats(),
+        "metadata_cache": _metadata_cache.get_stats()
     }
 
@@ -7,6 +7,7 @@ import os
 from typing import List, Dict
 import logging
 from app.core.allergy_detection import detect_allergy_answer
+from app.core.intent_matcher import KeywordMatch, match_keyword_tables, matching_tables
 from app.core.prompt_cache import (
     get_cached_intent, cache_intent,
     get_cached_prompt, cache_prompt
@@ -47,41 +48,27 @@ def classify_intent(user_message: str, previous_asked_allergies: bool = False) -
     if cached_intent:
         return cached_intent
     
-    text = (user_message or "").lower().strip()
+    # Scan the message once against every intent keyword table
+    matched = matching_tables(user_message)
     
     # PATCH B: CRITICAL - Check for allergy answers FIRST (before other intents)
     # If allergies were asked previously, prioritize allergy answer detection
-    if previous_asked_allergies:
-        allergy_keywords = ["allergy", "allergic", "food restriction", "intolerance", "avoid", "dietary restriction"]
-        if any(kw in text for kw in allergy_keywords):
-            logger.info(f"🔍 Intent classifier detected allergy answer (previous_asked_allergies=True): '{user_message[:100]}...'")
-            return "allergy_answer"
+    if previous_asked_allergies and "allergy_prompted" in matched:
+        logger.info(f"🔍 Intent classifier detected allergy answer (previous_asked_allergies=True): '{user_message[:100]}...'")
+        return "allergy_answer"
     
     # Use shared allergy detection utility to avoid code duplication
-    if detect_allergy_answer(user_message):
+    if detect_allergy_answer(user_message, matched):
         logger.info(f"🔍 Intent classifier detected potential allergy answer: '{user_message[:100]}...'")
         return "allergy_answer"
     
-    # Meal plan keywords
-    if any(keyword in text for keyword in ["meal plan", "nutrition", "diet", "meal", "food plan", "eating plan", "calories", "macros", "micronutrients"]):
-        return "meal_plan"
-    
-    # Workout keywords
-    if any(keyword in text for keyword in ["workout", "training", "lifting", "exercise plan", "fitness plan", "strength training", "cardio", "conditioning"]):
-        return "workout"
-    
-    # Lesson plan keywords
-    if any(keyword in text for keyword in ["lesson plan", "teach", "unit plan", "curriculum", "lesson", "teaching plan", "class plan"]):
-        return "lesson_plan"
+    # Meal plan, workout and lesson plan keywords, in priority order
+    for intent in ("meal_plan", "workout", "lesson_plan"):
+        if intent in matched:
+            return intent
     
     # Widget keywords
-    widget_keywords = [
-        "attendance", "teams", "adaptive", "analytics", "skill", "video",
-        "schedule", "tracking", "progress", "heart rate", "challenge",
-        "fitness goal", "export", "safety report", "widget", "capabilities",
-        "what can you do", "features", "tools"
-    ]
-    if any(keyword in text for keyword in widget_keywords):
+    if "widget" in matched:
         intent = "widget"
     else:
         intent = "general"
@@ -91,6 +78,16 @@ def classify_intent(user_message: str, previous_asked_allergies: bool = False) -
     return intent
 
 
+def classify_intent_matches(user_message: str) -> Dict[str, List[KeywordMatch]]:
+    """
+    Return every intent keyword found in the message, grouped by keyword table.
+    
+    Each match carries the keyword and its position, which is useful for
+    explaining or debugging why classify_intent picked an intent.
+    """
+    return match_keyword_tables(user_message)
+
+
 def load_raw_module(module_name: str) -> str:
     """
     Load module content from file system (raw text) with caching.
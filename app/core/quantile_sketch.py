@@ -0,0 +1,258 @@
+"""
+Quantile Sketches
+Mergeable, constant-memory percentile estimates for latencies and metrics.
+
+``QuantileSketch`` follows DDSketch: values fall into logarithmic buckets
+whose width is set by ``relative_accuracy``, so every reported quantile is
+within that relative error of a true sample value. Two sketches with the same
+accuracy merge by adding bucket counts, which makes them safe to combine
+across workers (see ``to_dict``/``from_dict``). ``WindowedSketch`` keeps one
+sketch per time interval so summaries can cover a recent window.
+"""
+
+import bisect
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+# Values closer to zero than this are counted as zero
+MIN_INDEXABLE_VALUE = 1e-9
+
+
+class QuantileSketch:
+    """DDSketch-style quantile sketch (not thread-safe on its own)."""
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._positive: Dict[int, float] = {}
+        self._negative: Dict[int, float] = {}
+        self._zero_count = 0.0
+        self.count = 0.0
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._cumulative: Optional[Tuple[List[float], List[float]]] = None
+
+    def _key(self, magnitude: float) -> int:
+        return math.ceil(math.log(magnitude) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        return 2 * self._gamma ** key / (self._gamma + 1)
+
+    def add(self, value: float, weight: float = 1.0):
+        """Record ``value`` (``weight`` times)."""
+        if weight <= 0:
+            return
+        if value > MIN_INDEXABLE_VALUE:
+            key = self._key(value)
+            self._positive[key] = self._positive.get(key, 0.0) + weight
+            if len(self._positive) > self.max_buckets:
+                self._collapse(self._positive)
+        elif value < -MIN_INDEXABLE_VALUE:
+            key = self._key(-value)
+            self._negative[key] = self._negative.get(key, 0.0) + weight
+            if len(self._negative) > self.max_buckets:
+                self._collapse(self._negative)
+        else:
+            self._zero_count += weight
+        self.count += weight
+        self.sum += value * weight
+        self.sum_sq += value * value * weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self._cumulative = None
+
+    def _collapse(self, buckets: Dict[int, float]):
+        """Fold the smallest-magnitude buckets together to stay within ``max_buckets``."""
+        keys = sorted(buckets)
+        excess = len(keys) - self.max_buckets
+        target = keys[excess]
+        for key in keys[:excess]:
+            buckets[target] += buckets.pop(key)
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Add ``other``'s samples into this sketch; returns self."""
+        if not other.count:
+            return self
+        if not math.isclose(other.relative_accuracy, self.relative_accuracy):
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for own, theirs in ((self._positive, other._positive), (self._negative, other._negative)):
+            for key, count in theirs.items():
+                own[key] = own.get(key, 0.0) + count
+            if len(own) > self.max_buckets:
+                self._collapse(own)
+        self._zero_count += other._zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.sum_sq += other.sum_sq
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._cumulative = None
+        return self
+
+    def _ranks(self) -> Tuple[List[float], List[float]]:
+        """Cumulative counts and bucket values in ascending value order (cached)."""
+        if self._cumulative is None:
+            cumulative: List[float] = []
+            values: List[float] = []
+            total = 0.0
+            for key in sorted(self._negative, reverse=True):
+                total += self._negative[key]
+                cumulative.append(total)
+                values.append(-self._value(key))
+            if self._zero_count:
+                total += self._zero_count
+                cumulative.append(total)
+                values.append(0.0)
+            for key in sorted(self._positive):
+                total += self._positive[key]
+                cumulative.append(total)
+                values.append(self._value(key))
+            self._cumulative = (cumulative, values)
+        return self._cumulative
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimated ``q``-quantile (0 <= q <= 1), or None when empty."""
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        if not self.count:
+            return None
+        if q == 0:
+            return self.min
+        if q == 1:
+            return self.max
+        cumulative, values = self._ranks()
+        rank = q * (self.count - 1)
+        index = min(bisect.bisect_right(cumulative, rank), len(values) - 1)
+        return min(max(values[index], self.min), self.max)
+
+    def quantiles(self, qs: Iterable[float]) -> Dict[float, Optional[float]]:
+        return {q: self.quantile(q) for q in qs}
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    @property
+    def stddev(self) -> float:
+        """Sample standard deviation of the recorded values."""
+        if self.count < 2:
+            return 0.0
+        variance = (self.sum_sq - self.count * self.mean ** 2) / (self.count - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    def summary(self) -> Dict[str, Any]:
+        """Count, mean and the usual latency percentiles."""
+        return {
+            "count": int(self.count),
+            "mean": self.mean,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99)
+        }
+
+    def copy(self) -> "QuantileSketch":
+        return QuantileSketch(self.relative_accuracy, self.max_buckets).merge(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable form for shipping to other workers."""
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_buckets": self.max_buckets,
+            "positive": {str(key): count for key, count in self._positive.items()},
+            "negative": {str(key): count for key, count in self._negative.items()},
+            "zero_count": self._zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "sum_sq": self.sum_sq,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantileSketch":
+        sketch = cls(data["relative_accuracy"], data.get("max_buckets", 2048))
+        sketch._positive = {int(key): count for key, count in data["positive"].items()}
+        sketch._negative = {int(key): count for key, count in data["negative"].items()}
+        sketch._zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        sketch.sum_sq = data.get("sum_sq", 0.0)
+        if sketch.count:
+            sketch.min = data["min"]
+            sketch.max = data["max"]
+        return sketch
+
+    def __len__(self) -> int:
+        return int(self.count)
+
+
+class WindowedSketch:
+    """Thread-safe ring of per-interval sketches covering the last ``retention`` seconds."""
+
+    def __init__(
+        self,
+        interval: float = 60,
+        retention: float = 3600,
+        relative_accuracy: float = 0.01,
+        max_buckets: int = 2048
+    ):
+        self.interval = interval
+        self.retention = retention
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self._buckets: Deque[Tuple[float, QuantileSketch]] = deque()
+        self._lock = threading.Lock()
+
+    def add(self, value: float, timestamp: Optional[float] = None):
+        timestamp = time.time() if timestamp is None else timestamp
+        bucket_start = timestamp - timestamp % self.interval
+        with self._lock:
+            self._bucket(bucket_start).add(value)
+            self._expire(self._buckets[-1][0] + self.interval - self.retention)
+
+    def _bucket(self, bucket_start: float) -> QuantileSketch:
+        # Late points walk back from the newest interval (usually only a step or two)
+        position = len(self._buckets)
+        while position and self._buckets[position - 1][0] >= bucket_start:
+            if self._buckets[position - 1][0] == bucket_start:
+                return self._buckets[position - 1][1]
+            position -= 1
+        sketch = QuantileSketch(self.relative_accuracy, self.max_buckets)
+        self._buckets.insert(position, (bucket_start, sketch))
+        return sketch
+
+    def _expire(self, cutoff: float):
+        while self._buckets and self._buckets[0][0] + self.interval <= cutoff:
+            self._buckets.popleft()
+
+    def expire_before(self, cutoff: float):
+        """Drop intervals that end at or before ``cutoff``."""
+        with self._lock:
+            self._expire(cutoff)
+
+    def merged(self, start: Optional[float] = None, end: Optional[float] = None) -> QuantileSketch:
+        """One sketch over every interval overlapping [start, end]."""
+        result = QuantileSketch(self.relative_accuracy, self.max_buckets)
+        with self._lock:
+            for bucket_start, sketch in self._buckets:
+                if start is not None and bucket_start + self.interval <= start:
+                    continue
+                if end is not None and bucket_start > end:
+                    break
+                result.merge(sketch)
+        return result
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(sum(sketch.count for _, sketch in self._buckets))
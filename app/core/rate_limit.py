@@ -1,20 +1,280 @@
-"""Rate limiting functionality for API endpoints."""
-from typing import Optional, Dict, Any, Callable
+"""Rate limiting functionality for API endpoints.
+
+One sliding-window engine with pluggable backends:
+
+* ``InMemoryRateLimitBackend`` - lock-sharded map for a single process.
+* ``RedisRateLimitBackend`` - atomic Lua script, shared by every worker.
+
+Each key keeps two fixed-window counters (current and previous); the request
+count over the sliding window is estimated by weighting the previous window by
+how much of it still overlaps. Checks are O(1) in time and memory per key.
+"""
+from abc import ABC, abstractmethod
+from typing import Optional, Dict, Any, Callable, List, NamedTuple
 from datetime import datetime, timedelta
 import asyncio
+import math
+import os
+import threading
+import time
 from fastapi import HTTPException, status
 from functools import wraps
 import logging
 
 logger = logging.getLogger(__name__)
 
-# In-memory store for rate limiting
-rate_limit_store: Dict[str, Dict[str, Any]] = {}
+
+class RateLimitResult(NamedTuple):
+    """Outcome of a rate limit check."""
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  # seconds until a request of the same cost would be allowed
+
+
+def _window_state(now: float, window: float):
+    """Return the current window index and the fraction of it already elapsed."""
+    index = math.floor(now / window)
+    return index, (now - index * window) / window
+
+
+def _evaluate(current: float, previous: float, elapsed: float, limit: int, window: float, cost: int) -> RateLimitResult:
+    """Apply the sliding-window estimate to a pair of window counters."""
+    weight = 1.0 - elapsed
+    estimated = previous * weight + current
+    allowed = cost == 0 or estimated + cost <= limit
+    if allowed:
+        estimated += cost
+        retry_after = 0.0
+    elif previous > 0 and current + cost <= limit:
+        # Wait for enough of the previous window to slide out
+        retry_after = max(0.0, (estimated + cost - limit) / previous * window)
+    else:
+        # Only the next window can admit this request
+        retry_after = (1.0 - elapsed) * window
+    return RateLimitResult(allowed, limit, max(0, int(limit - estimated)), retry_after)
+
+
+class RateLimitBackend(ABC):
+    """Storage for sliding-window counters."""
+
+    # Backends doing network I/O are run off the event loop
+    blocking = False
+
+    @abstractmethod
+    def hit(self, key: str, limit: int, window: float, cost: int = 1) -> RateLimitResult:
+        """Consume ``cost`` requests for ``key`` if the limit allows it."""
+        pass
+
+    @abstractmethod
+    def reset(self, key: str):
+        """Forget all counters of ``key``."""
+        pass
+
+    def prune(self) -> int:
+        """Drop counters whose windows have passed; returns how many were dropped."""
+        return 0
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Process-local backend: keys are spread over independently locked shards."""
+
+    def __init__(self, shards: int = 16, prune_every: int = 1024, clock: Callable[[], float] = time.time):
+        self._shards: List[Dict[str, List[float]]] = [{} for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._hits = [0] * shards
+        self.prune_every = prune_every
+        self._clock = clock
+
+    def _shard(self, key: str) -> int:
+        return hash(key) % len(self._shards)
+
+    def hit(self, key: str, limit: int, window: float, cost: int = 1) -> RateLimitResult:
+        now = self._clock()
+        index, elapsed = _window_state(now, window)
+        shard = self._shard(key)
+        with self._locks[shard]:
+            counters = self._shards[shard]
+            # [window length, window index, current count, previous count]
+            entry = counters.get(key)
+            if entry is None or entry[0] != window or index - entry[1] >= 2:
+                entry = [window, index, 0, 0]
+                counters[key] = entry
+            elif index != entry[1]:
+                entry[1], entry[2], entry[3] = index, 0, entry[2]
+
+            result = _evaluate(entry[2], entry[3], elapsed, limit, window, cost)
+            if result.allowed:
+                entry[2] += cost
+
+            self._hits[shard] += 1
+            if self._hits[shard] >= self.prune_every:
+                self._hits[shard] = 0
+                self._prune_shard(counters, now)
+        return result
+
+    def reset(self, key: str):
+        shard = self._shard(key)
+        with self._locks[shard]:
+            self._shards[shard].pop(key, None)
+
+    @staticmethod
+    def _prune_shard(counters: Dict[str, List[float]], now: float) -> int:
+        expired = [
+            key for key, (window, index, _, _) in counters.items()
+            if math.floor(now / window) - index >= 2
+        ]
+        for key in expired:
+            del counters[key]
+        return len(expired)
+
+    def prune(self) -> int:
+        now = self._clock()
+        removed = 0
+        for lock, counters in zip(self._locks, self._shards):
+            with lock:
+                removed += self._prune_shard(counters, now)
+        return removed
+
+    def __len__(self) -> int:
+        return sum(len(counters) for counters in self._shards)
+
+
+# KEYS: current window counter, previous window counter
+# ARGV: limit, cost, elapsed fraction of the current window, window seconds
+_SLIDING_WINDOW_LUA = """
+local limit = tonumber(ARGV[1])
+local cost = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3])
+local window = tonumber(ARGV[4])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+if cost > 0 and previous * (1 - elapsed) + current + cost <= limit then
+    current = redis.call('INCRBY', KEYS[1], cost)
+    redis.call('EXPIRE', KEYS[1], math.ceil(window * 2))
+    return {1, current, previous}
+end
+return {0, current, previous}
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Backend shared by all workers; each check is one atomic Lua call.
+
+    Counters expire on their own after two windows, so no cleanup pass is
+    needed. If Redis fails, checks fall back to ``fallback`` (per-process).
+    """
+
+    blocking = True
+
+    def __init__(
+        self,
+        client,
+        prefix: str = "ratelimit",
+        fallback: Optional[RateLimitBackend] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        self.client = client
+        self.prefix = prefix
+        self.fallback = fallback or InMemoryRateLimitBackend()
+        self._script = client.register_script(_SLIDING_WINDOW_LUA)
+        self._clock = clock
+
+    def _keys(self, key: str, window: float, index: int) -> List[str]:
+        base = f"{self.prefix}:{key}:{window:g}"
+        return [f"{base}:{index}", f"{base}:{index - 1}"]
+
+    def hit(self, key: str, limit: int, window: float, cost: int = 1) -> RateLimitResult:
+        index, elapsed = _window_state(self._clock(), window)
+        try:
+            allowed, current, previous = self._script(
+                keys=self._keys(key, window, index),
+                args=[limit, cost, repr(elapsed), repr(window)]
+            )
+        except Exception as e:
+            logger.warning(f"Redis rate limit check failed, using local limits: {e}")
+            return self.fallback.hit(key, limit, window, cost)
+
+        current, previous = float(current), float(previous)
+        if allowed:
+            # The script already counted this request
+            current -= cost
+        result = _evaluate(current, previous, elapsed, limit, window, cost)
+        # The script's decision is authoritative (it saw the counters atomically)
+        return result._replace(allowed=bool(allowed) or cost == 0)
+
+    def reset(self, key: str):
+        keys = list(self.client.scan_iter(match=f"{self.prefix}:{key}:*"))
+        if keys:
+            self.client.delete(*keys)
+        self.fallback.reset(key)
+
+
+class RateLimitEngine:
+    """Entry point for all rate limiting; wraps a backend with an async API."""
+
+    def __init__(self, backend: Optional[RateLimitBackend] = None):
+        self.backend = backend or InMemoryRateLimitBackend()
+
+    async def hit(self, key: str, limit: int, window: float, cost: int = 1) -> RateLimitResult:
+        """Consume ``cost`` requests for ``key``; ``cost=0`` only inspects the limit."""
+        if self.backend.blocking:
+            return await asyncio.to_thread(self.backend.hit, key, limit, window, cost)
+        return self.backend.hit(key, limit, window, cost)
+
+    def hit_sync(self, key: str, limit: int, window: float, cost: int = 1) -> RateLimitResult:
+        """Synchronous ``hit`` for non-async callers."""
+        return self.backend.hit(key, limit, window, cost)
+
+    def reset(self, key: str):
+        self.backend.reset(key)
+
+
+_engine: Optional[RateLimitEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_rate_limit_engine() -> RateLimitEngine:
+    """Get the process-wide engine.
+
+    Counters live in Redis when RATELIMIT_STORAGE_URL points at it, or else when
+    a ``REDIS_URL`` is set in the environment (as the request middleware always
+    used), so limits hold across workers; otherwise they are per process.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                from app.core.config import get_settings
+                settings = get_settings()
+                local = InMemoryRateLimitBackend(shards=settings.RATE_LIMIT_SHARDS)
+                backend: RateLimitBackend = local
+                storage_url = settings.RATELIMIT_STORAGE_URL
+                if not storage_url.startswith(("redis://", "rediss://")):
+                    storage_url = (os.getenv("REDIS_URL") or "").strip()
+                if storage_url.startswith(("redis://", "rediss://")):
+                    try:
+                        import redis
+                        backend = RedisRateLimitBackend(
+                            redis.Redis.from_url(storage_url, socket_timeout=1, socket_connect_timeout=1),
+                            fallback=local
+                        )
+                    except Exception as e:
+                        logger.warning(f"Redis rate limiting unavailable, using local limits: {e}")
+                _engine = RateLimitEngine(backend)
+    return _engine
+
+
+def set_rate_limit_engine(engine: Optional[RateLimitEngine]):
+    """Replace the process-wide engine (``None`` rebuilds it from settings)."""
+    global _engine
+    _engine = engine
+
 
 def rate_limit(requests: int, period: int):
     """
     Rate limiting decorator for FastAPI endpoints.
-    
+
     Args:
         requests: Maximum number of requests allowed in the period
         period: Time period in seconds
@@ -26,68 +286,39 @@ def rate_limit(requests: int, period: int):
             client_id = kwargs.get('current_user', {}).get('id', 'anonymous')
             endpoint = func.__name__
             key = f"{client_id}:{endpoint}"
-            
-            # Get current time
-            now = datetime.now()
-            
-            # Initialize or get rate limit data
-            if key not in rate_limit_store:
-                rate_limit_store[key] = {
-                    'requests': 0,
-                    'window_start': now,
-                    'last_reset': now
-                }
-            
-            # Check if we need to reset the window
-            data = rate_limit_store[key]
-            window_duration = timedelta(seconds=period)
-            if now - data['window_start'] > window_duration:
-                data['requests'] = 0
-                data['window_start'] = now
-                data['last_reset'] = now
-            
-            # Check rate limit
-            if data['requests'] >= requests:
-                wait_time = (data['window_start'] + window_duration - now).total_seconds()
+
+            result = await get_rate_limit_engine().hit(key, requests, period)
+            if not result.allowed:
+                wait_time = result.retry_after
                 logger.warning(f"Rate limit exceeded for {key}. Wait time: {wait_time}s")
                 raise HTTPException(
                     status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                     detail={
                         "error": "Rate limit exceeded",
                         "wait_time": wait_time,
-                        "retry_after": data['window_start'] + window_duration
+                        "retry_after": datetime.now() + timedelta(seconds=wait_time)
                     }
                 )
-            
-            # Increment request count
-            data['requests'] += 1
-            
+
             # Execute the endpoint function
             return await func(*args, **kwargs)
-            
+
         return wrapper
     return decorator
 
 def cleanup_rate_limits():
     """Clean up expired rate limit data."""
-    now = datetime.now()
-    expired = []
-    
-    for key, data in rate_limit_store.items():
-        if now - data['last_reset'] > timedelta(hours=1):
-            expired.append(key)
-    
-    for key in expired:
-        del rate_limit_store[key]
-        logger.debug(f"Cleaned up rate limit data for {key}")
+    removed = get_rate_limit_engine().backend.prune()
+    if removed:
+        logger.debug(f"Cleaned up rate limit data for {removed} keys")
 
 # Run cleanup periodically
 async def periodic_cleanup():
-    """Run cleanup periodically."""
+    """Run cleanup periodically (counters are also pruned as they are used)."""
     while True:
         try:
             cleanup_rate_limits()
             await asyncio.sleep(3600)  # Run every hour
         except Exception as e:
             logger.error(f"Error in rate limit cleanup: {str(e)}")
-            await asyncio.sleep(60)  # Retry after a minute on error 
\ No newline at end of file
+            await asyncio.sleep(60)  # Retry after a minute on error
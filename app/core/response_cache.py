@@ -0,0 +1,518 @@
+"""HTTP response cache for read-heavy GET endpoints.
+
+``ResponseCacheMiddleware`` is a pure-ASGI layer that caches complete GET
+responses for the path prefixes listed in its rules:
+
+* Keys vary by method, path, query string, the rule's ``vary_headers`` and
+  the caller's principal (a hash of the bearer token or session cookie), so
+  one user's dashboard is never served to another.
+* Entries live in a byte-bounded LRU in process, optionally backed by Redis
+  (``RESPONSE_CACHE_REDIS_URL``) so workers share them.
+* Every cached response carries a strong ``ETag``; a matching
+  ``If-None-Match`` is answered with ``304 Not Modified`` and no body, so a
+  client polling an unchanged dashboard pays for a header compare only.
+* Each rule has its own TTL and invalidation tags. Tag versions are part of
+  the key, so purging a tag (``invalidate_tags``, or any successful
+  POST/PUT/PATCH/DELETE under the rule's prefix) makes the old entries
+  unreachable. With Redis the versions are shared and every worker sees
+  the purge within ``RESPONSE_CACHE_TAG_REFRESH`` seconds; without it the
+  versions are per process, so other workers keep serving their entries
+  until the rule's TTL runs out (a warning is logged when several workers
+  are configured).
+* Routers mounted outside a rule's prefix that change its data purge the
+  rule's tags through the ``invalidate_on_write`` dependency.
+
+Only responses that declare a ``Content-Length`` are cached, so streaming
+and server-sent-event responses pass through untouched. Per-request headers
+(request id, timing, rate-limit counters) are dropped before an entry is
+stored. The app registers the cache inside the request pipeline, so hits
+still go through auth, rate limiting, metrics and audit.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+# Headers describing one request rather than the resource; never replayed from the cache
+PER_REQUEST_HEADERS = frozenset({
+    b"x-request-id", b"x-process-time", b"x-ratelimit-limit", b"x-ratelimit-remaining", b"retry-after"
+})
+
+
+@dataclass(frozen=True)
+class CacheRule:
+    """Caching policy for every path under ``prefix``."""
+    prefix: str
+    ttl: int = 60
+    tags: Tuple[str, ...] = ()
+    vary_headers: Tuple[str, ...] = ("accept", "accept-language")
+    per_principal: bool = True
+
+    @classmethod
+    def from_config(cls, prefix: str, config: Dict[str, Any]) -> "CacheRule":
+        return cls(
+            prefix=prefix,
+            ttl=int(config.get("ttl", 60)),
+            tags=tuple(config.get("tags", ())),
+            vary_headers=tuple(h.lower() for h in config.get("vary_headers", ("accept", "accept-language"))),
+            per_principal=bool(config.get("per_principal", True))
+        )
+
+
+@dataclass
+class CachedResponse:
+    """A complete response as it was sent."""
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    etag: str
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(k) + len(v) for k, v in self.headers)
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "status": self.status,
+            "headers": [[k.decode("latin-1"), v.decode("latin-1")] for k, v in self.headers],
+            "body": base64.b64encode(self.body).decode("ascii"),
+            "etag": self.etag
+        })
+
+    @classmethod
+    def from_json(cls, payload: str) -> "CachedResponse":
+        data = json.loads(payload)
+        return cls(
+            status=data["status"],
+            headers=[(k.encode("latin-1"), v.encode("latin-1")) for k, v in data["headers"]],
+            body=base64.b64decode(data["body"]),
+            etag=data["etag"]
+        )
+
+
+def strong_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison, as RFC 9110 requires for ``If-None-Match``."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
+
+
+class ResponseCacheStore:
+    """Byte-bounded in-process LRU with an optional Redis tier and tag versions.
+
+    Thread-safe. Redis calls run in a worker thread; Redis errors degrade to
+    the in-process tier.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_entry_bytes: int = 1024 * 1024,
+        redis_client: Any = None,
+        key_prefix: str = "faraday:response_cache:",
+        tag_refresh: float = 1.0,
+        clock=time.monotonic
+    ):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.redis = redis_client
+        self.key_prefix = key_prefix
+        self.tag_refresh = tag_refresh
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[CachedResponse, float]]" = OrderedDict()
+        self._bytes = 0
+        # tag -> (version, refreshed_at)
+        self._tag_versions: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "not_modified": 0}
+
+    # In-process tier
+
+    def _get_local(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            entry, expires_at = item
+            if expires_at <= self._clock():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _set_local(self, key: str, entry: CachedResponse, ttl: float):
+        size = entry.size
+        if size > self.max_entry_bytes or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (entry, self._clock() + ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def _drop(self, key: str):
+        entry, _ = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # Tags
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.key_prefix}tag:{tag}"
+
+    def _stale_tags(self, tags: Sequence[str]) -> List[str]:
+        now = self._clock()
+        return [
+            tag for tag in tags
+            if tag not in self._tag_versions or now - self._tag_versions[tag][1] >= self.tag_refresh
+        ]
+
+    def _refresh_tags(self, tags: Sequence[str]):
+        """Pull current versions of ``tags`` from Redis."""
+        try:
+            versions = self.redis.mget([self._tag_key(tag) for tag in tags])
+        except Exception as e:
+            logger.error(f"Response cache tag refresh failed: {str(e)}")
+            return
+        now = self._clock()
+        with self._lock:
+            for tag, version in zip(tags, versions):
+                self._tag_versions[tag] = (int(version or 0), now)
+
+    async def tag_versions(self, tags: Sequence[str]) -> Tuple[int, ...]:
+        """Current version of each tag; Redis is asked at most once per ``tag_refresh``."""
+        if self.redis is not None and tags:
+            stale = self._stale_tags(tags)
+            if stale:
+                await asyncio.to_thread(self._refresh_tags, stale)
+        return tuple(self._tag_versions.get(tag, (0, 0.0))[0] for tag in tags)
+
+    def _bump(self, tags: Iterable[str]):
+        now = self._clock()
+        for tag in tags:
+            version = None
+            if self.redis is not None:
+                try:
+                    version = int(self.redis.incr(self._tag_key(tag)))
+                except Exception as e:
+                    logger.error(f"Response cache invalidation failed for {tag}: {str(e)}")
+            with self._lock:
+                if version is None:
+                    version = self._tag_versions.get(tag, (0, 0.0))[0] + 1
+                self._tag_versions[tag] = (version, now)
+
+    async def invalidate_tags(self, *tags: str):
+        """Make every entry cached under any of ``tags`` unreachable.
+
+        Reaches every worker only when the store has a Redis client.
+        """
+        if tags:
+            await asyncio.to_thread(self._bump, tags)
+
+    # Both tiers
+
+    def _get_remote(self, key: str) -> Optional[CachedResponse]:
+        try:
+            payload = self.redis.get(self.key_prefix + key)
+        except Exception as e:
+            logger.error(f"Response cache get failed: {str(e)}")
+            return None
+        return CachedResponse.from_json(payload) if payload else None
+
+    def _set_remote(self, key: str, entry: CachedResponse, ttl: int):
+        try:
+            self.redis.setex(self.key_prefix + key, ttl, entry.to_json())
+        except Exception as e:
+            logger.error(f"Response cache set failed: {str(e)}")
+
+    async def get(self, key: str, ttl: int) -> Optional[CachedResponse]:
+        entry = self._get_local(key)
+        if entry is None and self.redis is not None:
+            entry = await asyncio.to_thread(self._get_remote, key)
+            if entry is not None:
+                self._set_local(key, entry, ttl)
+        self.stats["hits" if entry is not None else "misses"] += 1
+        return entry
+
+    async def set(self, key: str, entry: CachedResponse, ttl: int):
+        self.stats["stores"] += 1
+        self._set_local(key, entry, ttl)
+        if self.redis is not None:
+            await asyncio.to_thread(self._set_remote, key, entry, ttl)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+class ResponseCacheMiddleware:
+    """Pure-ASGI response cache; see the module docstring."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        rules: Optional[Sequence[CacheRule]] = None,
+        store: Optional[ResponseCacheStore] = None,
+        session_cookie: Optional[str] = None
+    ):
+        from app.core.config import settings
+        self.app = app
+        if rules is None:
+            rules = [CacheRule.from_config(prefix, config) for prefix, config in settings.RESPONSE_CACHE_RULES.items()]
+        self.rules = sorted(rules, key=lambda rule: len(rule.prefix), reverse=True)
+        self.store = store
+        self.session_cookie = session_cookie or settings.SESSION_COOKIE_NAME
+
+    def rule_for(self, path: str) -> Optional[CacheRule]:
+        for rule in self.rules:
+            if path.startswith(rule.prefix):
+                return rule
+        return None
+
+    def principal(self, headers: Headers) -> str:
+        """Opaque caller identity; the credential itself never ends up in a key."""
+        credential = headers.get("authorization")
+        if not credential:
+            for part in headers.get("cookie", "").split(";"):
+                name, _, value = part.strip().partition("=")
+                if name == self.session_cookie and value:
+                    credential = value
+                    break
+        if not credential:
+            return "anonymous"
+        return hashlib.sha256(credential.encode("latin-1", "replace")).hexdigest()
+
+    async def cache_key(self, scope: Scope, headers: Headers, rule: CacheRule, store: ResponseCacheStore) -> str:
+        versions = await store.tag_versions(rule.tags)
+        parts = [
+            scope["path"],
+            scope.get("query_string", b"").decode("latin-1"),
+            "|".join(headers.get(name, "") for name in rule.vary_headers),
+            self.principal(headers) if rule.per_principal else "shared",
+            ",".join(map(str, versions))
+        ]
+        return hashlib.sha256("\n".join(parts).encode("utf-8", "replace")).hexdigest()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        rule = self.rule_for(scope["path"])
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+        store = self.store if self.store is not None else get_response_cache()
+        method = scope["method"]
+        if method in WRITE_METHODS:
+            await self._invalidating(scope, receive, send, rule, store)
+            return
+        if method not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        key = await self.cache_key(scope, headers, rule, store)
+        request_cache_control = headers.get("cache-control", "")
+        if "no-cache" not in request_cache_control and "no-store" not in request_cache_control:
+            entry = await store.get(key, rule.ttl)
+            if entry is not None:
+                await self._send_cached(entry, headers, send, head=method == "HEAD", store=store)
+                return
+        if method == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        await self._fill(scope, receive, send, headers, rule, store, key)
+
+    def _validators(self, rule: CacheRule) -> List[Tuple[bytes, bytes]]:
+        # Clients keep the body but revalidate each time, which is one 304 while unchanged
+        cache_control = b"private, no-cache" if rule.per_principal else f"public, max-age=0, s-maxage={rule.ttl}".encode()
+        vary = ", ".join(["authorization", *rule.vary_headers] if rule.per_principal else rule.vary_headers)
+        return [(b"cache-control", cache_control), (b"vary", vary.encode("latin-1"))]
+
+    async def _send_cached(
+        self,
+        entry: CachedResponse,
+        headers: Headers,
+        send: Send,
+        head: bool,
+        store: ResponseCacheStore,
+        cache_status: bytes = b"HIT"
+    ):
+        if etag_matches(headers.get("if-none-match"), entry.etag):
+            store.stats["not_modified"] += 1
+            response_headers = [
+                (k, v) for k, v in entry.headers
+                if k in (b"etag", b"cache-control", b"vary", b"content-location", b"date", b"expires")
+            ]
+            await send({"type": "http.response.start", "status": 304, "headers": response_headers + [(b"x-cache", cache_status)]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send({"type": "http.response.start", "status": entry.status, "headers": entry.headers + [(b"x-cache", cache_status)]})
+        await send({"type": "http.response.body", "body": b"" if head else entry.body})
+
+    async def _fill(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        headers: Headers,
+        rule: CacheRule,
+        store: ResponseCacheStore,
+        key: str
+    ):
+        start_message: Optional[Message] = None
+        chunks: List[bytes] = []
+        caching = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, caching
+            if message["type"] == "http.response.start":
+                response_headers = Headers(raw=message["headers"])
+                length = response_headers.get("content-length")
+                caching = (
+                    message["status"] == 200
+                    and length is not None and length.isdigit() and int(length) <= store.max_entry_bytes
+                    and "set-cookie" not in response_headers
+                    and "no-store" not in response_headers.get("cache-control", "")
+                )
+                if not caching:
+                    await send(message)
+                    return
+                start_message = message
+                return
+            if not caching:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            mutable = MutableHeaders(scope=start_message)
+            etag = mutable.get("etag") or strong_etag(body)
+            mutable["etag"] = etag
+            for name, value in self._validators(rule):
+                mutable[name.decode()] = value.decode("latin-1")
+            stored_headers = [(k, v) for k, v in start_message["headers"] if k.lower() not in PER_REQUEST_HEADERS]
+            entry = CachedResponse(status=200, headers=stored_headers, body=body, etag=etag)
+            await store.set(key, entry, rule.ttl)
+            await self._send_cached(entry, headers, send, head=False, store=store, cache_status=b"MISS")
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _invalidating(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        rule: CacheRule,
+        store: ResponseCacheStore
+    ):
+        status = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+        if status is not None and 200 <= status < 400 and rule.tags:
+            await store.invalidate_tags(*rule.tags)
+
+
+_store: Optional[ResponseCacheStore] = None
+_store_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCacheStore:
+    """Process-wide store; shared through Redis when RESPONSE_CACHE_REDIS_URL is set."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                from app.core.config import settings
+                redis_client = None
+                if settings.RESPONSE_CACHE_REDIS_URL:
+                    try:
+                        import redis
+                        redis_client = redis.Redis.from_url(
+                            settings.RESPONSE_CACHE_REDIS_URL, socket_timeout=1, socket_connect_timeout=1
+                        )
+                    except Exception as e:
+                        logger.warning(f"Redis response cache unavailable, caching in process only: {e}")
+                workers = int(os.getenv("WORKERS", "1"))
+                if redis_client is None and workers > 1:
+                    logger.warning(
+                        f"Response cache is per process with {workers} workers: invalidation only "
+                        f"reaches the worker handling the write. Set RESPONSE_CACHE_REDIS_URL to share it."
+                    )
+                _store = ResponseCacheStore(
+                    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+                    max_entry_bytes=settings.RESPONSE_CACHE_MAX_ENTRY_BYTES,
+                    redis_client=redis_client,
+                    key_prefix=f"{settings.CACHE_KEY_PREFIX}response_cache:",
+                    tag_refresh=settings.RESPONSE_CACHE_TAG_REFRESH
+                )
+    return _store
+
+
+def set_response_cache(store: Optional[ResponseCacheStore]):
+    """Replace the process-wide store (``None`` rebuilds it from settings)."""
+    global _store
+    _store = store
+
+
+async def invalidate_tags(*tags: str):
+    """Purge cached responses for ``tags`` (e.g. ``"dashboard"``) after a write."""
+    await get_response_cache().invalidate_tags(*tags)
+
+
+def invalidate_on_write(*tags: str):
+    """FastAPI dependency purging ``tags`` after each successful write through a route.
+
+    For routers mounted outside a cache rule's prefix whose writes change data
+    cached under it, e.g. ``include_router(..., dependencies=[Depends(invalidate_on_write("dashboard"))])``.
+    """
+    async def dependency(request: Request):
+        yield
+        # Not reached when the endpoint raised
+        if request.method in WRITE_METHODS:
+            await invalidate_tags(*tags)
+    return dependency
@@ -0,0 +1,186 @@
+"""
+Bounded In-Process TTL Cache
+Thread-safe LRU cache with a maximum size, per-entry TTLs measured on the
+monotonic clock, optional background sweeping and hit/miss/eviction counters.
+
+Use this instead of a plain module-level dict for anything keyed by user
+input (chat messages, prompts, request parameters) so memory stays bounded in
+long-running workers.
+"""
+
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """LRU cache whose entries also expire after ``ttl`` seconds.
+
+    Expired entries are dropped when read, when the cache is full, and, if
+    ``sweep_interval`` is set, by a daemon thread started on the first write.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: Optional[float] = None,
+        sweep_interval: Optional[float] = None,
+        name: str = "ttl_cache",
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self.name = name
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_sweeper = threading.Event()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0
+        }
+
+    def _expiry(self, ttl: Optional[float]) -> Optional[float]:
+        ttl = self.ttl if ttl is None else ttl
+        return self._clock() + ttl if ttl is not None else None
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the live value for ``key`` and mark it recently used."""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.stats["misses"] += 1
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= self._clock():
+                del self._data[key]
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return default
+            self._data.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store ``value``; ``ttl`` overrides the cache default for this entry."""
+        with self._lock:
+            self._data[key] = (value, self._expiry(ttl))
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._expire_locked()
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+                    self.stats["evictions"] += 1
+        if self.sweep_interval and self._sweeper is None:
+            self._start_sweeper()
+
+    def delete(self, key: Hashable) -> bool:
+        """Remove ``key``; returns True if it was present."""
+        with self._lock:
+            return self._data.pop(key, _MISSING) is not _MISSING
+
+    def delete_matching(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Remove entries for which ``predicate(key, value)`` is true; returns how many."""
+        with self._lock:
+            matched = [key for key, (value, _) in self._data.items() if predicate(key, value)]
+            for key in matched:
+                del self._data[key]
+            return len(matched)
+
+    def clear(self):
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._data.clear()
+
+    def expire(self) -> int:
+        """Remove every expired entry and return how many were removed."""
+        with self._lock:
+            return self._expire_locked()
+
+    def _expire_locked(self) -> int:
+        now = self._clock()
+        expired = [
+            key for key, (_, expires_at) in self._data.items()
+            if expires_at is not None and expires_at <= now
+        ]
+        for key in expired:
+            del self._data[key]
+        self.stats["expirations"] += len(expired)
+        return len(expired)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return False
+            expires_at = entry[1]
+            return expires_at is None or expires_at > self._clock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _start_sweeper(self):
+        """Start the background sweep thread (holds only a weak reference)."""
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._stop_sweeper.clear()
+            self._sweeper = threading.Thread(
+                target=_sweep,
+                args=(weakref.ref(self), self.sweep_interval, self._stop_sweeper),
+                name=f"{self.name}-sweeper",
+                daemon=True
+            )
+            self._sweeper.start()
+
+    def stop_sweeper(self):
+        """Stop the background sweep thread, if running."""
+        self._stop_sweeper.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=1.0)
+            self._sweeper = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size, capacity and hit/miss/eviction/expiration counters."""
+        with self._lock:
+            total_requests = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": self.stats["hits"] / total_requests if total_requests > 0 else 0,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl
+            }
+
+    def reset_stats(self):
+        """Reset hit/miss/eviction/expiration counters."""
+        with self._lock:
+            self.stats = dict.fromkeys(self.stats, 0)
+
+
+def _sweep(cache_ref: "weakref.ref[TTLCache]", interval: float, stop: threading.Event):
+    """Periodically expire entries until the cache is stopped or collected."""
+    while not stop.wait(interval):
+        cache = cache_ref()
+        if cache is None:
+            return
+        try:
+            removed = cache.expire()
+            if removed:
+                logger.debug(f"🧹 {cache.name}: swept {removed} expired entries")
+        except Exception as e:
+            logger.warning(f"{cache.name} sweep failed: {e}")
+        del cache
@@ -0,0 +1,234 @@
+"""
+WebSocket Fan-out
+Broadcast subsystem for WebSocket services.
+
+Each message is serialized once. Every connection gets a bounded outbound
+queue drained by its own writer task, so sockets are written to concurrently.
+A slow or stalled client only fills its own queue; what happens then is set by
+``SlowConsumerPolicy``.
+"""
+
+import asyncio
+import json
+import logging
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class SlowConsumerPolicy(str, Enum):
+    """What to do when a connection's outbound queue is full."""
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    DISCONNECT = "disconnect"
+
+
+def serialize_message(message: Any) -> str:
+    """Serialize a message once, in the compact form Starlette's ``send_json`` uses."""
+    if isinstance(message, str):
+        return message
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class ConnectionSender:
+    """Outbound queue and writer task for one WebSocket connection."""
+
+    def __init__(
+        self,
+        websocket: Any,
+        group: str,
+        max_queue: int = 256,
+        send_timeout: float = 10.0,
+        policy: SlowConsumerPolicy = SlowConsumerPolicy.DROP_OLDEST,
+        on_close: Optional[Callable[["ConnectionSender"], Awaitable[None]]] = None
+    ):
+        self.websocket = websocket
+        self.group = group
+        self.send_timeout = send_timeout
+        self.policy = policy
+        self._on_close = on_close
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=max_queue)
+        self._writer = asyncio.create_task(self._run())
+        self.closed = False
+        self._closing = False
+        self.stats = {
+            "queued": 0,
+            "sent": 0,
+            "dropped": 0
+        }
+
+    def enqueue(self, text: str) -> bool:
+        """Queue an already serialized message without waiting; False if it was dropped."""
+        if self.closed or self._closing:
+            return False
+        try:
+            self._queue.put_nowait(text)
+        except asyncio.QueueFull:
+            if self.policy == SlowConsumerPolicy.DISCONNECT:
+                logger.warning(f"Disconnecting slow WebSocket consumer in group {self.group}")
+                self._closing = True
+                asyncio.ensure_future(self.close())
+                return False
+            self.stats["dropped"] += 1
+            if self.policy == SlowConsumerPolicy.DROP_NEWEST:
+                return False
+            self._queue.get_nowait()
+            self._queue.task_done()
+            self._queue.put_nowait(text)
+        self.stats["queued"] += 1
+        return True
+
+    async def _run(self):
+        """Drain the queue to the socket; stops on the first failed or stalled send."""
+        try:
+            while True:
+                text = await self._queue.get()
+                try:
+                    await asyncio.wait_for(self.websocket.send_text(text), timeout=self.send_timeout)
+                finally:
+                    self._queue.task_done()
+                self.stats["sent"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.info(f"WebSocket writer for group {self.group} stopped: {str(e)}")
+            asyncio.ensure_future(self.close())
+
+    async def drain(self):
+        """Wait until every queued message has been handed to the socket."""
+        await self._queue.join()
+
+    async def close(self, close_socket: bool = True):
+        """Stop the writer and optionally close the socket; idempotent."""
+        if self.closed:
+            return
+        self.closed = True
+        if self._writer is not asyncio.current_task():
+            self._writer.cancel()
+        # Release anyone waiting in drain()
+        while not self._queue.empty():
+            self._queue.get_nowait()
+            self._queue.task_done()
+        if close_socket:
+            try:
+                await self.websocket.close()
+            except Exception:
+                pass
+        if self._on_close is not None:
+            await self._on_close(self)
+
+
+class FanoutHub:
+    """Registry of connection senders, grouped by an owner key such as a user ID."""
+
+    def __init__(
+        self,
+        max_queue: int = 256,
+        send_timeout: float = 10.0,
+        policy: SlowConsumerPolicy = SlowConsumerPolicy.DROP_OLDEST,
+        on_disconnect: Optional[Callable[[Any, str], Awaitable[None]]] = None
+    ):
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.policy = policy
+        self._on_disconnect = on_disconnect
+        self._senders: Dict[int, ConnectionSender] = {}
+        self._groups: Dict[str, Set[ConnectionSender]] = {}
+
+    def register(self, websocket: Any, group: str) -> ConnectionSender:
+        """Start a writer for ``websocket`` under ``group`` (must run inside the event loop)."""
+        sender = ConnectionSender(
+            websocket,
+            group,
+            max_queue=self.max_queue,
+            send_timeout=self.send_timeout,
+            policy=self.policy,
+            on_close=self._sender_closed
+        )
+        self._senders[id(websocket)] = sender
+        self._groups.setdefault(group, set()).add(sender)
+        return sender
+
+    async def unregister(self, websocket: Any, close_socket: bool = False):
+        """Stop the writer of ``websocket``; the socket stays open unless ``close_socket``."""
+        sender = self._senders.get(id(websocket))
+        if sender is not None:
+            await sender.close(close_socket=close_socket)
+
+    def _discard(self, sender: ConnectionSender):
+        if self._senders.get(id(sender.websocket)) is sender:
+            del self._senders[id(sender.websocket)]
+        group = self._groups.get(sender.group)
+        if group is not None:
+            group.discard(sender)
+            if not group:
+                del self._groups[sender.group]
+
+    async def _sender_closed(self, sender: ConnectionSender):
+        self._discard(sender)
+        if self._on_disconnect is not None:
+            await self._on_disconnect(sender.websocket, sender.group)
+
+    def broadcast(
+        self,
+        message: Any,
+        groups: Optional[Iterable[str]] = None,
+        exclude: Optional[str] = None
+    ) -> int:
+        """Queue ``message`` for every connection (or those in ``groups``).
+
+        Returns the number of connections it was queued for; never waits on a socket.
+        """
+        text = serialize_message(message)
+        if groups is None:
+            targets = [sender for sender in self._senders.values() if sender.group != exclude]
+        else:
+            targets = [
+                sender
+                for group in groups if group != exclude
+                for sender in self._groups.get(group, ())
+            ]
+        return sum(sender.enqueue(text) for sender in targets)
+
+    def send_to_group(self, group: str, message: Any) -> int:
+        """Queue ``message`` for every connection in ``group``."""
+        return self.broadcast(message, groups=(group,))
+
+    def connection_count(self) -> int:
+        return len(self._senders)
+
+    async def drain(self):
+        """Wait for all queued messages to be written (tests and shutdown)."""
+        await asyncio.gather(*[sender.drain() for sender in list(self._senders.values())])
+
+    async def close(self):
+        """Close every connection."""
+        await asyncio.gather(*[sender.close() for sender in list(self._senders.values())])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get connection count and queued/sent/dropped totals."""
+        totals = {"queued": 0, "sent": 0, "dropped": 0}
+        for sender in self._senders.values():
+            for key in totals:
+                totals[key] += sender.stats[key]
+        return {
+            "connections": len(self._senders),
+            "groups": len(self._groups),
+            "policy": self.policy.value,
+            **totals
+        }
+
+
+def create_fanout_hub(
+    on_disconnect: Optional[Callable[[Any, str], Awaitable[None]]] = None
+) -> FanoutHub:
+    """Build a hub using the WS_* settings."""
+    from app.core.config import get_settings
+    settings = get_settings()
+    return FanoutHub(
+        max_queue=settings.WS_SEND_QUEUE_SIZE,
+        send_timeout=settings.WS_SEND_TIMEOUT,
+        policy=SlowConsumerPolicy(settings.WS_SLOW_CONSUMER_POLICY),
+        on_disconnect=on_disconnect
+    )
@@ -1,4 +1,4 @@
-from typing import List, Optional, Dict, Union
+from typing import Any, Iterable, List, Optional, Dict, Set, Tuple, Union
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_
@@ -12,13 +12,18 @@ from app.dashboard.schemas.access_control import (
     RoleAssignmentCreate, RoleAssignmentUpdate, PermissionOverrideCreate,
     PermissionOverrideUpdate, RoleHierarchyCreate, RoleTemplateCreate
 )
+from app.dashboard.services.permission_cache import (
+    CompiledPermissions, PermissionCache, get_permission_cache, permission_key
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
 class AccessControlService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, permission_cache: Optional[PermissionCache] = None):
         self.db = db
+        # Shared by all instances; every write below invalidates what it affects
+        self.permission_cache = permission_cache or get_permission_cache()
 
     # Permission Management
     async def create_permission(self, permission: PermissionCreate) -> Permission:
@@ -68,6 +73,7 @@ class AccessControlService:
             db_permission.updated_at = datetime.utcnow()
             self.db.commit()
             self.db.refresh(db_permission)
+            self.permission_cache.invalidate_permission(db_permission.id)
             return db_permission
         except Exception as e:
             self.db.rollback()
@@ -80,6 +86,7 @@ class AccessControlService:
             db_permission = await self.get_permission(permission_id)
             self.db.delete(db_permission)
             self.db.commit()
+            self.permission_cache.invalidate_permission(db_permission.id)
         except Exception as e:
             self.db.rollback()
             logger.error(f"Error deleting permission: {str(e)}")
@@ -137,6 +144,7 @@ class AccessControlService:
             db_role.updated_at = datetime.utcnow()
             self.db.commit()
             self.db.refresh(db_role)
+            self.permission_cache.invalidate_role(db_role.id)
             return db_role
         except Exception as e:
             self.db.rollback()
@@ -149,6 +157,7 @@ class AccessControlService:
             db_role = await self.get_role(role_id)
             self.db.delete(db_role)
             self.db.commit()
+            self.permission_cache.invalidate_hierarchy(db_role.id)
         except Exception as e:
             self.db.rollback()
             logger.error(f"Error deleting role: {str(e)}")
@@ -162,6 +171,7 @@ class AccessControlService:
             role.permissions.append(permission)
             self.db.commit()
             self.db.refresh(role)
+            self.permission_cache.invalidate_role(role.id)
             return role
         except Exception as e:
             self.db.rollback()
@@ -176,6 +186,7 @@ class AccessControlService:
             role.permissions.remove(permission)
             self.db.commit()
             self.db.refresh(role)
+            self.permission_cache.invalidate_role(role.id)
             return role
         except Exception as e:
             self.db.rollback()
@@ -202,6 +213,7 @@ class AccessControlService:
             self.db.add(db_assignment)
             self.db.commit()
             self.db.refresh(db_assignment)
+            self.permission_cache.invalidate_user(assignment.user_id)
             return db_assignment
         except Exception as e:
             self.db.rollback()
@@ -236,11 +248,14 @@ class AccessControlService:
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Role assignment not found"
                 )
+            previous_user_id = db_assignment.user_id
             for key, value in assignment.model_dump(exclude_unset=True).items():
                 setattr(db_assignment, key, value)
             db_assignment.updated_at = datetime.utcnow()
             self.db.commit()
             self.db.refresh(db_assignment)
+            self.permission_cache.invalidate_user(previous_user_id)
+            self.permission_cache.invalidate_user(db_assignment.user_id)
             return db_assignment
         except Exception as e:
             self.db.rollback()
@@ -258,6 +273,7 @@ class AccessControlService:
                 )
             self.db.delete(db_assignment)
             self.db.commit()
+            self.permission_cache.invalidate_user(db_assignment.user_id)
         except Exception as e:
             self.db.rollback()
             logger.error(f"Error revoking role: {str(e)}")
@@ -288,6 +304,7 @@ class AccessControlService:
             self.db.add(db_override)
             self.db.commit()
             self.db.refresh(db_override)
+            self.permission_cache.invalidate_user(override.user_id)
             return db_override
         except Exception as e:
             self.db.rollback()
@@ -307,11 +324,14 @@ class AccessControlService:
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Permission override not found"
                 )
+            previous_user_id = db_override.user_id
             for key, value in override.model_dump(exclude_unset=True).items():
                 setattr(db_override, key, value)
             db_override.updated_at = datetime.utcnow()
             self.db.commit()
             self.db.refresh(db_override)
+            self.permission_cache.invalidate_user(previous_user_id)
+            self.permission_cache.invalidate_user(db_override.user_id)
             return db_override
         except Exception as e:
             self.db.rollback()
@@ -329,6 +349,7 @@ class AccessControlService:
                 )
             self.db.delete(db_override)
             self.db.commit()
+            self.permission_cache.invalidate_user(db_override.user_id)
         except Exception as e:
             self.db.rollback()
             logger.error(f"Error deleting permission override: {str(e)}")
@@ -342,76 +363,114 @@ class AccessControlService:
         action: ActionType,
         resource_id: Optional[str] = None
     ) -> bool:
-        """Check if a user has permission to perform an action on a resource."""
-        try:
-            # Get user's active roles
-            roles = await self.get_user_roles(user_id)
-            
-            # Get all roles including inherited ones
-            all_roles = set()
-            for role in roles:
-                all_roles.add(role.id)
-                # Add inherited roles
-                inherited_roles = await self._get_inherited_roles(role.id)
-                all_roles.update(inherited_roles)
-            
-            # Check role-based permissions through RolePermission table
-            for role_id in all_roles:
-                role_permissions = self.db.query(Permission).join(
-                    RolePermission, Permission.id == RolePermission.permission_id
-                ).filter(RolePermission.role_id == role_id).all()
-                
-                for permission in role_permissions:
-                    if (permission.resource_type == resource_type and
-                        permission.action == action):
-                        return True
-
-            # Check permission overrides
-            overrides = self.db.query(PermissionOverride).filter(
-                and_(
-                    PermissionOverride.user_id == user_id,
-                    PermissionOverride.is_active == True,
-                    or_(
-                        PermissionOverride.expires_at == None,
-                        PermissionOverride.expires_at > datetime.utcnow()
-                    )
-                )
-            ).all()
-
-            for override in overrides:
-                permission = await self.get_permission(override.permission_id)
-                if (permission.resource_type == resource_type and
-                    permission.action == action):
-                    return override.is_allowed
+        """Check if a user has permission to perform an action on a resource.
 
-            return False
+        Role permissions (including inherited roles) grant access; otherwise the
+        first active override for the permission decides. Served from the
+        compiled per-user cache, so repeated checks run no queries.
+        """
+        try:
+            return self.get_compiled_permissions(user_id).allows(resource_type, action)
         except Exception as e:
             logger.error(f"Error checking permission: {str(e)}")
             return False
 
+    def get_compiled_permissions(self, user_id: Union[str, int]) -> CompiledPermissions:
+        """Get a user's compiled permissions, compiling them on a cache miss."""
+        compiled = self.permission_cache.get(user_id)
+        if compiled is None:
+            compiled, expires_in = self._compile_permissions(user_id)
+            self.permission_cache.put(user_id, compiled, expires_in)
+        return compiled
+
+    def _compile_permissions(self, user_id: Union[str, int]) -> Tuple[CompiledPermissions, Optional[float]]:
+        """Compile a user's effective permissions in three queries.
+
+        Returns the compiled permissions and the seconds until the earliest
+        active override expires (None if none expire).
+        """
+        role_ids = [
+            role_id for (role_id,) in self.db.query(RoleAssignment.role_id).filter(
+                RoleAssignment.user_id == user_id,
+                RoleAssignment.is_active == True
+            ).all()
+        ]
+        all_roles = self._expand_roles(role_ids)
+
+        decisions: Dict[Tuple[str, str], bool] = {}
+        permission_ids = set()
+        if all_roles:
+            role_permissions = self.db.query(
+                Permission.id, Permission.resource_type, Permission.action
+            ).join(
+                RolePermission, Permission.id == RolePermission.permission_id
+            ).filter(RolePermission.role_id.in_(all_roles)).all()
+            for permission_id, resource_type, action in role_permissions:
+                permission_ids.add(permission_id)
+                decisions[permission_key(resource_type, action)] = True
+
+        now = datetime.utcnow()
+        overrides = self.db.query(
+            PermissionOverride.permission_id,
+            PermissionOverride.is_allowed,
+            PermissionOverride.expires_at,
+            Permission.resource_type,
+            Permission.action
+        ).join(
+            Permission, Permission.id == PermissionOverride.permission_id
+        ).filter(
+            and_(
+                PermissionOverride.user_id == user_id,
+                PermissionOverride.is_active == True,
+                or_(
+                    PermissionOverride.expires_at == None,
+                    PermissionOverride.expires_at > now
+                )
+            )
+        ).order_by(PermissionOverride.id).all()
+
+        expires_in = None
+        for permission_id, is_allowed, expires_at, resource_type, action in overrides:
+            permission_ids.add(permission_id)
+            # Role grants win; otherwise the first override decides
+            decisions.setdefault(permission_key(resource_type, action), bool(is_allowed))
+            if expires_at is not None:
+                remaining = (expires_at - now).total_seconds()
+                expires_in = remaining if expires_in is None else min(expires_in, remaining)
+
+        compiled = CompiledPermissions(decisions, frozenset(all_roles), frozenset(permission_ids))
+        return compiled, expires_in
+
+    def _get_role_parents(self) -> Dict[Any, List[Any]]:
+        """Parent role IDs by child role ID, loaded in one query and cached."""
+        parents = self.permission_cache.get_hierarchy()
+        if parents is None:
+            parents = {}
+            for child_id, parent_id in self.db.query(
+                RoleHierarchy.child_role_id, RoleHierarchy.parent_role_id
+            ).all():
+                parents.setdefault(child_id, []).append(parent_id)
+            self.permission_cache.set_hierarchy(parents)
+        return parents
+
+    def _expand_roles(self, role_ids: Iterable[Union[str, int]]) -> Set[Union[str, int]]:
+        """Get the given roles plus every role they inherit from."""
+        parents = self._get_role_parents()
+        all_roles = set()
+        to_visit = list(role_ids)
+        while to_visit:
+            current_id = to_visit.pop()
+            if current_id in all_roles:
+                continue
+            all_roles.add(current_id)
+            to_visit.extend(parents.get(current_id, ()))
+        return all_roles
+
     async def _get_inherited_roles(self, role_id: Union[str, int]) -> set:
         """Get all inherited roles for a given role."""
         try:
-            inherited_roles = set()
-            visited = set()
-            to_visit = [role_id]
-            
-            while to_visit:
-                current_id = to_visit.pop(0)
-                if current_id in visited:
-                    continue
-                visited.add(current_id)
-                
-                # Get all parent roles of current role
-                parents = self.db.query(RoleHierarchy).filter(
-                    RoleHierarchy.child_role_id == current_id
-                ).all()
-                
-                for parent in parents:
-                    inherited_roles.add(parent.parent_role_id)
-                    to_visit.append(parent.parent_role_id)
-            
-            return inherited_roles
+            parents = self._get_role_parents()
+            return self._expand_roles(parents.get(role_id, ()))
         except Exception as e:
             logger.error(f"Error getting inherited roles: {str(e)}")
             return set()
@@ -423,23 +482,14 @@ class AccessControlService:
             user_roles = await self.get_user_roles(user_id)
             
             # Get all roles including inherited ones
-            all_roles = set()
-            for role in user_roles:
-                all_roles.add(role.id)
-                # Add inherited roles
-                inherited_roles = await self._get_inherited_roles(role.id)
-                all_roles.update(inherited_roles)
+            all_roles = self._expand_roles(role.id for role in user_roles)
+            if not all_roles:
+                return []
             
             # Get all permissions from user's roles
-            effective_permissions = []
-            for role_id in all_roles:
-                role_permissions = self.db.query(Permission).join(
-                    RolePermission, Permission.id == RolePermission.permission_id
-                ).filter(RolePermission.role_id == role_id).all()
-                
-                effective_permissions.extend(role_permissions)
-            
-            return effective_permissions
+            return self.db.query(Permission).join(
+                RolePermission, Permission.id == RolePermission.permission_id
+            ).filter(RolePermission.role_id.in_(all_roles)).all()
         except Exception as e:
             logger.error(f"Error getting effective permissions: {str(e)}")
             raise
@@ -477,6 +527,7 @@ class AccessControlService:
                     self.db.delete(db_hierarchy)
 
             self.db.commit()
+            self.permission_cache.invalidate_hierarchy(child_role.id)
 
             # Return the updated hierarchy
             return await self.get_role_hierarchy()
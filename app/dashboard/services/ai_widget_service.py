@@ -589,58 +589,24 @@ class AIWidgetService:
                     "recommendations": []
                 }
             
-            # Get attendance records for these students
-            # Use raw SQL to avoid relationship loading and handle date/datetime properly
-            cutoff_date = date.today() - timedelta(days=30)
-            attendance_data = self.db.execute(text("""
-                SELECT 
-                    student_id,
-                    date,
-                    status
-                FROM physical_education_attendance
-                WHERE student_id = ANY(:student_ids)
-                AND date >= :cutoff_date
-            """), {
-                "student_ids": student_ids,
-                "cutoff_date": cutoff_date
-            }).fetchall()
-            
-            # Convert to simple objects for pattern analysis
-            class AttendanceRecord:
-                def __init__(self, student_id, record_date, status):
-                    self.student_id = student_id
-                    # Handle both date and datetime types
-                    if isinstance(record_date, date):
-                        self.date = record_date
-                    elif hasattr(record_date, 'date'):
-                        self.date = record_date.date()
-                    else:
-                        self.date = record_date
-                    self.status = status
-                    self.class_id = class_id  # Store class_id for reference
-            
-            attendance_records = [
-                AttendanceRecord(row[0], row[1], row[2])
-                for row in attendance_data
-            ]
-            
-            # Add class_id to each record for _identify_at_risk_students
-            for record in attendance_records:
-                record.class_id = class_id
+            # Aggregate attendance in the database: one grouped query returns
+            # present/total counts per student, weekday and week window
+            counts = self._get_attendance_counts(student_ids)
             
             # Analyze patterns
-            patterns = self._analyze_attendance_patterns(attendance_records)
+            patterns = self._analyze_attendance_patterns(counts)
             
             # Predict future attendance
             predictions = self._predict_future_attendance(
-                attendance_records,
+                counts,
                 days_ahead=days_ahead
             )
             
             # Identify at-risk students
             at_risk_students = self._identify_at_risk_students(
                 class_id,
-                attendance_records
+                counts,
+                student_ids
             )
             
             return {
@@ -659,9 +625,79 @@ class AIWidgetService:
                 detail=f"Error predicting attendance patterns: {str(e)}"
             )
     
-    def _analyze_attendance_patterns(self, records: List) -> Dict[str, Any]:
+    # Week windows used for trends: last 7 days vs the 7 days before
+    ATTENDANCE_WINDOWS = ("recent", "previous", "older")
+    
+    def _get_attendance_counts(self, student_ids: List[int], days: int = 30) -> Dict[str, Any]:
+        """
+        Count present/total attendance over the last ``days`` days in one grouped query.
+        
+        Returns present/total pairs overall, per weekday (Monday=0), per week
+        window and per student (overall and recent window).
+        """
+        today = date.today()
+        rows = self.db.execute(text("""
+            SELECT
+                student_id,
+                CAST(EXTRACT(ISODOW FROM date) AS INTEGER) - 1 AS weekday,
+                CASE
+                    WHEN date >= :recent_cutoff THEN 'recent'
+                    WHEN date >= :previous_cutoff THEN 'previous'
+                    ELSE 'older'
+                END AS week_window,
+                COUNT(*) AS total,
+                COUNT(*) FILTER (WHERE LOWER(CAST(status AS TEXT)) = 'present') AS present
+            FROM physical_education_attendance
+            WHERE student_id = ANY(:student_ids)
+            AND date >= :cutoff_date
+            GROUP BY 1, 2, 3
+        """), {
+            "student_ids": student_ids,
+            "cutoff_date": today - timedelta(days=days),
+            "recent_cutoff": today - timedelta(days=7),
+            "previous_cutoff": today - timedelta(days=14)
+        }).fetchall()
+        return self._aggregate_attendance_counts(rows)
+    
+    @classmethod
+    def _aggregate_attendance_counts(cls, rows) -> Dict[str, Any]:
+        """Fold (student_id, weekday, window, total, present) rows into count tables."""
+        counts = {
+            "present": 0,
+            "total": 0,
+            "by_weekday": {},
+            "by_window": {window: {"present": 0, "total": 0} for window in cls.ATTENDANCE_WINDOWS},
+            "by_student": {}
+        }
+        for student_id, weekday, window, total, present in rows:
+            counts["present"] += present
+            counts["total"] += total
+            
+            day = counts["by_weekday"].setdefault(weekday, {"present": 0, "total": 0})
+            day["present"] += present
+            day["total"] += total
+            
+            counts["by_window"][window]["present"] += present
+            counts["by_window"][window]["total"] += total
+            
+            student = counts["by_student"].setdefault(
+                student_id,
+                {"present": 0, "total": 0, "recent_present": 0, "recent_total": 0}
+            )
+            student["present"] += present
+            student["total"] += total
+            if window == "recent":
+                student["recent_present"] += present
+                student["recent_total"] += total
+        return counts
+    
+    @staticmethod
+    def _rate(present: int, total: int) -> float:
+        return (present / total) * 100 if total else 0
+    
+    def _analyze_attendance_patterns(self, counts: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze historical attendance patterns."""
-        if not records:
+        if not counts["total"]:
             return {
                 "total_records": 0,
                 "average_attendance_rate": 0,
@@ -669,43 +705,28 @@ class AIWidgetService:
                 "trend": "insufficient_data"
             }
         
-        total_records = len(records)
-        present_count = sum(1 for r in records if r.status.lower() == "present")
-        attendance_rate = (present_count / total_records) * 100 if total_records > 0 else 0
+        attendance_rate = self._rate(counts["present"], counts["total"])
         
         # Day of week patterns
-        day_patterns = {}
-        for day in range(7):
-            day_records = [r for r in records if r.date.weekday() == day]
-            if day_records:
-                day_present = sum(1 for r in day_records if r.status.lower() == "present")
-                day_patterns[day] = {
-                    "total": len(day_records),
-                    "present": day_present,
-                    "rate": (day_present / len(day_records)) * 100 if day_records else 0
-                }
+        day_patterns = {
+            day: {
+                "total": day_counts["total"],
+                "present": day_counts["present"],
+                "rate": self._rate(day_counts["present"], day_counts["total"])
+            }
+            for day, day_counts in sorted(counts["by_weekday"].items())
+        }
         
         # Trend analysis (last 7 days vs previous 7 days)
-        today = date.today()
-        recent_records = [r for r in records if r.date >= today - timedelta(days=7)]
-        previous_records = [
-            r for r in records 
-            if today - timedelta(days=14) <= r.date < today - timedelta(days=7)
-        ]
-        
-        recent_rate = (
-            (sum(1 for r in recent_records if r.status.lower() == "present") / len(recent_records)) * 100
-            if recent_records else 0
-        )
-        previous_rate = (
-            (sum(1 for r in previous_records if r.status.lower() == "present") / len(previous_records)) * 100
-            if previous_records else 0
-        )
+        recent = counts["by_window"]["recent"]
+        previous = counts["by_window"]["previous"]
+        recent_rate = self._rate(recent["present"], recent["total"])
+        previous_rate = self._rate(previous["present"], previous["total"])
         
         trend = "improving" if recent_rate > previous_rate else "declining" if recent_rate < previous_rate else "stable"
         
         return {
-            "total_records": total_records,
+            "total_records": counts["total"],
             "average_attendance_rate": round(attendance_rate, 2),
             "day_of_week_patterns": day_patterns,
             "trend": trend,
@@ -715,11 +736,11 @@ class AIWidgetService:
     
     def _predict_future_attendance(
         self,
-        records: List,
+        counts: Dict[str, Any],
         days_ahead: int = 7
     ) -> List[Dict[str, Any]]:
         """Predict future attendance based on historical patterns."""
-        if not records:
+        if not counts["total"]:
             return []
         
         predictions = []
@@ -729,12 +750,12 @@ class AIWidgetService:
             target_date = base_date + timedelta(days=day)
             day_of_week = target_date.weekday()
             
-            # Get historical data for this day of week
-            day_records = [r for r in records if r.date.weekday() == day_of_week]
+            # Historical counts for this day of week
+            day_counts = counts["by_weekday"].get(day_of_week, {"present": 0, "total": 0})
+            day_total = day_counts["total"]
             
-            if day_records:
-                day_present = sum(1 for r in day_records if r.status.lower() == "present")
-                predicted_rate = (day_present / len(day_records)) * 100 if day_records else 85.0
+            if day_total:
+                predicted_rate = self._rate(day_counts["present"], day_total)
             else:
                 predicted_rate = 85.0  # Default prediction
             
@@ -742,7 +763,7 @@ class AIWidgetService:
                 "date": target_date.isoformat(),
                 "day_of_week": day_of_week,
                 "predicted_attendance_rate": round(predicted_rate, 2),
-                "confidence": "high" if len(day_records) >= 10 else "medium" if len(day_records) >= 5 else "low"
+                "confidence": "high" if day_total >= 10 else "medium" if day_total >= 5 else "low"
             })
         
         return predictions
@@ -750,54 +771,56 @@ class AIWidgetService:
     def _identify_at_risk_students(
         self,
         class_id: int,
-        records: List
+        counts: Dict[str, Any],
+        student_ids: Optional[List[int]] = None
     ) -> List[Dict[str, Any]]:
         """Identify students at risk of attendance issues."""
-        # Get all students in class using raw SQL to avoid relationship loading
-        student_ids_data = self.db.execute(text("""
-            SELECT student_id FROM physical_education_class_students
-            WHERE class_id = :class_id AND status = 'ACTIVE'
-        """), {"class_id": class_id}).fetchall()
+        if student_ids is None:
+            # Get all students in class using raw SQL to avoid relationship loading
+            student_ids_data = self.db.execute(text("""
+                SELECT student_id FROM physical_education_class_students
+                WHERE class_id = :class_id AND status = 'ACTIVE'
+            """), {"class_id": class_id}).fetchall()
+            student_ids = [row[0] for row in student_ids_data]
+        
+        # At risk: attendance < 85% and declining over the last 7 days
+        flagged = []
+        for student_id in student_ids:
+            student = counts["by_student"].get(student_id)
+            if not student or not student["total"]:
+                continue
+            attendance_rate = self._rate(student["present"], student["total"])
+            if attendance_rate < 85.0 and student["recent_total"]:
+                recent_rate = self._rate(student["recent_present"], student["recent_total"])
+                if recent_rate < attendance_rate:  # Declining
+                    flagged.append((student_id, attendance_rate, recent_rate))
+        
+        if not flagged:
+            return []
         
-        student_ids = [row[0] for row in student_ids_data]
+        # Get student names in one query using raw SQL
+        student_rows = self.db.execute(text("""
+            SELECT id, first_name, last_name FROM students WHERE id = ANY(:student_ids)
+        """), {"student_ids": [student_id for student_id, _, _ in flagged]}).fetchall()
+        student_info = {row[0]: row for row in student_rows}
         
         at_risk = []
-        for student_id in student_ids:
-            student_records = [r for r in records if r.student_id == student_id]
-            
-            if student_records:
-                present_count = sum(1 for r in student_records if r.status.lower() == "present")
-                attendance_rate = (present_count / len(student_records)) * 100
-                
-                # Check if at risk (attendance < 85% or declining trend)
-                if attendance_rate < 85.0:
-                    today = date.today()
-                    recent_records = [r for r in student_records if r.date >= today - timedelta(days=7)]
-                    if recent_records:
-                        recent_rate = (
-                            sum(1 for r in recent_records if r.status.lower() == "present") / len(recent_records)
-                        ) * 100
-                        
-                        if recent_rate < attendance_rate:  # Declining
-                            # Get student name using raw SQL
-                            student_info = self.db.execute(text("""
-                                SELECT id, first_name, last_name FROM students WHERE id = :student_id
-                            """), {"student_id": student_id}).first()
-                            
-                            if student_info:
-                                student_name = f"{student_info[1]} {student_info[2]}" if student_info[1] and student_info[2] else "Unknown"
-                                
-                                at_risk.append({
-                                    "student_id": student_id,
-                                    "student_name": student_name,
-                                    "attendance_rate": round(attendance_rate, 2),
-                                    "recent_rate": round(recent_rate, 2),
-                                    "risk_level": "high" if attendance_rate < 75 else "medium",
-                                    "recommendations": self._get_student_intervention_recommendations(
-                                        attendance_rate,
-                                        recent_rate
-                                    )
-                                })
+        for student_id, attendance_rate, recent_rate in flagged:
+            info = student_info.get(student_id)
+            if not info:
+                continue
+            student_name = f"{info[1]} {info[2]}" if info[1] and info[2] else "Unknown"
+            at_risk.append({
+                "student_id": student_id,
+                "student_name": student_name,
+                "attendance_rate": round(attendance_rate, 2),
+                "recent_rate": round(recent_rate, 2),
+                "risk_level": "high" if attendance_rate < 75 else "medium",
+                "recommendations": self._get_student_intervention_recommendations(
+                    attendance_rate,
+                    recent_rate
+                )
+            })
         
         return sorted(at_risk, key=lambda x: x["attendance_rate"])
     
@@ -1,10 +1,10 @@
 from typing import Dict, Any, Optional
-import openai
 import json
 import logging
 import base64
 import os
 from sqlalchemy.orm import Session
+from app.core.llm_client import get_llm_client_pool
 from app.dashboard.services.tool_registry_service import ToolRegistryService
 from app.dashboard.services.gpt_coordination_service import GPTCoordinationService
 from app.dashboard.services.ai_widget_service import AIWidgetService
@@ -68,7 +68,7 @@ class GPTFunctionService:
         comprehensive_system_prompt = ENHANCED_SYSTEM_PROMPT
 
         # Call OpenAI with the command and available tools
-        response = await openai.ChatCompletion.acreate(
+        response = await get_llm_client_pool().chat_completion(
             model="gpt-4-0613",
             messages=[
                 {"role": "system", "content": comprehensive_system_prompt},
@@ -90,7 +90,7 @@ class GPTFunctionService:
             result = await self._execute_function_call(function_name, function_args, user_id)
             
             # Get a natural language response about the result
-            follow_up = await openai.ChatCompletion.acreate(
+            follow_up = await get_llm_client_pool().chat_completion(
                 model="gpt-4-0613",
                 messages=[
                     {"role": "system", "content": "You are an AI dashboard assistant. Explain the result of the tool execution in a friendly, helpful way."},
@@ -1342,7 +1342,7 @@ class GPTFunctionService:
         available_tools = self.tool_registry.get_user_tools(user_id)
         
         # Get GPT suggestion
-        response = await openai.ChatCompletion.acreate(
+        response = await get_llm_client_pool().chat_completion(
             model="gpt-4-0613",
             messages=[
                 {"role": "system", "content": "You are an AI dashboard assistant. Suggest relevant tools based on the user's context."},
@@ -46,6 +46,9 @@ import tempfile
 from pathlib import Path
 import uuid
 
+from app.core.quantile_sketch import WindowedSketch
+from app.dashboard.services.timeseries_store import TimeSeriesStore, to_seconds
+
 logger = logging.getLogger(__name__)
 
 # Define TypeVar for generic type hints
@@ -290,7 +293,7 @@ class MonitoringService:
         Initialize the monitoring service with enhanced capabilities.
         
         Args:
-            max_metrics_per_type: Maximum number of metrics to store per type
+            max_metrics_per_type: Maximum number of points kept per metric series (type and name)
             metric_ttl: Time-to-live for metrics in seconds
             cleanup_interval: Interval for cleaning up expired metrics in seconds
             host_name: Optional host name for metrics
@@ -315,7 +318,11 @@ class MonitoringService:
             impact_config: Configuration for impact analysis
             risk_config: Configuration for risk assessment
         """
-        self._metrics: Dict[MetricType, List[Metric]] = {m: [] for m in MetricType}
+        # One ring buffer per (type, name); see timeseries_store
+        self._store = TimeSeriesStore(capacity=max_metrics_per_type)
+        # Per-minute quantile sketches per (type, name) back summary percentiles
+        self._sketches: Dict[Tuple[MetricType, str], WindowedSketch] = {}
+        self._sketch_lock = threading.Lock()
         self._max_metrics_per_type = max_metrics_per_type
         self._metric_ttl = metric_ttl
         self._cleanup_interval = cleanup_interval
@@ -324,7 +331,6 @@ class MonitoringService:
         self._worker_thread.start()
         self._last_cleanup = datetime.utcnow()
         self._host_name = host_name or socket.gethostname()
-        self._metric_aggregates = defaultdict(lambda: defaultdict(list))
         self._alert_thresholds = {
             'cpu': 80.0,
             'memory': 85.0,
@@ -722,26 +728,24 @@ class MonitoringService:
             List of detected anomalies
         """
         try:
-            metrics = self.get_metrics(metric_type, metric_name, *time_range if time_range else (None, None))
-            if not metrics:
+            _, values, metrics = self._store.window(metric_type, metric_name, *time_range if time_range else (None, None))
+            if not len(values):
                 return []
 
-            values = [m.value for m in metrics[metric_type.value]]
-            mean = np.mean(values)
-            std = np.std(values)
-            
-            anomalies = []
-            for i, value in enumerate(values):
-                if abs(value - mean) > sensitivity * std:
-                    anomalies.append({
-                        'timestamp': metrics[metric_type.value][i].timestamp,
-                        'value': value,
-                        'deviation': (value - mean) / std,
-                        'metric_type': metric_type.value,
-                        'metric_name': metric_name
-                    })
-            
-            return anomalies
+            mean = values.mean()
+            std = values.std()
+            
+            deviations = np.abs(values - mean)
+            return [
+                {
+                    'timestamp': metrics[i].timestamp,
+                    'value': float(values[i]),
+                    'deviation': float((values[i] - mean) / std),
+                    'metric_type': metric_type.value,
+                    'metric_name': metric_name
+                }
+                for i in np.flatnonzero(deviations > sensitivity * std)
+            ]
         except Exception as e:
             logger.error(f"Failed to detect anomalies: {e}")
             return []
@@ -764,16 +768,11 @@ class MonitoringService:
             Dictionary containing trend analysis results
         """
         try:
-            metrics = self.get_metrics(metric_type, metric_name, *time_range if time_range else (None, None))
-            if not metrics:
+            x, y, _ = self._store.window(metric_type, metric_name, *time_range if time_range else (None, None))
+            if not len(y):
                 return {}
-
-            values = [m.value for m in metrics[metric_type.value]]
-            timestamps = [m.timestamp for m in metrics[metric_type.value]]
             
             # Calculate trend line using linear regression
-            x = np.array([t.timestamp() for t in timestamps])
-            y = np.array(values)
             slope, intercept = np.polyfit(x, y, 1)
             
             # Calculate trend metrics
@@ -912,26 +911,24 @@ class MonitoringService:
     def _sync_with_datadog(self, client: Any) -> None:
         """Sync metrics with Datadog."""
         try:
-            for metric_type, metrics in self._metrics.items():
-                for metric in metrics:
-                    client.Metric.send(
-                        metric=f"faraday.{metric_type.value}.{metric.name}",
-                        points=metric.value,
-                        tags=[f"{k}:{v}" for k, v in metric.tags.items()]
-                    )
+            for metric in self._store.iter_items():
+                client.Metric.send(
+                    metric=f"faraday.{metric.type.value}.{metric.name}",
+                    points=metric.value,
+                    tags=[f"{k}:{v}" for k, v in metric.tags.items()]
+                )
         except Exception as e:
             logger.error(f"Failed to sync with Datadog: {e}")
 
     def _sync_with_newrelic(self, client: Any) -> None:
         """Sync metrics with New Relic."""
         try:
-            for metric_type, metrics in self._metrics.items():
-                for metric in metrics:
-                    client.record_custom_metric(
-                        f"Faraday/{metric_type.value}/{metric.name}",
-                        metric.value,
-                        attributes=metric.tags
-                    )
+            for metric in self._store.iter_items():
+                client.record_custom_metric(
+                    f"Faraday/{metric.type.value}/{metric.name}",
+                    metric.value,
+                    attributes=metric.tags
+                )
         except Exception as e:
             logger.error(f"Failed to sync with New Relic: {e}")
 
@@ -970,7 +967,6 @@ class MonitoringService:
         for metric in metrics:
             if self._should_sample(metric):
                 self._store_metric(metric)
-                self._aggregate_metric(metric)
                 self._check_thresholds(metric)
 
     def _should_sample(self, metric: Metric) -> bool:
@@ -1364,7 +1360,6 @@ class MonitoringService:
             try:
                 metric = self._metric_queue.get()
                 self._store_metric(metric)
-                self._aggregate_metric(metric)
                 self._check_thresholds(metric)
                 self._metric_queue.task_done()
             except Exception as e:
@@ -1400,21 +1395,10 @@ class MonitoringService:
                     'message': f"{resource_type} usage exceeded threshold: {metric.value} > {threshold}"
                 })
 
-    def _aggregate_metric(self, metric: Metric) -> None:
-        """Aggregate metrics for statistical analysis."""
-        key = f"{metric.type}_{metric.name}"
-        self._metric_aggregates[key]['values'].append(metric.value)
-        if len(self._metric_aggregates[key]['values']) > 1000:  # Keep last 1000 values
-            self._metric_aggregates[key]['values'].pop(0)
-
     def _store_metric(self, metric: Metric) -> None:
-        """Store a metric in the appropriate collection."""
-        metrics = self._metrics[metric.type]
-        metrics.append(metric)
-        
-        # Clean up old metrics if needed
-        if len(metrics) > self._max_metrics_per_type:
-            self._metrics[metric.type] = metrics[-self._max_metrics_per_type:]
+        """Store a metric in its series (full series drop their oldest points)."""
+        self._store.append(metric.type, metric.name, metric.timestamp, metric.value, metric)
+        self._get_sketch(metric.type, metric.name).add(metric.value, to_seconds(metric.timestamp))
         
         # Periodically clean up expired metrics
         if (datetime.utcnow() - self._last_cleanup).total_seconds() > self._cleanup_interval:
@@ -1423,13 +1407,23 @@ class MonitoringService:
     def _cleanup_expired_metrics(self) -> None:
         """Remove expired metrics from storage."""
         cutoff_time = datetime.utcnow() - timedelta(seconds=self._metric_ttl)
-        for metric_type in self._metrics:
-            self._metrics[metric_type] = [
-                m for m in self._metrics[metric_type]
-                if m.timestamp > cutoff_time
-            ]
+        self._store.expire_before(cutoff_time)
+        with self._sketch_lock:
+            sketches = list(self._sketches.values())
+        for sketch in sketches:
+            sketch.expire_before(to_seconds(cutoff_time))
         self._last_cleanup = datetime.utcnow()
 
+    def _get_sketch(self, metric_type: MetricType, metric_name: str) -> WindowedSketch:
+        with self._sketch_lock:
+            sketch = self._sketches.get((metric_type, metric_name))
+            if sketch is None:
+                sketch = self._sketches[(metric_type, metric_name)] = WindowedSketch(
+                    interval=min(60, self._metric_ttl),
+                    retention=self._metric_ttl
+                )
+            return sketch
+
     def track_performance(
         self,
         metric_name: str,
@@ -1707,24 +1701,8 @@ class MonitoringService:
         Returns:
             Dictionary of filtered metrics
         """
-        filtered_metrics = {}
-        
-        for m_type, metrics in self._metrics.items():
-            if metric_type and m_type != metric_type:
-                continue
-                
-            filtered = metrics
-            if metric_name:
-                filtered = [m for m in filtered if m.name == metric_name]
-            if start_time:
-                filtered = [m for m in filtered if m.timestamp >= start_time]
-            if end_time:
-                filtered = [m for m in filtered if m.timestamp <= end_time]
-                
-            if filtered:
-                filtered_metrics[m_type.value] = filtered
-                
-        return filtered_metrics
+        filtered_metrics = self._store.query(metric_type, metric_name, start_time, end_time)
+        return {m_type.value: metrics for m_type, metrics in filtered_metrics.items()}
 
     def get_metric_summary(
         self,
@@ -1739,30 +1717,38 @@ class MonitoringService:
         Args:
             metric_type: Type of metric to summarize
             metric_name: Name of metric to summarize
-            start_time: Optional start time to filter by
-            end_time: Optional end time to filter by
+            start_time: Optional start time to filter by (resolved to one-minute intervals)
+            end_time: Optional end time to filter by (resolved to one-minute intervals)
             
         Returns:
             Dictionary containing statistical summary
         """
-        metrics = self.get_metrics(metric_type, metric_name, start_time, end_time)
-        if not metrics:
+        with self._sketch_lock:
+            windowed = self._sketches.get((metric_type, metric_name))
+        if windowed is None:
             return {}
-            
-        values = [m.value for m in metrics[metric_type.value]]
+        sketch = windowed.merged(
+            to_seconds(start_time) if start_time else None,
+            to_seconds(end_time) if end_time else None
+        )
+        if not sketch.count:
+            return {}
+
+        # Exact count/mean/min/max/stddev; percentiles within the sketch's relative accuracy
+        p25, p50, p75, p95, p99 = (sketch.quantile(q) for q in (0.25, 0.5, 0.75, 0.95, 0.99))
         return {
-            'count': len(values),
-            'mean': statistics.mean(values) if values else 0,
-            'median': statistics.median(values) if values else 0,
-            'min': min(values) if values else 0,
-            'max': max(values) if values else 0,
-            'stddev': statistics.stdev(values) if len(values) > 1 else 0,
+            'count': int(sketch.count),
+            'mean': sketch.mean,
+            'median': p50,
+            'min': sketch.min,
+            'max': sketch.max,
+            'stddev': sketch.stddev,
             'percentiles': {
-                '25': statistics.quantiles(values, n=4)[0] if values else 0,
-                '50': statistics.median(values) if values else 0,
-                '75': statistics.quantiles(values, n=4)[2] if values else 0,
-                '95': statistics.quantiles(values, n=20)[18] if values else 0,
-                '99': statistics.quantiles(values, n=100)[98] if values else 0
+                '25': p25,
+                '50': p50,
+                '75': p75,
+                '95': p95,
+                '99': p99
             }
         }
 
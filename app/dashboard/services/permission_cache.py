@@ -0,0 +1,111 @@
+"""
+Permission Cache
+Compiled effective permissions per user for AccessControlService.
+
+A user's roles (including inherited ones), their role permissions and active
+permission overrides are compiled into one map from (resource_type, action) to
+allow/deny. Checks are then one dict lookup. An entry lives until a write that
+affects it invalidates it, until the earliest of its overrides expires, or, as
+a bound on staleness across workers, until PERMISSION_CACHE_TTL passes.
+"""
+
+import logging
+import time
+from typing import Any, Callable, Dict, FrozenSet, List, NamedTuple, Optional, Tuple, Union
+
+from app.core.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+PermissionKey = Tuple[str, str]
+
+
+def permission_key(resource_type: Any, action: Any) -> PermissionKey:
+    """Normalize enum members and plain strings to one hashable key."""
+    return (getattr(resource_type, "value", resource_type), getattr(action, "value", action))
+
+
+class CompiledPermissions(NamedTuple):
+    """Effective permissions of one user."""
+    decisions: Dict[PermissionKey, bool]
+    role_ids: FrozenSet[Any]
+    permission_ids: FrozenSet[Any]
+
+    def allows(self, resource_type: Any, action: Any) -> bool:
+        return self.decisions.get(permission_key(resource_type, action), False)
+
+
+class PermissionCache:
+    """Process-wide store of compiled permissions plus the role hierarchy graph."""
+
+    _HIERARCHY_KEY = "hierarchy"
+
+    def __init__(
+        self,
+        maxsize: int = 10000,
+        ttl: Optional[float] = 300,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.ttl = ttl
+        self._users = TTLCache(maxsize=maxsize, ttl=ttl, name="permission_cache", clock=clock)
+        self._hierarchy = TTLCache(maxsize=1, ttl=ttl, name="role_hierarchy_cache", clock=clock)
+
+    @staticmethod
+    def _user_key(user_id: Union[str, int]) -> str:
+        return str(user_id)
+
+    def get(self, user_id: Union[str, int]) -> Optional[CompiledPermissions]:
+        return self._users.get(self._user_key(user_id))
+
+    def put(self, user_id: Union[str, int], compiled: CompiledPermissions, expires_in: Optional[float] = None):
+        """Store compiled permissions; ``expires_in`` caps the entry's lifetime (override expiry)."""
+        ttl = self.ttl
+        if expires_in is not None:
+            ttl = expires_in if ttl is None else min(ttl, expires_in)
+        self._users.set(self._user_key(user_id), compiled, ttl=ttl)
+
+    def get_hierarchy(self) -> Optional[Dict[Any, List[Any]]]:
+        """Parent role IDs by child role ID, if loaded."""
+        return self._hierarchy.get(self._HIERARCHY_KEY)
+
+    def set_hierarchy(self, parents: Dict[Any, List[Any]]):
+        self._hierarchy.set(self._HIERARCHY_KEY, parents)
+
+    def invalidate_user(self, user_id: Union[str, int]):
+        self._users.delete(self._user_key(user_id))
+
+    def invalidate_role(self, role_id: Any) -> int:
+        """Drop every user whose effective roles include ``role_id``."""
+        return self._users.delete_matching(lambda _, compiled: role_id in compiled.role_ids)
+
+    def invalidate_permission(self, permission_id: Any) -> int:
+        """Drop every user whose roles or overrides reference ``permission_id``."""
+        return self._users.delete_matching(lambda _, compiled: permission_id in compiled.permission_ids)
+
+    def invalidate_hierarchy(self, role_id: Any) -> int:
+        """Reload the hierarchy and drop users who inherit through ``role_id``."""
+        self._hierarchy.clear()
+        return self.invalidate_role(role_id)
+
+    def clear(self):
+        self._users.clear()
+        self._hierarchy.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self._users.get_stats()
+
+
+_permission_cache: Optional[PermissionCache] = None
+
+
+def get_permission_cache() -> PermissionCache:
+    """Get the process-wide cache, sized from the PERMISSION_CACHE_* settings."""
+    global _permission_cache
+    if _permission_cache is None:
+        from app.core.config import get_settings
+        settings = get_settings()
+        _permission_cache = PermissionCache(
+            maxsize=settings.PERMISSION_CACHE_MAX_USERS,
+            ttl=settings.PERMISSION_CACHE_TTL
+        )
+    return _permission_cache
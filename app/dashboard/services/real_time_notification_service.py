@@ -14,6 +14,8 @@ import json
 import pytz
 import openai
 
+from app.core.websocket_fanout import FanoutHub, create_fanout_hub
+
 from ..models import (
     DashboardUser as User,
     Organization,
@@ -23,10 +25,15 @@ from ..models import (
 )
 
 class ConnectionManager:
-    """Manage WebSocket connections."""
+    """Manage WebSocket connections.
+
+    Messages are serialized once and queued per connection; each socket has its
+    own writer task, so a slow client never delays the others.
+    """
     
-    def __init__(self):
+    def __init__(self, hub: Optional[FanoutHub] = None):
         self.active_connections: Dict[str, List[WebSocket]] = {}
+        self.hub = hub or create_fanout_hub(on_disconnect=self._forget)
 
     async def connect(self, websocket: WebSocket, user_id: str):
         """Connect a user's WebSocket."""
@@ -34,42 +41,26 @@ class ConnectionManager:
         if user_id not in self.active_connections:
             self.active_connections[user_id] = []
         self.active_connections[user_id].append(websocket)
+        self.hub.register(websocket, user_id)
 
-    async def disconnect(self, websocket: WebSocket, user_id: str):
-        """Disconnect a user's WebSocket."""
-        if user_id in self.active_connections:
+    async def _forget(self, websocket: WebSocket, user_id: str):
+        if websocket in self.active_connections.get(user_id, ()):
             self.active_connections[user_id].remove(websocket)
             if not self.active_connections[user_id]:
                 del self.active_connections[user_id]
 
+    async def disconnect(self, websocket: WebSocket, user_id: str):
+        """Disconnect a user's WebSocket."""
+        await self.hub.unregister(websocket)
+        await self._forget(websocket, user_id)
+
     async def send_personal_message(self, message: Dict[str, Any], user_id: str):
         """Send a message to a specific user."""
-        if user_id in self.active_connections:
-            dead_connections = []
-            for connection in self.active_connections[user_id]:
-                try:
-                    await connection.send_json(message)
-                except:
-                    dead_connections.append(connection)
-            
-            # Clean up dead connections
-            for dead in dead_connections:
-                await self.disconnect(dead, user_id)
+        self.hub.send_to_group(user_id, message)
 
     async def broadcast(self, message: Dict[str, Any], exclude: Optional[str] = None):
         """Broadcast a message to all connected users."""
-        dead_connections = []
-        for user_id, connections in self.active_connections.items():
-            if user_id != exclude:
-                for connection in connections:
-                    try:
-                        await connection.send_json(message)
-                    except:
-                        dead_connections.append((connection, user_id))
-        
-        # Clean up dead connections
-        for dead_conn, user_id in dead_connections:
-            await self.disconnect(dead_conn, user_id)
+        self.hub.broadcast(message, exclude=exclude)
 
 class RealTimeNotificationService:
     """Service for managing real-time notifications."""
@@ -0,0 +1,251 @@
+"""
+Time-Series Store
+Columnar ring-buffer storage for dashboard metrics.
+
+Each (metric type, name) series owns preallocated NumPy arrays of timestamps
+and values, kept in timestamp order, plus the original metric objects. A full
+series overwrites its oldest points. Time ranges are found by binary search,
+and count/sum/sum-of-squares are updated as points come and go. Range queries
+and summaries therefore cost O(log n + window) instead of a scan over every
+stored metric.
+"""
+
+import heapq
+import math
+import threading
+from datetime import datetime
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+def to_seconds(timestamp: datetime) -> float:
+    """Timestamps are stored as float seconds (naive datetimes keep their own convention)."""
+    return timestamp.timestamp()
+
+
+class RingBufferSeries:
+    """Fixed-capacity, timestamp-ordered series backed by NumPy arrays."""
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._timestamps = np.empty(capacity, dtype=np.float64)
+        self._values = np.empty(capacity, dtype=np.float64)
+        self._items: List[Any] = [None] * capacity
+        self._start = 0  # physical index of the oldest point
+        self._size = 0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._evictions_since_resync = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _slices(self, lo: int, hi: int) -> List[slice]:
+        """Physical slices covering logical positions [lo, hi)."""
+        if lo >= hi:
+            return []
+        first = (self._start + lo) % self.capacity
+        last = first + (hi - lo)
+        if last <= self.capacity:
+            return [slice(first, last)]
+        return [slice(first, self.capacity), slice(0, last - self.capacity)]
+
+    def _gather(self, array: np.ndarray, lo: int, hi: int) -> np.ndarray:
+        parts = [array[part] for part in self._slices(lo, hi)]
+        if not parts:
+            return np.empty(0, dtype=array.dtype)
+        return parts[0].copy() if len(parts) == 1 else np.concatenate(parts)
+
+    def _search(self, timestamp: float, side: str) -> int:
+        """Binary search over the (possibly wrapped) logical order."""
+        offset = 0
+        for part in self._slices(0, self._size):
+            segment = self._timestamps[part]
+            position = int(np.searchsorted(segment, timestamp, side=side))
+            if position < len(segment):
+                return offset + position
+            offset += len(segment)
+        return offset
+
+    def bounds(self, start: Optional[float] = None, end: Optional[float] = None) -> Tuple[int, int]:
+        """Logical [lo, hi) positions of points with start <= timestamp <= end."""
+        lo = 0 if start is None else self._search(start, "left")
+        hi = self._size if end is None else self._search(end, "right")
+        return lo, max(lo, hi)
+
+    def append(self, timestamp: float, value: float, item: Any = None):
+        """Add a point; out-of-order points are inserted in place (slow path)."""
+        if self._size and timestamp < self._timestamps[(self._start + self._size - 1) % self.capacity]:
+            self._insert(timestamp, value, item)
+            return
+        if self._size == self.capacity:
+            self._drop_oldest(1)
+        index = (self._start + self._size) % self.capacity
+        self._timestamps[index] = timestamp
+        self._values[index] = value
+        self._items[index] = item
+        self._size += 1
+        self._sum += value
+        self._sum_sq += value * value
+
+    def _insert(self, timestamp: float, value: float, item: Any):
+        timestamps = self._gather(self._timestamps, 0, self._size)
+        values = self._gather(self._values, 0, self._size)
+        items = self.items(0, self._size)
+        position = int(np.searchsorted(timestamps, timestamp, side="right"))
+        if self._size == self.capacity:
+            if position == 0:
+                return  # Older than everything kept
+            timestamps, values, items = timestamps[1:], values[1:], items[1:]
+            position -= 1
+        timestamps = np.insert(timestamps, position, timestamp)
+        values = np.insert(values, position, value)
+        items.insert(position, item)
+
+        self._size = len(timestamps)
+        self._start = 0
+        self._timestamps[:self._size] = timestamps
+        self._values[:self._size] = values
+        self._items[:self._size] = items
+        self._resync()
+
+    def _drop_oldest(self, count: int):
+        count = min(count, self._size)
+        if not count:
+            return
+        for part in self._slices(0, count):
+            dropped = self._values[part]
+            self._sum -= float(dropped.sum())
+            self._sum_sq -= float(np.dot(dropped, dropped))
+            self._items[part] = [None] * (part.stop - part.start)
+        self._start = (self._start + count) % self.capacity
+        self._size -= count
+        self._evictions_since_resync += count
+        # Bound floating-point drift of the running sums
+        if self._evictions_since_resync >= self.capacity or not self._size:
+            self._resync()
+
+    def _resync(self):
+        values = self._gather(self._values, 0, self._size)
+        self._sum = float(values.sum())
+        self._sum_sq = float(np.dot(values, values))
+        self._evictions_since_resync = 0
+
+    def expire_before(self, cutoff: float) -> int:
+        """Drop points with timestamp <= cutoff; returns how many were dropped."""
+        count = self._search(cutoff, "right")
+        self._drop_oldest(count)
+        return count
+
+    def timestamps(self, lo: int = 0, hi: Optional[int] = None) -> np.ndarray:
+        return self._gather(self._timestamps, lo, self._size if hi is None else hi)
+
+    def values(self, lo: int = 0, hi: Optional[int] = None) -> np.ndarray:
+        return self._gather(self._values, lo, self._size if hi is None else hi)
+
+    def items(self, lo: int = 0, hi: Optional[int] = None) -> List[Any]:
+        hi = self._size if hi is None else hi
+        result: List[Any] = []
+        for part in self._slices(lo, hi):
+            result.extend(self._items[part])
+        return result
+
+    def rolling_stats(self) -> Dict[str, float]:
+        """O(1) count/mean/stddev over the whole series (sample stddev)."""
+        count = self._size
+        if not count:
+            return {"count": 0, "sum": 0.0, "mean": 0.0, "stddev": 0.0}
+        mean = self._sum / count
+        variance = (self._sum_sq - count * mean * mean) / (count - 1) if count > 1 else 0.0
+        return {"count": count, "sum": self._sum, "mean": mean, "stddev": math.sqrt(max(variance, 0.0))}
+
+
+class TimeSeriesStore:
+    """Thread-safe collection of ring-buffer series keyed by (metric type, name)."""
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self._series: Dict[Tuple[Hashable, str], RingBufferSeries] = {}
+        self._lock = threading.RLock()
+
+    def append(self, metric_type: Hashable, name: str, timestamp: datetime, value: float, item: Any = None):
+        with self._lock:
+            series = self._series.get((metric_type, name))
+            if series is None:
+                series = self._series[(metric_type, name)] = RingBufferSeries(self.capacity)
+            series.append(to_seconds(timestamp), float(value), item)
+
+    def window(
+        self,
+        metric_type: Hashable,
+        name: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Tuple[np.ndarray, np.ndarray, List[Any]]:
+        """Copies of the timestamps, values and items of one series within [start, end]."""
+        with self._lock:
+            series = self._series.get((metric_type, name))
+            if series is None:
+                return np.empty(0), np.empty(0), []
+            lo, hi = series.bounds(
+                to_seconds(start) if start else None,
+                to_seconds(end) if end else None
+            )
+            return series.timestamps(lo, hi), series.values(lo, hi), series.items(lo, hi)
+
+    def rolling_stats(self, metric_type: Hashable, name: str) -> Dict[str, float]:
+        with self._lock:
+            series = self._series.get((metric_type, name))
+            if series is None:
+                return {"count": 0, "sum": 0.0, "mean": 0.0, "stddev": 0.0}
+            return series.rolling_stats()
+
+    def query(
+        self,
+        metric_type: Optional[Hashable] = None,
+        name: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Dict[Hashable, List[Any]]:
+        """Items per metric type within [start, end], each list in timestamp order."""
+        start_seconds = to_seconds(start) if start else None
+        end_seconds = to_seconds(end) if end else None
+        per_type: Dict[Hashable, List[List[Tuple[float, Any]]]] = {}
+        with self._lock:
+            for (series_type, series_name), series in self._series.items():
+                if metric_type is not None and series_type != metric_type:
+                    continue
+                if name is not None and series_name != name:
+                    continue
+                lo, hi = series.bounds(start_seconds, end_seconds)
+                if lo < hi:
+                    per_type.setdefault(series_type, []).append(
+                        list(zip(series.timestamps(lo, hi).tolist(), series.items(lo, hi)))
+                    )
+        return {
+            series_type: [entry[1] for entry in heapq.merge(*chunks, key=lambda entry: entry[0])]
+            for series_type, chunks in per_type.items()
+        }
+
+    def expire_before(self, cutoff: datetime) -> int:
+        """Drop points at or before ``cutoff`` from every series."""
+        cutoff_seconds = to_seconds(cutoff)
+        with self._lock:
+            removed = sum(series.expire_before(cutoff_seconds) for series in self._series.values())
+            for key in [key for key, series in self._series.items() if not len(series)]:
+                del self._series[key]
+            return removed
+
+    def iter_items(self) -> Iterator[Any]:
+        """All stored items, series by series (a snapshot taken under the lock)."""
+        with self._lock:
+            snapshot = [series.items() for series in self._series.values()]
+        for items in snapshot:
+            yield from items
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(series) for series in self._series.values())
@@ -32,7 +32,6 @@ from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
 from app.services.collaboration.realtime_collaboration_service import RealtimeCollaborationService
 from app.services.utilities.file_processing_service import FileProcessingService
 from app.services.ai.ai_analytics import AIAnalyticsService
@@ -51,18 +50,24 @@ from app.api.v1.endpoints.rbac_management import router as rbac_management_route
 import socket
 from app.core.health import router as health_router
 from app.services.physical_education import service_integration
-from app.api.v1.middleware.cache import add_caching
+from app.core.response_cache import ResponseCacheMiddleware, invalidate_on_write
 from app.api.v1 import router as api_router
 from app.api.v1.endpoints.speech_to_text import router as speech_to_text_router
 from app.api.v1.endpoints.guest_chat import router as guest_chat_router
 from app.api.v1.endpoints.teacher_auth import router as teacher_auth_router
 from fastapi_limiter import FastAPILimiter
 from app.middleware.auth import AuthMiddleware
-from app.api.v1.middleware.rate_limit import add_rate_limiting
+from app.api.v1.middleware.rate_limit import ScannerBlockHook, SkipInTestMode
+from app.core.asgi_pipeline import PipelineMiddleware, default_hooks
 import redis
 from sqlalchemy.orm import Session
 from app.core.config import settings, get_settings
 from app.core.auth import get_current_active_user
+from app.core.llm_client import close_llm_client_pool
+from app.services.azure.azure_tts_service import close_azure_tts_service
+from app.core.cache import shutdown_cache_replication
+from app.core.log_writer import shutdown_log_writer
+from app.core.monitoring import performance_monitor
 from app.services.physical_education.movement_analyzer import MovementAnalyzer
 from app.services.physical_education.video_processor import VideoProcessor
 from app.dashboard.api.v1.endpoints import (
@@ -79,8 +84,6 @@ from app.dashboard.api.v1.endpoints import (
 )
 from app.dashboard.api.v1.endpoints import api_router as dashboard_api_router
 from app.dashboard.services.gpt_manager_service import GPTManagerService
-from app.dashboard.api.v1.middleware.rate_limit import setup_rate_limiting
-from app.dashboard.api.v1.middleware.auth import setup_auth_middleware
 from app.api.v1.endpoints import educational
 from app.core.load_balancer import GlobalLoadBalancer
 from app.core.regional_failover import RegionalFailoverManager
@@ -369,6 +372,35 @@ WEBSOCKET_PORT = int(os.getenv('WEBSOCKET_PORT', find_available_port(9100, 9200)
 
 app_settings = get_settings()
 
+# Dashboard routers are also mounted outside /api/v1/dashboard; writes through
+# those paths purge the cached dashboard responses too
+DASHBOARD_WRITE_DEPENDENCIES = [Depends(invalidate_on_write("dashboard"))]
+
+# Redis client and task publishing latency sketches; set at startup outside test mode
+latency_sketch_redis = None
+latency_sketch_publisher = None
+
+def add_request_pipeline(app_instance: FastAPI) -> None:
+    """Register the request pipeline; auth, rate limiting and scanner blocking are skipped in test mode.
+
+    The response cache sits inside the pipeline, so cache hits still pass
+    auth and rate limiting and are counted by metrics and audit. Scanner
+    blocking runs on every route; the other hooks follow MIDDLEWARE_ROUTE_HOOKS.
+    """
+    hooks = [SkipInTestMode(ScannerBlockHook())]
+    for hook in default_hooks():
+        hooks.append(SkipInTestMode(hook) if hook.name in ("authentication", "rate_limit") else hook)
+    routes = {
+        prefix: [ScannerBlockHook.name, *enabled]
+        for prefix, enabled in app_settings.MIDDLEWARE_ROUTE_HOOKS.items()
+    }
+    app_instance.add_middleware(ResponseCacheMiddleware)
+    app_instance.add_middleware(
+        PipelineMiddleware,
+        hooks=hooks,
+        routes=routes
+    )
+
 def create_app(test_mode: bool = False) -> FastAPI:
     """
     Create and configure a FastAPI application instance.
@@ -430,14 +462,14 @@ def create_app(test_mode: bool = False) -> FastAPI:
     from app.api.v1.endpoints.user_analytics import router as user_analytics_router
     app_instance.include_router(user_analytics_router, prefix="/api/v1/analytics", tags=["user-analytics"])
     app_instance.include_router(analytics.router, prefix="/api/v1/dashboard/analytics", tags=["analytics"])
-    app_instance.include_router(compatibility.router, prefix="/api/v1/compatibility", tags=["compatibility"])
-    app_instance.include_router(gpt_context.router, prefix="/api/v1/gpt-context", tags=["gpt-context"])
-    app_instance.include_router(gpt_manager.router, prefix="/api/v1/gpt-manager", tags=["gpt-manager"])
-    app_instance.include_router(resource_optimization.router, prefix="/api/v1/resource-optimization", tags=["resource-optimization"])
-    app_instance.include_router(access_control.router, prefix="/api/v1/access-control", tags=["access-control"])
-    app_instance.include_router(resource_sharing.router, prefix="/api/v1/resource-sharing", tags=["resource-sharing"])
-    app_instance.include_router(optimization_monitoring.router, prefix="/api/v1/optimization-monitoring", tags=["optimization-monitoring"])
-    app_instance.include_router(notifications.router, prefix="/api/v1/notifications", tags=["notifications"])
+    app_instance.include_router(compatibility.router, prefix="/api/v1/compatibility", tags=["compatibility"], dependencies=DASHBOARD_WRITE_DEPENDENCIES)
+    app_instance.include_router(gpt_context.router, prefix="/api/v1/gpt-context", tags=["gpt-context"], dependencies=DASHBOARD_WRITE_DEPENDENCIES)
+    app_instance.include_router(gpt_manager.router, prefix="/api/v1/gpt-manager", tags=["gpt-manager"], dependencies=DASHBOARD_WRITE_DEPENDENCIES)
+    app_instance.include_router(resource_optimization.router, prefix="/api/v1/resource-optimization", tags=["resource-optimization"], dependencies=DASHBOARD_WRITE_DEPENDENCIES)
+    app_instance.include_router(access_control.router, prefix="/api/v1/access-control", tags=["access-control"], dependencies=DASHBOARD_WRITE_DEPENDENCIES)
+    app_instance.include_router(resource_sharing.router, prefix="/api/v1/resource-sharing", tags=["resource-sharing"], dependencies=DASHBOARD_WRITE_DEPENDENCIES)
+    app_instance.include_router(optimization_monitoring.router, prefix="/api/v1/optimization-monitoring", tags=["optimization-monitoring"], dependencies=DASHBOARD_WRITE_DEPENDENCIES)
+    app_instance.include_router(notifications.router, prefix="/api/v1/notifications", tags=["notifications"], dependencies=DASHBOARD_WRITE_DEPENDENCIES)
     app_instance.include_router(educational.router, prefix="/api/v1/educational", tags=["educational"])
     app_instance.include_router(pe_router, prefix="/api/v1/phys-ed", tags=["physical-education"])
     app_instance.include_router(health_fitness_router, prefix="/api/v1/physical-education", tags=["physical-education"])
@@ -498,15 +530,6 @@ def create_app(test_mode: bool = False) -> FastAPI:
     # Mount static files - HTML files will be served with no-cache via middleware
     app_instance.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
 
-    # Configure CORS
-    app_instance.add_middleware(
-        CORSMiddleware,
-        allow_origins=app_settings.CORS_ORIGINS,
-        allow_credentials=app_settings.CORS_CREDENTIALS,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
-    
     # Add middleware to prevent caching of HTML files
     @app_instance.middleware("http")
     async def no_cache_html_middleware(request: Request, call_next):
@@ -518,11 +541,20 @@ def create_app(test_mode: bool = False) -> FastAPI:
             response.headers["Expires"] = "0"
         return response
 
-    # Set up rate limiting for access control endpoints
-    setup_rate_limiting(app_instance)
+    # Scanner blocking, auth and rate limiting (with request id, timing, metrics,
+    # logging, security headers, circuit breaking, feature flags and audit) run
+    # as hooks of one ASGI layer
+    add_request_pipeline(app_instance)
 
-    # Set up authentication for access control endpoints
-    setup_auth_middleware(app_instance)
+    # Configure CORS outside the pipeline, so preflights are answered and
+    # 401/429 responses still carry the CORS headers browsers need to read them
+    app_instance.add_middleware(
+        CORSMiddleware,
+        allow_origins=app_settings.CORS_ORIGINS,
+        allow_credentials=app_settings.CORS_CREDENTIALS,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 
     # Initialize services (only in non-test mode)
     if not test_mode:
@@ -608,6 +640,13 @@ def create_app(test_mode: bool = False) -> FastAPI:
                 )
                 await FastAPILimiter.init(redis_instance)
                 
+                # Share this worker's latency sketches for cluster-wide percentiles
+                global latency_sketch_redis, latency_sketch_publisher
+                latency_sketch_redis = redis_instance
+                latency_sketch_publisher = asyncio.create_task(
+                    performance_monitor.run_sketch_publisher(redis_instance)
+                )
+                
                 logger.info("Application startup complete")
             except Exception as e:
                 logger.error(f"Error during startup: {e}")
@@ -619,6 +658,9 @@ def create_app(test_mode: bool = False) -> FastAPI:
         async def shutdown_event():
             """Cleanup the application on shutdown."""
             try:
+                if latency_sketch_publisher is not None:
+                    latency_sketch_publisher.cancel()
+                
                 # Cleanup physical education services
                 await service_integration.cleanup()
                 
@@ -639,6 +681,18 @@ def create_app(test_mode: bool = False) -> FastAPI:
                 except Exception as e:
                     logger.warning(f"Error shutting down resource sharing service: {e}")
                 
+                # Close pooled LLM client connections
+                await close_llm_client_pool()
+                
+                # Close the text-to-speech HTTP client
+                await close_azure_tts_service()
+                
+                # Flush queued cache replication writes
+                await asyncio.to_thread(shutdown_cache_replication)
+                
+                # Write queued activity/audit/performance/security log rows
+                await asyncio.to_thread(shutdown_log_writer)
+                
                 logging.info("Application shutdown completed successfully")
             except Exception as e:
                 logging.error(f"Error during shutdown: {str(e)}")
@@ -697,14 +751,14 @@ app.include_router(teacher_auth_router, prefix="/api/v1", tags=["teacher-authent
 from app.api.v1.endpoints.user_analytics import router as user_analytics_router
 app.include_router(user_analytics_router, prefix="/api/v1/analytics", tags=["user-analytics"])
 app.include_router(analytics.router, prefix="/api/v1/dashboard/analytics", tags=["analytics"])
-app.include_router(compatibility.router, prefix="/api/v1/compatibility", tags=["compatibility"])
-app.include_router(gpt_context.router, prefix="/api/v1/gpt-context", tags=["gpt-context"])
-app.include_router(gpt_manager.router, prefix="/api/v1/gpt-manager", tags=["gpt-manager"])
-app.include_router(resource_optimization.router, prefix="/api/v1/resource-optimization", tags=["resource-optimization"])
-app.include_router(access_control.router, prefix="/api/v1/access-control", tags=["access-control"])
-app.include_router(resource_sharing.router, prefix="/api/v1/resource-sharing", tags=["resource-sharing"])
-app.include_router(optimization_monitoring.router, prefix="/api/v1/optimization-monitoring", tags=["optimization-monitoring"])
-app.include_router(notifications.router, prefix="/api/v1/notifications", tags=["notifications"])  # Add new router
+app.include_router(compatibility.router, prefix="/api/v1/compatibility", tags=["compatibility"], dependencies=DASHBOARD_WRITE_DEPENDENCIES)
+app.include_router(gpt_context.router, prefix="/api/v1/gpt-context", tags=["gpt-context"], dependencies=DASHBOARD_WRITE_DEPENDENCIES)
+app.include_router(gpt_manager.router, prefix="/api/v1/gpt-manager", tags=["gpt-manager"], dependencies=DASHBOARD_WRITE_DEPENDENCIES)
+app.include_router(resource_optimization.router, prefix="/api/v1/resource-optimization", tags=["resource-optimization"], dependencies=DASHBOARD_WRITE_DEPENDENCIES)
+app.include_router(access_control.router, prefix="/api/v1/access-control", tags=["access-control"], dependencies=DASHBOARD_WRITE_DEPENDENCIES)
+app.include_router(resource_sharing.router, prefix="/api/v1/resource-sharing", tags=["resource-sharing"], dependencies=DASHBOARD_WRITE_DEPENDENCIES)
+app.include_router(optimization_monitoring.router, prefix="/api/v1/optimization-monitoring", tags=["optimization-monitoring"], dependencies=DASHBOARD_WRITE_DEPENDENCIES)
+app.include_router(notifications.router, prefix="/api/v1/notifications", tags=["notifications"], dependencies=DASHBOARD_WRITE_DEPENDENCIES)  # Add new router
 app.include_router(educational.router, prefix="/api/v1/educational", tags=["educational"])
 app.include_router(pe_router, prefix="/api/v1/phys-ed", tags=["physical-education"])
 app.include_router(health_fitness_router, prefix="/api/v1/physical-education", tags=["physical-education"])
@@ -788,12 +842,6 @@ async def no_cache_html_middleware(request: Request, call_next):
         response.headers["Expires"] = "0"
     return response
 
-# Set up rate limiting for access control endpoints
-setup_rate_limiting(app)
-
-# Set up authentication for access control endpoints
-setup_auth_middleware(app)
-
 @lru_cache()
 def get_pe_service() -> PEService:
     """Get PE service instance."""
@@ -1060,6 +1108,18 @@ async def shutdown_event():
         except Exception as e:
             logger.warning(f"Error shutting down resource sharing service: {e}")
         
+        # Close pooled LLM client connections
+        await close_llm_client_pool()
+        
+        # Close the text-to-speech HTTP client
+        await close_azure_tts_service()
+        
+        # Flush queued cache replication writes
+        await asyncio.to_thread(shutdown_cache_replication)
+        
+        # Write queued activity/audit/performance/security log rows
+        await asyncio.to_thread(shutdown_log_writer)
+        
         logging.info("Application shutdown completed successfully")
     except Exception as e:
         logging.error(f"Error during shutdown: {str(e)}")
@@ -1877,8 +1937,6 @@ limiter = Limiter(key_func=get_remote_address)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 app.add_middleware(SlowAPIMiddleware)
-app.add_middleware(BaseHTTPMiddleware, dispatch=add_rate_limiting)
-app.add_middleware(BaseHTTPMiddleware, dispatch=add_caching)
 
 # Create a singleton instance with lazy loading
 _realtime_collaboration_service = None
@@ -2080,19 +2138,24 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
                     session_id = message.get("session_id")
                     document_id = message.get("document_id")
                     content = message.get("content")
-                    if all([session_id, document_id, content]):
-                        await collaboration_service.edit_document(
+                    delta = message.get("delta")
+                    if all([session_id, document_id]) and (content or delta is not None):
+                        # Clients send a delta against base_version; full content is still accepted
+                        document = await collaboration_service.edit_document(
                             session_id,
                             user_id,
                             document_id,
-                            content
+                            content,
+                            delta=delta,
+                            base_version=message.get("base_version")
                         )
                         await collaboration_service._broadcast_session_update(
                             session_id,
                             {
                                 "type": "document_updated",
                                 "document_id": document_id,
-                                "content": content,
+                                "delta": collaboration_service.document_history[document_id].last_delta,
+                                "version": document["version"],
                                 "user_id": user_id
                             }
                         )
@@ -2152,6 +2215,9 @@ async def websocket_endpoint(websocket: WebSocket):
 class MetricsSummary(BaseModel):
     learning_accuracy: float
     response_time_avg: float
+    response_time_p50: float = 0.0
+    response_time_p95: float = 0.0
+    response_time_p99: float = 0.0
     recommendation_quality: float
     user_engagement_minutes: float
     active_users: int
@@ -2168,6 +2234,7 @@ async def get_metrics_summary() -> Dict[str, Any]:
         Dict containing the following metrics:
         - learning_accuracy: Current learning accuracy score
         - response_time_avg: Average response time
+        - response_time_p50/p95/p99: Request latency percentiles across all workers (1% relative error)
         - recommendation_quality: Quality score of recommendations
         - user_engagement_minutes: Total user engagement time
         - active_users: Number of currently active users
@@ -2190,9 +2257,19 @@ async def get_metrics_summary() -> Dict[str, Any]:
         else:
             response_time_avg = 0.0
         
+        latency = performance_monitor.get_latency_percentiles()
+        if latency_sketch_redis is not None:
+            try:
+                latency = await performance_monitor.get_cluster_latency_percentiles(latency_sketch_redis)
+            except Exception as e:
+                logger.warning(f"Falling back to this worker's latency percentiles: {str(e)}")
+        
         return {
             "learning_accuracy": getattr(LEARNING_ACCURACY, '_value', 0.0),
             "response_time_avg": response_time_avg,
+            "response_time_p50": latency["p50"] or 0.0,
+            "response_time_p95": latency["p95"] or 0.0,
+            "response_time_p99": latency["p99"] or 0.0,
             "recommendation_quality": getattr(RECOMMENDATION_QUALITY, '_value', 0.0),
             "user_engagement_minutes": getattr(USER_ENGAGEMENT, '_value', 0.0),
             "active_users": getattr(ACTIVE_USERS, '_value', 0),
@@ -4606,11 +4683,16 @@ async def get_document_history(
     request: Request,
     session_id: str,
     document_id: str,
+    include_content: bool = False,
+    version: Optional[int] = None,
     collaboration_service: RealtimeCollaborationService = Depends(get_realtime_collaboration_service)
 ):
-    """Get document edit history."""
+    """Get document edit history, or one reconstructed version."""
     try:
-        result = await collaboration_service.get_document_history(session_id, document_id)
+        if version is not None:
+            result = await collaboration_service.get_document_version(session_id, document_id, version)
+        else:
+            result = await collaboration_service.get_document_history(session_id, document_id, include_content)
         return {"status": "success", "data": result}
     except Exception as e:
         logger.error(f"Error getting document history: {str(e)}")
@@ -39,6 +39,9 @@ __all__ = [
 
 logger = logging.getLogger(__name__)
 
+# MediaPipe Pose provides 33 landmarks per frame
+NUM_POSE_LANDMARKS = 33
+
 class MovementAnalysisRecord(CoreBase):
     """Stores movement analysis data for student activities."""
     __tablename__ = "physical_education_movement_analysis"  # Changed to avoid conflicts
@@ -413,11 +416,9 @@ class MovementModels:
             if not unprocessed:
                 return
                 
-            # Calculate metrics
-            self._calculate_smoothness(unprocessed)
-            self._calculate_consistency(unprocessed)
-            self._calculate_speed(unprocessed)
-            self._calculate_range_of_motion(unprocessed)
+            # Convert landmarks once, then calculate all metrics in a single pass
+            positions, timestamps = self._build_landmark_tensor(unprocessed)
+            self.sequence_metrics.update(self.compute_sequence_metrics(positions, timestamps))
             
             # Mark frames as processed
             for frame in unprocessed:
@@ -426,130 +427,117 @@ class MovementModels:
         except Exception as e:
             logger.error(f"Error updating sequence metrics: {str(e)}")
 
+    @staticmethod
+    def _build_landmark_tensor(frames: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """Convert buffered frames into a landmark tensor and timestamp vector.
+        
+        Args:
+            frames: Buffered frames with MediaPipe ``landmarks`` (or lists of
+                landmark dicts) and ``timestamp`` datetimes
+            
+        Returns:
+            Contiguous float32 array of shape (frames, 33, 3) with x/y/z
+            positions, and float64 array of seconds since the first frame
+        """
+        num_frames = len(frames)
+        positions = np.fromiter(
+            (
+                coord
+                for frame in frames
+                for lm in getattr(frame['landmarks'], 'landmark', frame['landmarks'])[:NUM_POSE_LANDMARKS]
+                for coord in ((lm.x, lm.y, lm.z) if hasattr(lm, 'x') else (lm['x'], lm['y'], lm['z']))
+            ),
+            dtype=np.float32,
+            count=num_frames * NUM_POSE_LANDMARKS * 3
+        ).reshape(num_frames, NUM_POSE_LANDMARKS, 3)
+        
+        if num_frames:
+            start = frames[0]['timestamp']
+            timestamps = np.fromiter(
+                ((frame['timestamp'] - start).total_seconds() for frame in frames),
+                dtype=np.float64,
+                count=num_frames
+            )
+        else:
+            timestamps = np.zeros(0, dtype=np.float64)
+        
+        return positions, timestamps
+
+    @staticmethod
+    def compute_sequence_metrics(positions: np.ndarray, timestamps: np.ndarray) -> Dict[str, float]:
+        """Calculate smoothness, consistency, speed and range of motion.
+        
+        Args:
+            positions: Array of shape (frames, landmarks, 3)
+            timestamps: Array of shape (frames,) in seconds
+            
+        Returns:
+            Dictionary with the metrics that could be computed for the sequence
+        """
+        metrics = {}
+        if positions.shape[0] < 2:
+            return metrics
+        
+        # Per-frame displacement of every landmark
+        velocity = np.diff(positions, axis=0)
+        displacement = np.linalg.norm(velocity, axis=2)
+        
+        # Smoothness: inverse of average jerk, approximated by second differences
+        if positions.shape[0] >= 3:
+            jerk = np.linalg.norm(np.diff(velocity, axis=0), axis=2)
+            avg_jerk = float(jerk.sum()) / (positions.shape[0] - 2)
+            metrics['smoothness'] = 1.0 / (1.0 + avg_jerk)
+        
+        # Consistency: inverse of average positional variance
+        avg_variance = float(np.var(positions, axis=0).mean())
+        metrics['consistency'] = 1.0 / (1.0 + avg_variance)
+        
+        # Speed: average landmark velocity over frame pairs with elapsed time
+        dt = np.diff(timestamps)
+        moving = dt != 0
+        if moving.any():
+            metrics['speed'] = float((displacement[moving] / dt[moving, None]).mean())
+        
+        # Range of motion: average bounding-box diagonal per landmark
+        extent = positions.max(axis=0) - positions.min(axis=0)
+        metrics['range_of_motion'] = float(np.linalg.norm(extent, axis=1).mean())
+        
+        return metrics
+
+    def _apply_sequence_metric(self, frames: List[Dict], metric: str) -> None:
+        """Calculate the sequence metrics and store only ``metric``."""
+        if len(frames) < 2:
+            return
+        positions, timestamps = self._build_landmark_tensor(frames)
+        metrics = self.compute_sequence_metrics(positions, timestamps)
+        if metric in metrics:
+            self.sequence_metrics[metric] = metrics[metric]
+
     def _calculate_smoothness(self, frames: List[Dict]) -> None:
         """Calculate movement smoothness from landmark positions."""
         try:
-            if len(frames) < 2:
-                return
-                
-            # Calculate jerk (rate of change of acceleration)
-            total_jerk = 0
-            for i in range(1, len(frames) - 1):
-                prev = frames[i-1]['landmarks']
-                curr = frames[i]['landmarks']
-                next_frame = frames[i+1]['landmarks']
-                
-                # Calculate acceleration changes for key points
-                for point_idx in range(33):  # MediaPipe provides 33 landmarks
-                    p1 = np.array([prev.landmark[point_idx].x, prev.landmark[point_idx].y, prev.landmark[point_idx].z])
-                    p2 = np.array([curr.landmark[point_idx].x, curr.landmark[point_idx].y, curr.landmark[point_idx].z])
-                    p3 = np.array([next_frame.landmark[point_idx].x, next_frame.landmark[point_idx].y, next_frame.landmark[point_idx].z])
-                    
-                    # Approximate jerk using finite differences
-                    acc1 = p2 - p1
-                    acc2 = p3 - p2
-                    jerk = np.linalg.norm(acc2 - acc1)
-                    total_jerk += jerk
-            
-            # Update smoothness metric (inverse of average jerk)
-            avg_jerk = total_jerk / (len(frames) - 2)
-            self.sequence_metrics['smoothness'] = 1.0 / (1.0 + avg_jerk)
-            
+            self._apply_sequence_metric(frames, 'smoothness')
         except Exception as e:
             logger.error(f"Error calculating smoothness: {str(e)}")
 
     def _calculate_consistency(self, frames: List[Dict]) -> None:
         """Calculate movement consistency from landmark positions."""
         try:
-            if len(frames) < 2:
-                return
-                
-            # Calculate variance in movement patterns
-            variances = []
-            for point_idx in range(33):
-                positions = []
-                for frame in frames:
-                    landmark = frame['landmarks'].landmark[point_idx]
-                    positions.append([landmark.x, landmark.y, landmark.z])
-                
-                # Calculate variance of positions
-                variance = np.var(positions, axis=0)
-                variances.append(np.mean(variance))
-            
-            # Update consistency metric (inverse of average variance)
-            avg_variance = np.mean(variances)
-            self.sequence_metrics['consistency'] = 1.0 / (1.0 + avg_variance)
-            
+            self._apply_sequence_metric(frames, 'consistency')
         except Exception as e:
             logger.error(f"Error calculating consistency: {str(e)}")
 
     def _calculate_speed(self, frames: List[Dict]) -> None:
         """Calculate movement speed from landmark positions and timestamps."""
         try:
-            if len(frames) < 2:
-                return
-                
-            # Calculate average velocity
-            total_velocity = 0
-            count = 0
-            
-            for i in range(1, len(frames)):
-                prev = frames[i-1]
-                curr = frames[i]
-                
-                # Time difference in seconds
-                dt = (curr['timestamp'] - prev['timestamp']).total_seconds()
-                if dt == 0:
-                    continue
-                
-                # Calculate velocity for key points
-                for point_idx in range(33):
-                    p1 = prev['landmarks'].landmark[point_idx]
-                    p2 = curr['landmarks'].landmark[point_idx]
-                    
-                    # Calculate displacement
-                    displacement = np.linalg.norm([
-                        p2.x - p1.x,
-                        p2.y - p1.y,
-                        p2.z - p1.z
-                    ])
-                    
-                    velocity = displacement / dt
-                    total_velocity += velocity
-                    count += 1
-            
-            # Update speed metric
-            if count > 0:
-                self.sequence_metrics['speed'] = total_velocity / count
-                
+            self._apply_sequence_metric(frames, 'speed')
         except Exception as e:
             logger.error(f"Error calculating speed: {str(e)}")
 
     def _calculate_range_of_motion(self, frames: List[Dict]) -> None:
         """Calculate range of motion from landmark positions."""
         try:
-            if len(frames) < 2:
-                return
-                
-            # Calculate maximum displacement for each landmark
-            max_displacements = []
-            
-            for point_idx in range(33):
-                positions = []
-                for frame in frames:
-                    landmark = frame['landmarks'].landmark[point_idx]
-                    positions.append([landmark.x, landmark.y, landmark.z])
-                
-                # Calculate max displacement
-                positions = np.array(positions)
-                min_pos = np.min(positions, axis=0)
-                max_pos = np.max(positions, axis=0)
-                displacement = np.linalg.norm(max_pos - min_pos)
-                max_displacements.append(displacement)
-            
-            # Update range of motion metric
-            self.sequence_metrics['range_of_motion'] = np.mean(max_displacements)
-            
+            self._apply_sequence_metric(frames, 'range_of_motion')
         except Exception as e:
             logger.error(f"Error calculating range of motion: {str(e)}")
 
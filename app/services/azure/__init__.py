@@ -4,7 +4,15 @@ Azure Services
 This package contains Azure service integrations.
 """
 
-from .azure_tts_service import AzureTTSService, get_azure_tts_service
+from .azure_tts_service import AzureTTSService, close_azure_tts_service, get_azure_tts_service
+from .tts_audio_cache import TTSAudioCache, get_tts_audio_cache, synthesize_speech_cached
 
-__all__ = ["AzureTTSService", "get_azure_tts_service"]
+__all__ = [
+    "AzureTTSService",
+    "close_azure_tts_service",
+    "get_azure_tts_service",
+    "TTSAudioCache",
+    "get_tts_audio_cache",
+    "synthesize_speech_cached"
+]
 
@@ -3,45 +3,132 @@ Azure Text-to-Speech Service
 
 This service provides text-to-speech functionality using Azure Cognitive Services Speech REST API.
 Uses REST API instead of SDK for better cross-platform compatibility (especially ARM64).
+
+Async callers use ``synthesize_speech_async``, which goes through one shared
+``httpx.AsyncClient`` and reuses the access token until it expires.
 """
 
 from typing import Optional, Dict, Any, BinaryIO
+import asyncio
 import logging
 from io import BytesIO
+import httpx
 import requests
 import time
 from app.core.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Tokens are valid for 10 minutes; refresh a minute early
+TOKEN_LIFETIME_SECONDS = 9 * 60
+
+# Neural voice used when only a language is requested
+NEURAL_VOICES = {
+    "en-US": "en-US-JennyNeural",
+    "en-GB": "en-GB-SoniaNeural",
+    "es-ES": "es-ES-ElviraNeural",
+    "fr-FR": "fr-FR-DeniseNeural",
+    "de-DE": "de-DE-KatjaNeural",
+    "it-IT": "it-IT-ElsaNeural",
+    "pt-BR": "pt-BR-FranciscaNeural",
+    "ja-JP": "ja-JP-NanamiNeural",
+    "zh-CN": "zh-CN-XiaoxiaoNeural",
+    "ko-KR": "ko-KR-SunHiNeural"
+}
+DEFAULT_VOICE = "en-US-JennyNeural"
+
 
 class AzureTTSService:
     """Azure Text-to-Speech service using Cognitive Services Speech REST API."""
-    
-    def __init__(self):
+
+    # MP3 format for faster download (much smaller than WAV)
+    # audio-16khz-128kbitrate-mono-mp3 is good quality and fast
+    # For even faster: audio-16khz-64kbitrate-mono-mp3 or audio-16khz-32kbitrate-mono-mp3
+    output_format = "audio-16khz-64kbitrate-mono-mp3"
+
+    def __init__(
+        self,
+        speech_key: Optional[str] = None,
+        speech_region: Optional[str] = None,
+        token_url: Optional[str] = None,
+        tts_url: Optional[str] = None
+    ):
         self.settings = get_settings()
-        self.speech_key = self.settings.AZURE_SPEECH_KEY
-        self.speech_region = self.settings.AZURE_SPEECH_REGION
-        
+        self.speech_key = speech_key if speech_key is not None else self.settings.AZURE_SPEECH_KEY
+        self.speech_region = speech_region if speech_region is not None else self.settings.AZURE_SPEECH_REGION
+        self._access_token = None
+        self._token_expiry = 0
+        self._token_lock: Optional[asyncio.Lock] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+
         if not self.speech_key or not self.speech_region:
             logger.warning("Azure Speech credentials not configured. TTS will not be available.")
-            self._access_token = None
-            self._token_expiry = 0
         else:
-            self._access_token = None
-            self._token_expiry = 0
-            # Base URLs for REST API
-            self._token_url = f"https://{self.speech_region}.api.cognitive.microsoft.com/sts/v1.0/issueToken"
-            self._tts_url = f"https://{self.speech_region}.tts.speech.microsoft.com/cognitiveservices/v1"
+            # Base URLs for REST API (overridable to point at a local stand-in)
+            self._token_url = token_url or f"https://{self.speech_region}.api.cognitive.microsoft.com/sts/v1.0/issueToken"
+            self._tts_url = tts_url or f"https://{self.speech_region}.tts.speech.microsoft.com/cognitiveservices/v1"
             logger.info(f"Azure TTS service initialized for region: {self.speech_region} (REST API)")
-    
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """Shared async HTTP client, so token and synthesis calls reuse connections."""
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                timeout=30.0,
+                headers={"User-Agent": "Faraday-AI-TTS"}
+            )
+        return self._async_client
+
+    async def aclose(self):
+        """Close the shared async HTTP client."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    def _has_valid_token(self) -> bool:
+        return bool(self._access_token) and time.time() < self._token_expiry
+
+    def _store_token(self, token: str):
+        self._access_token = token
+        self._token_expiry = time.time() + TOKEN_LIFETIME_SECONDS
+
+    def _invalidate_token(self):
+        self._access_token = None
+        self._token_expiry = 0
+
+    async def _get_access_token_async(self) -> Optional[str]:
+        """
+        Async counterpart of ``_get_access_token``.
+        Concurrent callers wait for a single refresh instead of each fetching a token.
+        """
+        if self._has_valid_token():
+            return self._access_token
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+        async with self._token_lock:
+            if self._has_valid_token():
+                return self._access_token
+            try:
+                response = await self.async_client.post(
+                    self._token_url,
+                    headers={"Ocp-Apim-Subscription-Key": self.speech_key},
+                    timeout=10
+                )
+                response.raise_for_status()
+                self._store_token(response.text)
+                logger.debug("Azure Speech access token obtained")
+                return self._access_token
+            except Exception as e:
+                logger.error(f"Failed to obtain Azure Speech access token: {str(e)}")
+                return None
+
     def _get_access_token(self) -> Optional[str]:
         """
         Get or refresh Azure Speech access token.
         Tokens are valid for 10 minutes, so we cache them.
         """
         # Check if we have a valid cached token
-        if self._access_token and time.time() < self._token_expiry:
+        if self._has_valid_token():
             return self._access_token
         
         try:
@@ -52,9 +139,8 @@ class AzureTTSService:
             response = requests.post(self._token_url, headers=headers, timeout=10)
             response.raise_for_status()
             
-            self._access_token = response.text
             # Cache token for 9 minutes (tokens are valid for 10 minutes)
-            self._token_expiry = time.time() + (9 * 60)
+            self._store_token(response.text)
             logger.debug("Azure Speech access token obtained")
             return self._access_token
         except Exception as e:
@@ -100,61 +186,22 @@ class AzureTTSService:
                 logger.error("Failed to obtain Azure Speech access token")
                 return None
             
-            # Determine the voice name to use
-            resolved_voice_name = None
-            if voice_name:
-                resolved_voice_name = voice_name
-            elif language:
-                # Try to find a neural voice for the language
-                neural_voices = {
-                    "en-US": "en-US-JennyNeural",
-                    "en-GB": "en-GB-SoniaNeural",
-                    "es-ES": "es-ES-ElviraNeural",
-                    "fr-FR": "fr-FR-DeniseNeural",
-                    "de-DE": "de-DE-KatjaNeural",
-                    "it-IT": "it-IT-ElsaNeural",
-                    "pt-BR": "pt-BR-FranciscaNeural",
-                    "ja-JP": "ja-JP-NanamiNeural",
-                    "zh-CN": "zh-CN-XiaoxiaoNeural",
-                    "ko-KR": "ko-KR-SunHiNeural"
-                }
-                if language in neural_voices:
-                    resolved_voice_name = neural_voices[language]
-            
-            # Default voice if none specified
-            if not resolved_voice_name:
-                resolved_voice_name = "en-US-JennyNeural"
-            
+            resolved_voice_name = self.resolve_voice_name(voice_name, language)
             logger.info(f"Using Azure voice: {resolved_voice_name} for synthesis (language: {language}, rate: {rate})")
             
             # Create SSML for advanced voice control
             ssml_text = self._create_ssml(text, resolved_voice_name, rate, pitch, volume, style)
             
             # Make REST API request
-            # Use MP3 format for faster download (much smaller than WAV)
-            # audio-16khz-128kbitrate-mono-mp3 is good quality and fast
-            # For even faster: audio-16khz-64kbitrate-mono-mp3 or audio-16khz-32kbitrate-mono-mp3
             headers = {
                 "Authorization": f"Bearer {access_token}",
                 "Content-Type": "application/ssml+xml",
-                "X-Microsoft-OutputFormat": "audio-16khz-64kbitrate-mono-mp3",  # MP3 format - much faster than WAV
+                "X-Microsoft-OutputFormat": self.output_format,
                 "User-Agent": "Faraday-AI-TTS"
             }
             
-            # Calculate timeout based on text length
-            # Azure TTS typically processes ~100-200 characters per second
-            # For longer texts (like lesson plans), we need more time
-            # Base timeout: 30 seconds, add 1 second per 100 characters over 2000
             text_length = len(text)
-            if text_length > 2000:
-                # For long texts (lesson plans), allow more time
-                # 30 seconds base + 1 second per 100 chars over 2000
-                timeout = 30 + ((text_length - 2000) // 100)
-                # Cap at 120 seconds (2 minutes) for very long texts
-                timeout = min(timeout, 120)
-            else:
-                timeout = 30
-            
+            timeout = self.synthesis_timeout(text_length)
             logger.info(f"Azure TTS request: {text_length} characters, timeout: {timeout}s")
             
             response = requests.post(
@@ -178,6 +225,104 @@ class AzureTTSService:
             logger.error(f"Error synthesizing speech: {str(e)}", exc_info=True)
             return None
     
+    def resolve_voice_name(self, voice_name: Optional[str] = None, language: Optional[str] = None) -> str:
+        """Voice actually used for a request: the named voice, else the language's neural voice, else the default."""
+        if voice_name:
+            return voice_name
+        if language and language in NEURAL_VOICES:
+            return NEURAL_VOICES[language]
+        return DEFAULT_VOICE
+
+    @staticmethod
+    def synthesis_timeout(text_length: int) -> int:
+        """
+        Request timeout in seconds for a text of ``text_length`` characters.
+
+        Azure TTS typically processes ~100-200 characters per second, so long
+        texts (like lesson plans) get 30 seconds plus 1 second per 100
+        characters over 2000, capped at 120 seconds.
+        """
+        if text_length > 2000:
+            return min(30 + ((text_length - 2000) // 100), 120)
+        return 30
+
+    def build_ssml(
+        self,
+        text: str,
+        voice_name: Optional[str] = None,
+        language: Optional[str] = None,
+        rate: Optional[float] = None,
+        pitch: Optional[float] = None,
+        volume: Optional[float] = None,
+        style: Optional[str] = None
+    ) -> str:
+        """SSML document sent to Azure for these request parameters."""
+        return self._create_ssml(text, self.resolve_voice_name(voice_name, language), rate, pitch, volume, style)
+
+    async def synthesize_ssml_async(self, ssml: str, timeout: float = 30) -> Optional[bytes]:
+        """
+        Synthesize an SSML document with the shared async client.
+
+        The cached access token is reused until it expires; a 401 drops it and
+        retries once with a fresh token. Returns the MP3 bytes, or None if
+        synthesis fails.
+        """
+        if not self.is_available():
+            logger.error("Azure TTS service is not available")
+            return None
+
+        for attempt in range(2):
+            access_token = await self._get_access_token_async()
+            if not access_token:
+                logger.error("Failed to obtain Azure Speech access token")
+                return None
+            try:
+                response = await self.async_client.post(
+                    self._tts_url,
+                    headers={
+                        "Authorization": f"Bearer {access_token}",
+                        "Content-Type": "application/ssml+xml",
+                        "X-Microsoft-OutputFormat": self.output_format
+                    },
+                    content=ssml.encode('utf-8'),
+                    timeout=timeout
+                )
+                if response.status_code == 401 and attempt == 0:
+                    logger.info("Azure Speech access token rejected, refreshing")
+                    self._invalidate_token()
+                    continue
+                response.raise_for_status()
+                return response.content
+            except httpx.HTTPStatusError as e:
+                logger.error(
+                    f"Error synthesizing speech (HTTP error): {str(e)}; "
+                    f"body: {e.response.text[:200]}"
+                )
+                return None
+            except Exception as e:
+                logger.error(f"Error synthesizing speech: {str(e)}", exc_info=True)
+                return None
+        return None
+
+    async def synthesize_speech_async(
+        self,
+        text: str,
+        voice_name: Optional[str] = None,
+        language: Optional[str] = None,
+        rate: Optional[float] = None,
+        pitch: Optional[float] = None,
+        volume: Optional[float] = None,
+        style: Optional[str] = None
+    ) -> Optional[bytes]:
+        """
+        Async version of ``synthesize_speech`` that does not block the event loop.
+
+        Returns:
+            MP3 audio bytes, or None if synthesis fails
+        """
+        ssml = self.build_ssml(text, voice_name, language, rate, pitch, volume, style)
+        return await self.synthesize_ssml_async(ssml, timeout=self.synthesis_timeout(len(text)))
+
     def _create_ssml(
         self,
         text: str,
@@ -333,3 +478,9 @@ def get_azure_tts_service() -> AzureTTSService:
         _azure_tts_service = AzureTTSService()
     return _azure_tts_service
 
+
+async def close_azure_tts_service():
+    """Close the singleton's async HTTP client on application shutdown."""
+    if _azure_tts_service is not None:
+        await _azure_tts_service.aclose()
+
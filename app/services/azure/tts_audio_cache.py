@@ -0,0 +1,315 @@
+"""
+Synthesized Audio Cache
+
+Content-addressed disk cache for text-to-speech output.
+
+The cache key is the SHA-256 of the output format plus the SSML document sent
+to Azure. The SSML already encodes the text, the resolved voice, rate, pitch,
+volume and style, so requests that would produce the same audio share one
+file even when they spell their parameters differently (a language instead
+of a voice name, ``rate=None`` instead of ``rate=1.0``).
+
+Files live under ``TTS_CACHE_DIR`` in two-character shard directories. They
+are written to a temporary file and renamed into place, so a reader never
+sees a partial file. Every worker process shares the directory, and the
+directory is the source of truth. A hit bumps the file's mtime. After each
+write, a worker takes an exclusive lock on the directory, rescans it and
+deletes the files with the oldest mtimes until the whole directory is back
+under ``TTS_CACHE_MAX_BYTES``. That bounds the total across all workers.
+
+Lookups open the file before returning it, and a file that is missing counts
+as a miss. A file evicted by another worker while it is being served still
+streams to the end. Concurrent misses for the same key in one process wait
+for one synthesis call. Endpoints stream the open file, so the audio is read
+from disk instead of being held in memory per request.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, Iterator, Optional
+
+from prometheus_client import Counter, Gauge
+
+try:
+    import fcntl
+except ImportError:  # Windows: eviction only coordinates threads of this process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Temporary files older than this were left by a crashed writer
+STALE_TMP_SECONDS = 300
+
+try:
+    TTS_CACHE_REQUESTS = Counter(
+        'faraday_tts_cache_requests_total',
+        'Text-to-speech audio cache lookups',
+        ['outcome']
+    )
+    TTS_CACHE_BYTES = Gauge(
+        'faraday_tts_cache_bytes',
+        'Bytes of synthesized audio held in the disk cache'
+    )
+except ValueError:
+    # Metrics already registered (module re-imported in tests)
+    from prometheus_client import REGISTRY
+    TTS_CACHE_REQUESTS = REGISTRY._names_to_collectors['faraday_tts_cache_requests_total']
+    TTS_CACHE_BYTES = REGISTRY._names_to_collectors['faraday_tts_cache_bytes']
+
+
+def audio_cache_key(ssml: str, output_format: str) -> str:
+    """Content address of the audio Azure returns for ``ssml`` in ``output_format``."""
+    digest = hashlib.sha256()
+    digest.update(output_format.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(ssml.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class TTSAudioCache:
+    """Size-bounded LRU of synthesized audio files on local disk, shared by every worker."""
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024, suffix: str = ".mp3"):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.size_bytes = 0
+        # key -> size, least recently used first, as of the last rescan
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Serializes this process's rescans; the flock in _directory_lock covers other processes
+        self._scan_lock = threading.Lock()
+        self._inflight: Dict[str, "asyncio.Future[Optional[Path]]"] = {}
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "writes": 0,
+            "evictions": 0,
+            "failures": 0
+        }
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._remove_stale_tmp()
+        with self._directory_lock():
+            self._rescan_and_evict()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}{self.suffix}"
+
+    @contextmanager
+    def _directory_lock(self) -> Iterator[None]:
+        """Exclusive lock held by one process (and thread) at a time for the whole directory."""
+        with self._scan_lock:
+            with open(self.directory / ".lock", "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                # Closing the file releases the flock
+                yield
+
+    def _remove_stale_tmp(self):
+        # Only old ones: a fresh .tmp may be another worker's write in progress
+        cutoff = time.time() - STALE_TMP_SECONDS
+        for stale in self.directory.glob("*/*.tmp"):
+            try:
+                if stale.stat().st_mtime < cutoff:
+                    stale.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _rescan_and_evict(self, keep: Optional[str] = None):
+        """Rebuild the index from disk and delete the oldest files past ``max_bytes``.
+
+        Called with the directory lock held, so it sees every worker's files.
+        ``keep`` (the entry just written) is never evicted, even when it alone
+        exceeds the budget: the caller is about to serve it.
+        """
+        entries = []
+        for path in self.directory.glob(f"*/*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        entries.sort()
+        index = OrderedDict((key, size) for _, key, size in entries)
+        size_bytes = sum(index.values())
+        evicted = 0
+        for key in list(index):
+            if size_bytes <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            size_bytes -= index.pop(key)
+            evicted += 1
+            try:
+                self.path_for(key).unlink()
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._index = index
+            self.size_bytes = size_bytes
+            self.stats["evictions"] += evicted
+        TTS_CACHE_BYTES.set(size_bytes)
+
+    def get(self, key: str) -> Optional[BinaryIO]:
+        """Open the cached audio for ``key`` and mark it most recently used; None on a miss.
+
+        The caller must close the returned file.
+        """
+        path = self.path_for(key)
+        try:
+            audio = open(path, "rb")
+        except FileNotFoundError:
+            # Never cached, or evicted (possibly by another worker)
+            with self._lock:
+                self.size_bytes -= self._index.pop(key, 0)
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted since it was opened; the open file still reads in full
+            pass
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+            else:
+                # Written by another worker since the last rescan
+                self._index[key] = os.fstat(audio.fileno()).st_size
+                self.size_bytes += self._index[key]
+        return audio
+
+    def put(self, key: str, data: bytes) -> Path:
+        """Store ``data`` under ``key`` and evict the oldest files past ``max_bytes``."""
+        path = self.path_for(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_name(f".{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.stats["writes"] += 1
+        with self._directory_lock():
+            self._rescan_and_evict(keep=key)
+        return path
+
+    async def get_or_create(
+        self,
+        key: str,
+        produce: Callable[[], Awaitable[Optional[bytes]]]
+    ) -> Optional[BinaryIO]:
+        """
+        Open cached audio for ``key``, calling ``produce`` on a miss.
+
+        Concurrent misses for one key share a single ``produce`` call. Returns
+        None (and caches nothing) when ``produce`` returns no audio. The caller
+        must close the returned file.
+        """
+        audio = self.get(key)
+        if audio is not None:
+            self.stats["hits"] += 1
+            TTS_CACHE_REQUESTS.labels(outcome="hit").inc()
+            return audio
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            TTS_CACHE_REQUESTS.labels(outcome="coalesced").inc()
+        else:
+            self.stats["misses"] += 1
+            TTS_CACHE_REQUESTS.labels(outcome="miss").inc()
+            task = asyncio.ensure_future(self._fill(key, produce))
+            self._inflight[key] = task
+        # Shielded so a client disconnecting doesn't cancel audio others are waiting for
+        path = await asyncio.shield(task)
+        if path is None:
+            return None
+        audio = self.get(key)
+        if audio is None:
+            # Only possible when another worker evicted it the moment it was written
+            self.stats["failures"] += 1
+            logger.warning(f"Synthesized audio {key[:12]} was evicted before it could be served")
+        return audio
+
+    async def _fill(self, key: str, produce: Callable[[], Awaitable[Optional[bytes]]]) -> Optional[Path]:
+        try:
+            data = await produce()
+            if not data:
+                self.stats["failures"] += 1
+                return None
+            return await asyncio.to_thread(self.put, key, data)
+        except Exception as e:
+            self.stats["failures"] += 1
+            logger.error(f"Failed to cache synthesized audio {key[:12]}: {e}", exc_info=True)
+            return None
+        finally:
+            self._inflight.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters plus size (as of the last rescan) and budget."""
+        return {
+            **self.stats,
+            "entries": len(self._index),
+            "size_bytes": self.size_bytes,
+            "max_bytes": self.max_bytes
+        }
+
+
+_tts_audio_cache: Optional[TTSAudioCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_tts_audio_cache() -> TTSAudioCache:
+    """Get the process-wide audio cache, configured from settings."""
+    global _tts_audio_cache
+    if _tts_audio_cache is None:
+        with _cache_lock:
+            if _tts_audio_cache is None:
+                from app.core.config import get_settings
+                settings = get_settings()
+                _tts_audio_cache = TTSAudioCache(
+                    directory=settings.TTS_CACHE_DIR,
+                    max_bytes=settings.TTS_CACHE_MAX_BYTES
+                )
+    return _tts_audio_cache
+
+
+def set_tts_audio_cache(cache: Optional[TTSAudioCache]):
+    """Replace the process-wide cache (``None`` rebuilds it from settings)."""
+    global _tts_audio_cache
+    _tts_audio_cache = cache
+
+
+async def synthesize_speech_cached(
+    service,
+    text: str,
+    voice_name: Optional[str] = None,
+    language: Optional[str] = None,
+    rate: Optional[float] = None,
+    pitch: Optional[float] = None,
+    volume: Optional[float] = None,
+    style: Optional[str] = None,
+    cache: Optional[TTSAudioCache] = None
+) -> Optional[BinaryIO]:
+    """
+    Open audio for these parameters, synthesizing it with ``service`` on a miss.
+
+    Returns None when synthesis fails; the caller must close the file.
+    """
+    if cache is None:
+        cache = get_tts_audio_cache()
+    ssml = service.build_ssml(text, voice_name, language, rate, pitch, volume, style)
+    key = audio_cache_key(ssml, service.output_format)
+    return await cache.get_or_create(
+        key,
+        lambda: service.synthesize_ssml_async(ssml, timeout=service.synthesis_timeout(len(text)))
+    )
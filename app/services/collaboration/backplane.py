@@ -0,0 +1,429 @@
+"""
+Collaboration Backplane
+Cross-worker routing for RealtimeCollaborationService.
+
+Each worker only holds the WebSockets of its own clients. The backplane carries
+session broadcasts between workers, and it stores the state they must agree
+on: session records, participants, shared documents with their history, and
+document locks.
+
+* ``InMemoryBackplane`` - shared by service instances in one process (tests, single worker).
+* ``RedisBackplane`` - Redis pub/sub for broadcasts, hashes and Lua scripts for locks.
+"""
+
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Receives (session_id, origin worker id, update data)
+BroadcastHandler = Callable[[str, str, Dict[str, Any]], Awaitable[None]]
+
+
+class CollaborationBackplane(ABC):
+    """Broadcast routing and shared lock/session state for collaboration workers."""
+
+    @abstractmethod
+    async def start(self, handler: BroadcastHandler) -> None:
+        """Start delivering broadcasts published by any worker to ``handler``."""
+        pass
+
+    @abstractmethod
+    async def stop(self, handler: BroadcastHandler) -> None:
+        """Stop delivering broadcasts to ``handler``."""
+        pass
+
+    @abstractmethod
+    async def publish(self, session_id: str, origin: str, update_data: Dict[str, Any]) -> None:
+        """Send a session broadcast to every worker."""
+        pass
+
+    @abstractmethod
+    async def save_session(self, session_id: str, record: Dict[str, Any]) -> bool:
+        """Store a session record; False if the session already exists."""
+        pass
+
+    @abstractmethod
+    async def load_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get a session record created by any worker."""
+        pass
+
+    @abstractmethod
+    async def delete_session(self, session_id: str) -> None:
+        """Forget a session record with its participants, documents and locks."""
+        pass
+
+    @abstractmethod
+    async def add_participant(self, session_id: str, user_id: str) -> bool:
+        """Add a participant on any worker; False if already in the session."""
+        pass
+
+    @abstractmethod
+    async def remove_participant(self, session_id: str, user_id: str) -> int:
+        """Remove a participant; returns how many remain across all workers."""
+        pass
+
+    @abstractmethod
+    async def get_participants(self, session_id: str) -> Set[str]:
+        """Participants of a session across all workers."""
+        pass
+
+    @abstractmethod
+    async def save_document(self, session_id: str, document_id: str, record: Dict[str, Any]) -> None:
+        """Store the current state of a shared document."""
+        pass
+
+    @abstractmethod
+    async def load_document(self, session_id: str, document_id: str) -> Optional[Dict[str, Any]]:
+        """Get the current state of a shared document, if it exists."""
+        pass
+
+    @abstractmethod
+    async def list_documents(self, session_id: str) -> List[str]:
+        """IDs of the documents shared in a session."""
+        pass
+
+    @abstractmethod
+    async def delete_document(self, session_id: str, document_id: str) -> None:
+        """Forget a shared document and its history."""
+        pass
+
+    @abstractmethod
+    async def append_history(self, session_id: str, document_id: str, entry: Dict[str, Any]) -> None:
+        """Append the history entry of a new document version."""
+        pass
+
+    @abstractmethod
+    async def load_history(self, session_id: str, document_id: str, start: int = 0) -> List[Dict[str, Any]]:
+        """History entries of a document from index ``start`` (version ``start + 1``) on."""
+        pass
+
+    @abstractmethod
+    async def acquire_lock(self, session_id: str, document_id: str, user_id: str) -> str:
+        """Lock a document for ``user_id`` unless it is locked; returns the holder."""
+        pass
+
+    @abstractmethod
+    async def release_lock(self, session_id: str, document_id: str, user_id: Optional[str] = None) -> bool:
+        """Release a lock held by ``user_id`` (any holder if ``None``); True if released."""
+        pass
+
+    @abstractmethod
+    async def get_lock(self, session_id: str, document_id: str) -> Optional[str]:
+        """Get the user holding a document lock, if any."""
+        pass
+
+    @abstractmethod
+    async def release_user_locks(self, session_id: str, user_id: str) -> List[str]:
+        """Release every lock ``user_id`` holds in a session; returns the document IDs."""
+        pass
+
+
+class InMemoryBackplane(CollaborationBackplane):
+    """Process-local backplane; service instances sharing one behave like separate workers."""
+
+    def __init__(self):
+        self._handlers: List[BroadcastHandler] = []
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._participants: Dict[str, Set[str]] = {}
+        self._documents: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._history: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        self._locks: Dict[str, Dict[str, str]] = {}
+
+    async def start(self, handler: BroadcastHandler) -> None:
+        if handler not in self._handlers:
+            self._handlers.append(handler)
+
+    async def stop(self, handler: BroadcastHandler) -> None:
+        if handler in self._handlers:
+            self._handlers.remove(handler)
+
+    async def publish(self, session_id: str, origin: str, update_data: Dict[str, Any]) -> None:
+        # Round-trip through JSON so every worker sees what Redis would deliver
+        payload = json.loads(json.dumps(update_data, default=str))
+        for handler in list(self._handlers):
+            try:
+                await handler(session_id, origin, payload)
+            except Exception as e:
+                logger.error(f"Error delivering backplane broadcast: {str(e)}")
+
+    async def save_session(self, session_id: str, record: Dict[str, Any]) -> bool:
+        if session_id in self._sessions:
+            return False
+        self._sessions[session_id] = json.loads(json.dumps(record, default=str))
+        return True
+
+    async def load_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return self._sessions.get(session_id)
+
+    async def delete_session(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+        self._participants.pop(session_id, None)
+        self._documents.pop(session_id, None)
+        self._history.pop(session_id, None)
+        self._locks.pop(session_id, None)
+
+    async def add_participant(self, session_id: str, user_id: str) -> bool:
+        participants = self._participants.setdefault(session_id, set())
+        if user_id in participants:
+            return False
+        participants.add(user_id)
+        return True
+
+    async def remove_participant(self, session_id: str, user_id: str) -> int:
+        participants = self._participants.get(session_id, set())
+        participants.discard(user_id)
+        return len(participants)
+
+    async def get_participants(self, session_id: str) -> Set[str]:
+        return set(self._participants.get(session_id, set()))
+
+    async def save_document(self, session_id: str, document_id: str, record: Dict[str, Any]) -> None:
+        self._documents.setdefault(session_id, {})[document_id] = json.loads(json.dumps(record, default=str))
+
+    async def load_document(self, session_id: str, document_id: str) -> Optional[Dict[str, Any]]:
+        record = self._documents.get(session_id, {}).get(document_id)
+        return dict(record) if record is not None else None
+
+    async def list_documents(self, session_id: str) -> List[str]:
+        return list(self._documents.get(session_id, {}))
+
+    async def delete_document(self, session_id: str, document_id: str) -> None:
+        self._documents.get(session_id, {}).pop(document_id, None)
+        self._history.get(session_id, {}).pop(document_id, None)
+
+    async def append_history(self, session_id: str, document_id: str, entry: Dict[str, Any]) -> None:
+        history = self._history.setdefault(session_id, {}).setdefault(document_id, [])
+        history.append(json.loads(json.dumps(entry, default=str)))
+
+    async def load_history(self, session_id: str, document_id: str, start: int = 0) -> List[Dict[str, Any]]:
+        return [dict(entry) for entry in self._history.get(session_id, {}).get(document_id, [])[start:]]
+
+    async def acquire_lock(self, session_id: str, document_id: str, user_id: str) -> str:
+        return self._locks.setdefault(session_id, {}).setdefault(document_id, user_id)
+
+    async def release_lock(self, session_id: str, document_id: str, user_id: Optional[str] = None) -> bool:
+        locks = self._locks.get(session_id, {})
+        if document_id in locks and user_id in (None, locks[document_id]):
+            del locks[document_id]
+            return True
+        return False
+
+    async def get_lock(self, session_id: str, document_id: str) -> Optional[str]:
+        return self._locks.get(session_id, {}).get(document_id)
+
+    async def release_user_locks(self, session_id: str, user_id: str) -> List[str]:
+        locks = self._locks.get(session_id, {})
+        released = [doc_id for doc_id, holder in locks.items() if holder == user_id]
+        for doc_id in released:
+            del locks[doc_id]
+        return released
+
+
+# KEYS: lock hash; ARGV: document ID, user ID ("" releases any holder)
+_RELEASE_LOCK_LUA = """
+local holder = redis.call('HGET', KEYS[1], ARGV[1])
+if holder and (ARGV[2] == '' or holder == ARGV[2]) then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+    return 1
+end
+return 0
+"""
+
+# KEYS: lock hash; ARGV: user ID
+_RELEASE_USER_LOCKS_LUA = """
+local released = {}
+local locks = redis.call('HGETALL', KEYS[1])
+for i = 1, #locks, 2 do
+    if locks[i + 1] == ARGV[1] then
+        redis.call('HDEL', KEYS[1], locks[i])
+        table.insert(released, locks[i])
+    end
+end
+return released
+"""
+
+
+class RedisBackplane(CollaborationBackplane):
+    """Backplane shared by every worker and node through Redis.
+
+    Broadcasts use one pub/sub channel per session (``<prefix>:broadcast:<id>``),
+    received with a single pattern subscription per worker. Locks live in one
+    hash per session and change atomically. Participants are a set per session,
+    so any worker can tell when the last one has left. Documents are a hash per
+    session and each document's history is a list of version entries. All keys
+    expire after ``session_ttl`` seconds, so abandoned sessions do not pile up.
+    """
+
+    def __init__(self, client, prefix: str = "collab", session_ttl: int = 86400):
+        """``client`` is a ``redis.asyncio.Redis`` created with ``decode_responses=True``."""
+        self.client = client
+        self.prefix = prefix
+        self.session_ttl = session_ttl
+        self._release_lock = client.register_script(_RELEASE_LOCK_LUA)
+        self._release_user_locks = client.register_script(_RELEASE_USER_LOCKS_LUA)
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+
+    def _channel(self, session_id: str) -> str:
+        return f"{self.prefix}:broadcast:{session_id}"
+
+    def _session_key(self, session_id: str) -> str:
+        return f"{self.prefix}:session:{session_id}"
+
+    def _locks_key(self, session_id: str) -> str:
+        return f"{self.prefix}:locks:{session_id}"
+
+    def _participants_key(self, session_id: str) -> str:
+        return f"{self.prefix}:participants:{session_id}"
+
+    def _documents_key(self, session_id: str) -> str:
+        return f"{self.prefix}:documents:{session_id}"
+
+    def _history_key(self, session_id: str, document_id: str) -> str:
+        return f"{self.prefix}:history:{session_id}:{document_id}"
+
+    async def start(self, handler: BroadcastHandler) -> None:
+        if self._listener is not None:
+            return
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.psubscribe(self._channel("*"))
+        self._listener = asyncio.create_task(self._listen(handler))
+
+    async def _listen(self, handler: BroadcastHandler) -> None:
+        channel_prefix = self._channel("")
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    if message.get("type") != "pmessage":
+                        continue
+                    envelope = json.loads(message["data"])
+                    await handler(message["channel"][len(channel_prefix):], envelope["origin"], envelope["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Collaboration backplane listener error: {str(e)}")
+                await asyncio.sleep(1)
+
+    async def stop(self, handler: BroadcastHandler) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.punsubscribe()
+                await self._pubsub.close()
+            except Exception as e:
+                logger.error(f"Error closing collaboration backplane subscription: {str(e)}")
+            self._pubsub = None
+
+    async def publish(self, session_id: str, origin: str, update_data: Dict[str, Any]) -> None:
+        envelope = json.dumps({"origin": origin, "data": update_data}, default=str)
+        await self.client.publish(self._channel(session_id), envelope)
+
+    async def save_session(self, session_id: str, record: Dict[str, Any]) -> bool:
+        created = await self.client.set(
+            self._session_key(session_id),
+            json.dumps(record, default=str),
+            nx=True,
+            ex=self.session_ttl
+        )
+        return bool(created)
+
+    async def load_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        record = await self.client.get(self._session_key(session_id))
+        return json.loads(record) if record else None
+
+    async def delete_session(self, session_id: str) -> None:
+        document_ids = await self.client.hkeys(self._documents_key(session_id))
+        await self.client.delete(
+            self._session_key(session_id),
+            self._locks_key(session_id),
+            self._participants_key(session_id),
+            self._documents_key(session_id),
+            *[self._history_key(session_id, document_id) for document_id in document_ids]
+        )
+
+    async def add_participant(self, session_id: str, user_id: str) -> bool:
+        key = self._participants_key(session_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.sadd(key, user_id)
+            pipe.expire(key, self.session_ttl)
+            added, _ = await pipe.execute()
+        return bool(added)
+
+    async def remove_participant(self, session_id: str, user_id: str) -> int:
+        key = self._participants_key(session_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.srem(key, user_id)
+            pipe.scard(key)
+            _, remaining = await pipe.execute()
+        return int(remaining)
+
+    async def get_participants(self, session_id: str) -> Set[str]:
+        return set(await self.client.smembers(self._participants_key(session_id)))
+
+    async def save_document(self, session_id: str, document_id: str, record: Dict[str, Any]) -> None:
+        key = self._documents_key(session_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, document_id, json.dumps(record, default=str))
+            pipe.expire(key, self.session_ttl)
+            await pipe.execute()
+
+    async def load_document(self, session_id: str, document_id: str) -> Optional[Dict[str, Any]]:
+        record = await self.client.hget(self._documents_key(session_id), document_id)
+        return json.loads(record) if record else None
+
+    async def list_documents(self, session_id: str) -> List[str]:
+        return list(await self.client.hkeys(self._documents_key(session_id)))
+
+    async def delete_document(self, session_id: str, document_id: str) -> None:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hdel(self._documents_key(session_id), document_id)
+            pipe.delete(self._history_key(session_id, document_id))
+            await pipe.execute()
+
+    async def append_history(self, session_id: str, document_id: str, entry: Dict[str, Any]) -> None:
+        key = self._history_key(session_id, document_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.rpush(key, json.dumps(entry, default=str))
+            pipe.expire(key, self.session_ttl)
+            await pipe.execute()
+
+    async def load_history(self, session_id: str, document_id: str, start: int = 0) -> List[Dict[str, Any]]:
+        entries = await self.client.lrange(self._history_key(session_id, document_id), start, -1)
+        return [json.loads(entry) for entry in entries]
+
+    async def acquire_lock(self, session_id: str, document_id: str, user_id: str) -> str:
+        key = self._locks_key(session_id)
+        if await self.client.hsetnx(key, document_id, user_id):
+            await self.client.expire(key, self.session_ttl)
+            return user_id
+        return await self.client.hget(key, document_id) or await self.acquire_lock(session_id, document_id, user_id)
+
+    async def release_lock(self, session_id: str, document_id: str, user_id: Optional[str] = None) -> bool:
+        released = await self._release_lock(keys=[self._locks_key(session_id)], args=[document_id, user_id or ""])
+        return bool(released)
+
+    async def get_lock(self, session_id: str, document_id: str) -> Optional[str]:
+        return await self.client.hget(self._locks_key(session_id), document_id)
+
+    async def release_user_locks(self, session_id: str, user_id: str) -> List[str]:
+        return list(await self._release_user_locks(keys=[self._locks_key(session_id)], args=[user_id]))
+
+
+def create_collaboration_backplane() -> CollaborationBackplane:
+    """Build the backplane selected by COLLABORATION_BACKPLANE ("memory" or "redis")."""
+    from app.core.config import get_settings
+    settings = get_settings()
+    if settings.COLLABORATION_BACKPLANE == "redis":
+        try:
+            import redis.asyncio as redis
+            client = redis.Redis.from_url(settings.REDIS_URL, encoding="utf-8", decode_responses=True)
+            return RedisBackplane(client, session_ttl=settings.COLLABORATION_SESSION_TTL)
+        except Exception as e:
+            logger.warning(f"Redis collaboration backplane unavailable, using in-memory: {str(e)}")
+    return InMemoryBackplane()
@@ -0,0 +1,201 @@
+"""
+Document History
+Delta-encoded version history for collaborative documents.
+
+A delta is a list of operations applied left to right:
+
+* positive int - keep that many characters
+* negative int - delete that many characters
+* str - insert the text
+
+Unmentioned trailing text is kept, so typing one word into a long lesson plan
+is stored (and sent) as something like ``[1532, "word "]``. A full snapshot is
+kept every ``snapshot_interval`` versions, or when a delta would be larger
+than the content it produces, so reconstructing any version replays at most
+``snapshot_interval`` deltas.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+
+Delta = List[Union[int, str]]
+
+DEFAULT_SNAPSHOT_INTERVAL = 50
+
+
+def compute_delta(old: str, new: str) -> Delta:
+    """Delta turning ``old`` into ``new``, as one replacement between their common prefix and suffix."""
+    limit = min(len(old), len(new))
+    prefix = 0
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+
+    delta: Delta = []
+    if prefix:
+        delta.append(prefix)
+    deleted = len(old) - prefix - suffix
+    if deleted:
+        delta.append(-deleted)
+    inserted = new[prefix:len(new) - suffix]
+    if inserted:
+        delta.append(inserted)
+    return delta
+
+
+def apply_delta(text: str, delta: Delta) -> str:
+    """Apply a delta; raises ValueError if it does not fit ``text``."""
+    parts = []
+    position = 0
+    for op in delta:
+        if isinstance(op, str):
+            parts.append(op)
+        elif isinstance(op, int) and not isinstance(op, bool) and op != 0:
+            end = position + abs(op)
+            if end > len(text):
+                raise ValueError(f"Delta runs past the end of the document ({end} > {len(text)})")
+            if op > 0:
+                parts.append(text[position:end])
+            position = end
+        else:
+            raise ValueError(f"Invalid delta operation: {op!r}")
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+def delta_size(delta: Delta) -> int:
+    """Characters a delta carries (inserted text plus one per numeric op)."""
+    return sum(len(op) if isinstance(op, str) else 1 for op in delta)
+
+
+def _parse_timestamp(value: Union[str, datetime]) -> datetime:
+    """Entries that went through JSON carry ISO timestamps."""
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+class DocumentHistory:
+    """Version history of one document: periodic snapshots plus deltas between them."""
+
+    def __init__(
+        self,
+        content: str,
+        user_id: str,
+        snapshot_interval: int = DEFAULT_SNAPSHOT_INTERVAL,
+        timestamp: Optional[datetime] = None
+    ):
+        self.snapshot_interval = snapshot_interval
+        self.content = content
+        # entries[i] describes version i + 1
+        self._entries: List[Dict[str, Any]] = [{
+            "version": 1,
+            "user_id": user_id,
+            "timestamp": timestamp or datetime.now(),
+            "snapshot": content
+        }]
+
+    @property
+    def version(self) -> int:
+        return len(self._entries)
+
+    @property
+    def last_delta(self) -> Delta:
+        """Delta of the latest version (a snapshot is expressed as a full replacement)."""
+        entry = self._entries[-1]
+        if "delta" in entry:
+            return entry["delta"]
+        if self.version == 1:
+            return [entry["snapshot"]] if entry["snapshot"] else []
+        return compute_delta(self.content_at(self.version - 1), entry["snapshot"])
+
+    @property
+    def last_entry(self) -> Dict[str, Any]:
+        """Entry of the latest version."""
+        return dict(self._entries[-1])
+
+    @classmethod
+    def from_entries(
+        cls,
+        entries: List[Dict[str, Any]],
+        snapshot_interval: int = DEFAULT_SNAPSHOT_INTERVAL
+    ) -> "DocumentHistory":
+        """Rebuild a history from ``entries`` (e.g. as stored by another worker)."""
+        first = entries[0]
+        history = cls(first["snapshot"], first["user_id"], snapshot_interval, _parse_timestamp(first["timestamp"]))
+        history.extend(entries[1:])
+        return history
+
+    def extend(self, entries: List[Dict[str, Any]]):
+        """Append entries recorded elsewhere; they must continue from the latest version."""
+        for entry in entries:
+            if entry["version"] != self.version + 1:
+                raise ValueError(f"Expected version {self.version + 1}, got {entry['version']}")
+            entry = {**entry, "timestamp": _parse_timestamp(entry["timestamp"])}
+            self.content = entry["snapshot"] if "snapshot" in entry else apply_delta(self.content, entry["delta"])
+            self._entries.append(entry)
+
+    def apply(self, delta: Delta, user_id: str, timestamp: Optional[datetime] = None) -> str:
+        """Record a client delta against the latest version; returns the new content."""
+        content = apply_delta(self.content, delta)
+        self._append(content, delta, user_id, timestamp)
+        return content
+
+    def record(self, content: str, user_id: str, timestamp: Optional[datetime] = None) -> Delta:
+        """Record a full-content edit as a delta; returns the delta."""
+        delta = compute_delta(self.content, content)
+        self._append(content, delta, user_id, timestamp)
+        return delta
+
+    def _append(self, content: str, delta: Delta, user_id: str, timestamp: Optional[datetime]):
+        entry = {
+            "version": self.version + 1,
+            "user_id": user_id,
+            "timestamp": timestamp or datetime.now()
+        }
+        if entry["version"] % self.snapshot_interval == 0 or delta_size(delta) >= len(content):
+            entry["snapshot"] = content
+        else:
+            entry["delta"] = delta
+        self._entries.append(entry)
+        self.content = content
+
+    def content_at(self, version: int) -> str:
+        """Reconstruct the content of ``version``."""
+        if not 1 <= version <= self.version:
+            raise ValueError(f"Unknown version {version}")
+        if version == self.version:
+            return self.content
+        start = version - 1
+        while "snapshot" not in self._entries[start]:
+            start -= 1
+        content = self._entries[start]["snapshot"]
+        for entry in self._entries[start + 1:version]:
+            content = apply_delta(content, entry["delta"])
+        return content
+
+    def entries(self, include_content: bool = False) -> List[Dict[str, Any]]:
+        """History entries, oldest first.
+
+        Entries carry either ``delta`` or ``snapshot``; with ``include_content``
+        every entry also gets its full ``content`` (reconstructed in one pass).
+        """
+        if not include_content:
+            return [dict(entry) for entry in self._entries]
+        result = []
+        content = ""
+        for entry in self._entries:
+            content = entry["snapshot"] if "snapshot" in entry else apply_delta(content, entry["delta"])
+            result.append({**entry, "content": content})
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get version count and stored size."""
+        snapshots = [entry["snapshot"] for entry in self._entries if "snapshot" in entry]
+        return {
+            "versions": self.version,
+            "snapshots": len(snapshots),
+            "stored_chars": sum(len(snapshot) for snapshot in snapshots) + sum(
+                delta_size(entry["delta"]) for entry in self._entries if "delta" in entry
+            )
+        }
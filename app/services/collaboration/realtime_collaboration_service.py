@@ -7,19 +7,37 @@ from collections import defaultdict
 import json
 import uuid
 
+from app.core.websocket_fanout import create_fanout_hub
+from app.services.collaboration.backplane import CollaborationBackplane, create_collaboration_backplane
+from app.services.collaboration.document_history import Delta, DocumentHistory
+
 logger = logging.getLogger(__name__)
 
+# Document fields that are only meaningful on this worker, or rebuilt from history
+_LOCAL_DOCUMENT_FIELDS = ("content", "history", "lock_status")
+_DOCUMENT_TIMESTAMPS = ("created_at", "last_modified", "approved_at", "rejected_at")
+
 class RealtimeCollaborationService:
-    def __init__(self):
-        """Initialize the Realtime Collaboration Service."""
+    def __init__(self, backplane: Optional[CollaborationBackplane] = None):
+        """Initialize the Realtime Collaboration Service.
+
+        Sessions, participants, documents and locks below are this worker's
+        view; the backplane routes broadcasts to other workers and holds the
+        authoritative state of all of them.
+        """
         self.active_sessions: Dict[str, Dict[str, Any]] = {}
         self.session_participants: Dict[str, Set[str]] = defaultdict(set)
         self.document_locks: Dict[str, Dict[str, str]] = defaultdict(dict)
         self.collaborative_documents: Dict[str, Dict[str, Any]] = {}
         self.websocket_connections: Dict[str, WebSocket] = {}
-        self.document_history: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.document_history: Dict[str, DocumentHistory] = {}
         self.pending_changes: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
         self.session_metadata: Dict[str, Dict[str, Any]] = {}
+        # Per-connection send queues; broadcasts never wait on a socket
+        self.fanout = create_fanout_hub(on_disconnect=self._on_websocket_closed)
+        self.backplane = backplane or create_collaboration_backplane()
+        self.worker_id = uuid.uuid4().hex
+        self._backplane_started = False
 
     async def create_session(
         self,
@@ -28,6 +46,7 @@ class RealtimeCollaborationService:
     ) -> Dict[str, Any]:
         """Create a new collaboration session."""
         try:
+            await self._start_backplane()
             if session_id in self.active_sessions:
                 raise HTTPException(status_code=400, detail="Session already exists")
 
@@ -41,13 +60,11 @@ class RealtimeCollaborationService:
                 "settings": self._get_default_session_settings()
             }
 
-            self.active_sessions[session_id] = session
-            self.session_metadata[session_id] = {
-                "Session": session_id,
-                "last_activity": datetime.now(),
-                "participant_status": {},
-                "session_type": "default"
-            }
+            record = {key: session[key] for key in ("id", "creator", "created_at", "status", "settings")}
+            if not await self.backplane.save_session(session_id, record):
+                raise HTTPException(status_code=400, detail="Session already exists")
+
+            self._add_local_session(session)
 
             return session
         
@@ -62,13 +79,13 @@ class RealtimeCollaborationService:
     ) -> Dict[str, Any]:
         """Join an existing collaboration session."""
         try:
-            if session_id not in self.active_sessions:
-                raise HTTPException(status_code=404, detail="Session not found")
-
-            session = self.active_sessions[session_id]
+            await self._start_backplane()
+            # The session may have been created on another worker
+            session = await self._require_session(session_id)
             
             # If user is the creator and not in participants, add them
             if user_id == session["creator"] and user_id not in session["participants"]:
+                await self.backplane.add_participant(session_id, user_id)
                 session["participants"].add(user_id)
                 self.session_participants[session_id].add(user_id)
                 self.session_metadata[session_id]["participant_status"][user_id] = "active"
@@ -79,8 +96,9 @@ class RealtimeCollaborationService:
             if user_id in session["participants"]:
                 raise HTTPException(status_code=400, detail="User already in session")
 
-            # Check participant limit
-            if len(session["participants"]) >= session["settings"]["max_participants"]:
+            # Check participant limit (participants on every worker count)
+            participants = await self.backplane.get_participants(session_id)
+            if len(participants) >= session["settings"]["max_participants"]:
                 raise HTTPException(status_code=400, detail="Session has reached maximum participants")
 
             # Check anonymous access
@@ -88,6 +106,9 @@ class RealtimeCollaborationService:
                 if not session["settings"]["allow_anonymous"]:
                     raise HTTPException(status_code=403, detail="Anonymous access is not allowed in this session")
 
+            if not await self.backplane.add_participant(session_id, user_id):
+                raise HTTPException(status_code=400, detail="User already in session")
+
             # Add user to participants set
             session["participants"].add(user_id)
             self.session_participants[session_id].add(user_id)
@@ -112,19 +133,17 @@ class RealtimeCollaborationService:
     ) -> None:
         """Leave a collaboration session."""
         try:
-            if session_id not in self.active_sessions:
-                raise HTTPException(status_code=404, detail="Session not found")
-
-            session = self.active_sessions[session_id]
+            session = await self._require_session(session_id)
             if user_id not in session["participants"]:
                 raise HTTPException(status_code=400, detail="User not in session")
 
             session["participants"].remove(user_id)
-            self.session_participants[session_id].remove(user_id)
-            del self.session_metadata[session_id]["participant_status"][user_id]
+            self.session_participants[session_id].discard(user_id)
+            self.session_metadata[session_id]["participant_status"].pop(user_id, None)
+            remaining = await self.backplane.remove_participant(session_id, user_id)
 
             # Release any locks held by the user
-            self._release_user_locks(session_id, user_id)
+            await self._release_user_locks(session_id, user_id)
 
             await self._broadcast_session_update(session_id, {
                 "type": "participant_left",
@@ -132,8 +151,9 @@ class RealtimeCollaborationService:
                 "timestamp": datetime.now().isoformat()
             })
 
-            # Only clean up empty session if there are no documents
-            if not session["participants"] and not session["documents"]:
+            # Only clean up the session once nobody on any worker is in it
+            # and there are no documents
+            if remaining == 0 and not await self.backplane.list_documents(session_id):
                 await self._cleanup_session(session_id)
         except Exception as e:
             logger.error(f"Error leaving session: {str(e)}")
@@ -147,10 +167,7 @@ class RealtimeCollaborationService:
     ) -> Dict[str, Any]:
         """Update session information."""
         try:
-            if session_id not in self.active_sessions:
-                raise HTTPException(status_code=404, detail="Session not found")
-
-            session = self.active_sessions[session_id]
+            session = await self._require_session(session_id)
             if user_id not in session["participants"]:
                 raise HTTPException(status_code=403, detail="User not authorized")
 
@@ -182,10 +199,7 @@ class RealtimeCollaborationService:
     ) -> Dict[str, Any]:
         """Share a document in the session."""
         try:
-            if session_id not in self.active_sessions:
-                raise HTTPException(status_code=404, detail="Session not found")
-
-            session = self.active_sessions[session_id]
+            session = await self._require_session(session_id)
             if user_id not in session["participants"]:
                 raise HTTPException(status_code=403, detail="User not authorized")
 
@@ -199,14 +213,15 @@ class RealtimeCollaborationService:
                 "status": "active"
             }
 
+            history = DocumentHistory(document_content, user_id)
+            # Sharing under an existing ID starts the document over
+            await self.backplane.delete_document(session_id, document_id)
+            await self._commit_document_version(session_id, document, history)
+
             self.collaborative_documents[document_id] = document
-            session["documents"].append(document_id)
-            self.document_history[document_id].append({
-                "version": 1,
-                "content": document_content,
-                "user_id": user_id,
-                "timestamp": datetime.now()
-            })
+            self.document_history[document_id] = history
+            if document_id not in session["documents"]:
+                session["documents"].append(document_id)
 
             await self._broadcast_session_update(session_id, {
                 "type": "document_shared",
@@ -227,14 +242,9 @@ class RealtimeCollaborationService:
     ) -> Dict[str, Any]:
         """Get a shared document."""
         try:
-            if session_id not in self.active_sessions:
-                raise HTTPException(status_code=404, detail="Session not found")
-
-            if document_id not in self.collaborative_documents:
-                raise HTTPException(status_code=404, detail="Document not found")
-
-            document = self.collaborative_documents[document_id]
-            document["history"] = self.document_history[document_id]
+            await self._require_session(session_id)
+            document = await self._require_document(session_id, document_id)
+            document["history"] = self.document_history[document_id].entries()
             document["lock_status"] = self._get_document_lock_status(session_id, document_id)
 
             return document
@@ -250,14 +260,14 @@ class RealtimeCollaborationService:
     ) -> None:
         """Lock a document for editing."""
         try:
-            if session_id not in self.active_sessions:
-                raise HTTPException(status_code=404, detail="Session not found")
+            await self._require_session(session_id)
 
-            if document_id in self.document_locks[session_id]:
-                if self.document_locks[session_id][document_id] != user_id:
-                    raise HTTPException(status_code=400, detail="Document already locked")
+            if await self.backplane.get_lock(session_id, document_id) == user_id:
                 return
 
+            if await self.backplane.acquire_lock(session_id, document_id, user_id) != user_id:
+                raise HTTPException(status_code=400, detail="Document already locked")
+
             self.document_locks[session_id][document_id] = user_id
 
             await self._broadcast_session_update(session_id, {
@@ -278,16 +288,17 @@ class RealtimeCollaborationService:
     ) -> None:
         """Unlock a document."""
         try:
-            if session_id not in self.active_sessions:
-                raise HTTPException(status_code=404, detail="Session not found")
+            await self._require_session(session_id)
 
-            if document_id not in self.document_locks[session_id]:
+            holder = await self.backplane.get_lock(session_id, document_id)
+            if holder is None:
                 return
 
-            if self.document_locks[session_id][document_id] != user_id:
+            if holder != user_id:
                 raise HTTPException(status_code=403, detail="Not authorized to unlock document")
 
-            del self.document_locks[session_id][document_id]
+            await self.backplane.release_lock(session_id, document_id, user_id)
+            self.document_locks[session_id].pop(document_id, None)
 
             await self._broadcast_session_update(session_id, {
                 "type": "document_unlocked",
@@ -304,41 +315,53 @@ class RealtimeCollaborationService:
         session_id: str,
         user_id: str,
         document_id: str,
-        document_content: str
+        document_content: Optional[str] = None,
+        delta: Optional[Delta] = None,
+        base_version: Optional[int] = None
     ) -> Dict[str, Any]:
-        """Edit a shared document."""
-        try:
-            if session_id not in self.active_sessions:
-                raise HTTPException(status_code=404, detail="Session not found")
+        """Edit a shared document.
 
-            if document_id not in self.collaborative_documents:
-                raise HTTPException(status_code=404, detail="Document not found")
+        Clients either send a ``delta`` against ``base_version`` or the full
+        ``document_content``; both are stored and broadcast as a delta.
+        """
+        try:
+            await self._require_session(session_id)
+            document = await self._require_document(session_id, document_id)
 
             # Check if the user has the lock
-            if document_id not in self.document_locks.get(session_id, {}) or self.document_locks[session_id][document_id] != user_id:
+            if await self.backplane.get_lock(session_id, document_id) != user_id:
                 raise HTTPException(status_code=403, detail="You must have a lock to edit this document")
 
-            document = self.collaborative_documents[document_id]
+            history = self.document_history[document_id]
+            if delta is not None:
+                if base_version is not None and base_version != document["version"]:
+                    raise HTTPException(status_code=409, detail="Document version conflict")
+                try:
+                    document_content = history.apply(delta, user_id)
+                except ValueError as e:
+                    raise HTTPException(status_code=400, detail=f"Invalid delta: {str(e)}")
+            elif document_content is not None:
+                delta = history.record(document_content, user_id)
+            else:
+                raise HTTPException(status_code=400, detail="Either content or delta is required")
+
             document["content"] = document_content
             document["last_modified"] = datetime.now()
-            document["version"] += 1
-
-            self.document_history[document_id].append({
-                "version": document["version"],
-                "content": document_content,
-                "user_id": user_id,
-                "timestamp": datetime.now()
-            })
+            document["version"] = history.version
+            await self._commit_document_version(session_id, document)
 
             await self._broadcast_session_update(session_id, {
                 "type": "document_edited",
                 "document_id": document_id,
                 "user_id": user_id,
                 "version": document["version"],
+                "delta": delta,
                 "timestamp": datetime.now().isoformat()
             })
 
             return document
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error editing document: {str(e)}")
             raise HTTPException(status_code=500, detail=str(e))
@@ -351,19 +374,14 @@ class RealtimeCollaborationService:
     ) -> Dict[str, Any]:
         """Review a shared document."""
         try:
-            if session_id not in self.active_sessions:
-                raise HTTPException(status_code=404, detail="Session not found")
-
-            if document_id not in self.collaborative_documents:
-                raise HTTPException(status_code=404, detail="Document not found")
-
-            document = self.collaborative_documents[document_id]
+            await self._require_session(session_id)
+            document = await self._require_document(session_id, document_id)
             review_data = {
                 "document_id": document_id,
                 "reviewer": user_id,
                 "timestamp": datetime.now(),
                 "version": document["version"],
-                "history": self.document_history[document_id],
+                "history": self.document_history[document_id].entries(),
                 "pending_changes": self.pending_changes[document_id]
             }
 
@@ -387,16 +405,12 @@ class RealtimeCollaborationService:
     ) -> Dict[str, Any]:
         """Approve a document in the collaboration session."""
         try:
-            if session_id not in self.active_sessions:
-                raise HTTPException(status_code=404, detail="Session not found")
-
-            if document_id not in self.collaborative_documents:
-                raise HTTPException(status_code=404, detail="Document not found")
-
-            document = self.collaborative_documents[document_id]
+            await self._require_session(session_id)
+            document = await self._require_document(session_id, document_id)
             document["status"] = "approved"
             document["approved_by"] = user_id
             document["approved_at"] = datetime.now()
+            await self._save_document(session_id, document)
 
             await self._broadcast_session_update(session_id, {
                 "type": "document_approved",
@@ -418,16 +432,12 @@ class RealtimeCollaborationService:
     ) -> Dict[str, Any]:
         """Reject a document in the collaboration session."""
         try:
-            if session_id not in self.active_sessions:
-                raise HTTPException(status_code=404, detail="Session not found")
-
-            if document_id not in self.collaborative_documents:
-                raise HTTPException(status_code=404, detail="Document not found")
-
-            document = self.collaborative_documents[document_id]
+            await self._require_session(session_id)
+            document = await self._require_document(session_id, document_id)
             document["status"] = "rejected"
             document["rejected_by"] = user_id
             document["rejected_at"] = datetime.now()
+            await self._save_document(session_id, document)
 
             await self._broadcast_session_update(session_id, {
                 "type": "document_rejected",
@@ -449,28 +459,20 @@ class RealtimeCollaborationService:
     ) -> Dict[str, Any]:
         """Merge changes in a document."""
         try:
-            if session_id not in self.active_sessions:
-                raise HTTPException(status_code=404, detail="Session not found")
-
-            if document_id not in self.collaborative_documents:
-                raise HTTPException(status_code=404, detail="Document not found")
+            await self._require_session(session_id)
+            document = await self._require_document(session_id, document_id)
 
             if not self.pending_changes[document_id]:
                 raise HTTPException(status_code=400, detail="No pending changes to merge")
 
-            document = self.collaborative_documents[document_id]
             latest_change = self.pending_changes[document_id][-1]
             
+            history = self.document_history[document_id]
+            history.record(latest_change["content"], user_id)
             document["content"] = latest_change["content"]
             document["last_modified"] = datetime.now()
-            document["version"] += 1
-
-            self.document_history[document_id].append({
-                "version": document["version"],
-                "content": latest_change["content"],
-                "user_id": user_id,
-                "timestamp": datetime.now()
-            })
+            document["version"] = history.version
+            await self._commit_document_version(session_id, document)
 
             # Clear pending changes after successful merge
             self.pending_changes[document_id] = []
@@ -491,17 +493,45 @@ class RealtimeCollaborationService:
     async def get_document_history(
         self,
         session_id: str,
-        document_id: str
+        document_id: str,
+        include_content: bool = False
     ) -> List[Dict[str, Any]]:
-        """Get document edit history."""
+        """Get document edit history.
+
+        Entries carry a ``delta`` or a full ``snapshot``; ``include_content``
+        adds the reconstructed content of every version.
+        """
         try:
-            if session_id not in self.active_sessions:
-                raise HTTPException(status_code=404, detail="Session not found")
+            await self._require_session(session_id)
+            await self._require_document(session_id, document_id)
 
-            if document_id not in self.collaborative_documents:
-                raise HTTPException(status_code=404, detail="Document not found")
+            return self.document_history[document_id].entries(include_content=include_content)
+        except Exception as e:
+            logger.error(f"Error getting document history: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    async def get_document_version(
+        self,
+        session_id: str,
+        document_id: str,
+        version: int
+    ) -> Dict[str, Any]:
+        """Reconstruct a past version of a document."""
+        try:
+            await self._require_session(session_id)
+            await self._require_document(session_id, document_id)
+
+            history = self.document_history[document_id]
+            if not 1 <= version <= history.version:
+                raise HTTPException(status_code=404, detail="Version not found")
 
-            return self.document_history[document_id]
+            return {
+                "document_id": document_id,
+                "version": version,
+                "content": history.content_at(version)
+            }
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error getting document history: {str(e)}")
             raise HTTPException(status_code=500, detail=str(e))
@@ -513,11 +543,8 @@ class RealtimeCollaborationService:
     ) -> Dict[str, Any]:
         """Get document lock status."""
         try:
-            if session_id not in self.active_sessions:
-                raise HTTPException(status_code=404, detail="Session not found")
-
-            if document_id not in self.collaborative_documents:
-                raise HTTPException(status_code=404, detail="Document not found")
+            await self._require_session(session_id)
+            await self._require_document(session_id, document_id)
 
             return self._get_document_lock_status(session_id, document_id)
         except Exception as e:
@@ -532,28 +559,15 @@ class RealtimeCollaborationService:
     ) -> Dict[str, str]:
         """Delete a document from the collaboration session."""
         try:
-            if session_id not in self.active_sessions:
-                raise HTTPException(status_code=404, detail="Session not found")
-
-            if document_id not in self.collaborative_documents:
-                raise HTTPException(status_code=404, detail="Document not found")
-
-            document = self.collaborative_documents[document_id]
+            await self._require_session(session_id)
+            document = await self._require_document(session_id, document_id)
             if document["owner"] != user_id:
                 raise HTTPException(status_code=403, detail="Only the document owner can delete it")
 
             # Remove document from all relevant data structures
-            del self.collaborative_documents[document_id]
-            if document_id in self.document_locks.get(session_id, {}):
-                del self.document_locks[session_id][document_id]
-            if document_id in self.document_history:
-                del self.document_history[document_id]
-            if document_id in self.pending_changes:
-                del self.pending_changes[document_id]
-            
-            # Remove from session's document list
-            if document_id in self.active_sessions[session_id]["documents"]:
-                self.active_sessions[session_id]["documents"].remove(document_id)
+            await self.backplane.delete_document(session_id, document_id)
+            await self.backplane.release_lock(session_id, document_id)
+            self._forget_document(session_id, document_id)
 
             await self._broadcast_session_update(session_id, {
                 "type": "document_deleted",
@@ -569,10 +583,7 @@ class RealtimeCollaborationService:
 
     async def get_session_status(self, session_id: str) -> Dict[str, Any]:
         """Get the current status of a collaboration session."""
-        if session_id not in self.active_sessions:
-            raise HTTPException(status_code=404, detail="Session not found")
-            
-        session = self.active_sessions[session_id]
+        session = await self._require_session(session_id)
         return {
             "id": session_id,
             "creator": session["creator"],
@@ -597,14 +608,106 @@ class RealtimeCollaborationService:
             "allow_anonymous": False
         }
 
-    def _release_user_locks(self, session_id: str, user_id: str) -> None:
+    async def _release_user_locks(self, session_id: str, user_id: str) -> None:
         """Release all document locks held by a user."""
+        await self.backplane.release_user_locks(session_id, user_id)
+        self._forget_user_locks(session_id, user_id)
+
+    def _forget_user_locks(self, session_id: str, user_id: str) -> None:
+        """Drop a user's locks from this worker's view."""
         for doc_id, lock_holder in list(self.document_locks[session_id].items()):
             if lock_holder == user_id:
                 del self.document_locks[session_id][doc_id]
 
+    def _add_local_session(self, session: Dict[str, Any]) -> None:
+        """Track a session on this worker."""
+        self.active_sessions[session["id"]] = session
+        self.session_metadata[session["id"]] = {
+            "Session": session["id"],
+            "last_activity": datetime.now(),
+            "participant_status": {},
+            "session_type": "default"
+        }
+
+    async def _load_session(self, session_id: str) -> None:
+        """Pick up a session created on another worker."""
+        record = await self.backplane.load_session(session_id)
+        if record is None:
+            return
+        participants = await self.backplane.get_participants(session_id)
+        self._add_local_session({
+            **record,
+            "created_at": datetime.fromisoformat(record["created_at"]),
+            "participants": participants,
+            "documents": await self.backplane.list_documents(session_id)
+        })
+        self.session_participants[session_id] = set(participants)
+        for user_id in participants:
+            self.session_metadata[session_id]["participant_status"][user_id] = "active"
+
+    async def _require_session(self, session_id: str) -> Dict[str, Any]:
+        """Get a session, loading it from the backplane if another worker created it."""
+        if session_id not in self.active_sessions:
+            await self._load_session(session_id)
+        if session_id not in self.active_sessions:
+            raise HTTPException(status_code=404, detail="Session not found")
+        return self.active_sessions[session_id]
+
+    async def _require_document(self, session_id: str, document_id: str) -> Dict[str, Any]:
+        """Get a shared document, catching up on versions recorded by other workers."""
+        record = await self.backplane.load_document(session_id, document_id)
+        if record is None:
+            self._forget_document(session_id, document_id)
+            raise HTTPException(status_code=404, detail="Document not found")
+
+        history = self.document_history.get(document_id)
+        if history is None or history.version > record["version"]:
+            history = DocumentHistory.from_entries(await self.backplane.load_history(session_id, document_id))
+            self.document_history[document_id] = history
+        elif history.version < record["version"]:
+            history.extend(await self.backplane.load_history(session_id, document_id, start=history.version))
+
+        document = self.collaborative_documents.setdefault(document_id, {})
+        document.update({
+            key: datetime.fromisoformat(value) if key in _DOCUMENT_TIMESTAMPS and isinstance(value, str) else value
+            for key, value in record.items()
+        })
+        document["content"] = history.content
+        session = self.active_sessions.get(session_id)
+        if session is not None and document_id not in session["documents"]:
+            session["documents"].append(document_id)
+        return document
+
+    async def _save_document(self, session_id: str, document: Dict[str, Any]) -> None:
+        """Store a document's metadata on the backplane; content lives in its history."""
+        record = {key: value for key, value in document.items() if key not in _LOCAL_DOCUMENT_FIELDS}
+        await self.backplane.save_document(session_id, document["id"], record)
+
+    async def _commit_document_version(
+        self,
+        session_id: str,
+        document: Dict[str, Any],
+        history: Optional[DocumentHistory] = None
+    ) -> None:
+        """Publish a document's latest version so every worker can catch up to it."""
+        history = history or self.document_history[document["id"]]
+        # History first: a worker that sees the new version can always load it
+        await self.backplane.append_history(session_id, document["id"], history.last_entry)
+        await self._save_document(session_id, document)
+
+    def _forget_document(self, session_id: str, document_id: str) -> None:
+        """Drop a document from this worker's view."""
+        self.collaborative_documents.pop(document_id, None)
+        self.document_history.pop(document_id, None)
+        self.pending_changes.pop(document_id, None)
+        self.document_locks.get(session_id, {}).pop(document_id, None)
+        session = self.active_sessions.get(session_id)
+        if session is not None and document_id in session["documents"]:
+            session["documents"].remove(document_id)
+
     async def _cleanup_session(self, session_id: str) -> None:
         """Clean up an empty session."""
+        await self.backplane.delete_session(session_id)
         if session_id in self.active_sessions:
             del self.active_sessions[session_id]
         if session_id in self.session_participants:
@@ -621,14 +724,63 @@ class RealtimeCollaborationService:
         session_id: str,
         update_data: Dict[str, Any]
     ) -> None:
-        """Broadcast an update to all session participants."""
+        """Broadcast an update to all session participants.
+
+        The update is serialized once and queued for each participant connected
+        to this worker, then published so other workers deliver it to theirs.
+        """
+        self._deliver_session_update(session_id, update_data)
+        try:
+            await self.backplane.publish(session_id, self.worker_id, update_data)
+        except Exception as e:
+            logger.error(f"Error publishing update for session {session_id}: {str(e)}")
+
+    def _deliver_session_update(self, session_id: str, update_data: Dict[str, Any]) -> None:
+        """Queue an update for the session participants connected to this worker."""
         if session_id in self.session_participants:
-            for user_id in self.session_participants[session_id]:
-                if user_id in self.websocket_connections:
-                    try:
-                        await self.websocket_connections[user_id].send_json(update_data)
-                    except Exception as e:
-                        logger.error(f"Error broadcasting to user {user_id}: {str(e)}")
+            try:
+                self.fanout.broadcast(update_data, groups=self.session_participants[session_id])
+            except Exception as e:
+                logger.error(f"Error broadcasting to session {session_id}: {str(e)}")
+
+    async def _start_backplane(self) -> None:
+        """Subscribe to broadcasts from other workers (once, inside the event loop)."""
+        if not self._backplane_started:
+            self._backplane_started = True
+            await self.backplane.start(self._on_backplane_update)
+
+    async def _on_backplane_update(
+        self,
+        session_id: str,
+        origin: str,
+        update_data: Dict[str, Any]
+    ) -> None:
+        """Apply an update published by another worker and deliver it locally."""
+        if origin == self.worker_id:
+            return
+
+        update_type = update_data.get("type")
+        user_id = update_data.get("user_id")
+        document_id = update_data.get("document_id")
+        session = self.active_sessions.get(session_id)
+        if update_type == "document_locked":
+            self.document_locks[session_id][document_id] = user_id
+        elif update_type == "document_unlocked":
+            self.document_locks[session_id].pop(document_id, None)
+        elif update_type in ("document_shared", "document_deleted"):
+            # Any local copy is stale; it is reloaded from the backplane on next use
+            self._forget_document(session_id, document_id)
+            if update_type == "document_shared" and session is not None:
+                session["documents"].append(document_id)
+        elif update_type in ("participant_joined", "user_joined") and session is not None:
+            session["participants"].add(user_id)
+            self.session_participants[session_id].add(user_id)
+        elif update_type in ("participant_left", "user_left") and session is not None:
+            session["participants"].discard(user_id)
+            self.session_participants[session_id].discard(user_id)
+            self._forget_user_locks(session_id, user_id)
+
+        self._deliver_session_update(session_id, update_data)
 
     async def register_websocket(
         self,
@@ -636,7 +788,12 @@ class RealtimeCollaborationService:
         websocket: WebSocket
     ) -> None:
         """Register a WebSocket connection for a user."""
+        await self._start_backplane()
+        previous = self.websocket_connections.get(user_id)
+        if previous is not None and previous is not websocket:
+            await self.fanout.unregister(previous)
         self.websocket_connections[user_id] = websocket
+        self.fanout.register(websocket, user_id)
 
     async def unregister_websocket(
         self,
@@ -644,17 +801,20 @@ class RealtimeCollaborationService:
     ) -> None:
         """Unregister a WebSocket connection."""
         if user_id in self.websocket_connections:
+            await self.fanout.unregister(self.websocket_connections.pop(user_id))
+
+    async def _on_websocket_closed(self, websocket: WebSocket, user_id: str) -> None:
+        """Forget a connection whose writer stopped (send failure or slow consumer)."""
+        if self.websocket_connections.get(user_id) is websocket:
             del self.websocket_connections[user_id]
 
     async def cleanup(self) -> None:
         """Clean up all resources when the service is shutting down."""
         try:
             # Close all active WebSocket connections
-            for user_id, websocket in self.websocket_connections.items():
-                try:
-                    await websocket.close()
-                except Exception as e:
-                    logger.error(f"Error closing websocket for user {user_id}: {str(e)}")
+            await self.fanout.close()
+            await self.backplane.stop(self._on_backplane_update)
+            self._backplane_started = False
 
             # Clear all data structures
             self.active_sessions.clear()
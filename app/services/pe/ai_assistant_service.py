@@ -14,7 +14,7 @@ import openai
 import re
 import asyncio
 import logging
-from openai import OpenAI
+from app.core.llm_client import get_openai_client
 
 from app.models.ai_assistant import (
     AIAssistantConfig,
@@ -48,7 +48,7 @@ logger = logging.getLogger(__name__)
 class AIAssistantService:
     def __init__(self, db: Session):
         self.db = db
-        self.openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        self.openai_client = get_openai_client()
         # Initialize ModelRouter for hybrid architecture
         from app.services.pe.model_router import ModelRouter
         self.model_router = ModelRouter(db, self.openai_client)
@@ -6,8 +6,8 @@ Supports both simple pattern (no db/openai_client) and registry pattern (with db
 
 from typing import Dict, Any, Optional
 from sqlalchemy.orm import Session
-from openai import OpenAI
 from pathlib import Path
+from app.core.llm_client import get_openai_client
 import logging
 import os
 
@@ -17,26 +17,25 @@ logger = logging.getLogger(__name__)
 class BaseWidgetService:
     """Base class for all specialized widget services."""
 
-    def __init__(self, db: Session = None, openai_client: OpenAI = None):
+    def __init__(self, db: Session = None, openai_client: Optional[Any] = None):
         """
         Initialize BaseWidgetService.
         
         Args:
             db: Optional database session (for registry compatibility)
-            openai_client: Optional OpenAI client (auto-created from env if not provided)
+            openai_client: Optional OpenAI client (shared pooled client if not provided)
         """
         self.db = db
         self.prompt_file: str = ""
         self.model: str = "gpt-4o-mini"
         
-        # Auto-create OpenAI client if not provided
+        # Use the shared pooled client if none is provided
         if openai_client:
             self.openai_client = openai_client
         else:
-            # Create client from environment variable
             api_key = os.getenv('OPENAI_API_KEY')
             if api_key:
-                self.openai_client = OpenAI(api_key=api_key)
+                self.openai_client = get_openai_client()
             else:
                 self.openai_client = None
                 logger.warning("⚠️ No OpenAI API key found - API calls will fail")
@@ -5,9 +5,10 @@ Routes requests to specialized service or fallback router.
 
 from typing import Dict, Any, Optional
 from sqlalchemy.orm import Session
-from openai import OpenAI
 import logging
 
+from app.core.llm_client import get_openai_client
+
 from app.services.pe.specialized_services.service_registry import ServiceRegistry
 from app.services.pe.base_widget_service import BaseWidgetService
 
@@ -17,16 +18,18 @@ logger = logging.getLogger(__name__)
 class ModelRouter:
     """Routes requests to specialized service or fallback router."""
 
-    def __init__(self, db: Session = None, openai_client: OpenAI = None):
+    def __init__(self, db: Session = None, openai_client: Optional[Any] = None):
         """
         Initialize ModelRouter.
         
         Args:
             db: Database session (required for ServiceRegistry)
-            openai_client: OpenAI client (required for ServiceRegistry and fallback)
+            openai_client: OpenAI client (defaults to the shared pooled client)
         """
-        if not db or not openai_client:
-            logger.warning("⚠️ ModelRouter initialized without db/openai_client - registry will be None")
+        if openai_client is None:
+            openai_client = get_openai_client()
+        if not db:
+            logger.warning("⚠️ ModelRouter initialized without db - registry will be None")
             self.registry = None
         else:
             self.registry = ServiceRegistry(db, openai_client)
@@ -8,6 +8,7 @@ import asyncio
 from typing import List, Dict, Optional, Any
 from datetime import datetime
 from openai import OpenAI
+from app.core.llm_client import LLMClientPool, get_llm_client_pool
 from app.core.prompt_cache import get_cached_intent, cache_intent
 
 logger = logging.getLogger(__name__)
@@ -25,8 +26,16 @@ class OptimizedAIService:
     7. DB query optimization
     """
     
-    def __init__(self, openai_client: OpenAI, mini_model: str = "gpt-4o-mini", main_model: str = "gpt-4"):
-        self.openai_client = openai_client
+    def __init__(
+        self,
+        openai_client: Optional[OpenAI] = None,
+        mini_model: str = "gpt-4o-mini",
+        main_model: str = "gpt-4",
+        llm_pool: Optional[LLMClientPool] = None
+    ):
+        # Requests go through the shared async pool; the sync client is kept for callers that read it
+        self.llm_pool = llm_pool or get_llm_client_pool()
+        self.openai_client = openai_client or self.llm_pool.sync_client
         self.mini_model = mini_model
         self.main_model = main_model
     
@@ -57,8 +66,7 @@ Message: "{user_message}"
 Respond with ONLY the intent name (e.g., "meal_plan"):"""
         
         try:
-            response = await asyncio.to_thread(
-                self.openai_client.chat.completions.create,
+            response = await self.llm_pool.chat_completion(
                 model=self.mini_model,
                 messages=[{"role": "user", "content": classification_prompt}],
                 temperature=0.1,
@@ -126,12 +134,9 @@ Respond with ONLY the intent name (e.g., "meal_plan"):"""
         usage_metadata = {}
         
         try:
-            stream = await asyncio.to_thread(
-                self.openai_client.chat.completions.create,
-                **request_params
-            )
+            stream = await self.llm_pool.chat_completion(**request_params)
             
-            for chunk in stream:
+            async for chunk in stream:
                 if chunk.choices[0].delta.content:
                     full_response += chunk.choices[0].delta.content
                 
@@ -178,10 +183,7 @@ Respond with ONLY the intent name (e.g., "meal_plan"):"""
         if response_format:
             request_params["response_format"] = response_format
         
-        response = await asyncio.to_thread(
-            self.openai_client.chat.completions.create,
-            **request_params
-        )
+        response = await self.llm_pool.chat_completion(**request_params)
         
         full_response = response.choices[0].message.content
         usage_metadata = {
@@ -18,6 +18,7 @@ from pathlib import Path
 from app.core.database import get_db
 from app.core.monitoring import track_metrics
 from app.services.physical_education import service_integration
+from app.services.physical_education.recommendation_scoring import SCORE_COMPONENTS, rank_activities
 
 # Import models
 from app.models.physical_education.activity import Activity
@@ -1411,45 +1412,45 @@ class ActivityManager:
             
             activities = query.all()
             
-            # Initialize recommendation scores
-            recommendations = []
-            
-            for activity in activities:
-                # Calculate various scores
-                performance_score = await self._calculate_performance_score(activity, performances)
-                preference_score = await self._calculate_preference_score(
-                    activity,
-                    pe_preferences,
-                    adaptation_preferences
-                )
-                progression_score = await self._calculate_progression_score(activity, student_id)
-                diversity_score = await self._calculate_diversity_score(activity, performances)
-                
-                # Calculate final score with weights
-                final_score = (
-                    performance_score * 0.3 +
-                    preference_score * 0.3 +
-                    progression_score * 0.2 +
-                    diversity_score * 0.2
+            # Bulk-load the remaining inputs: progressions and the types of performed activities
+            progressions = self.db.query(ActivityProgression).filter(
+                ActivityProgression.student_id == student_id
+            ).all()
+            activity_types = {activity.id: activity.activity_type for activity in activities}
+            missing_ids = {p.activity_id for p in performances} - activity_types.keys()
+            if missing_ids:
+                activity_types.update(
+                    self.db.query(Activity.id, Activity.activity_type).filter(
+                        Activity.id.in_(list(missing_ids))
+                    ).all()
                 )
-                
-                recommendation = {
-                    "activity": activity,
-                    "score": final_score,
-                    "metrics": {
-                        "performance": performance_score,
-                        "preference": preference_score,
-                        "progression": progression_score,
-                        "diversity": diversity_score
-                    } if include_metrics else None
-                }
-                
-                recommendations.append(recommendation)
+            performed_types = [
+                activity_types[p.activity_id] for p in performances
+                if activity_types.get(p.activity_id) is not None
+            ]
+            
+            # Score every candidate in one pass and keep the top ``limit``
+            top, scores, components = rank_activities(
+                activities,
+                performances,
+                pe_preferences,
+                adaptation_preferences,
+                progressions,
+                performed_types,
+                limit
+            )
             
-            # Sort by score and return top recommendations
-            recommendations.sort(key=lambda x: x["score"], reverse=True)
+            recommendations = [
+                {
+                    "activity": activities[index],
+                    "score": float(scores[index]),
+                    "metrics": dict(zip(SCORE_COMPONENTS, components[index].tolist()))
+                    if include_metrics else None
+                }
+                for index in top
+            ]
             return {
-                "recommendations": recommendations[:limit],
+                "recommendations": recommendations,
                 "total_activities": len(activities),
                 "metrics_included": include_metrics
             }
@@ -1458,42 +1459,6 @@ class ActivityManager:
             self.logger.error(f"Error getting advanced recommendations: {str(e)}")
             raise
 
-    async def _calculate_performance_score(
-        self,
-        activity: Activity,
-        performances: List[StudentActivityPerformance]
-    ) -> float:
-        """Calculate performance-based score for an activity."""
-        try:
-            if not performances:
-                return 0.5  # Default score for no performance history
-            
-            # Get relevant performances
-            relevant_performances = [
-                p for p in performances
-                if p.activity_id == activity.id
-            ]
-            
-            if not relevant_performances:
-                return 0.5  # Default score for no specific performance history
-            
-            # Calculate average score
-            scores = [p.score for p in relevant_performances]
-            avg_score = sum(scores) / len(scores)
-            
-            # Calculate improvement trend
-            if len(scores) > 1:
-                improvement = (scores[-1] - scores[0]) / len(scores)
-                trend_factor = 1 + (improvement * 0.5)  # Amplify positive trends
-            else:
-                trend_factor = 1.0
-            
-            return min(1.0, avg_score * trend_factor)
-            
-        except Exception as e:
-            self.logger.error(f"Error calculating performance score: {str(e)}")
-            return 0.5
-
     async def _calculate_preference_score(
         self,
         activity: Activity,
@@ -1539,72 +1504,6 @@ class ActivityManager:
             self.logger.error(f"Error calculating preference score: {str(e)}")
             return 0.5
 
-    async def _calculate_progression_score(
-        self,
-        activity: Activity,
-        student_id: str
-    ) -> float:
-        """Calculate progression-based score for an activity."""
-        try:
-            # Get student's current progression
-            progression = self.db.query(ActivityProgression).filter(
-                and_(
-                    ActivityProgression.student_id == student_id,
-                    ActivityProgression.activity_id == activity.id
-                )
-            ).first()
-            
-            if not progression:
-                return 0.5  # Default score for no progression data
-            
-            # Calculate score based on current level and improvement rate
-            level_scores = {
-                DifficultyLevel.BEGINNER: 0.3,
-                DifficultyLevel.INTERMEDIATE: 0.6,
-                DifficultyLevel.ADVANCED: 0.9
-            }
-            
-            base_score = level_scores.get(progression.current_level, 0.5)
-            improvement_factor = 1 + (progression.improvement_rate * 0.5)
-            
-            return min(1.0, base_score * improvement_factor)
-            
-        except Exception as e:
-            self.logger.error(f"Error calculating progression score: {str(e)}")
-            return 0.5
-
-    async def _calculate_diversity_score(
-        self,
-        activity: Activity,
-        performances: List[StudentActivityPerformance]
-    ) -> float:
-        """Calculate diversity-based score for an activity."""
-        try:
-            if not performances:
-                return 0.5  # Default score for no performance history
-            
-            # Get activity type distribution
-            activity_types = {}
-            for p in performances:
-                activity = await self.get_activity(p.activity_id)
-                if activity:
-                    activity_type = activity.activity_type.value
-                    activity_types[activity_type] = activity_types.get(activity_type, 0) + 1
-            
-            # Calculate diversity score
-            total_activities = sum(activity_types.values())
-            if total_activities == 0:
-                return 0.5
-            
-            current_type_count = activity_types.get(activity.activity_type.value, 0)
-            diversity_ratio = 1 - (current_type_count / total_activities)
-            
-            return diversity_ratio
-            
-        except Exception as e:
-            self.logger.error(f"Error calculating diversity score: {str(e)}")
-            return 0.5
-
     async def get_enhanced_performance_analysis(
         self,
         student_id: str,
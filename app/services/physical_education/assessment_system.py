@@ -2,18 +2,22 @@
 
 
 import logging
+import time
 from typing import Dict, Any, List, Optional, Tuple
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import numpy as np
 import pandas as pd
 from app.core.monitoring import track_metrics
 from app.services.physical_education import service_integration
+from app.services.physical_education.peer_percentile_index import PeerPercentileIndex
 from collections import deque
 import asyncio
 from dataclasses import dataclass
 from enum import Enum
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
 from app.core.database import get_db
+from app.core.ttl_cache import TTLCache
 
 # Import models
 from app.models.skill_assessment.assessment.assessment import (
@@ -80,6 +84,11 @@ class AssessmentSystem:
             "statistics": {}
         }
         self.benchmarks = {}
+        # Latest overall score per student, by (age_group, skill)
+        self.peer_index = PeerPercentileIndex()
+        # Skill name -> activity id, resolved once instead of per saved row
+        self.skill_activity_cache = TTLCache(maxsize=1024, ttl=300, name="skill_activity_cache")
+        self.last_save_stats: Dict[str, Any] = {}
         
         # Enhanced assessment settings
         self.settings = {
@@ -374,6 +383,9 @@ class AssessmentSystem:
             # Initialize student data storage
             self.initialize_student_data()
             
+            # Warm the peer comparison index from stored assessments
+            self.load_peer_index()
+            
             # Initialize real-time assessment
             self.initialize_real_time_assessment()
             
@@ -411,6 +423,7 @@ class AssessmentSystem:
             self.adaptation_metrics.clear()
             self.assessment_cache.clear()
             self.batch_cache.clear()
+            self.skill_activity_cache.clear()
             
             self.logger.info("Assessment system cleaned up successfully")
         except Exception as e:
@@ -1332,41 +1345,9 @@ class AssessmentSystem:
         scores: Dict[str, float],
         age_group: str
     ) -> Dict[str, Any]:
-        """Generate peer comparison metrics."""
+        """Generate peer comparison metrics from the peer score index."""
         try:
-            # Get all students in the same age group
-            peers = [
-                student for student in self.student_data["profiles"].values()
-                if student.get("age_group") == age_group
-            ]
-            
-            if not peers:
-                return {}
-            
-            # Calculate peer statistics
-            peer_scores = []
-            for peer in peers:
-                if peer["id"] in self.student_data["assessments"]:
-                    peer_assessments = [
-                        assessment for assessment in self.student_data["assessments"][peer["id"]]
-                        if assessment["skill"] == skill
-                    ]
-                    if peer_assessments:
-                        peer_scores.append(peer_assessments[-1]["scores"]["overall"])
-            
-            if not peer_scores:
-                return {}
-            
-            # Calculate comparison metrics
-            percentile = np.percentile(peer_scores, scores["overall"] * 100)
-            
-            return {
-                "percentile": percentile,
-                "average_peer_score": np.mean(peer_scores),
-                "top_peer_score": max(peer_scores),
-                "peer_count": len(peer_scores)
-            }
-            
+            return self.peer_index.comparison(age_group, skill, scores["overall"])
         except Exception as e:
             self.logger.error(f"Error generating peer comparison: {str(e)}")
             return {}
@@ -1516,100 +1497,175 @@ class AssessmentSystem:
             self.logger.error(f"Error updating statistics: {str(e)}")
             raise
 
+    SAVE_CHUNK_SIZE = 500
+
+    @staticmethod
+    def _assessment_key(student_id: int, activity_id: int, assessment_date: datetime) -> Tuple[int, int, datetime]:
+        """Match key for a saved assessment; aware timestamps are compared as naive UTC."""
+        if assessment_date.tzinfo is not None:
+            assessment_date = assessment_date.astimezone(timezone.utc).replace(tzinfo=None)
+        return (student_id, activity_id, assessment_date)
+
+    def _resolve_skill_activities(self, skills) -> Dict[str, int]:
+        """Map skills to activity ids with one activity query for all uncached skills.
+
+        A skill maps to the first activity whose name contains it (case-insensitive),
+        falling back to the first activity, as the per-row lookup did.
+        """
+        resolved = {}
+        missing = []
+        for skill in set(skills):
+            activity_id = self.skill_activity_cache.get(skill)
+            if activity_id is None:
+                missing.append(skill)
+            else:
+                resolved[skill] = activity_id
+        if missing:
+            activities = self.db.query(Activity.id, Activity.name).order_by(Activity.id).all()
+            for skill in missing:
+                needle = skill.lower()
+                activity_id = next(
+                    (activity_id for activity_id, name in activities if name and needle in name.lower()),
+                    activities[0][0] if activities else None
+                )
+                if activity_id is None:
+                    self.logger.warning(f"No activity found for skill {skill}, skipping save")
+                    continue
+                self.skill_activity_cache.set(skill, activity_id)
+                resolved[skill] = activity_id
+        return resolved
+
+    def _load_existing_assessments(self, keys) -> Dict[Tuple[int, int, datetime], int]:
+        """Ids of stored assessments matching ``keys``, fetched in one query."""
+        if not keys:
+            return {}
+        dates = [key[2] for key in keys]
+        rows = self.db.query(
+            SkillAssessment.id,
+            SkillAssessment.student_id,
+            SkillAssessment.activity_id,
+            SkillAssessment.assessment_date
+        ).filter(
+            SkillAssessment.student_id.in_({key[0] for key in keys}),
+            SkillAssessment.activity_id.in_({key[1] for key in keys}),
+            SkillAssessment.assessment_date >= min(dates),
+            SkillAssessment.assessment_date <= max(dates)
+        ).all()
+        wanted = {self._assessment_key(*key) for key in keys}
+        existing = {}
+        for assessment_id, student_id, activity_id, assessment_date in rows:
+            key = self._assessment_key(student_id, activity_id, assessment_date)
+            if key in wanted:
+                existing.setdefault(key, assessment_id)
+        return existing
+
+    def _save_performance_trends(self) -> int:
+        """Upsert the latest trend score of each (student, skill) in chunked bulk statements."""
+        started = time.perf_counter()
+        pairs = [
+            (int(student_id), skill, trend_data)
+            for student_id, skills in self.performance_trends.items()
+            for skill, trend_data in skills.items()
+        ]
+        activity_ids = self._resolve_skill_activities(skill for _, skill, _ in pairs)
+
+        # One row per (student, activity, date); later skills win, as sequential updates did
+        rows: Dict[Tuple[int, int, datetime], Dict[str, Any]] = {}
+        for student_id, skill, trend_data in pairs:
+            if skill not in activity_ids:
+                continue
+            if trend_data.get("daily_scores"):
+                latest_score_data = trend_data["daily_scores"][-1]
+                overall_score = latest_score_data.get("score", 0.0)
+                assessment_date = datetime.fromisoformat(latest_score_data.get("date", datetime.now().isoformat()))
+            else:
+                overall_score = 0.0
+                assessment_date = datetime.now()
+            key = (student_id, activity_ids[skill], assessment_date)
+            rows[key] = {
+                "student_id": student_id,
+                "activity_id": activity_ids[skill],
+                "assessment_date": assessment_date,
+                "overall_score": overall_score,
+                "assessor_notes": f"Performance data for {skill}",
+                "assessment_metadata": {"performance_trend": trend_data, "skill": skill}
+            }
+
+        keys = list(rows)
+        inserted = updated = 0
+        for start in range(0, len(keys), self.SAVE_CHUNK_SIZE):
+            chunk = keys[start:start + self.SAVE_CHUNK_SIZE]
+            existing = self._load_existing_assessments(chunk)
+            updates, inserts = [], []
+            for key in chunk:
+                assessment_id = existing.get(self._assessment_key(*key))
+                if assessment_id is None:
+                    inserts.append(rows[key])
+                else:
+                    updates.append({
+                        "id": assessment_id,
+                        "overall_score": rows[key]["overall_score"],
+                        "assessment_metadata": rows[key]["assessment_metadata"]
+                    })
+            # executemany: one statement per chunk rather than one per row
+            if updates:
+                self.db.execute(update(SkillAssessment), updates)
+            if inserts:
+                self.db.execute(insert(SkillAssessment), inserts)
+            self._safe_commit()
+            inserted += len(inserts)
+            updated += len(updates)
+
+        self._record_save_stats("skill_assessments", inserted + updated, started, inserted=inserted, updated=updated)
+        return inserted + updated
+
+    def _save_recent_history(self) -> int:
+        """Add history records for recent assessments that have a stored SkillAssessment."""
+        if not (isinstance(self.assessment_history, dict) and "recent_assessments" in self.assessment_history):
+            return 0
+        started = time.perf_counter()
+        records = self.assessment_history["recent_assessments"][-100:]  # Last 100
+        activity_ids = self._resolve_skill_activities(record["skill"] for record in records)
+
+        keyed = []
+        for record in records:
+            if record["skill"] not in activity_ids:
+                continue
+            assessment_date = datetime.fromisoformat(record.get("timestamp", datetime.now().isoformat()))
+            keyed.append(((int(record["student_id"]), activity_ids[record["skill"]], assessment_date), record))
+
+        existing = self._load_existing_assessments([key for key, _ in keyed])
+        histories = [
+            {
+                "assessment_id": existing[self._assessment_key(*key)],
+                "change_type": "completed",
+                "previous_state": None,
+                "new_state": record["scores"],
+                "reason": f"Assessment completed for {record['skill']}"
+            }
+            for key, record in keyed
+            if self._assessment_key(*key) in existing
+        ]
+        if histories:
+            self.db.execute(insert(AssessmentHistory), histories)
+        self._record_save_stats("assessment_history", len(histories), started)
+        return len(histories)
+
+    def _record_save_stats(self, table: str, rows: int, started: float, **extra):
+        elapsed = time.perf_counter() - started
+        rate = rows / elapsed if elapsed > 0 else 0.0
+        self.last_save_stats[table] = {"rows": rows, "seconds": elapsed, "rows_per_second": rate, **extra}
+        self.logger.info(f"Saved {rows} {table} rows in {elapsed:.3f}s ({rate:.0f} rows/s)")
+
     def save_student_data(self):
         """Save student data to persistent storage."""
         try:
             if not self.db:
                 self.db = next(get_db())
             
-            # Save performance trends to SkillAssessment records
-            for student_id_str, skills in self.performance_trends.items():
-                student_id = int(student_id_str)
-                
-                for skill, trend_data in skills.items():
-                    # Get the latest daily score
-                    if trend_data.get("daily_scores"):
-                        latest_score_data = trend_data["daily_scores"][-1]
-                        overall_score = latest_score_data.get("score", 0.0)
-                        assessment_date = datetime.fromisoformat(latest_score_data.get("date", datetime.now().isoformat()))
-                    else:
-                        overall_score = 0.0
-                        assessment_date = datetime.now()
-                    
-                    # Find or get a default activity for this skill
-                    activity = self.db.query(Activity).filter(
-                        Activity.name.ilike(f"%{skill}%")
-                    ).first()
-                    
-                    if not activity:
-                        # Get a default activity or create a fallback
-                        activity = self.db.query(Activity).first()
-                        if not activity:
-                            self.logger.warning(f"No activity found for skill {skill}, skipping save")
-                            continue
-                    
-                    # Create or update SkillAssessment
-                    existing_assessment = self.db.query(SkillAssessment).filter(
-                        SkillAssessment.student_id == student_id,
-                        SkillAssessment.activity_id == activity.id,
-                        SkillAssessment.assessment_date == assessment_date
-                    ).first()
-                    
-                    if existing_assessment:
-                        existing_assessment.overall_score = overall_score
-                        existing_assessment.assessment_metadata = {
-                            "performance_trend": trend_data,
-                            "skill": skill
-                        }
-                    else:
-                        assessment = SkillAssessment(
-                            student_id=student_id,
-                            activity_id=activity.id,
-                            assessment_date=assessment_date,
-                            overall_score=overall_score,
-                            assessor_notes=f"Performance data for {skill}",
-                            assessment_metadata={
-                                "performance_trend": trend_data,
-                                "skill": skill
-                            }
-                        )
-                        self.db.add(assessment)
-            
-            # Save assessment history to AssessmentHistory records
-            if isinstance(self.assessment_history, dict) and "recent_assessments" in self.assessment_history:
-                for assessment_record in self.assessment_history["recent_assessments"][-100:]:  # Last 100
-                    student_id = int(assessment_record["student_id"])
-                    skill = assessment_record["skill"]
-                    scores = assessment_record["scores"]
-                    
-                    # Find activity for this skill
-                    activity = self.db.query(Activity).filter(
-                        Activity.name.ilike(f"%{skill}%")
-                    ).first()
-                    
-                    if not activity:
-                        activity = self.db.query(Activity).first()
-                        if not activity:
-                            continue
-                    
-                    # Find the corresponding SkillAssessment
-                    assessment_date = datetime.fromisoformat(assessment_record.get("timestamp", datetime.now().isoformat()))
-                    skill_assessment = self.db.query(SkillAssessment).filter(
-                        SkillAssessment.student_id == student_id,
-                        SkillAssessment.activity_id == activity.id,
-                        SkillAssessment.assessment_date == assessment_date
-                    ).first()
-                    
-                    if skill_assessment:
-                        # Create history record
-                        history = AssessmentHistory(
-                            assessment_id=skill_assessment.id,
-                            change_type="completed",
-                            previous_state=None,
-                            new_state=scores,
-                            reason=f"Assessment completed for {skill}"
-                        )
-                        self.db.add(history)
+            # Bulk-write performance trends and the matching history records
+            saved = self._save_performance_trends()
+            saved += self._save_recent_history()
             
             # Migrate existing assessment data before saving new data
             # In production: Migration runs automatically (default behavior)
@@ -1624,7 +1680,7 @@ class AssessmentSystem:
                     self.logger.warning(f"Migration failed during save: {migration_error}, continuing without migration")
             
             self._safe_commit()
-            self.logger.info("Student data saved successfully")
+            self.logger.info(f"Student data saved successfully ({saved} rows)")
         except Exception as e:
             if self.db:
                 self.db.rollback()
@@ -2616,6 +2672,8 @@ class AssessmentSystem:
             self.db.add(history)
             
             self._safe_commit()
+            if "overall" in scores:
+                self.peer_index.update(str(student_id), age_group, skill, scores["overall"])
             self.logger.info(f"Student data updated for {student_id}")
         except Exception as e:
             if self.db:
@@ -2917,45 +2975,31 @@ class AssessmentSystem:
             return False
 
     def generate_peer_comparison(self, student_id: str, skill: str, scores: Dict[str, float], age_group: str) -> Dict[str, Any]:
-        """Generate peer comparison metrics."""
+        """Generate peer comparison metrics from the peer score index."""
         try:
-            # Get all students in the same age group
-            peers = [
-                student for student in self.student_data["profiles"].values()
-                if student.get("age_group") == age_group
-            ]
-            
-            if not peers:
-                return {}
-            
-            # Calculate peer statistics
-            peer_scores = []
-            for peer in peers:
-                if peer["id"] in self.student_data["assessments"]:
-                    peer_assessments = [
-                        assessment for assessment in self.student_data["assessments"][peer["id"]]
-                        if assessment["skill"] == skill
-                    ]
-                    if peer_assessments:
-                        peer_scores.append(peer_assessments[-1]["scores"]["overall"])
-            
-            if not peer_scores:
-                return {}
-            
-            # Calculate comparison metrics
-            percentile = np.percentile(peer_scores, scores["overall"] * 100)
-            
-            return {
-                "percentile": percentile,
-                "average_peer_score": np.mean(peer_scores),
-                "top_peer_score": max(peer_scores),
-                "peer_count": len(peer_scores)
-            }
-            
+            return self.peer_index.comparison(age_group, skill, scores["overall"])
         except Exception as e:
             self.logger.error(f"Error generating peer comparison: {str(e)}")
             return {}
 
+    def load_peer_index(self):
+        """Rebuild the peer score index from stored skill assessments, oldest first."""
+        try:
+            if not self.db:
+                return
+            rows = self.db.query(
+                SkillAssessment.student_id,
+                SkillAssessment.assessment_metadata
+            ).order_by(SkillAssessment.assessment_date).all()
+            self.peer_index.rebuild(
+                (str(student_id), metadata["age_group"], metadata["skill"], metadata["scores"]["overall"])
+                for student_id, metadata in rows
+                if metadata and metadata.get("age_group") and metadata.get("skill")
+                and "overall" in (metadata.get("scores") or {})
+            )
+        except Exception as e:
+            self.logger.warning(f"Could not load peer comparison index: {str(e)}")
+
     def update_enhanced_student_data(self, student_id: str, skill: str, scores: Dict[str, float], feedback: Dict[str, str], age_group: str):
         """Update student data with enhanced tracking."""
         try:
@@ -3074,6 +3118,8 @@ class AssessmentSystem:
             self.db.add(history)
             
             self._safe_commit()
+            if "overall" in scores:
+                self.peer_index.update(str(student_id), age_group, skill, scores["overall"])
             self.logger.info(f"Student data updated for {student_id}")
         except Exception as e:
             if self.db:
@@ -3163,100 +3209,15 @@ class AssessmentSystem:
             if not self.db:
                 self.db = next(get_db())
             
-            # Save performance trends to SkillAssessment records
-            for student_id_str, skills in self.performance_trends.items():
-                student_id = int(student_id_str)
-                
-                for skill, trend_data in skills.items():
-                    # Get the latest daily score
-                    if trend_data.get("daily_scores"):
-                        latest_score_data = trend_data["daily_scores"][-1]
-                        overall_score = latest_score_data.get("score", 0.0)
-                        assessment_date = datetime.fromisoformat(latest_score_data.get("date", datetime.now().isoformat()))
-                    else:
-                        overall_score = 0.0
-                        assessment_date = datetime.now()
-                    
-                    # Find or get a default activity for this skill
-                    activity = self.db.query(Activity).filter(
-                        Activity.name.ilike(f"%{skill}%")
-                    ).first()
-                    
-                    if not activity:
-                        # Get a default activity or create a fallback
-                        activity = self.db.query(Activity).first()
-                        if not activity:
-                            self.logger.warning(f"No activity found for skill {skill}, skipping save")
-                            continue
-                    
-                    # Create or update SkillAssessment
-                    existing_assessment = self.db.query(SkillAssessment).filter(
-                        SkillAssessment.student_id == student_id,
-                        SkillAssessment.activity_id == activity.id,
-                        SkillAssessment.assessment_date == assessment_date
-                    ).first()
-                    
-                    if existing_assessment:
-                        existing_assessment.overall_score = overall_score
-                        existing_assessment.assessment_metadata = {
-                            "performance_trend": trend_data,
-                            "skill": skill
-                        }
-                    else:
-                        assessment = SkillAssessment(
-                            student_id=student_id,
-                            activity_id=activity.id,
-                            assessment_date=assessment_date,
-                            overall_score=overall_score,
-                            assessor_notes=f"Performance data for {skill}",
-                            assessment_metadata={
-                                "performance_trend": trend_data,
-                                "skill": skill
-                            }
-                        )
-                        self.db.add(assessment)
-            
-            # Save assessment history to AssessmentHistory records
-            if isinstance(self.assessment_history, dict) and "recent_assessments" in self.assessment_history:
-                for assessment_record in self.assessment_history["recent_assessments"][-100:]:  # Last 100
-                    student_id = int(assessment_record["student_id"])
-                    skill = assessment_record["skill"]
-                    scores = assessment_record["scores"]
-                    
-                    # Find activity for this skill
-                    activity = self.db.query(Activity).filter(
-                        Activity.name.ilike(f"%{skill}%")
-                    ).first()
-                    
-                    if not activity:
-                        activity = self.db.query(Activity).first()
-                        if not activity:
-                            continue
-                    
-                    # Find the corresponding SkillAssessment
-                    assessment_date = datetime.fromisoformat(assessment_record.get("timestamp", datetime.now().isoformat()))
-                    skill_assessment = self.db.query(SkillAssessment).filter(
-                        SkillAssessment.student_id == student_id,
-                        SkillAssessment.activity_id == activity.id,
-                        SkillAssessment.assessment_date == assessment_date
-                    ).first()
-                    
-                    if skill_assessment:
-                        # Create history record
-                        history = AssessmentHistory(
-                            assessment_id=skill_assessment.id,
-                            change_type="completed",
-                            previous_state=None,
-                            new_state=scores,
-                            reason=f"Assessment completed for {skill}"
-                        )
-                        self.db.add(history)
+            # Bulk-write performance trends and the matching history records
+            saved = self._save_performance_trends()
+            saved += self._save_recent_history()
             
             # Migrate existing assessment data before saving new data (second instance)
             self._migrate_existing_assessments()
             
             self.db.commit()
-            self.logger.info("Student data saved successfully")
+            self.logger.info(f"Student data saved successfully ({saved} rows)")
         except Exception as e:
             if self.db:
                 self.db.rollback()
@@ -0,0 +1,162 @@
+# Standard library imports
+import hashlib
+import sys
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Iterable, Optional, Tuple
+
+# Third-party imports
+import cv2
+import numpy as np
+
+
+def frame_digest(frame: np.ndarray, sample_size: Tuple[int, int] = (32, 32)) -> str:
+    """Content digest of a frame computed from an area-downsampled copy.
+
+    Hashing a small thumbnail avoids copying the full frame with ``tobytes``
+    and lets visually identical frames share cache entries.
+    """
+    thumbnail = cv2.resize(frame, sample_size, interpolation=cv2.INTER_AREA)
+    digest = hashlib.blake2b(thumbnail.tobytes(), digest_size=16)
+    digest.update(repr(frame.shape).encode())
+    return digest.hexdigest()
+
+
+def batch_digest(digests: Iterable[str]) -> str:
+    """Digest of an ordered batch of frame digests."""
+    digest = hashlib.blake2b(digest_size=16)
+    for frame_key in digests:
+        digest.update(frame_key.encode())
+    return digest.hexdigest()
+
+
+def estimate_nbytes(value: Any) -> int:
+    """Estimate the memory held by a cached value, counting array buffers."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_nbytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def compact_features(features: Dict[str, Any]) -> Dict[str, Any]:
+    """Pack per-frame features into a compact, frame-independent form.
+
+    Edges are bit-packed, keypoints become two small arrays and SIFT
+    descriptors (integral values in 0-255) are stored as uint8. Optical flow
+    depends on the neighbouring frame and is never cached.
+    """
+    edges = features.get("edges")
+    keypoints = features.get("keypoints") or []
+    descriptors = features.get("descriptors")
+    return {
+        "edges_shape": edges.shape if edges is not None else None,
+        "edges": np.packbits(edges > 0) if edges is not None else None,
+        "keypoint_values": np.array(
+            [(kp.pt[0], kp.pt[1], kp.size, kp.angle, kp.response) for kp in keypoints],
+            dtype=np.float32
+        ).reshape(-1, 5),
+        "keypoint_ids": np.array(
+            [(kp.octave, kp.class_id) for kp in keypoints],
+            dtype=np.int32
+        ).reshape(-1, 2),
+        "descriptors": descriptors.astype(np.uint8) if descriptors is not None else None
+    }
+
+
+def expand_features(compact: Dict[str, Any]) -> Dict[str, Any]:
+    """Restore edges, keypoints and descriptors from ``compact_features`` output."""
+    edges = None
+    if compact["edges"] is not None:
+        height, width = compact["edges_shape"]
+        edges = np.unpackbits(compact["edges"], count=height * width).reshape(height, width) * np.uint8(255)
+    keypoints = tuple(
+        cv2.KeyPoint(float(x), float(y), float(size), float(angle), float(response), int(octave), int(class_id))
+        for (x, y, size, angle, response), (octave, class_id)
+        in zip(compact["keypoint_values"], compact["keypoint_ids"])
+    )
+    descriptors = compact["descriptors"].astype(np.float32) if compact["descriptors"] is not None else None
+    return {
+        "edges": edges,
+        "keypoints": keypoints,
+        "descriptors": descriptors
+    }
+
+
+class FrameFeatureCache(OrderedDict):
+    """LRU cache bounded by the bytes held rather than by entry count.
+
+    Behaves like a dict so existing cache management code keeps working;
+    ``get`` refreshes recency and records hit/miss statistics.
+    """
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int] = estimate_nbytes):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.bytes_held = 0
+        self._sizes: Dict[Any, int] = {}
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0
+        }
+
+    def __setitem__(self, key, value):
+        if key in self:
+            self.bytes_held -= self._sizes.pop(key, 0)
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        size = self.sizeof(value)
+        self._sizes[key] = size
+        self.bytes_held += size
+        self._evict()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.bytes_held -= self._sizes.pop(key, 0)
+
+    def get(self, key, default=None):
+        if key in self:
+            self.stats["hits"] += 1
+            self.move_to_end(key)
+            return super().__getitem__(key)
+        self.stats["misses"] += 1
+        return default
+
+    def pop(self, key, *default):
+        if key in self:
+            self.bytes_held -= self._sizes.pop(key, 0)
+        return super().pop(key, *default)
+
+    def popitem(self, last: bool = True):
+        key, value = super().popitem(last=last)
+        self.bytes_held -= self._sizes.pop(key, 0)
+        return key, value
+
+    def clear(self):
+        super().clear()
+        self._sizes.clear()
+        self.bytes_held = 0
+
+    def _evict(self):
+        """Drop least recently used entries until the byte budget is met."""
+        while self.bytes_held > self.max_bytes and len(self) > 1:
+            self.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and the bytes currently held."""
+        total_requests = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": self.stats["hits"] / total_requests if total_requests > 0 else 0,
+            "entries": len(self),
+            "bytes_held": self.bytes_held,
+            "max_bytes": self.max_bytes
+        }
+
+    def reset_stats(self):
+        """Reset hit/miss/eviction counters."""
+        self.stats = dict.fromkeys(self.stats, 0)
@@ -0,0 +1,238 @@
+# Standard library imports
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+# Third-party imports
+import cv2
+import numpy as np
+
+FEATURE_STAGES = ("grayscale", "edges", "keypoints", "flow")
+
+# One SIFT detector per worker thread/process instead of one per frame
+_worker_local = threading.local()
+
+
+def _get_sift():
+    """Return the SIFT detector owned by the current worker."""
+    sift = getattr(_worker_local, "sift", None)
+    if sift is None:
+        sift = cv2.SIFT_create()
+        _worker_local.sift = sift
+    return sift
+
+
+def _keypoints_to_tuples(keypoints) -> List[Tuple]:
+    """Convert cv2.KeyPoint objects into picklable tuples."""
+    return [
+        (kp.pt[0], kp.pt[1], kp.size, kp.angle, kp.response, kp.octave, kp.class_id)
+        for kp in keypoints
+    ]
+
+
+def _tuples_to_keypoints(keypoints: List[Tuple]) -> List[Any]:
+    """Rebuild cv2.KeyPoint objects from tuples produced in a worker process."""
+    return [cv2.KeyPoint(x, y, size, angle, response, octave, class_id)
+            for x, y, size, angle, response, octave, class_id in keypoints]
+
+
+def extract_feature_chunk(
+    frames: List[np.ndarray],
+    seed_frame: Optional[np.ndarray] = None,
+    picklable: bool = False,
+    skip_static: Optional[List[bool]] = None
+) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+    """Extract edges, SIFT keypoints and optical flow for consecutive frames.
+
+    ``seed_frame`` is the frame preceding ``frames[0]`` in the video (BGR or
+    grayscale) so the first optical-flow field of a chunk matches sequential
+    processing. Frames flagged in ``skip_static`` (e.g. cache hits) only get
+    optical flow. Returns the per-frame features and the seconds spent per stage.
+    """
+    timings = dict.fromkeys(FEATURE_STAGES, 0.0)
+    sift = _get_sift()
+
+    previous_gray = None
+    if seed_frame is not None:
+        previous_gray = seed_frame if seed_frame.ndim == 2 else cv2.cvtColor(seed_frame, cv2.COLOR_BGR2GRAY)
+
+    results = []
+    for index, frame in enumerate(frames):
+        start = time.perf_counter()
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        timings["grayscale"] += time.perf_counter() - start
+
+        if skip_static is not None and skip_static[index]:
+            edges, keypoints, descriptors = None, None, None
+        else:
+            start = time.perf_counter()
+            edges = cv2.Canny(gray, 100, 200)
+            timings["edges"] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            keypoints, descriptors = sift.detectAndCompute(gray, None)
+            timings["keypoints"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        if previous_gray is not None:
+            flow = cv2.calcOpticalFlowFarneback(
+                previous_gray,
+                gray,
+                None,
+                0.5, 3, 15, 3, 5, 1.2, 0
+            )
+        else:
+            flow = None
+        timings["flow"] += time.perf_counter() - start
+
+        previous_gray = gray
+        results.append({
+            "edges": edges,
+            "keypoints": _keypoints_to_tuples(keypoints) if picklable and keypoints is not None else keypoints,
+            "descriptors": descriptors,
+            "flow": flow
+        })
+
+    return results, timings
+
+
+class FrameFeatureExecutor:
+    """Spreads per-frame feature extraction across a thread or process pool.
+
+    Frames are split into contiguous chunks; each chunk is seeded with the
+    frame preceding it so optical flow between neighbouring frames is the same
+    as in sequential processing.
+    """
+
+    MODES = ("thread", "process", "inline")
+
+    def __init__(self, mode: str = "thread", max_workers: Optional[int] = None, chunk_size: int = 16):
+        if mode not in self.MODES:
+            raise ValueError(f"Unsupported executor mode: {mode}")
+        self.logger = logging.getLogger("frame_feature_executor")
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+        self._executor: Optional[Executor] = None
+        self.stage_timings = {
+            "stages": dict.fromkeys(FEATURE_STAGES, 0.0),
+            "wall_time": 0.0,
+            "frames": 0,
+            "chunks": 0,
+            "calls": 0
+        }
+        self.last_timings: Dict[str, Any] = {}
+
+    def _get_executor(self) -> Optional[Executor]:
+        """Create the worker pool on first use."""
+        if self.mode == "inline":
+            return None
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="frame-features"
+                )
+        return self._executor
+
+    async def extract(
+        self,
+        frames: List[np.ndarray],
+        previous_frame: Optional[np.ndarray] = None,
+        skip_static: Optional[List[bool]] = None
+    ) -> List[Dict[str, Any]]:
+        """Extract features for consecutive frames without blocking the event loop.
+
+        Frames flagged in ``skip_static`` only get optical flow computed.
+        """
+        if not frames:
+            return []
+
+        start = time.perf_counter()
+        picklable = self.mode == "process"
+        chunks = [
+            (
+                frames[i:i + self.chunk_size],
+                frames[i - 1] if i > 0 else previous_frame,
+                skip_static[i:i + self.chunk_size] if skip_static is not None else None
+            )
+            for i in range(0, len(frames), self.chunk_size)
+        ]
+
+        try:
+            executor = self._get_executor()
+            if executor is None:
+                chunk_results = [extract_feature_chunk(chunk, seed, False, skip) for chunk, seed, skip in chunks]
+            else:
+                loop = asyncio.get_running_loop()
+                chunk_results = await asyncio.gather(*[
+                    loop.run_in_executor(executor, extract_feature_chunk, chunk, seed, picklable, skip)
+                    for chunk, seed, skip in chunks
+                ])
+        except Exception as e:
+            self.logger.error(f"Error extracting frame features: {str(e)}")
+            raise
+
+        features = []
+        stages = dict.fromkeys(FEATURE_STAGES, 0.0)
+        for chunk_features, chunk_timings in chunk_results:
+            if picklable:
+                for item in chunk_features:
+                    if item["keypoints"] is not None:
+                        item["keypoints"] = _tuples_to_keypoints(item["keypoints"])
+            features.extend(chunk_features)
+            for stage, seconds in chunk_timings.items():
+                stages[stage] += seconds
+
+        self._record_timings(stages, time.perf_counter() - start, len(frames), len(chunks))
+        return features
+
+    def _record_timings(self, stages: Dict[str, float], wall_time: float, frames: int, chunks: int):
+        """Store timings of the last call and accumulate running totals."""
+        busy_time = sum(stages.values())
+        self.last_timings = {
+            "mode": self.mode,
+            "workers": self.max_workers,
+            "frames": frames,
+            "chunks": chunks,
+            "stages": stages,
+            "wall_time": wall_time,
+            "parallel_speedup": busy_time / wall_time if wall_time > 0 else 0.0
+        }
+
+        totals = self.stage_timings
+        for stage, seconds in stages.items():
+            totals["stages"][stage] += seconds
+        totals["wall_time"] += wall_time
+        totals["frames"] += frames
+        totals["chunks"] += chunks
+        totals["calls"] += 1
+
+    def get_stage_timings(self) -> Dict[str, Any]:
+        """Get cumulative per-stage timings and the observed parallel speedup."""
+        totals = self.stage_timings
+        busy_time = sum(totals["stages"].values())
+        return {
+            "mode": self.mode,
+            "workers": self.max_workers,
+            "frames": totals["frames"],
+            "chunks": totals["chunks"],
+            "calls": totals["calls"],
+            "stages": dict(totals["stages"]),
+            "wall_time": totals["wall_time"],
+            "frames_per_second": totals["frames"] / totals["wall_time"] if totals["wall_time"] > 0 else 0.0,
+            "parallel_speedup": busy_time / totals["wall_time"] if totals["wall_time"] > 0 else 0.0,
+            "last_call": self.last_timings
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Shut down the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -0,0 +1,123 @@
+"""Peer score index for assessment comparisons.
+
+Keeps every student's latest overall score per (age_group, skill) in a sorted
+list, updated in place as assessments arrive. Percentile, rank, mean, top
+score and count queries then cost O(log n) or O(1) instead of a scan over
+every profile and assessment.
+"""
+
+# Standard library imports
+import bisect
+import math
+import threading
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class SortedScores:
+    """Sorted multiset of scores with a running sum."""
+
+    def __init__(self):
+        self.scores: List[float] = []
+        self.total = 0.0
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def add(self, score: float):
+        bisect.insort(self.scores, score)
+        self.total += score
+
+    def remove(self, score: float):
+        position = bisect.bisect_left(self.scores, score)
+        if position < len(self.scores) and self.scores[position] == score:
+            del self.scores[position]
+            self.total -= score
+        if not self.scores:
+            self.total = 0.0
+
+    def percentile(self, q: float) -> float:
+        """Value at percentile ``q`` (0-100), interpolated like ``np.percentile``."""
+        position = (len(self.scores) - 1) * min(max(q, 0.0), 100.0) / 100.0
+        lower = math.floor(position)
+        upper = min(lower + 1, len(self.scores) - 1)
+        fraction = position - lower
+        return self.scores[lower] + (self.scores[upper] - self.scores[lower]) * fraction
+
+    def percentile_rank(self, score: float) -> float:
+        """Percentage of scores at or below ``score``."""
+        return 100.0 * bisect.bisect_right(self.scores, score) / len(self.scores)
+
+    @property
+    def mean(self) -> float:
+        return self.total / len(self.scores)
+
+    @property
+    def top(self) -> float:
+        return self.scores[-1]
+
+
+class PeerPercentileIndex:
+    """Latest overall score of each student, grouped by (age_group, skill)."""
+
+    def __init__(self):
+        self._groups: Dict[Tuple[Any, str], SortedScores] = {}
+        # (student_id, skill) -> (age_group, score) currently indexed
+        self._latest: Dict[Tuple[Hashable, str], Tuple[Any, float]] = {}
+        self._lock = threading.Lock()
+
+    def update(self, student_id: Hashable, age_group: Any, skill: str, score: float):
+        """Record ``score`` as the student's latest for ``skill``, replacing any earlier one."""
+        score = float(score)
+        with self._lock:
+            previous = self._latest.get((student_id, skill))
+            if previous is not None:
+                self._discard(previous[0], skill, previous[1])
+            self._groups.setdefault((age_group, skill), SortedScores()).add(score)
+            self._latest[(student_id, skill)] = (age_group, score)
+
+    def _discard(self, age_group: Any, skill: str, score: float):
+        group = self._groups.get((age_group, skill))
+        if group is not None:
+            group.remove(score)
+            if not len(group):
+                del self._groups[(age_group, skill)]
+
+    def remove_student(self, student_id: Hashable):
+        with self._lock:
+            for key in [key for key in self._latest if key[0] == student_id]:
+                age_group, score = self._latest.pop(key)
+                self._discard(age_group, key[1], score)
+
+    def rebuild(self, entries: Iterable[Tuple[Hashable, Any, str, float]]):
+        """Replace the index with (student_id, age_group, skill, score) entries, oldest first."""
+        with self._lock:
+            self._groups.clear()
+            self._latest.clear()
+        for student_id, age_group, skill, score in entries:
+            self.update(student_id, age_group, skill, score)
+
+    def comparison(self, age_group: Any, skill: str, score: float) -> Dict[str, Any]:
+        """Peer statistics for one score; empty when nobody in the group has been assessed."""
+        with self._lock:
+            group = self._groups.get((age_group, skill))
+            if not group:
+                return {}
+            return {
+                # Kept from the original comparison: the peer score at the
+                # student's overall score read as a percentile
+                "percentile": group.percentile(score * 100),
+                "percentile_rank": group.percentile_rank(score),
+                "average_peer_score": group.mean,
+                "top_peer_score": group.top,
+                "peer_count": len(group)
+            }
+
+    def count(self, age_group: Any, skill: str) -> int:
+        with self._lock:
+            group = self._groups.get((age_group, skill))
+            return len(group) if group else 0
+
+    def latest_score(self, student_id: Hashable, skill: str) -> Optional[float]:
+        with self._lock:
+            entry = self._latest.get((student_id, skill))
+            return entry[1] if entry else None
@@ -0,0 +1,169 @@
+"""Vectorized activity recommendation scoring.
+
+``ActivityManager.get_advanced_recommendations`` loads a student's history in
+a few bulk queries and hands it here. Every candidate activity becomes one row
+of a feature matrix with performance, preference, progression and diversity
+columns. All rows are scored with a single matrix product, and the top-k rows
+are picked with ``argpartition`` instead of sorting the whole catalog.
+"""
+
+# Standard library imports
+from collections import Counter
+from typing import Any, Dict, Hashable, Iterable, List, Sequence, Tuple
+
+# Third-party imports
+import numpy as np
+
+from app.models.physical_education.pe_enums.pe_types import DifficultyLevel
+
+SCORE_COMPONENTS = ("performance", "preference", "progression", "diversity")
+SCORE_WEIGHTS = np.array([0.3, 0.3, 0.2, 0.2])
+DEFAULT_SCORE = 0.5
+
+LEVEL_SCORES = {
+    DifficultyLevel.BEGINNER: 0.3,
+    DifficultyLevel.INTERMEDIATE: 0.6,
+    DifficultyLevel.ADVANCED: 0.9
+}
+
+
+def _enum_value(value: Any) -> Any:
+    return getattr(value, "value", value)
+
+
+def performance_scores(
+    positions: Dict[Hashable, int],
+    performances: Sequence[Any]
+) -> np.ndarray:
+    """Average score times an improvement-trend factor, per candidate.
+
+    The trend compares each activity's first and last performance in the order
+    given. Candidates without history (or with a missing score) get the default.
+    """
+    scores = np.full(len(positions), DEFAULT_SCORE)
+    rows = [(positions[p.activity_id], p.score) for p in performances if p.activity_id in positions]
+    if not rows:
+        return scores
+    index = np.array([row for row, _ in rows], dtype=np.intp)
+    values = np.array([np.nan if score is None else score for _, score in rows], dtype=np.float64)
+
+    counts = np.bincount(index, minlength=len(positions))
+    sums = np.bincount(index, weights=values, minlength=len(positions))
+    first = np.full(len(positions), np.nan)
+    last = np.full(len(positions), np.nan)
+    unique, first_at = np.unique(index, return_index=True)
+    first[unique] = values[first_at]
+    unique, last_from_end = np.unique(index[::-1], return_index=True)
+    last[unique] = values[::-1][last_from_end]
+
+    seen = counts > 0
+    average = sums[seen] / counts[seen]
+    trend = np.where(
+        counts[seen] > 1,
+        1 + (last[seen] - first[seen]) / counts[seen] * 0.5,
+        1.0
+    )
+    computed = np.minimum(1.0, average * trend)
+    scores[seen] = np.where(np.isnan(computed), DEFAULT_SCORE, computed)
+    return scores
+
+
+def preference_scores(
+    activity_ids: Sequence[Hashable],
+    activity_types: Sequence[Any],
+    pe_preferences: Iterable[Any],
+    adaptation_preferences: Iterable[Any]
+) -> np.ndarray:
+    """PE preference for the activity blended with the adaptation preference for its type."""
+    by_activity: Dict[Hashable, float] = {}
+    for preference in pe_preferences:
+        by_activity.setdefault(preference.activity_id, preference.preference_score)
+    by_type: Dict[Any, float] = {}
+    for preference in adaptation_preferences or ():
+        by_type.setdefault(_enum_value(preference.activity_type), preference.preference_score)
+
+    pe = np.array([by_activity.get(activity_id) or 0.0 for activity_id in activity_ids], dtype=np.float64)
+    adaptation = np.array(
+        [by_type.get(_enum_value(activity_type)) or 0.0 for activity_type in activity_types],
+        dtype=np.float64
+    )
+    return np.select(
+        [(pe > 0) & (adaptation > 0), pe > 0, adaptation > 0],
+        [pe * 0.7 + adaptation * 0.3, pe, adaptation],
+        default=DEFAULT_SCORE
+    )
+
+
+def progression_scores(positions: Dict[Hashable, int], progressions: Iterable[Any]) -> np.ndarray:
+    """Current level weighted by improvement rate, per candidate."""
+    scores = np.full(len(positions), DEFAULT_SCORE)
+    seen = set()
+    for progression in progressions:
+        row = positions.get(progression.activity_id)
+        if row is None or row in seen:
+            continue
+        seen.add(row)
+        if progression.improvement_rate is None:
+            continue
+        base_score = LEVEL_SCORES.get(progression.current_level, DEFAULT_SCORE)
+        scores[row] = min(1.0, base_score * (1 + progression.improvement_rate * 0.5))
+    return scores
+
+
+def diversity_scores(activity_types: Sequence[Any], performed_types: Iterable[Any]) -> np.ndarray:
+    """One minus the share of past performances that had the candidate's type."""
+    type_counts = Counter(_enum_value(activity_type) for activity_type in performed_types)
+    total = sum(type_counts.values())
+    if not total:
+        return np.full(len(activity_types), DEFAULT_SCORE)
+    counts = np.array([type_counts.get(_enum_value(t), 0) for t in activity_types], dtype=np.float64)
+    return 1 - counts / total
+
+
+def score_candidates(components: np.ndarray, weights: np.ndarray = SCORE_WEIGHTS) -> np.ndarray:
+    """Weighted score of each row of an (activities x components) matrix."""
+    return components @ weights
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` best scores, best first.
+
+    Ties keep catalog order, exactly as a stable descending sort would.
+    """
+    n = len(scores)
+    k = max(0, min(k, n))
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+    if k < n:
+        threshold = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        above = np.flatnonzero(scores > threshold)
+        tied = np.flatnonzero(scores == threshold)[:k - len(above)]
+        candidates = np.concatenate([above, tied])
+    else:
+        candidates = np.arange(n)
+    # lexsort's last key is primary: score descending, then catalog position
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
+
+
+def rank_activities(
+    activities: Sequence[Any],
+    performances: Sequence[Any],
+    pe_preferences: Sequence[Any],
+    adaptation_preferences: Sequence[Any],
+    progressions: Sequence[Any],
+    performed_types: Sequence[Any],
+    limit: int
+) -> Tuple[List[int], np.ndarray, np.ndarray]:
+    """Score every candidate and return (top indices, final scores, component matrix)."""
+    activity_ids = [activity.id for activity in activities]
+    activity_types = [activity.activity_type for activity in activities]
+    positions = {activity_id: row for row, activity_id in enumerate(activity_ids)}
+
+    components = np.column_stack([
+        performance_scores(positions, performances),
+        preference_scores(activity_ids, activity_types, pe_preferences, adaptation_preferences),
+        progression_scores(positions, progressions),
+        diversity_scores(activity_types, performed_types)
+    ]) if activities else np.empty((0, len(SCORE_COMPONENTS)))
+    scores = score_candidates(components)
+    return top_k(scores, limit).tolist(), scores, components
@@ -5,7 +5,8 @@ import json
 from app.core.monitoring import track_metrics
 from app.services.physical_education import service_integration
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, update
+from app.core.config import settings
 from app.core.database import get_db
 from app.models.physical_education.safety import (
     SafetyIncident,
@@ -1517,88 +1518,103 @@ class SafetyManager:
 
     async def bulk_update_safety_incidents(
         self,
-        updates: List[Dict[str, Any]]
-    ) -> Dict[str, int]:
-        """Bulk update multiple safety incidents."""
-        try:
-            db = next(get_db())
-            success_count = 0
-            failure_count = 0
-            
-            for update in updates:
-                incident_id = update.get("id")
-                update_data = update.get("data", {})
-                
-                if not incident_id or not update_data:
-                    failure_count += 1
-                    continue
-                
-                incident = db.query(SafetyIncident).filter(SafetyIncident.id == incident_id).first()
-                
-                if not incident:
-                    failure_count += 1
-                    continue
-                
-                for key, value in update_data.items():
-                    if hasattr(incident, key):
-                        setattr(incident, key, value)
-                
-                success_count += 1
-            
-            db.commit()
-            return {"success": success_count, "failure": failure_count}
-            
-        except Exception as e:
-            self.logger.error(f"Error in bulk update of safety incidents: {str(e)}")
-            if db:
-                db.rollback()
-            return {"success": 0, "failure": len(updates)}
-        finally:
-            if db:
-                db.close()
+        updates: List[Dict[str, Any]],
+        chunk_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Bulk update multiple safety incidents.
+
+        Each item is ``{"id": ..., "data": {...}}``. Returns success/failure
+        counts plus a per-id outcome in ``results``.
+        """
+        return self._bulk_update_records(SafetyIncident, updates, chunk_size, "safety incidents")
 
     async def bulk_update_risk_assessments(
         self,
-        updates: List[Dict[str, Any]]
-    ) -> Dict[str, int]:
-        """Bulk update multiple risk assessments."""
+        updates: List[Dict[str, Any]],
+        chunk_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Bulk update multiple risk assessments (same format as incidents)."""
+        return self._bulk_update_records(RiskAssessment, updates, chunk_size, "risk assessments")
+
+    def _validate_bulk_changes(self, model, data: Dict[str, Any]) -> Optional[str]:
+        """Check a change set against the model's column metadata; returns an error or None."""
+        columns = model.__table__.columns
+        for key, value in data.items():
+            column = columns.get(key)
+            if column is None:
+                return f"Unknown field: {key}"
+            if column.primary_key:
+                return f"Field cannot be updated: {key}"
+            if value is None and not column.nullable:
+                return f"Field cannot be null: {key}"
+        return None
+
+    def _bulk_update_records(
+        self,
+        model,
+        updates: List[Dict[str, Any]],
+        chunk_size: Optional[int],
+        label: str
+    ) -> Dict[str, Any]:
+        """Apply ``{"id", "data"}`` updates with one id prefetch and grouped executemany UPDATEs per chunk."""
+        chunk_size = chunk_size or settings.SAFETY_BULK_UPDATE_CHUNK_SIZE
+        results: Dict[Any, Dict[str, Any]] = {}
+        changes: Dict[Any, Dict[str, Any]] = {}
+        for item in updates:
+            record_id = item.get("id")
+            update_data = item.get("data") or {}
+            if not record_id or not update_data:
+                results[record_id] = {"status": "invalid", "error": "Missing id or data"}
+                continue
+            error = self._validate_bulk_changes(model, update_data)
+            if error:
+                results[record_id] = {"status": "invalid", "error": error}
+                continue
+            # Repeated ids merge in request order, later values winning
+            changes.setdefault(record_id, {}).update(update_data)
+
+        db = None
+        record_ids = list(changes)
         try:
             db = next(get_db())
-            success_count = 0
-            failure_count = 0
-            
-            for update in updates:
-                assessment_id = update.get("id")
-                update_data = update.get("data", {})
-                
-                if not assessment_id or not update_data:
-                    failure_count += 1
-                    continue
-                
-                assessment = db.query(RiskAssessment).filter(RiskAssessment.id == assessment_id).first()
-                
-                if not assessment:
-                    failure_count += 1
-                    continue
-                
-                for key, value in update_data.items():
-                    if hasattr(assessment, key):
-                        setattr(assessment, key, value)
-                
-                success_count += 1
-            
-            db.commit()
-            return {"success": success_count, "failure": failure_count}
-            
-        except Exception as e:
-            self.logger.error(f"Error in bulk update of risk assessments: {str(e)}")
+            for start in range(0, len(record_ids), chunk_size):
+                chunk = record_ids[start:start + chunk_size]
+                found = {
+                    record_id for (record_id,) in
+                    db.query(model.id).filter(model.id.in_(chunk)).all()
+                }
+                # One executemany UPDATE per distinct set of changed columns
+                groups: Dict[frozenset, List[Dict[str, Any]]] = {}
+                for record_id in chunk:
+                    if record_id not in found:
+                        results[record_id] = {"status": "not_found"}
+                        continue
+                    data = changes[record_id]
+                    groups.setdefault(frozenset(data), []).append({"id": record_id, **data})
+                for rows in groups.values():
+                    db.execute(update(model), rows)
+                db.commit()
+                for rows in groups.values():
+                    for row in rows:
+                        results[row["id"]] = {"status": "updated"}
+        except Exception as e:
+            self.logger.error(f"Error in bulk update of {label}: {str(e)}")
             if db:
                 db.rollback()
-            return {"success": 0, "failure": len(updates)}
+            for record_id in record_ids:
+                if results.get(record_id, {}).get("status") != "updated":
+                    results[record_id] = {"status": "error", "error": str(e)}
         finally:
             if db:
                 db.close()
 
+        success = sum(1 for outcome in results.values() if outcome["status"] == "updated")
+        return {
+            "success": success,
+            "failure": len(results) - success,
+            "results": results
+        }
+
     async def delete_safety_incident(self, incident_id: int) -> bool:
         """Delete a safety incident."""
         try:
@@ -3,7 +3,7 @@ import asyncio
 import logging
 import os
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional, Tuple
 
 # Third-party imports
 import cv2
@@ -27,6 +27,14 @@ from app.models.physical_education.pe_enums.pe_types import (
 from app.models.physical_education.skill_assessment.skill_assessment_models import SkillModels
 from app.models.physical_education.movement_analysis.movement_models import MovementModels
 from app.services.physical_education.movement_analyzer import MovementAnalyzer
+from app.services.physical_education.frame_feature_executor import FrameFeatureExecutor
+from app.services.physical_education.frame_feature_cache import (
+    FrameFeatureCache,
+    batch_digest,
+    compact_features,
+    expand_features,
+    frame_digest
+)
 
 class VideoProcessor:
     """Service for processing video data and extracting movement information."""
@@ -38,9 +46,6 @@ class VideoProcessor:
         self.movement_models = MovementModels()
         self.skill_models = SkillModels()
         self.processing_history = []
-        self.frame_cache = {}
-        self.analysis_cache = {}
-        self.batch_cache = {}
         self.cache_stats = {
             "hits": 0,
             "misses": 0,
@@ -51,14 +56,28 @@ class VideoProcessor:
             "batch_size": 32,
             "quality_threshold": 0.7,
             "max_cache_size": 1000,
-            "max_batch_cache_size": 100,
             "cache_ttl": 3600,  # 1 hour in seconds
             "memory_limit": 1024 * 1024 * 1024,  # 1GB in bytes
             "batch_processing": True,
             "parallel_processing": True,
             "compression_enabled": True,
-            "compression_quality": 0.9
+            "compression_quality": 0.9,
+            "streaming_enabled": False,
+            "stream_window_size": 64,  # frames handed to the analyzer at once
+            "max_frames_in_flight": 128,  # decoded frames buffered ahead of analysis
+            "feature_executor": "thread",  # thread, process or inline
+            "feature_workers": None,  # defaults to the CPU count
+            "feature_chunk_size": 16,
+            "cache_digest_size": 32,  # thumbnail edge used for frame digests
+            "feature_cache_max_bytes": 256 * 1024 * 1024,
+            "batch_cache_max_bytes": 128 * 1024 * 1024,
+            "frame_cache_max_bytes": 64 * 1024 * 1024,
+            "analysis_cache_max_bytes": 64 * 1024 * 1024
         }
+        self.feature_cache = FrameFeatureCache(self.processing_config["feature_cache_max_bytes"])
+        self.batch_cache = FrameFeatureCache(self.processing_config["batch_cache_max_bytes"])
+        self.frame_cache = FrameFeatureCache(self.processing_config["frame_cache_max_bytes"])
+        self.analysis_cache = FrameFeatureCache(self.processing_config["analysis_cache_max_bytes"])
         self.video_metadata = {}
         self.quality_metrics = {}
         self.motion_analysis = {}
@@ -70,6 +89,8 @@ class VideoProcessor:
         self.enhancement_history = {}
         self.export_settings = {}
         self.movement_analyzer = MovementAnalyzer()
+        self.feature_executor = None
+        self._sift = None
         
         # Video processing settings
         self.settings = {
@@ -148,21 +169,31 @@ class VideoProcessor:
             await self.skill_models.initialize()
             
             # Initialize caches and configurations
-            self.frame_cache = {}
-            self.analysis_cache = {}
+            self.frame_cache.clear()
+            self.analysis_cache.clear()
             self.video_metadata = {}
             self.processing_config = {
                 "frame_interval": 0.5,  # seconds
                 "batch_size": 32,
                 "quality_threshold": 0.7,
                 "max_cache_size": 1000,
-                "max_batch_cache_size": 100,
                 "cache_ttl": 3600,  # 1 hour in seconds
                 "memory_limit": 1024 * 1024 * 1024,  # 1GB in bytes
                 "batch_processing": True,
                 "parallel_processing": True,
                 "compression_enabled": True,
-                "compression_quality": 0.9
+                "compression_quality": 0.9,
+                "streaming_enabled": False,
+                "stream_window_size": 64,
+                "max_frames_in_flight": 128,
+                "feature_executor": "thread",
+                "feature_workers": None,
+                "feature_chunk_size": 16,
+                "cache_digest_size": 32,
+                "feature_cache_max_bytes": 256 * 1024 * 1024,
+                "batch_cache_max_bytes": 128 * 1024 * 1024,
+                "frame_cache_max_bytes": 64 * 1024 * 1024,
+                "analysis_cache_max_bytes": 64 * 1024 * 1024
             }
             
             # Initialize movement analyzer
@@ -211,6 +242,11 @@ class VideoProcessor:
             
             # Remove temporary files
             self.cleanup_temp_files()
+            
+            # Stop feature extraction workers
+            if self.feature_executor:
+                self.feature_executor.shutdown()
+                self.feature_executor = None
         except Exception as e:
             self.logger.error(f"Error cleaning up video processor: {str(e)}")
             raise
@@ -240,6 +276,8 @@ class VideoProcessor:
     @track_metrics
     async def process_video(self, video_path: str) -> Dict[str, Any]:
         """Process a video file and extract movement information."""
+        if self.processing_config.get("streaming_enabled"):
+            return await self.process_video_stream(video_path)
         try:
             # Validate video file
             if not self.validate_video(video_path):
@@ -316,62 +354,193 @@ class VideoProcessor:
             self.logger.error(f"Error validating video {video_path}: {str(e)}")
             return False
 
-    async def extract_frames(self, video_path: str) -> List[np.ndarray]:
-        """Extract frames from video file."""
+    @track_metrics
+    async def process_video_stream(
+        self,
+        video_path: str,
+        window_size: Optional[int] = None,
+        max_frames_in_flight: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Process a video in fixed-size frame windows with bounded memory.
+        
+        Frames are decoded, processed and analyzed one window at a time, so
+        peak memory depends on the window size rather than the video length.
+        """
         try:
-            frames = []
+            # Validate video file
+            if not self.validate_video(video_path):
+                raise ValueError(f"Invalid video file: {video_path}")
+            
+            # Update processing state
+            self.processing_state["current_video"] = video_path
+            self.processing_state["active_processes"] += 1
+            
+            start_time = datetime.now()
+            
+            # Analyze each window as soon as it is processed
+            window_results = []
+            frames_processed = 0
+            async for window in self.stream_frame_windows(video_path, window_size, max_frames_in_flight):
+                analysis = await self.movement_analyzer.analyze(window)
+                window_results.append({
+                    "window_index": len(window_results),
+                    "start_frame": frames_processed,
+                    "frame_count": len(window),
+                    "analysis": analysis
+                })
+                frames_processed += len(window)
+            
+            # Generate report
+            report = self.generate_report({
+                "streaming": True,
+                "frames_processed": frames_processed,
+                "window_count": len(window_results),
+                "windows": window_results
+            })
+            
+            # Update metrics
+            end_time = datetime.now()
+            processing_time = (end_time - start_time).total_seconds()
+            self.update_performance_metrics(processing_time)
+            
+            # Update processing state
+            self.processing_state["processed_videos"].append(video_path)
+            self.processing_state["active_processes"] -= 1
+            
+            return report
+            
+        except Exception as e:
+            self.logger.error(f"Error streaming video {video_path}: {str(e)}")
+            self.processing_state["failed_videos"].append(video_path)
+            self.processing_state["active_processes"] -= 1
+            raise
+
+    async def stream_frame_windows(
+        self,
+        video_path: str,
+        window_size: Optional[int] = None,
+        max_frames_in_flight: Optional[int] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield processed frames in windows while decoding ahead in the background.
+        
+        Decoding runs off the event loop and is throttled by a bounded queue, so
+        at most ``max_frames_in_flight`` decoded frames exist at any time.
+        """
+        window_size = max(1, window_size or self.processing_config["stream_window_size"])
+        max_frames_in_flight = max(
+            max_frames_in_flight or self.processing_config["max_frames_in_flight"],
+            window_size + 1
+        )
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max_frames_in_flight - window_size)
+        decode_errors: List[Exception] = []
+        
+        async def _decode():
             cap = cv2.VideoCapture(video_path)
+            try:
+                while cap.isOpened():
+                    ret, frame = await asyncio.to_thread(cap.read)
+                    if not ret:
+                        break
+                    await queue.put(self._resize_frame(frame))
+            except Exception as e:
+                decode_errors.append(e)
+            finally:
+                cap.release()
+            await queue.put(None)
+        
+        # Optical flow must not bridge two different videos
+        if hasattr(self, 'previous_frame'):
+            del self.previous_frame
+        
+        decoder = asyncio.create_task(_decode())
+        try:
+            window = []
+            while True:
+                frame = await queue.get()
+                if frame is None:
+                    break
+                window.append(frame)
+                if len(window) >= window_size:
+                    yield await self.process_frames(window)
+                    window = []
+            
+            if window:
+                yield await self.process_frames(window)
             
+            if decode_errors:
+                raise decode_errors[0]
+        except Exception as e:
+            self.logger.error(f"Error streaming frames from {video_path}: {str(e)}")
+            raise
+        finally:
+            if not decoder.done():
+                decoder.cancel()
+
+    def iter_frames(self, video_path: str) -> Iterator[np.ndarray]:
+        """Decode and resize frames one at a time without buffering the video."""
+        cap = cv2.VideoCapture(video_path)
+        try:
             while cap.isOpened():
                 ret, frame = cap.read()
                 if not ret:
                     break
-                
-                # Resize frame if needed
-                if frame.shape[:2] != self.settings["resolution"]:
-                    frame = cv2.resize(frame, self.settings["resolution"])
-                
-                frames.append(frame)
-            
+                yield self._resize_frame(frame)
+        finally:
             cap.release()
-            return frames
+
+    def _resize_frame(self, frame: np.ndarray) -> np.ndarray:
+        """Resize a frame to the configured resolution if needed."""
+        width, height = self.settings["resolution"]
+        if frame.shape[1] != width or frame.shape[0] != height:
+            frame = cv2.resize(frame, (width, height))
+        return frame
+
+    async def extract_frames(self, video_path: str) -> List[np.ndarray]:
+        """Extract frames from video file."""
+        try:
+            return list(self.iter_frames(video_path))
             
         except Exception as e:
             self.logger.error(f"Error extracting frames from {video_path}: {str(e)}")
             raise
 
-    async def process_frames(self, frames: List[np.ndarray]) -> List[Dict[str, Any]]:
-        """Process extracted frames."""
+    async def process_frames(self, frames: List[np.ndarray], use_cache: bool = True) -> List[Dict[str, Any]]:
+        """Process extracted frames.
+        
+        Frames are looked up in the feature cache by a downsampled content
+        digest. All frames go through the feature executor in order so optical
+        flow stays correct; cache hits only skip edge and keypoint extraction.
+        """
         try:
-            processed_frames = []
+            digests = [self._frame_key(frame) if use_cache else None for frame in frames]
             
-            for frame in frames:
-                # Check cache
-                frame_hash = hash(frame.tobytes())
-                if frame_hash in self.cache["frames"]:
-                    self.cache_stats["hits"] += 1
-                    processed_frames.append(self.cache["frames"][frame_hash])
-                    continue
-                
-                self.cache_stats["misses"] += 1
+            # Check cache
+            cached = []
+            for digest in digests:
+                entry = self.feature_cache.get(digest) if digest is not None else None
+                if digest is not None:
+                    self.cache_stats["hits" if entry is not None else "misses"] += 1
+                cached.append(entry)
+            
+            # Process frames
+            features = await self.extract_features_parallel(
+                frames,
+                skip_static=[entry is not None for entry in cached]
+            )
+            
+            processed_frames = []
+            for frame, digest, entry, frame_features in zip(frames, digests, cached, features):
+                if entry is not None:
+                    frame_features.update(expand_features(entry))
+                elif digest is not None:
+                    # Update cache with compact features only
+                    self.feature_cache[digest] = compact_features(frame_features)
                 
-                # Process frame
-                # PRODUCTION-READY: Use sync version of extract_features (line 378)
-                # The async version (line 707) requires key_points parameter
-                # Use the sync version explicitly to avoid shadowing by async version
-                features = self.extract_features_sync(frame)  # Sync version
-                processed_frame = {
+                processed_frames.append({
                     "data": frame,
-                    "features": features,
+                    "features": frame_features,
                     "timestamp": datetime.now().isoformat()
-                }
-                
-                # Update cache
-                self.cache["frames"][frame_hash] = processed_frame
-                processed_frames.append(processed_frame)
-                
-                # Manage cache size
-                await self.manage_cache()
+                })
             
             return processed_frames
             
@@ -379,6 +548,53 @@ class VideoProcessor:
             self.logger.error(f"Error processing frames: {str(e)}")
             raise
 
+    def _frame_key(self, frame: np.ndarray) -> str:
+        """Cache key of a frame: a digest of its downsampled content."""
+        digest_size = self.processing_config.get("cache_digest_size", 32)
+        return frame_digest(frame, (digest_size, digest_size))
+
+    def _get_feature_executor(self) -> FrameFeatureExecutor:
+        """Return the feature executor matching the current processing config."""
+        mode = self.processing_config.get("feature_executor", "thread")
+        workers = self.processing_config.get("feature_workers")
+        chunk_size = self.processing_config.get("feature_chunk_size", 16)
+        
+        executor = self.feature_executor
+        if executor is None or executor.mode != mode or (workers and executor.max_workers != workers):
+            if executor is not None:
+                executor.shutdown(wait=False)
+            executor = FrameFeatureExecutor(mode=mode, max_workers=workers, chunk_size=chunk_size)
+            self.feature_executor = executor
+        executor.chunk_size = max(1, chunk_size)
+        return executor
+
+    async def extract_features_parallel(
+        self,
+        frames: List[np.ndarray],
+        skip_static: Optional[List[bool]] = None
+    ) -> List[Dict[str, Any]]:
+        """Extract features for consecutive frames on the feature executor.
+        
+        Optical flow for the first frame is computed against the last frame
+        seen by this processor, matching ``extract_features_sync``.
+        """
+        if not frames:
+            return []
+        
+        features = await self._get_feature_executor().extract(
+            frames,
+            previous_frame=getattr(self, 'previous_frame', None),
+            skip_static=skip_static
+        )
+        self.previous_frame = cv2.cvtColor(frames[-1], cv2.COLOR_BGR2GRAY)
+        return features
+
+    def get_feature_timings(self) -> Dict[str, Any]:
+        """Get per-stage feature extraction timings."""
+        if self.feature_executor is None:
+            return {}
+        return self.feature_executor.get_stage_timings()
+
     def extract_features_sync(self, frame: np.ndarray) -> Dict[str, Any]:
         """Extract features from a single frame."""
         try:
@@ -389,8 +605,9 @@ class VideoProcessor:
             edges = cv2.Canny(gray, 100, 200)
             
             # Extract keypoints
-            sift = cv2.SIFT_create()
-            keypoints, descriptors = sift.detectAndCompute(gray, None)
+            if self._sift is None:
+                self._sift = cv2.SIFT_create()
+            keypoints, descriptors = self._sift.detectAndCompute(gray, None)
             
             # Calculate motion
             if hasattr(self, 'previous_frame'):
@@ -462,6 +679,10 @@ class VideoProcessor:
         try:
             for cache_type in self.cache:
                 self.cache[cache_type].clear()
+            self.feature_cache.clear()
+            self.feature_cache.reset_stats()
+            self.batch_cache.clear()
+            self.batch_cache.reset_stats()
             
             self.cache_stats = {
                 "hits": 0,
@@ -518,6 +739,7 @@ class VideoProcessor:
                     "error_rate": self.performance_metrics["error_rates"].get("overall", 0)
                 },
                 "cache_stats": self.cache_stats,
+                "feature_timings": self.get_feature_timings(),
                 "resource_usage": {
                     "memory": self._estimate_memory_usage(),
                     "active_processes": self.processing_state["active_processes"]
@@ -663,9 +885,10 @@ class VideoProcessor:
         """Process a single frame and extract features."""
         try:
             # Check cache first
-            frame_hash = hash(frame.tobytes())
-            if frame_hash in self.frame_cache:
-                return self.frame_cache[frame_hash]
+            frame_hash = self._frame_key(frame)
+            cached = self.frame_cache.get(frame_hash)
+            if cached is not None:
+                return cached
             
             # Resize frame for processing
             blob = cv2.dnn.blobFromImage(frame, 1.0 / 255, (368, 368),
@@ -708,9 +931,10 @@ class VideoProcessor:
         """Extract additional features from frame and key points."""
         try:
             # Check cache first
-            feature_hash = hash((frame.tobytes(), str(key_points)))
-            if feature_hash in self.analysis_cache:
-                return self.analysis_cache[feature_hash]
+            feature_hash = batch_digest((self._frame_key(frame), str(key_points)))
+            cached = self.analysis_cache.get(feature_hash)
+            if cached is not None:
+                return cached
             
             features = await self.movement_models.extract_features(frame, key_points)
             
@@ -1632,12 +1856,13 @@ class VideoProcessor:
     async def process_frames_batch(self, frames: List[np.ndarray]) -> List[Dict[str, Any]]:
         """Process multiple frames in a batch for better performance."""
         try:
-            batch_hash = hash(tuple(frame.tobytes() for frame in frames))
+            batch_hash = batch_digest(self._frame_key(frame) for frame in frames)
             
             # Check batch cache
-            if batch_hash in self.batch_cache:
+            cached_results = self.batch_cache.get(batch_hash)
+            if cached_results is not None:
                 self.cache_stats["hits"] += 1
-                return self.batch_cache[batch_hash]
+                return cached_results
                 
             self.cache_stats["misses"] += 1
             
@@ -1666,8 +1891,7 @@ class VideoProcessor:
                 }
                 results.append(processed_frame)
             
-            # Update batch cache
-            await self.manage_batch_cache()
+            # Update batch cache (evicts by byte budget)
             self.batch_cache[batch_hash] = results
             
             return results
@@ -1703,22 +1927,6 @@ class VideoProcessor:
         except Exception as e:
             self.logger.error(f"Error managing frame cache: {str(e)}")
 
-    async def manage_batch_cache(self):
-        """Manage batch cache size and memory usage."""
-        try:
-            current_size = len(self.batch_cache)
-            if current_size > self.processing_config["max_batch_cache_size"]:
-                # Remove oldest entries
-                items = sorted(self.batch_cache.items(), key=lambda x: x[0])
-                items_to_remove = items[:current_size - self.processing_config["max_batch_cache_size"]]
-                
-                for key, _ in items_to_remove:
-                    del self.batch_cache[key]
-                    self.cache_stats["evictions"] += 1
-                    
-        except Exception as e:
-            self.logger.error(f"Error managing batch cache: {str(e)}")
-
     async def optimize_memory_usage(self):
         """Optimize memory usage by compressing cached data."""
         try:
@@ -1762,6 +1970,10 @@ class VideoProcessor:
                 "hit_rate": hit_rate,
                 "frame_cache_size": len(self.frame_cache),
                 "batch_cache_size": len(self.batch_cache),
+                "feature_cache": self.feature_cache.get_stats(),
+                "batch_cache": self.batch_cache.get_stats(),
+                "analysis_cache": self.analysis_cache.get_stats(),
+                "bytes_held": self.feature_cache.bytes_held + self.batch_cache.bytes_held,
                 "memory_usage": self._estimate_memory_usage()
             }
             
@@ -1772,16 +1984,11 @@ class VideoProcessor:
     def _estimate_memory_usage(self) -> int:
         """Estimate current memory usage of caches."""
         try:
-            import sys
-            
-            frame_cache_size = sum(sys.getsizeof(v) for v in self.frame_cache.values())
-            batch_cache_size = sum(
-                sum(sys.getsizeof(f) for f in batch)
-                for batch in self.batch_cache.values()
+            return sum(
+                cache.bytes_held
+                for cache in (self.frame_cache, self.analysis_cache, self.feature_cache, self.batch_cache)
             )
             
-            return frame_cache_size + batch_cache_size
-            
         except Exception as e:
             self.logger.error(f"Error estimating memory usage: {str(e)}")
             return 0 
\ No newline at end of file
@@ -0,0 +1,321 @@
+"""Tests and per-request overhead benchmark for the fused ASGI middleware pipeline."""
+import asyncio
+import statistics
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from starlette.responses import PlainTextResponse
+
+from app.core.asgi_pipeline import (
+    AuthenticationHook,
+    CircuitBreakerHook,
+    FeatureFlagHook,
+    MetricsHook,
+    PipelineHook,
+    PipelineMiddleware,
+    RateLimitHook,
+    RequestIDHook,
+    SecurityHeadersHook,
+    TimingHook
+)
+from app.core.middleware import (
+    CircuitBreakerMiddleware,
+    FeatureFlagMiddleware,
+    RequestIDMiddleware,
+    SecurityHeadersMiddleware,
+    TimingMiddleware
+)
+from app.core.monitoring import performance_monitor
+from app.core.rate_limit import InMemoryRateLimitBackend, RateLimitEngine
+from app.core.security import SECURITY_HEADERS
+
+CHUNKS = [b"first,", b"second,", b"third"]
+
+
+class RecordingHook(PipelineHook):
+    """Appends its phases to a shared log; optionally short-circuits."""
+
+    def __init__(self, name, log, response=None):
+        self.name = name
+        self.log = log
+        self.response = response
+
+    async def before(self, ctx):
+        self.log.append(f"{self.name}.before")
+        return self.response
+
+    def on_response(self, ctx, headers):
+        self.log.append(f"{self.name}.on_response")
+
+    async def after(self, ctx):
+        self.log.append(f"{self.name}.after")
+
+
+def make_app():
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for chunk in CHUNKS:
+                yield chunk
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    return app
+
+
+async def call(app, path="/ping", headers=()):
+    """Drive one GET through ``app`` at the ASGI level and return the sent messages."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": list(headers),
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80)
+    }
+    messages = []
+    received = False
+    disconnect = asyncio.Event()
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages
+
+
+def test_hooks_run_in_order_and_short_circuit_like_nested_middleware():
+    log = []
+    app = make_app()
+    app.add_middleware(
+        PipelineMiddleware,
+        hooks=[RecordingHook("a", log), RecordingHook("b", log), RecordingHook("c", log)]
+    )
+    client = TestClient(app)
+
+    assert client.get("/ping").status_code == 200
+    assert log == [
+        "a.before", "b.before", "c.before",
+        "c.on_response", "b.on_response", "a.on_response",
+        "c.after", "b.after", "a.after"
+    ]
+
+    log.clear()
+    app = make_app()
+    app.add_middleware(
+        PipelineMiddleware,
+        hooks=[
+            RecordingHook("a", log),
+            RecordingHook("b", log, response=PlainTextResponse("nope", status_code=403)),
+            RecordingHook("c", log)
+        ]
+    )
+    response = TestClient(app).get("/ping")
+    assert response.status_code == 403 and response.text == "nope"
+    assert log == ["a.before", "b.before", "b.on_response", "a.on_response", "b.after", "a.after"]
+
+
+def test_default_concerns_add_headers_and_reject_unauthenticated():
+    app = make_app()
+    app.add_middleware(
+        PipelineMiddleware,
+        hooks=[RequestIDHook(), TimingHook(), SecurityHeadersHook(), AuthenticationHook(public_paths=["/health"])]
+    )
+    client = TestClient(app)
+
+    response = client.get("/health", headers={"X-Request-ID": "abc"})
+    assert response.status_code == 200
+    assert response.headers["X-Request-ID"] == "abc"
+    assert float(response.headers["X-Process-Time"]) >= 0
+    for header, value in SECURITY_HEADERS.items():
+        assert response.headers[header] == value
+
+    # Auth short-circuits, but hooks that already ran still decorate the 401
+    response = client.get("/ping")
+    assert response.status_code == 401
+    assert response.headers["X-Request-ID"]
+    assert response.headers["X-Frame-Options"] == SECURITY_HEADERS["X-Frame-Options"]
+
+
+def test_public_paths_match_whole_segments():
+    app = make_app()
+    app.add_middleware(PipelineMiddleware, hooks=[AuthenticationHook(public_paths=["/", "/health"])])
+    client = TestClient(app)
+
+    assert client.get("/health").status_code == 200
+    assert client.get("/health/db").status_code == 404
+    # "/" covers the root only, and "/health" does not cover "/healthz"
+    assert client.get("/ping").status_code == 401
+    assert client.get("/healthz").status_code == 401
+
+
+def test_cors_preflights_pass_auth_and_rejections_keep_cors_headers():
+    app = make_app()
+    app.add_middleware(PipelineMiddleware, hooks=[AuthenticationHook(public_paths=["/health"])])
+    app.add_middleware(CORSMiddleware, allow_origins=["https://app.example.com"], allow_methods=["*"], allow_headers=["*"])
+    client = TestClient(app)
+    origin = {"Origin": "https://app.example.com"}
+
+    preflight = client.options("/ping", headers={**origin, "Access-Control-Request-Method": "GET"})
+    assert preflight.status_code == 200
+    assert preflight.headers["Access-Control-Allow-Origin"] == "https://app.example.com"
+
+    rejected = client.get("/ping", headers=origin)
+    assert rejected.status_code == 401
+    assert rejected.headers["Access-Control-Allow-Origin"] == "https://app.example.com"
+
+
+def test_rate_limit_hook_matches_middleware_behaviour():
+    app = make_app()
+    engine = RateLimitEngine(InMemoryRateLimitBackend())
+    app.add_middleware(
+        PipelineMiddleware,
+        hooks=[RateLimitHook(limit=2, window=60, engine=engine, exempt_paths=["/health"])]
+    )
+    client = TestClient(app)
+
+    responses = [client.get("/ping") for _ in range(3)]
+    assert [response.status_code for response in responses] == [200, 200, 429]
+    assert responses[0].headers["X-RateLimit-Remaining"] == "1"
+    assert int(responses[-1].headers["Retry-After"]) >= 1
+    assert client.get("/health").status_code == 200
+
+
+def test_metrics_hook_records_latency_per_route(monkeypatch):
+    monkeypatch.setattr(performance_monitor, "response_times", {})
+    app = make_app()
+    app.add_middleware(PipelineMiddleware, hooks=[MetricsHook()])
+    client = TestClient(app)
+
+    for _ in range(3):
+        client.get("/ping")
+    assert performance_monitor.get_latency_percentiles("/ping")["count"] == 3
+
+
+def test_hooks_can_be_enabled_per_route():
+    log = []
+    app = make_app()
+    app.add_middleware(
+        PipelineMiddleware,
+        hooks=[RecordingHook("a", log), RecordingHook("b", log), RequestIDHook()],
+        routes={"/health": ["b"], "/ping": []}
+    )
+    client = TestClient(app)
+
+    response = client.get("/health")
+    assert log == ["b.before", "b.on_response", "b.after"]
+    assert "X-Request-ID" not in response.headers
+
+    log.clear()
+    assert "X-Request-ID" not in client.get("/ping").headers
+    assert log == []
+
+    assert client.get("/stream").headers["X-Request-ID"]
+    assert log[0] == "a.before"
+
+    with pytest.raises(ValueError):
+        PipelineMiddleware(app, hooks=[RequestIDHook()], routes={"/x": ["missing"]})
+
+
+@pytest.mark.asyncio
+async def test_streaming_body_passes_through_untouched():
+    app = make_app()
+    app.add_middleware(PipelineMiddleware, hooks=[RequestIDHook(), TimingHook(), SecurityHeadersHook()])
+    messages = await call(app, "/stream")
+
+    assert messages[0]["type"] == "http.response.start"
+    headers = dict(messages[0]["headers"])
+    assert b"x-request-id" in headers and b"x-frame-options" in headers
+    bodies = [message["body"] for message in messages[1:] if message.get("body")]
+    assert bodies == CHUNKS
+
+
+def test_unhandled_error_becomes_500_and_reaches_after_hooks():
+    log = []
+    app = make_app()
+    app.add_middleware(PipelineMiddleware, hooks=[RecordingHook("a", log), RequestIDHook()])
+    response = TestClient(app, raise_server_exceptions=False).get("/boom")
+
+    assert response.status_code == 500
+    assert response.headers["X-Request-ID"]
+    assert log[-1] == "a.after"
+
+
+@pytest.mark.benchmark
+class TestPipelineOverhead:
+    """Per-request overhead of the fused pipeline against the BaseHTTPMiddleware stack."""
+
+    REQUESTS = 2000
+
+    async def median_overhead(self, app, bare):
+        samples = []
+        for _ in range(5):
+            start = time.perf_counter()
+            for _ in range(self.REQUESTS):
+                await call(app)
+            with_middleware = time.perf_counter() - start
+            start = time.perf_counter()
+            for _ in range(self.REQUESTS):
+                await call(bare)
+            samples.append((with_middleware - (time.perf_counter() - start)) / self.REQUESTS)
+        return statistics.median(samples)
+
+    @pytest.mark.asyncio
+    async def test_fused_pipeline_overhead(self):
+        # Same concerns on both sides; circuit breaker and feature flags are
+        # exercised but find nothing to do, so no cache round trips are timed
+        before = make_app()
+        for middleware in (
+            FeatureFlagMiddleware, CircuitBreakerMiddleware, SecurityHeadersMiddleware,
+            TimingMiddleware, RequestIDMiddleware
+        ):
+            before.add_middleware(middleware)
+
+        after = make_app()
+        after.add_middleware(
+            PipelineMiddleware,
+            hooks=[RequestIDHook(), TimingHook(), SecurityHeadersHook(), CircuitBreakerHook(), FeatureFlagHook()]
+        )
+
+        for app in (before, after):
+            messages = await call(app)
+            assert messages[0]["status"] == 200
+            assert b"x-request-id" in dict(messages[0]["headers"])
+
+        bare = make_app()
+        stacked = await self.median_overhead(before, bare)
+        fused = await self.median_overhead(after, bare)
+        print(f"\nper-request middleware overhead: BaseHTTPMiddleware stack {stacked * 1e6:.1f} us, "
+              f"fused pipeline {fused * 1e6:.1f} us")
+        assert fused < stacked / 2
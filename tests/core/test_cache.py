@@ -0,0 +1,149 @@
+"""Tests for the two-tier (L1 + Redis) cache and background replication."""
+from unittest.mock import Mock
+
+import pytest
+
+from app.core.cache import Cache, ReplicationQueue, cached, get_cache
+from app.core.regional_failover import Region
+
+
+class FakeRedis:
+    """Dict-backed stand-in for the subset of redis.Redis the cache uses."""
+
+    def __init__(self):
+        self.data = {}
+        self.calls = {"get": 0, "setex": 0, "pipelines": 0}
+
+    def get(self, key):
+        self.calls["get"] += 1
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.calls["setex"] += 1
+        self.data[key] = value
+        return True
+
+    def set(self, key, value):
+        self.data[key] = value
+        return True
+
+    def delete(self, key):
+        return 1 if self.data.pop(key, None) is not None else 0
+
+    def ping(self):
+        return True
+
+    def pipeline(self, transaction=True):
+        self.calls["pipelines"] += 1
+        redis = self
+        ops = []
+
+        class Pipeline:
+            def setex(self, key, ttl, value):
+                ops.append(lambda: redis.setex(key, ttl, value))
+
+            def set(self, key, value):
+                ops.append(lambda: redis.set(key, value))
+
+            def delete(self, key):
+                ops.append(lambda: redis.delete(key))
+
+            def execute(self):
+                return [op() for op in ops]
+
+        return Pipeline()
+
+
+@pytest.fixture
+def regions():
+    primary = FakeRedis()
+    secondaries = {region.value: FakeRedis() for region in Region if region != Region.NORTH_AMERICA}
+    cluster = Mock()
+    cluster.primary_region = Region.NORTH_AMERICA
+    cluster.replication_enabled = True
+    cluster.is_available = True
+    cluster.clients = {Region.NORTH_AMERICA.value: primary, **secondaries}
+    replication = ReplicationQueue(cluster, batch_size=50, flush_interval=0.01)
+    yield primary, secondaries, replication
+    replication.stop()
+
+
+def test_l1_hits_skip_redis(regions):
+    primary, _, replication = regions
+    cache = Cache(redis_client=primary, replication=replication)
+
+    cache.set("key", {"value": 1})
+    assert cache.get("key") == {"value": 1}
+    assert cache.get("key") == {"value": 1}
+    assert primary.calls["get"] == 0
+
+    # A fresh instance (another worker) reads through Redis once, then from L1
+    other = Cache(redis_client=primary, replication=replication)
+    assert other.get("key") == {"value": 1}
+    assert other.get("key") == {"value": 1}
+    assert primary.calls["get"] == 1
+
+
+def test_replication_is_batched_per_region(regions):
+    primary, secondaries, replication = regions
+    cache = Cache(redis_client=primary, replication=replication)
+
+    for i in range(20):
+        cache.set(f"key:{i}", i, ttl=60)
+    cache.delete("key:0")
+    assert replication.flush()
+
+    for client in secondaries.values():
+        assert set(client.data) == {f"key:{i}" for i in range(1, 20)}
+        assert client.calls["pipelines"] < 20
+    assert replication.get_stats()["errors"] == 0
+
+
+@pytest.mark.asyncio
+async def test_async_api_and_cached_coroutines(regions):
+    primary, _, replication = regions
+    cache = Cache(redis_client=primary, replication=replication)
+
+    assert await cache.aset("async", [1, 2, 3]) is True
+    assert await cache.aget("async") == [1, 2, 3]
+    assert await cache.alookup("missing") == (False, None)
+    assert await cache.adelete("async") is True
+    assert await cache.aget("async") is None
+
+    calls = []
+
+    @cached("square", ttl=60, replicate=False)
+    async def square(x):
+        calls.append(x)
+        return x * x
+
+    get_cache().clear()
+    assert await square(4) == 16
+    assert await square(4) == 16
+    assert calls == [4]
+
+
+class Opaque:
+    """A value json.dumps cannot encode."""
+
+
+@pytest.mark.asyncio
+async def test_non_json_values_stay_in_l1(regions):
+    primary, _, replication = regions
+    primary.data["stale"] = '"old"'
+    cache = Cache(redis_client=primary, replication=replication)
+    value = Opaque()
+
+    assert cache.set("stale", value) is True
+    assert cache.get("stale") is value
+    assert "stale" not in primary.data
+
+    assert await cache.aset("opaque", {"result": value}, ttl=3600) is True
+    assert (await cache.aget("opaque"))["result"] is value
+    assert "opaque" not in primary.data
+
+    # Without Redis the in-memory path accepts the same values
+    local = Cache(redis_client=None, replication=replication)
+    local.redis = None
+    assert await local.aset("opaque", value) is True
+    assert await local.aget("opaque") is value
@@ -0,0 +1,160 @@
+"""Tests for the compiled intent keyword matcher."""
+import random
+import time
+
+import pytest
+
+from app.core.allergy_detection import detect_allergy_answer
+from app.core.intent_matcher import (
+    KEYWORD_TABLES,
+    RESPONSE_TABLES,
+    KeywordMatcher,
+    intent_matcher,
+    match_response_tables
+)
+from app.core.prompt_loader import classify_intent, classify_intent_matches
+
+SAMPLE_MESSAGES = [
+    "Can you build a meal plan for a wrestler who is cutting weight?",
+    "The student is allergic to tree nuts and shellfish",
+    "I need a lesson plan for 5th grade basketball",
+    "Create a strength training workout with squats and bench press",
+    "Show me attendance analytics for my class",
+    "What can you do?",
+    "Hello there, how are you today?",
+    "none",
+]
+
+
+def naive_tables(text):
+    """The substring checks the matcher replaces."""
+    lower = (text or "").lower()
+    return {
+        table for table, keywords in KEYWORD_TABLES.items()
+        if any(keyword in lower for keyword in keywords)
+    }
+
+
+def random_responses(count, length, seed=11):
+    """Model-response sized texts: mostly prose with the occasional keyword."""
+    rng = random.Random(seed)
+    keywords = [keyword for keywords in KEYWORD_TABLES.values() for keyword in keywords]
+    prose = [
+        "the", "a", "warm", "up", "before", "your", "session", "and", "keep", "hydrated",
+        "focus", "on", "form", "rest", "between", "each", "round", "today", "coach", "team"
+    ]
+    responses = []
+    for _ in range(count):
+        words = []
+        while sum(len(word) + 1 for word in words) < length:
+            words.append(rng.choice(keywords if rng.random() < 0.02 else prose))
+        responses.append(" ".join(words))
+    return responses
+
+
+def random_messages(count, seed=7):
+    rng = random.Random(seed)
+    keywords = [keyword for keywords in KEYWORD_TABLES.values() for keyword in keywords]
+    filler = ["the", "a", "please", "my", "students", "for", "today", "Plan", "NUT", "mealtime"]
+    return [
+        " ".join(rng.choice(keywords if rng.random() < 0.3 else filler) for _ in range(rng.randint(0, 12)))
+        for _ in range(count)
+    ]
+
+
+def test_matching_tables_equals_substring_checks():
+    """The single-pass matcher agrees with per-table ``any(kw in text)``."""
+    for message in SAMPLE_MESSAGES + random_messages(500):
+        assert intent_matcher.matching_tables(message) == naive_tables(message), message
+
+
+def test_match_response_tables_equals_matcher():
+    """The per-table response checks agree with the compiled matcher."""
+    for text in SAMPLE_MESSAGES + random_messages(200) + random_responses(20, 3000):
+        assert match_response_tables(text) == intent_matcher.matching_tables(text) & set(RESPONSE_TABLES)
+
+
+def test_scan_reports_every_occurrence():
+    """Overlapping and prefix keywords are all reported with their positions."""
+    matcher = KeywordMatcher({"a": ["nut", "nuts"], "b": ["tree nut"], "c": ["meal", "meal plan"]})
+    text = "Tree nuts in my MEAL plan"
+    matches = {(match.keyword, match.start, match.end) for match in matcher.scan(text)}
+
+    assert matches == {
+        ("tree nut", 0, 8),
+        ("nut", 5, 8),
+        ("nuts", 5, 9),
+        ("meal", 16, 20),
+        ("meal plan", 16, 25),
+    }
+    for keyword, start, end in matches:
+        assert text.lower()[start:end] == keyword
+
+    grouped = matcher.match_tables(text, tables=["a"])
+    assert set(grouped) == {"a"}
+    assert {match.keyword for match in grouped["a"]} == {"nut", "nuts"}
+
+
+def test_classify_intent_priority():
+    """Intent priority is unchanged: allergy, meal plan, workout, lesson plan, widget."""
+    assert classify_intent("The student is allergic to peanuts") == "allergy_answer"
+    assert classify_intent("none") == "allergy_answer"
+    assert classify_intent("Build a meal plan for my lesson") == "meal_plan"
+    assert classify_intent("cardio workout for my lesson") == "workout"
+    assert classify_intent("lesson plan on attendance") == "lesson_plan"
+    assert classify_intent("show attendance analytics") == "widget"
+    assert classify_intent("hello there") == "general"
+    assert classify_intent("food intolerance", previous_asked_allergies=True) == "allergy_answer"
+
+    matches = classify_intent_matches("cardio workout")
+    assert {match.keyword for match in matches["workout"]} == {"cardio", "workout"}
+
+
+def test_detect_allergy_answer_accepts_precomputed_tables():
+    message = "I avoid peanuts"
+    assert detect_allergy_answer(message, intent_matcher.matching_tables(message))
+    assert not detect_allergy_answer("I need a meal plan", intent_matcher.matching_tables("I need a meal plan"))
+
+
+@pytest.mark.benchmark
+class TestIntentMatcherPerformance:
+    """Performance benchmarks for the compiled matcher."""
+
+    def test_matching_tables_faster_than_substring_checks(self):
+        """One compiled scan beats a substring search per keyword."""
+        messages = SAMPLE_MESSAGES + random_messages(200)
+        rounds = 20
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for message in messages:
+                naive_tables(message)
+        naive_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for message in messages:
+                intent_matcher.matching_tables(message)
+        compiled_time = time.perf_counter() - start
+
+        assert compiled_time < naive_time
+
+    @pytest.mark.parametrize("length", [500, 3000, 5000])
+    def test_response_checks_faster_than_compiled_scan_on_long_text(self, length):
+        """Per-table checks beat the combined scan on response-length text."""
+        responses = random_responses(20, length)
+        rounds = 5
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for response in responses:
+                intent_matcher.matching_tables(response)
+        compiled_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for response in responses:
+                match_response_tables(response)
+        response_time = time.perf_counter() - start
+
+        assert response_time < compiled_time
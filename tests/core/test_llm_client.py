@@ -0,0 +1,185 @@
+"""Tests for the shared LLM client pool against a local stub provider."""
+import asyncio
+import json
+
+import pytest
+
+from app.core.llm_client import LLMClientPool
+
+COMPLETION = {
+    "id": "chatcmpl-stub",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4o-mini",
+    "choices": [{
+        "index": 0,
+        "message": {"role": "assistant", "content": "general"},
+        "finish_reason": "stop"
+    }],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+}
+
+
+class StubProvider:
+    """Minimal keep-alive HTTP server answering every request with a chat completion."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.connections = 0
+        self.requests = 0
+        self.concurrent = 0
+        self.max_concurrent = 0
+        self.server = None
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                headers = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in headers.decode().split("\r\n"):
+                    if line.lower().startswith("content-length:"):
+                        length = int(line.split(":", 1)[1])
+                await reader.readexactly(length)
+
+                self.requests += 1
+                self.concurrent += 1
+                self.max_concurrent = max(self.max_concurrent, self.concurrent)
+                await asyncio.sleep(self.delay)
+                self.concurrent -= 1
+
+                body = json.dumps(COMPLETION).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(body)}\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/v1"
+
+
+@pytest.mark.asyncio
+async def test_chat_completion_reuses_connections():
+    """Sequential calls share one keep-alive connection."""
+    async with StubProvider() as stub:
+        pool = LLMClientPool(api_key="test", base_url=stub.base_url, max_retries=0)
+        try:
+            for _ in range(5):
+                response = await pool.chat_completion(
+                    model="gpt-4o-mini",
+                    messages=[{"role": "user", "content": "hi"}]
+                )
+                assert response.choices[0].message.content == "general"
+        finally:
+            await pool.aclose()
+
+    assert stub.requests == 5
+    assert stub.connections == 1
+    stats = pool.get_stats()["models"]["gpt-4o-mini"]
+    assert stats["requests"] == 5
+    assert stats["errors"] == 0
+    assert stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_chat_completion_respects_model_concurrency():
+    """No more than the configured number of calls per model are in flight."""
+    async with StubProvider(delay=0.05) as stub:
+        pool = LLMClientPool(
+            api_key="test",
+            base_url=stub.base_url,
+            max_retries=0,
+            model_concurrency={"gpt-4": 2}
+        )
+        try:
+            await asyncio.gather(*[
+                pool.chat_completion(model="gpt-4", messages=[{"role": "user", "content": str(i)}])
+                for i in range(6)
+            ])
+        finally:
+            await pool.aclose()
+
+    assert stub.requests == 6
+    assert stub.max_concurrent <= 2
+
+
+class _FakeStream:
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._chunks)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakeCompletions:
+    async def create(self, model, **params):
+        return _FakeStream(["a", "b"])
+
+
+class _FakeAsyncClient:
+    class chat:
+        completions = _FakeCompletions()
+
+
+@pytest.mark.asyncio
+async def test_streaming_call_holds_permit_until_consumed():
+    """A streamed completion keeps its concurrency slot until drained or closed."""
+    pool = LLMClientPool(api_key="test", model_concurrency={"gpt-4": 1})
+    pool._async_client = _FakeAsyncClient()
+
+    first = await pool.chat_completion(model="gpt-4", stream=True)
+    assert pool.get_stats()["models"]["gpt-4"]["in_flight"] == 1
+
+    second = asyncio.ensure_future(pool.chat_completion(model="gpt-4", stream=True))
+    await asyncio.sleep(0.01)
+    assert not second.done()
+
+    assert [chunk async for chunk in first] == ["a", "b"]
+    stream = await asyncio.wait_for(second, timeout=1)
+    await stream.close()
+
+    stats = pool.get_stats()["models"]["gpt-4"]
+    assert stats["in_flight"] == 0
+    assert stats["requests"] == 2
+
+
+def test_async_limits_are_per_event_loop():
+    """Each event loop gets its own semaphore instead of sharing one."""
+    pool = LLMClientPool(api_key="test")
+
+    async def limit():
+        return pool._async_limit("gpt-4")
+
+    first = asyncio.new_event_loop()
+    second = asyncio.new_event_loop()
+    try:
+        assert first.run_until_complete(limit()) is not second.run_until_complete(limit())
+    finally:
+        first.close()
+        second.close()
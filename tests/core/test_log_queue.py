@@ -0,0 +1,112 @@
+"""Tests for the queue-based logging backend."""
+import logging
+import threading
+
+from app.core.log_queue import QueueLogging, SamplingFilter
+
+
+class ListHandler(logging.Handler):
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self.records = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.threads.add(threading.get_ident())
+        self.records.append(self.format(record))
+
+
+def make_logger(name, queue_logging):
+    test_logger = logging.getLogger(name)
+    test_logger.handlers = [queue_logging.handler]
+    test_logger.propagate = False
+    test_logger.setLevel(logging.DEBUG)
+    return test_logger
+
+
+def test_records_are_formatted_on_the_writer_thread():
+    handler = ListHandler()
+    errors = ListHandler(level=logging.ERROR)
+    queue_logging = QueueLogging([handler, errors])
+    queue_logging.start()
+    test_logger = make_logger("test_log_queue.writer", queue_logging)
+
+    test_logger.info("turn %d", 1)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        test_logger.exception("failed")
+    queue_logging.stop()
+
+    assert handler.records[0] == "turn 1"
+    assert handler.records[1].startswith("failed") and "ValueError: boom" in handler.records[1]
+    assert len(errors.records) == 1
+    assert threading.get_ident() not in handler.threads
+
+
+def test_full_queue_drops_and_counts():
+    handler = ListHandler()
+    queue_logging = QueueLogging([handler], maxsize=3)  # listener not started
+    test_logger = make_logger("test_log_queue.full", queue_logging)
+
+    for i in range(10):
+        test_logger.info("message %d", i)
+
+    stats = queue_logging.get_stats()
+    assert stats["pending"] == 3 and stats["dropped_queue_full"] == 7
+    queue_logging.start()
+    queue_logging.stop()
+    assert handler.records == ["message 0", "message 1", "message 2"]
+
+
+def test_sampling_rate_limits_hot_call_sites_only():
+    sampling = SamplingFilter(debug_sample_rate=0.0, site_rate=2.0, site_burst=5, clock=lambda: 0.0)
+    handler = ListHandler()
+    queue_logging = QueueLogging([handler], sampling=sampling)
+    queue_logging.start()
+    test_logger = make_logger("test_log_queue.sampling", queue_logging)
+
+    for i in range(20):
+        test_logger.info("hot %d", i)
+    test_logger.info("other line")
+    test_logger.debug("sampled out")
+    test_logger.warning("always kept")
+    queue_logging.stop()
+
+    assert [r for r in handler.records if r.startswith("hot ")] == [f"hot {i}" for i in range(5)]
+    assert "other line" in handler.records and "always kept" in handler.records
+    assert "sampled out" not in handler.records
+    stats = queue_logging.get_stats()
+    assert stats["dropped_rate_limited"] == 15 and stats["dropped_sampled"] == 1
+
+
+def test_audit_and_security_loggers_are_never_sampled():
+    sampling = SamplingFilter(debug_sample_rate=0.0, site_rate=1.0, site_burst=1, clock=lambda: 0.0)
+    handler = ListHandler()
+    queue_logging = QueueLogging([handler], sampling=sampling)
+    queue_logging.start()
+    audit_logger = make_logger("audit", queue_logging)
+    security_logger = make_logger("security.auth", queue_logging)
+
+    for i in range(5):
+        audit_logger.info("audit %d", i)
+        security_logger.debug("login %d", i)
+    queue_logging.stop()
+
+    assert [r for r in handler.records if r.startswith("audit ")] == [f"audit {i}" for i in range(5)]
+    assert [r for r in handler.records if r.startswith("login ")] == [f"login {i}" for i in range(5)]
+    assert queue_logging.get_stats()["dropped_rate_limited"] == 0
+
+
+def test_message_is_rendered_before_queueing():
+    handler = ListHandler()
+    queue_logging = QueueLogging([handler])  # listener not started yet
+    test_logger = make_logger("test_log_queue.render", queue_logging)
+
+    state = {"step": 1}
+    test_logger.info("state %s", state)
+    state["step"] = 2
+    queue_logging.start()
+    queue_logging.stop()
+
+    assert handler.records == ["state {'step': 1}"]
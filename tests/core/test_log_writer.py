@@ -0,0 +1,101 @@
+"""Tests for the batched background log writer."""
+import threading
+
+from sqlalchemy import Column, Integer, String, create_engine, func, select
+from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.log_writer import BatchedLogWriter
+
+Base = declarative_base()
+
+
+class Event(Base):
+    __tablename__ = "writer_events"
+    id = Column(Integer, primary_key=True)
+    action = Column(String, nullable=False)
+
+
+class Note(Base):
+    __tablename__ = "writer_notes"
+    id = Column(Integer, primary_key=True)
+    text = Column(String, nullable=False)
+
+
+def make_session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+
+def count_rows(session_factory):
+    with session_factory() as db:
+        return db.execute(select(func.count()).select_from(Event)).scalar()
+
+
+def test_rows_are_written_in_batches_and_flushed_on_stop():
+    session_factory = make_session_factory()
+    writer = BatchedLogWriter(session_factory=session_factory, maxsize=1000, batch_size=50, flush_interval=0.05)
+
+    for i in range(120):
+        assert writer.submit(Event, {"action": f"event-{i}"})
+    writer.stop(timeout=5)
+
+    assert count_rows(session_factory) == 120
+    stats = writer.get_stats()
+    assert stats["written"] == 120 and stats["pending"] == 0
+    # 120 rows at 50 per batch need at least three INSERT rounds, far fewer than 120 commits
+    assert 3 <= stats["batches"] < 120
+
+
+def test_full_queue_drops_instead_of_blocking():
+    session_factory = make_session_factory()
+    release = threading.Event()
+
+    def slow_factory():
+        release.wait(5)
+        return session_factory()
+
+    writer = BatchedLogWriter(session_factory=slow_factory, maxsize=5, batch_size=1, flush_interval=0.01)
+    accepted = sum(writer.submit(Event, {"action": "x"}) for _ in range(50))
+    release.set()
+    writer.stop(timeout=5)
+
+    stats = writer.get_stats()
+    assert stats["dropped"] == 50 - accepted > 0
+    assert stats["high_watermark"] <= 5
+    assert count_rows(session_factory) == accepted
+
+
+def test_failed_batch_is_counted_and_worker_keeps_running():
+    session_factory = make_session_factory()
+    writer = BatchedLogWriter(session_factory=session_factory, batch_size=10, flush_interval=0.01)
+
+    writer.submit(Event, {"action": None})  # violates NOT NULL
+    writer.flush(timeout=5)
+    writer.submit(Event, {"action": "ok"})
+    writer.stop(timeout=5)
+
+    stats = writer.get_stats()
+    assert stats["failed"] == 1 and stats["written"] == 1
+    assert count_rows(session_factory) == 1
+
+
+def test_bad_row_only_costs_itself():
+    session_factory = make_session_factory()
+    writer = BatchedLogWriter(session_factory=session_factory, batch_size=10, flush_interval=0.2)
+
+    writer.submit(Event, {"action": "first"})
+    writer.submit(Event, {"action": None})  # violates NOT NULL
+    writer.submit(Event, {"action": "third"})
+    writer.submit(Note, {"text": "other table"})
+    writer.stop(timeout=5)
+
+    stats = writer.get_stats()
+    assert stats["failed"] == 1 and stats["written"] == 3
+    assert count_rows(session_factory) == 2
+    with session_factory() as db:
+        assert db.execute(select(func.count()).select_from(Note)).scalar() == 1
+
@@ -0,0 +1,122 @@
+"""
+Tests for the mergeable quantile sketches.
+"""
+
+import json
+import random
+
+import pytest
+
+from app.core.monitoring import PerformanceMonitor
+from app.core.quantile_sketch import QuantileSketch, WindowedSketch
+
+
+def exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def test_quantiles_within_relative_accuracy():
+    rng = random.Random(3)
+    values = [rng.lognormvariate(-3, 1.2) for _ in range(20000)]
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    for q in (0.0, 0.25, 0.5, 0.95, 0.99, 1.0):
+        expected = exact_quantile(values, q)
+        assert sketch.quantile(q) == pytest.approx(expected, rel=0.01)
+    assert sketch.count == len(values)
+    assert sketch.mean == pytest.approx(sum(values) / len(values))
+    assert len(sketch._positive) < 2048
+
+    mixed = QuantileSketch()
+    for value in (-5.0, -1.0, 0.0, 2.0, 8.0):
+        mixed.add(value)
+    assert mixed.quantile(0.0) == -5.0
+    assert mixed.quantile(0.5) == 0.0
+    assert mixed.quantile(1.0) == 8.0
+    assert QuantileSketch().quantile(0.5) is None
+
+
+def test_merge_across_workers_matches_single_sketch():
+    rng = random.Random(11)
+    values = [rng.expovariate(20) for _ in range(9000)]
+    combined = QuantileSketch()
+    workers = [QuantileSketch() for _ in range(3)]
+    for i, value in enumerate(values):
+        combined.add(value)
+        workers[i % 3].add(value)
+
+    merged = QuantileSketch()
+    for worker in workers:
+        # Round-trip through JSON as a worker would publish it
+        merged.merge(QuantileSketch.from_dict(json.loads(json.dumps(worker.to_dict()))))
+
+    assert merged.count == combined.count
+    for q in (0.5, 0.95, 0.99):
+        assert merged.quantile(q) == combined.quantile(q)
+
+    coarse = QuantileSketch(relative_accuracy=0.05)
+    coarse.add(1.0)
+    with pytest.raises(ValueError):
+        merged.merge(coarse)
+
+
+def test_windowed_sketch_covers_requested_intervals():
+    windowed = WindowedSketch(interval=60, retention=600)
+    for minute in range(20):
+        windowed.add(float(minute), timestamp=minute * 60 + 1)
+    # A late point lands in its own interval
+    windowed.add(100.0, timestamp=15 * 60 + 30)
+
+    # Only the last ten minutes are retained
+    assert windowed.merged().min == 10.0
+    recent = windowed.merged(start=15 * 60, end=16 * 60 + 30)
+    assert recent.count == 3
+    assert recent.max == 100.0
+
+    windowed.expire_before(19 * 60)
+    assert len(windowed) == 1
+
+
+class FakeAsyncRedis:
+    """Dict-backed stand-in for the redis.asyncio calls the sketch publisher uses."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def scan_iter(self, match):
+        prefix = match.rstrip("*")
+        for key in list(self.data):
+            if key.startswith(prefix):
+                yield key
+
+
+@pytest.mark.asyncio
+async def test_published_sketches_merge_across_workers():
+    redis = FakeAsyncRedis()
+    workers = [PerformanceMonitor() for _ in range(3)]
+    combined = QuantileSketch()
+    for i, worker in enumerate(workers):
+        worker.worker_id = f"host:{i}"
+        for value in range(1, 101):
+            worker.track_response_time("/api/v1/chat/message", value * (i + 1) / 1000)
+            combined.add(value * (i + 1) / 1000)
+        await worker.publish_sketches(redis)
+
+    # The asking worker counts its live sketch, not its stale published copy
+    workers[0].track_response_time("/api/v1/chat/message", 5.0)
+    combined.add(5.0)
+
+    cluster = await workers[0].get_cluster_latency_percentiles(redis)
+    assert cluster["count"] == 301
+    assert cluster["p99"] == combined.quantile(0.99)
+    assert workers[0].get_latency_percentiles()["count"] == 101
+
@@ -0,0 +1,114 @@
+"""Tests for the sliding-window rate limit engine and RateLimitMiddleware."""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.api.v1.middleware import rate_limit as api_rate_limit
+from app.core.middleware import RateLimitMiddleware
+from app.core.rate_limit import InMemoryRateLimitBackend, RateLimitEngine, set_rate_limit_engine
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_sliding_window_weights_previous_window():
+    clock = FakeClock(1000.0)
+    backend = InMemoryRateLimitBackend(clock=clock)
+
+    for _ in range(10):
+        assert backend.hit("client", limit=10, window=10).allowed
+    denied = backend.hit("client", limit=10, window=10)
+    assert not denied.allowed
+    assert denied.remaining == 0
+    assert 0 < denied.retry_after <= 10
+
+    # Half way through the next window, half of the previous window still counts
+    clock.now = 1015.0
+    allowed = [backend.hit("client", limit=10, window=10).allowed for _ in range(10)]
+    assert allowed.count(True) == 5
+
+    # Two windows later the key starts fresh and stale counters are pruned
+    clock.now = 1040.0
+    assert backend.prune() == 1
+    assert backend.hit("client", limit=10, window=10).remaining == 9
+
+
+def test_keys_are_limited_independently_under_concurrency():
+    backend = InMemoryRateLimitBackend(shards=4, clock=FakeClock())
+
+    def burst(key):
+        return sum(backend.hit(key, limit=50, window=60).allowed for _ in range(80))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        admitted = list(pool.map(burst, [f"client-{i}" for i in range(8)]))
+
+    assert admitted == [50] * 8
+    assert len(backend) == 8
+
+
+def test_middleware_enforces_limit():
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"ok": True}
+
+    engine = RateLimitEngine(InMemoryRateLimitBackend())
+    app.add_middleware(RateLimitMiddleware, limit=3, window=60, engine=engine)
+    client = TestClient(app)
+
+    responses = [client.get("/ping") for _ in range(4)]
+    assert [response.status_code for response in responses] == [200, 200, 200, 429]
+    assert responses[0].headers["X-RateLimit-Remaining"] == "2"
+    assert int(responses[-1].headers["Retry-After"]) >= 1
+
+    # Exempt paths are never limited
+    assert client.get("/health").status_code == 200
+
+
+def test_add_rate_limiting_uses_engine(monkeypatch):
+    """add_rate_limiting answers 429 from the shared engine."""
+    monkeypatch.setenv("TESTING", "false")
+    monkeypatch.setenv("TEST_MODE", "false")
+    monkeypatch.setattr(api_rate_limit, "RATE_LIMIT_REQUESTS", 3)
+    set_rate_limit_engine(RateLimitEngine(InMemoryRateLimitBackend()))
+
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    app.add_middleware(BaseHTTPMiddleware, dispatch=api_rate_limit.add_rate_limiting)
+    try:
+        client = TestClient(app)
+        responses = [client.get("/ping") for _ in range(4)]
+    finally:
+        set_rate_limit_engine(None)
+
+    assert [response.status_code for response in responses] == [200, 200, 200, 429]
+    assert responses[0].headers["X-RateLimit-Remaining"] == "2"
+    assert int(responses[-1].headers["Retry-After"]) >= 1
+
+
+@pytest.mark.asyncio
+async def test_engine_cost_zero_only_inspects():
+    engine = RateLimitEngine(InMemoryRateLimitBackend(clock=FakeClock()))
+    await engine.hit("key", limit=5, window=60)
+    peek = await engine.hit("key", limit=5, window=60, cost=0)
+    assert peek.allowed
+    assert peek.remaining == 4
+    assert (await engine.hit("key", limit=5, window=60, cost=0)).remaining == 4
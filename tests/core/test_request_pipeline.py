@@ -0,0 +1,118 @@
+"""App-level tests for the request pipeline registered by main.py."""
+import pytest
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.testclient import TestClient
+from jose import jwt
+
+from app.core.asgi_pipeline import PipelineMiddleware
+from app.core.auth import create_access_token
+from app.core.config import settings
+from app.core.rate_limit import InMemoryRateLimitBackend, RateLimitEngine, set_rate_limit_engine
+from app.core.response_cache import ResponseCacheMiddleware, ResponseCacheStore, set_response_cache
+from app.main import add_request_pipeline, app
+
+
+@pytest.fixture
+def live_pipeline(monkeypatch):
+    """Run the pipeline as in production: auth and rate limiting on, fresh limits."""
+    monkeypatch.setenv("TESTING", "false")
+    monkeypatch.setenv("TEST_MODE", "false")
+    set_rate_limit_engine(RateLimitEngine(InMemoryRateLimitBackend()))
+    yield
+    set_rate_limit_engine(None)
+
+
+@pytest.mark.parametrize("method, path", [
+    ("GET", "/"),
+    ("GET", "/login"),
+    ("POST", "/api/v1/auth/token"),
+    ("POST", "/api/v1/auth/teacher/login"),
+    ("POST", "/api/v1/chat/message"),
+    ("GET", "/api/v1/auth/microsoft/"),
+    ("GET", "/api/v1/beta/auth/microsoft/"),
+    ("GET", "/api/v1/text-to-speech/voices"),
+    ("POST", "/api/v1/speech-to-text"),
+    ("POST", "/api/v1/sms/opt-in"),
+])
+def test_public_routes_are_not_rejected_by_auth(live_pipeline, method, path):
+    response = TestClient(app).request(method, path, json={})
+    assert response.status_code != 401
+    assert response.headers["X-Request-ID"]
+
+
+def test_protected_routes_require_a_token(live_pipeline):
+    response = TestClient(app).get("/api/v1/access-control/access-control/permissions")
+    assert response.status_code == 401
+    assert response.headers["X-Request-ID"]
+
+
+def test_teacher_login_tokens_pass_pipeline_auth(live_pipeline):
+    protected = FastAPI()
+
+    @protected.get("/api/v1/access-control/ping")
+    async def ping():
+        return {"ok": True}
+
+    @protected.get("/api/v1/students")
+    async def students():
+        return []
+
+    add_request_pipeline(protected)
+    client = TestClient(protected)
+    # Same claims and signer as /api/v1/auth/teacher/login
+    token = create_access_token(data={"sub": "teacher-1", "email": "teacher@example.com", "type": "teacher"})
+
+    assert client.get("/api/v1/access-control/ping", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+    forged = jwt.encode({"sub": "teacher-1"}, "another-key", algorithm="HS256")
+    assert client.get("/api/v1/access-control/ping", headers={"Authorization": f"Bearer {forged}"}).status_code == 401
+    # Other routes are left to their own auth dependencies
+    assert client.get("/api/v1/students").status_code == 200
+
+
+def test_cors_wraps_the_pipeline_and_the_cache_sits_inside_it():
+    # user_middleware lists the outermost layer first
+    layers = [middleware.cls for middleware in app.user_middleware]
+    cors = [index for index, layer in enumerate(layers) if layer is CORSMiddleware]
+    assert cors and max(cors) < layers.index(PipelineMiddleware) < layers.index(ResponseCacheMiddleware)
+
+
+def test_rate_limit_applies_through_the_pipeline(live_pipeline, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_CALLS", 3)
+    limited = FastAPI()
+
+    @limited.get("/")
+    async def root():
+        return {"ok": True}
+
+    add_request_pipeline(limited)
+    client = TestClient(limited)
+
+    responses = [client.get("/") for _ in range(4)]
+    assert [response.status_code for response in responses] == [200, 200, 200, 429]
+    assert responses[0].headers["X-RateLimit-Remaining"] == "2"
+    assert int(responses[-1].headers["Retry-After"]) >= 1
+
+
+def test_cache_hits_still_pass_through_the_pipeline(live_pipeline, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_CALLS", 3)
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_RULES", {"/reports": {"ttl": 60, "per_principal": False}})
+    reports = FastAPI()
+
+    @reports.get("/reports/summary")
+    async def summary():
+        return {"classes": 4}
+
+    add_request_pipeline(reports)
+    set_response_cache(ResponseCacheStore())
+    try:
+        client = TestClient(reports)
+        responses = [client.get("/reports/summary") for _ in range(4)]
+    finally:
+        set_response_cache(None)
+
+    assert [response.status_code for response in responses] == [200, 200, 200, 429]
+    assert [response.headers["X-Cache"] for response in responses[:3]] == ["MISS", "HIT", "HIT"]
+    # Hits carry this request's id and counters, not the first caller's
+    assert [response.headers["X-RateLimit-Remaining"] for response in responses[:3]] == ["2", "1", "0"]
+    assert len({response.headers["X-Request-ID"] for response in responses}) == 4
@@ -0,0 +1,188 @@
+"""Tests for the ETag-aware HTTP response cache."""
+import pytest
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.response_cache import (
+    CachedResponse,
+    CacheRule,
+    ResponseCacheMiddleware,
+    ResponseCacheStore,
+    etag_matches,
+    invalidate_on_write,
+    set_response_cache
+)
+
+
+@pytest.fixture
+def cached_app():
+    app = FastAPI()
+    calls = {"summary": 0, "stream": 0}
+
+    @app.get("/api/v1/dashboard/summary")
+    async def summary():
+        calls["summary"] += 1
+        return {"widgets": ["progress", "attendance"]}
+
+    @app.post("/api/v1/dashboard/widgets")
+    async def add_widget():
+        return {"ok": True}
+
+    @app.get("/api/v1/dashboard/stream")
+    async def stream():
+        calls["stream"] += 1
+
+        async def chunks():
+            yield b"data: 1\n\n"
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    store = ResponseCacheStore(max_bytes=64 * 1024)
+    app.add_middleware(
+        ResponseCacheMiddleware,
+        rules=[CacheRule("/api/v1/dashboard", ttl=60, tags=("dashboard",))],
+        store=store,
+        session_cookie="session"
+    )
+    set_response_cache(None)
+    yield TestClient(app), calls, store
+    set_response_cache(None)
+
+
+def test_repeat_requests_are_served_from_cache_and_revalidated(cached_app):
+    client, calls, store = cached_app
+    headers = {"Authorization": "Bearer teacher-1"}
+
+    first = client.get("/api/v1/dashboard/summary", headers=headers)
+    assert first.status_code == 200 and first.headers["X-Cache"] == "MISS"
+    etag = first.headers["ETag"]
+    assert etag.startswith('"') and "private" in first.headers["Cache-Control"]
+
+    second = client.get("/api/v1/dashboard/summary", headers=headers)
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json() == first.json() and second.headers["ETag"] == etag
+
+    not_modified = client.get("/api/v1/dashboard/summary", headers={**headers, "If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b"" and not_modified.headers["ETag"] == etag
+    assert calls["summary"] == 1
+    assert store.stats["not_modified"] == 1
+
+
+def test_keys_vary_by_principal(cached_app):
+    client, calls, _ = cached_app
+    client.get("/api/v1/dashboard/summary", headers={"Authorization": "Bearer teacher-1"})
+    other = client.get("/api/v1/dashboard/summary", headers={"Authorization": "Bearer teacher-2"})
+    assert other.headers["X-Cache"] == "MISS"
+
+    client.cookies.set("session", "abc")
+    assert client.get("/api/v1/dashboard/summary").headers["X-Cache"] == "MISS"
+    assert client.get("/api/v1/dashboard/summary").headers["X-Cache"] == "HIT"
+    assert calls["summary"] == 3
+
+
+def test_writes_purge_tagged_entries(cached_app):
+    client, calls, _ = cached_app
+    headers = {"Authorization": "Bearer teacher-1"}
+    client.get("/api/v1/dashboard/summary", headers=headers)
+
+    assert client.post("/api/v1/dashboard/widgets", headers=headers).status_code == 200
+    assert client.get("/api/v1/dashboard/summary", headers=headers).headers["X-Cache"] == "MISS"
+    assert calls["summary"] == 2
+
+
+def test_writes_outside_the_prefix_purge_through_the_dependency():
+    router = APIRouter()
+    calls = {"list": 0}
+
+    @router.get("/notifications")
+    async def list_notifications():
+        calls["list"] += 1
+        return {"unread": 3}
+
+    @router.post("/notifications")
+    async def mark_read(fail: bool = False):
+        if fail:
+            raise HTTPException(status_code=400, detail="bad request")
+        return {"unread": 0}
+
+    app = FastAPI()
+    # The same router is served under the cached prefix and outside it
+    app.include_router(router, prefix="/api/v1/dashboard")
+    app.include_router(router, prefix="/api/v1", dependencies=[Depends(invalidate_on_write("dashboard"))])
+    store = ResponseCacheStore(max_bytes=64 * 1024)
+    app.add_middleware(
+        ResponseCacheMiddleware,
+        rules=[CacheRule("/api/v1/dashboard", ttl=60, tags=("dashboard",))],
+        store=store
+    )
+    set_response_cache(store)
+    try:
+        client = TestClient(app)
+        client.get("/api/v1/dashboard/notifications")
+        assert client.get("/api/v1/dashboard/notifications").headers["X-Cache"] == "HIT"
+
+        # A failed write leaves the entry alone
+        assert client.post("/api/v1/notifications?fail=true").status_code == 400
+        assert client.get("/api/v1/dashboard/notifications").headers["X-Cache"] == "HIT"
+
+        assert client.post("/api/v1/notifications").status_code == 200
+        assert client.get("/api/v1/dashboard/notifications").headers["X-Cache"] == "MISS"
+        assert calls["list"] == 2
+    finally:
+        set_response_cache(None)
+
+
+def test_per_request_headers_are_not_replayed():
+    app = FastAPI()
+
+    @app.get("/api/v1/dashboard/summary")
+    async def summary(response: Response):
+        response.headers["X-Request-ID"] = "first-caller"
+        response.headers["X-Dashboard-Version"] = "2"
+        return {"widgets": []}
+
+    app.add_middleware(
+        ResponseCacheMiddleware,
+        rules=[CacheRule("/api/v1/dashboard", ttl=60)],
+        store=ResponseCacheStore(max_bytes=64 * 1024)
+    )
+    client = TestClient(app)
+    client.get("/api/v1/dashboard/summary")
+    hit = client.get("/api/v1/dashboard/summary")
+    assert hit.headers["X-Cache"] == "HIT"
+    assert hit.headers["X-Dashboard-Version"] == "2"
+    assert "X-Request-ID" not in hit.headers
+
+
+def test_streaming_responses_are_not_cached(cached_app):
+    client, calls, store = cached_app
+    for _ in range(2):
+        response = client.get("/api/v1/dashboard/stream")
+        assert response.text == "data: 1\n\n" and "X-Cache" not in response.headers
+    assert calls["stream"] == 2 and len(store) == 0
+
+
+@pytest.mark.asyncio
+async def test_store_is_byte_bounded_and_tags_version_keys():
+    store = ResponseCacheStore(max_bytes=1000, max_entry_bytes=600)
+    for i in range(5):
+        await store.set(f"k{i}", CachedResponse(200, [], b"x" * 300, f'"{i}"'), ttl=60)
+    assert store.size_bytes <= 1000 and len(store) == 3
+    assert await store.get("k0", ttl=60) is None
+    assert (await store.get("k4", ttl=60)).etag == '"4"'
+
+    # Oversized entries are skipped rather than evicting everything else
+    await store.set("big", CachedResponse(200, [], b"x" * 700, '"big"'), ttl=60)
+    assert await store.get("big", ttl=60) is None and len(store) == 3
+
+    assert await store.tag_versions(("dashboard",)) == (0,)
+    await store.invalidate_tags("dashboard")
+    assert await store.tag_versions(("dashboard", "curriculum")) == (1, 0)
+
+
+def test_etag_matching_uses_weak_comparison():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
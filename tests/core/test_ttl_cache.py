@@ -0,0 +1,86 @@
+"""Tests for the bounded TTL cache and the prompt cache built on it."""
+import time
+
+from app.core import prompt_cache
+from app.core.ttl_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction_and_stats():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.get("b") is None
+
+    stats = cache.get_stats()
+    assert stats["size"] == 2
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+
+
+def test_ttl_uses_clock_and_expire_sweeps():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+    cache.set("short", 1, ttl=1)
+    cache.set("default", 2)
+
+    clock.now = 2
+    assert cache.get("short") is None
+    assert cache.get("default") == 2
+
+    clock.now = 6
+    assert cache.expire() == 1
+    assert len(cache) == 0
+    assert cache.get_stats()["expirations"] == 2
+
+
+def test_full_cache_drops_expired_entries_before_live_ones():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.set("old", 1, ttl=1)
+    cache.set("live", 2)
+    clock.now = 5
+    cache.set("new", 3)
+
+    assert cache.get("live") == 2
+    assert cache.get("new") == 3
+    assert cache.get_stats()["evictions"] == 0
+
+
+def test_background_sweeper_removes_expired_entries():
+    cache = TTLCache(maxsize=10, ttl=0.01, sweep_interval=0.01)
+    try:
+        cache.set("key", "value")
+        deadline = time.monotonic() + 2
+        while len(cache) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(cache) == 0
+    finally:
+        cache.stop_sweeper()
+
+
+def test_prompt_cache_reports_store_stats():
+    prompt_cache.clear_cache()
+    prompt_cache.cache_intent("make me a meal plan:False", "meal_plan")
+    assert prompt_cache.get_cached_intent("make me a meal plan:False") == "meal_plan"
+    assert prompt_cache.get_cached_intent("something else:False") is None
+
+    stats = prompt_cache.get_cache_stats()
+    assert stats["intent_cache_size"] == 1
+    assert stats["intent_cache"]["maxsize"] == prompt_cache.INTENT_CACHE_MAX_ENTRIES
+    assert stats["intent_cache"]["hits"] >= 1
+    assert stats["intent_cache"]["misses"] >= 1
@@ -0,0 +1,188 @@
+"""Tests for the synthesized-audio cache against a local fake Azure TTS server."""
+import asyncio
+import os
+from pathlib import Path
+
+import pytest
+
+from app.services.azure.azure_tts_service import AzureTTSService
+from app.services.azure.tts_audio_cache import TTSAudioCache, synthesize_speech_cached
+
+
+class FakeTTSServer:
+    """Minimal keep-alive HTTP server speaking the Azure token and synthesis endpoints."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.token_requests = 0
+        self.synthesis_requests = 0
+        self.reject_next_token = False
+        self.tokens = []
+        self.server = None
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode().split("\r\n")
+                path = lines[0].split(" ")[1]
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                if path.endswith("/issueToken"):
+                    self.token_requests += 1
+                    token = f"token-{self.token_requests}"
+                    self.tokens.append(token)
+                    status, payload = "200 OK", token.encode()
+                elif headers.get("authorization") != f"Bearer {self.tokens[-1]}" or self.reject_next_token:
+                    self.reject_next_token = False
+                    status, payload = "401 Unauthorized", b""
+                else:
+                    self.synthesis_requests += 1
+                    await asyncio.sleep(self.delay)
+                    status, payload = "200 OK", b"ID3" + body
+
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Length: {len(payload)}\r\n\r\n".encode() + payload
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def service(self) -> AzureTTSService:
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return AzureTTSService(
+            speech_key="test-key",
+            speech_region="local",
+            token_url=f"http://{host}:{port}/sts/v1.0/issueToken",
+            tts_url=f"http://{host}:{port}/cognitiveservices/v1"
+        )
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_synthesize_once(tmp_path):
+    cache = TTSAudioCache(str(tmp_path), max_bytes=1024 * 1024)
+    async with FakeTTSServer(delay=0.05) as fake:
+        service = fake.service()
+        files = await asyncio.gather(*[
+            synthesize_speech_cached(service, "Stretch before running.", language="en-US", cache=cache)
+            for _ in range(5)
+        ])
+        # Same audio whether the voice is named or implied by the language
+        files.append(await synthesize_speech_cached(
+            service, "Stretch before running.", voice_name="en-US-JennyNeural", rate=1.0, cache=cache
+        ))
+        await service.aclose()
+
+    # Every caller gets its own open handle on the one cached file
+    assert len({Path(f.name) for f in files}) == 1 and len({id(f) for f in files}) == 6
+    bodies = set()
+    for f in files:
+        with f:
+            bodies.add(f.read())
+    [body] = bodies
+    assert body.startswith(b"ID3") and b"Stretch before running." in body
+    assert fake.synthesis_requests == 1 and fake.token_requests == 1
+    stats = cache.get_stats()
+    assert stats["misses"] == 1 and stats["coalesced"] == 4 and stats["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_token_is_reused_until_rejected(tmp_path):
+    cache = TTSAudioCache(str(tmp_path))
+    async with FakeTTSServer() as fake:
+        service = fake.service()
+        for text in ("one", "two"):
+            audio = await synthesize_speech_cached(service, text, cache=cache)
+            assert audio is not None
+            audio.close()
+        assert fake.token_requests == 1
+
+        fake.reject_next_token = True
+        audio = await synthesize_speech_cached(service, "three", cache=cache)
+        assert audio is not None
+        audio.close()
+        await service.aclose()
+
+    assert fake.token_requests == 2 and fake.synthesis_requests == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_synthesis_is_not_cached(tmp_path):
+    cache = TTSAudioCache(str(tmp_path))
+    service = AzureTTSService(
+        speech_key="test-key",
+        speech_region="local",
+        token_url="http://127.0.0.1:9/sts/v1.0/issueToken",
+        tts_url="http://127.0.0.1:9/cognitiveservices/v1"
+    )
+    assert await synthesize_speech_cached(service, "unreachable", cache=cache) is None
+    await service.aclose()
+    assert len(cache) == 0 and cache.get_stats()["failures"] == 1
+
+
+def test_lru_eviction_and_index_rebuild(tmp_path):
+    cache = TTSAudioCache(str(tmp_path), max_bytes=250)
+    for i, key in enumerate(("aa01", "bb02", "cc03")):
+        cache.put(key, b"x" * 100)
+        os.utime(cache.path_for(key), (i, i))
+    assert cache.get("aa01") is None and not cache.path_for("aa01").exists()
+
+    os.utime(cache.path_for("bb02"), (10, 10))  # most recently used on disk
+    assert cache.size_bytes == 200 and cache.get_stats()["evictions"] == 1
+
+    restarted = TTSAudioCache(str(tmp_path), max_bytes=250)
+    restarted.put("dd04", b"x" * 100)
+    assert restarted.get("cc03") is None
+    with restarted.get("bb02") as audio:
+        assert audio.read() == b"x" * 100
+    assert restarted.size_bytes == 200
+
+
+def test_budget_covers_every_worker_sharing_the_directory(tmp_path):
+    worker_a = TTSAudioCache(str(tmp_path), max_bytes=250)
+    worker_b = TTSAudioCache(str(tmp_path), max_bytes=250)
+    worker_a.put("aa01", b"x" * 100)
+    os.utime(worker_a.path_for("aa01"), (1, 1))
+    worker_a.put("bb02", b"x" * 100)
+    os.utime(worker_a.path_for("bb02"), (2, 2))
+
+    # Worker B has never seen A's files, but its write still evicts the oldest
+    worker_b.put("cc03", b"x" * 100)
+    assert not worker_b.path_for("aa01").exists()
+    assert sum(path.stat().st_size for path in tmp_path.glob("*/*.mp3")) == 200
+
+    # A file another worker wrote is a hit; one that vanished is a miss
+    with worker_a.get("cc03") as audio:
+        assert audio.read() == b"x" * 100
+    assert worker_a.get("aa01") is None
+    worker_a.path_for("bb02").unlink()
+    assert worker_a.get("bb02") is None and "bb02" not in worker_a._index
+
+
+def test_open_file_survives_eviction_by_another_worker(tmp_path):
+    worker_a = TTSAudioCache(str(tmp_path), max_bytes=150)
+    worker_b = TTSAudioCache(str(tmp_path), max_bytes=150)
+    worker_a.put("aa01", b"a" * 100)
+    os.utime(worker_a.path_for("aa01"), (1, 1))
+
+    audio = worker_a.get("aa01")
+    os.utime(worker_a.path_for("aa01"), (1, 1))
+    worker_b.put("bb02", b"b" * 100)
+    assert not worker_a.path_for("aa01").exists()
+    with audio:
+        assert audio.read() == b"a" * 100
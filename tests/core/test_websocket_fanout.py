@@ -0,0 +1,129 @@
+"""Tests and fan-out benchmark for per-connection WebSocket send queues."""
+import asyncio
+import json
+import statistics
+import time
+
+import pytest
+
+from app.core.websocket_fanout import FanoutHub, SlowConsumerPolicy
+
+
+class FakeWebSocket:
+    """Records sent frames; ``delay`` simulates a slow network peer."""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.sent = []
+        self.closed = False
+
+    async def send_text(self, text):
+        if self.fail:
+            raise RuntimeError("connection reset")
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(text)
+
+    async def send_json(self, data):
+        await self.send_text(json.dumps(data))
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_broadcast_serializes_once_and_targets_groups():
+    hub = FanoutHub()
+    sockets = {user: FakeWebSocket() for user in ("a", "b", "c")}
+    for user, websocket in sockets.items():
+        hub.register(websocket, user)
+
+    assert hub.broadcast({"type": "update", "n": 1}, groups={"a", "b"}) == 2
+    assert hub.broadcast({"type": "all"}, exclude="a") == 2
+    await hub.drain()
+
+    assert sockets["a"].sent == ['{"type":"update","n":1}']
+    assert sockets["b"].sent == ['{"type":"update","n":1}', '{"type":"all"}']
+    assert sockets["c"].sent == ['{"type":"all"}']
+    # Every connection got the very same string object
+    assert sockets["a"].sent[0] is sockets["b"].sent[0]
+    await hub.close()
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_policies():
+    closed = []
+
+    async def on_disconnect(websocket, group):
+        closed.append(group)
+
+    hub = FanoutHub(max_queue=2, policy=SlowConsumerPolicy.DROP_OLDEST)
+    stalled = FakeWebSocket(delay=10)
+    hub.register(stalled, "slow")
+    for i in range(5):
+        hub.broadcast({"n": i})
+    assert hub.get_stats()["dropped"] > 0
+    await hub.close()
+
+    hub = FanoutHub(max_queue=2, policy=SlowConsumerPolicy.DISCONNECT, on_disconnect=on_disconnect)
+    stalled = FakeWebSocket(delay=10)
+    hub.register(stalled, "slow")
+    for i in range(5):
+        hub.broadcast({"n": i})
+    await asyncio.sleep(0)
+    assert stalled.closed
+    assert closed == ["slow"]
+    assert hub.connection_count() == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_send_removes_connection_without_blocking_others():
+    hub = FanoutHub()
+    healthy, broken = FakeWebSocket(), FakeWebSocket(fail=True)
+    hub.register(healthy, "ok")
+    hub.register(broken, "broken")
+
+    hub.broadcast({"type": "ping"})
+    await hub.drain()
+    await asyncio.sleep(0)
+
+    assert healthy.sent == ['{"type":"ping"}']
+    assert hub.connection_count() == 1
+    await hub.close()
+
+
+@pytest.mark.benchmark
+class TestFanoutPerformance:
+    """Fan-out latency for 1k clients, against sequential send_json."""
+
+    CLIENTS = 1000
+    NETWORK_DELAY = 0.001
+
+    @pytest.mark.asyncio
+    async def test_fanout_latency_1k_clients(self):
+        message = {"type": "document_updated", "content": "x" * 2048, "user_id": "u1"}
+        sockets = [FakeWebSocket(delay=self.NETWORK_DELAY) for _ in range(self.CLIENTS)]
+
+        # Baseline: one awaited send_json per connection
+        start = time.perf_counter()
+        for websocket in sockets[:100]:
+            await websocket.send_json(message)
+        sequential = (time.perf_counter() - start) * self.CLIENTS / 100
+
+        hub = FanoutHub(max_queue=64)
+        for i, websocket in enumerate(sockets):
+            hub.register(websocket, f"user-{i}")
+
+        latencies = []
+        for _ in range(5):
+            start = time.perf_counter()
+            assert hub.broadcast(message) == self.CLIENTS
+            await hub.drain()
+            latencies.append(time.perf_counter() - start)
+        await hub.close()
+
+        median = statistics.median(latencies)
+        print(f"\nfan-out to {self.CLIENTS} clients: {median * 1000:.1f} ms "
+              f"(sequential estimate {sequential * 1000:.1f} ms)")
+        assert median < sequential / 5
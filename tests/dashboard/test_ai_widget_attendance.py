@@ -0,0 +1,80 @@
+"""
+Tests for AIWidgetService attendance analytics built on aggregated counts.
+"""
+
+from datetime import date, timedelta
+from unittest.mock import Mock
+
+import pytest
+
+from app.dashboard.services.ai_widget_service import AIWidgetService
+
+
+def naive_counts(records):
+    """Per-record reference: (student_id, date, status) tuples grouped like the SQL query."""
+    today = date.today()
+    grouped = {}
+    for student_id, record_date, status in records:
+        if record_date >= today - timedelta(days=7):
+            window = "recent"
+        elif record_date >= today - timedelta(days=14):
+            window = "previous"
+        else:
+            window = "older"
+        key = (student_id, record_date.weekday(), window)
+        total, present = grouped.get(key, (0, 0))
+        grouped[key] = (total + 1, present + (status.lower() == "present"))
+    return [key + value for key, value in grouped.items()]
+
+
+@pytest.fixture
+def records():
+    today = date.today()
+    rows = []
+    for offset in range(30):
+        day = today - timedelta(days=offset)
+        rows.append((1, day, "present"))
+        # Student 2 attended early on and has missed the last week
+        rows.append((2, day, "absent" if offset < 7 or offset % 3 == 0 else "PRESENT"))
+    return rows
+
+
+@pytest.fixture
+def service():
+    db = Mock()
+    db.execute.return_value.fetchall.return_value = [(2, "Sam", "Lee")]
+    return AIWidgetService(db)
+
+
+def test_patterns_and_predictions_from_counts(service, records):
+    counts = AIWidgetService._aggregate_attendance_counts(naive_counts(records))
+
+    patterns = service._analyze_attendance_patterns(counts)
+    present = sum(1 for _, _, status in records if status.lower() == "present")
+    assert patterns["total_records"] == len(records)
+    assert patterns["average_attendance_rate"] == round(present / len(records) * 100, 2)
+    assert sum(day["total"] for day in patterns["day_of_week_patterns"].values()) == len(records)
+    assert patterns["trend"] == "declining"
+
+    predictions = service._predict_future_attendance(counts, days_ahead=7)
+    assert len(predictions) == 7
+    assert {p["day_of_week"] for p in predictions} == set(range(7))
+
+
+def test_at_risk_students_use_one_name_query(service, records):
+    counts = AIWidgetService._aggregate_attendance_counts(naive_counts(records))
+
+    at_risk = service._identify_at_risk_students(10, counts, [1, 2])
+
+    assert [student["student_id"] for student in at_risk] == [2]
+    assert at_risk[0]["student_name"] == "Sam Lee"
+    assert at_risk[0]["recent_rate"] < at_risk[0]["attendance_rate"]
+    assert service.db.execute.call_count == 1
+
+
+def test_empty_counts():
+    service = AIWidgetService(Mock())
+    counts = AIWidgetService._aggregate_attendance_counts([])
+    assert service._analyze_attendance_patterns(counts)["trend"] == "insufficient_data"
+    assert service._predict_future_attendance(counts) == []
+    assert service._identify_at_risk_students(10, counts, [1]) == []
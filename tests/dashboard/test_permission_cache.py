@@ -0,0 +1,63 @@
+"""
+Tests for compiled per-user permissions in AccessControlService.
+"""
+
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app.dashboard.models.access_control import ActionType, ResourceType
+from app.dashboard.services.access_control_service import AccessControlService
+from app.dashboard.services.permission_cache import CompiledPermissions, PermissionCache
+
+
+def compiled(decisions, role_ids=(), permission_ids=()):
+    return CompiledPermissions(decisions, frozenset(role_ids), frozenset(permission_ids))
+
+
+@pytest.fixture
+def cache():
+    return PermissionCache(maxsize=100, ttl=300)
+
+
+@pytest.fixture
+def service(cache):
+    return AccessControlService(Mock(), permission_cache=cache)
+
+
+@pytest.mark.asyncio
+async def test_checks_compile_once_per_user(service):
+    resource, action = ResourceType.TOOL, ActionType.EXECUTE
+    result = (compiled({(resource.value, action.value): True}, role_ids={1}), None)
+    with patch.object(service, "_compile_permissions", return_value=result) as compile_permissions:
+        for _ in range(100):
+            assert await service.check_permission(7, resource, action) is True
+        assert await service.check_permission("7", resource.value, action.value) is True
+        assert await service.check_permission(8, resource, action) is True
+
+    assert compile_permissions.call_count == 2
+    service.db.query.assert_not_called()
+
+
+def test_invalidation_is_scoped(cache):
+    cache.put(1, compiled({}, role_ids={10, 11}, permission_ids={100}))
+    cache.put(2, compiled({}, role_ids={20}, permission_ids={200}))
+    cache.put(3, compiled({}, role_ids={11}, permission_ids={300}))
+
+    assert cache.invalidate_role(11) == 2
+    assert cache.get(1) is None and cache.get(3) is None
+    assert cache.get(2) is not None
+
+    assert cache.invalidate_permission(200) == 1
+    assert cache.get(2) is None
+
+
+def test_override_expiry_bounds_entry_lifetime():
+    clock = Mock(return_value=0.0)
+    cache = PermissionCache(ttl=300, clock=clock)
+
+    cache.put("user", compiled({("tool", "execute"): True}), expires_in=30)
+    clock.return_value = 29.0
+    assert cache.get("user") is not None
+    clock.return_value = 31.0
+    assert cache.get("user") is None
@@ -0,0 +1,72 @@
+"""
+Tests for the ring-buffer time-series store behind the dashboard MonitoringService.
+"""
+
+import statistics
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.dashboard.services.timeseries_store import RingBufferSeries, TimeSeriesStore
+
+
+BASE = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def at(seconds):
+    return BASE + timedelta(seconds=seconds)
+
+
+def test_ring_buffer_wraps_and_keeps_rolling_stats():
+    series = RingBufferSeries(capacity=5)
+    for i in range(12):
+        series.append(float(i), float(i * 10), item=i)
+
+    assert len(series) == 5
+    assert series.items() == [7, 8, 9, 10, 11]
+    assert series.values().tolist() == [70.0, 80.0, 90.0, 100.0, 110.0]
+
+    stats = series.rolling_stats()
+    assert stats["mean"] == pytest.approx(90.0)
+    assert stats["stddev"] == pytest.approx(statistics.stdev([70, 80, 90, 100, 110]))
+
+    # Binary search across the wrapped segments
+    lo, hi = series.bounds(8.0, 10.0)
+    assert series.items(lo, hi) == [8, 9, 10]
+
+    # Out-of-order points are inserted in timestamp order
+    series.append(8.5, 85.0, item="late")
+    assert series.items() == [8, "late", 9, 10, 11]
+    assert series.rolling_stats()["sum"] == pytest.approx(80 + 85 + 90 + 100 + 110)
+
+    assert series.expire_before(9.0) == 3
+    assert series.items() == [10, 11]
+
+
+def test_store_queries_match_linear_filtering():
+    store = TimeSeriesStore(capacity=100)
+    records = []
+    for i in range(300):
+        name = ("latency", "errors", "cpu")[i % 3]
+        record = {"name": name, "timestamp": at(i), "value": float(i % 17)}
+        store.append("performance", name, record["timestamp"], record["value"], record)
+        records.append(record)
+
+    start, end = at(150), at(260)
+    expected = [
+        r for r in records
+        if r["name"] == "latency" and start <= r["timestamp"] <= end
+    ]
+    timestamps, values, items = store.window("performance", "latency", start, end)
+    assert items == expected
+    assert values.tolist() == [r["value"] for r in expected]
+    assert np.all(np.diff(timestamps) > 0)
+
+    # Queries across names come back merged in timestamp order
+    merged = store.query("performance", start=start, end=end)["performance"]
+    assert [r["timestamp"] for r in merged] == sorted(r["timestamp"] for r in merged)
+    assert len(merged) == 111
+
+    assert store.expire_before(at(250)) > 0
+    assert all(r["timestamp"] > at(250) for r in store.iter_items())
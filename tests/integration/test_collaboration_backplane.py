@@ -0,0 +1,134 @@
+"""
+Tests for routing collaboration sessions across workers through the backplane.
+
+Two RealtimeCollaborationService instances sharing one InMemoryBackplane stand
+in for two gunicorn workers.
+"""
+
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.collaboration.backplane import InMemoryBackplane
+from app.services.collaboration.realtime_collaboration_service import RealtimeCollaborationService
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def workers():
+    backplane = InMemoryBackplane()
+    return RealtimeCollaborationService(backplane), RealtimeCollaborationService(backplane)
+
+
+async def settle(*services):
+    for service in services:
+        await service.fanout.drain()
+    await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_broadcasts_reach_participants_on_other_workers(workers):
+    worker_a, worker_b = workers
+    socket_a, socket_b = FakeWebSocket(), FakeWebSocket()
+    await worker_a.register_websocket("teacher_a", socket_a)
+    await worker_b.register_websocket("teacher_b", socket_b)
+
+    await worker_a.create_session("session-1", "teacher_a")
+    await worker_a.join_session("session-1", "teacher_a")
+    # Worker B never saw the session created; it loads it from the backplane
+    await worker_b.join_session("session-1", "teacher_b")
+
+    await worker_a._broadcast_session_update("session-1", {"type": "document_updated", "user_id": "teacher_a"})
+    await settle(worker_a, worker_b)
+
+    assert {"type": "document_updated", "user_id": "teacher_a"} in socket_b.sent
+    assert socket_a.sent.count({"type": "document_updated", "user_id": "teacher_a"}) == 1
+    # Worker A learned about teacher_b joining on worker B
+    assert "teacher_b" in worker_a.active_sessions["session-1"]["participants"]
+
+
+@pytest.mark.asyncio
+async def test_locks_are_shared_between_workers(workers):
+    worker_a, worker_b = workers
+    await worker_a.create_session("session-1", "teacher_a")
+    await worker_a.join_session("session-1", "teacher_a")
+    await worker_b.join_session("session-1", "teacher_b")
+
+    await worker_a.lock_document("session-1", "teacher_a", "doc-1")
+    assert worker_b.document_locks["session-1"]["doc-1"] == "teacher_a"
+
+    with pytest.raises(HTTPException):
+        await worker_b.lock_document("session-1", "teacher_b", "doc-1")
+
+    # Leaving on worker A releases the lock everywhere
+    await worker_a.leave_session("session-1", "teacher_a")
+    assert "doc-1" not in worker_b.document_locks["session-1"]
+    await worker_b.lock_document("session-1", "teacher_b", "doc-1")
+    assert await worker_a.backplane.get_lock("session-1", "doc-1") == "teacher_b"
+
+
+@pytest.mark.asyncio
+async def test_session_ids_are_unique_across_workers(workers):
+    worker_a, worker_b = workers
+    await worker_a.create_session("session-1", "teacher_a")
+    with pytest.raises(HTTPException):
+        await worker_b.create_session("session-1", "teacher_b")
+
+
+@pytest.mark.asyncio
+async def test_session_survives_until_last_participant_on_any_worker_leaves(workers):
+    worker_a, worker_b = workers
+    await worker_a.create_session("session-1", "teacher_a")
+    await worker_a.join_session("session-1", "teacher_a")
+    await worker_a.lock_document("session-1", "teacher_a", "doc-1")
+    await worker_b.join_session("session-1", "teacher_b")
+    assert worker_b.active_sessions["session-1"]["participants"] == {"teacher_a", "teacher_b"}
+
+    # teacher_b is the only participant worker B knows locally, but teacher_a is still in
+    await worker_b.leave_session("session-1", "teacher_b")
+    assert await worker_a.backplane.load_session("session-1") is not None
+    assert await worker_a.backplane.get_lock("session-1", "doc-1") == "teacher_a"
+
+    await worker_a.leave_session("session-1", "teacher_a")
+    assert await worker_a.backplane.load_session("session-1") is None
+
+
+@pytest.mark.asyncio
+async def test_documents_are_co_edited_across_workers(workers):
+    worker_a, worker_b = workers
+    await worker_a.create_session("session-1", "teacher_a")
+    await worker_a.join_session("session-1", "teacher_a")
+    await worker_b.join_session("session-1", "teacher_b")
+    await worker_a.share_document("session-1", "teacher_a", "doc-1", "Warm up.")
+
+    # Worker B never saw the document shared; it loads it from the backplane
+    await worker_b.lock_document("session-1", "teacher_b", "doc-1")
+    document = await worker_b.edit_document("session-1", "teacher_b", "doc-1", delta=[8, " Then run."], base_version=1)
+    assert document["content"] == "Warm up. Then run."
+    await worker_b.unlock_document("session-1", "teacher_b", "doc-1")
+
+    # Worker A catches up on the version recorded by worker B before editing
+    await worker_a.lock_document("session-1", "teacher_a", "doc-1")
+    document = await worker_a.edit_document("session-1", "teacher_a", "doc-1", delta=[18, " Stretch."], base_version=2)
+    assert document["content"] == "Warm up. Then run. Stretch."
+    assert document["version"] == 3
+    assert (await worker_b.get_document_version("session-1", "doc-1", 3))["content"] == document["content"]
+    assert [entry["user_id"] for entry in await worker_b.get_document_history("session-1", "doc-1")] == [
+        "teacher_a", "teacher_b", "teacher_a"
+    ]
+
+    await worker_b.delete_document("session-1", "teacher_a", "doc-1")
+    with pytest.raises(HTTPException):
+        await worker_a.get_document("session-1", "doc-1")
@@ -0,0 +1,86 @@
+"""
+Tests for delta-encoded collaborative document history.
+"""
+
+import random
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.collaboration.backplane import InMemoryBackplane
+from app.services.collaboration.document_history import (
+    DocumentHistory,
+    apply_delta,
+    compute_delta
+)
+from app.services.collaboration.realtime_collaboration_service import RealtimeCollaborationService
+
+
+def test_delta_round_trip():
+    old = "Warm-up: jog 5 minutes. Main: relay races."
+    new = "Warm-up: jog 10 minutes. Main: relay races and cool-down."
+    delta = compute_delta(old, new)
+    assert apply_delta(old, delta) == new
+    assert compute_delta(old, old) == [len(old)]
+    assert apply_delta("abc", []) == "abc"
+
+    with pytest.raises(ValueError):
+        apply_delta("abc", [2, -5])
+
+
+def test_history_reconstructs_every_version_from_snapshots_and_deltas():
+    rng = random.Random(7)
+    content = "Lesson plan\n" + "x" * 2000
+    history = DocumentHistory(content, "teacher", snapshot_interval=10)
+    versions = [content]
+    for i in range(45):
+        position = rng.randrange(len(content))
+        content = content[:position] + f"edit {i} " + content[position + 3:]
+        if i % 2:
+            history.record(content, "teacher")
+        else:
+            history.apply(compute_delta(versions[-1], content), "teacher")
+        versions.append(content)
+
+    assert history.version == 46
+    for version, expected in enumerate(versions, start=1):
+        assert history.content_at(version) == expected
+    assert [entry["content"] for entry in history.entries(include_content=True)] == versions
+
+    stats = history.get_stats()
+    assert stats["snapshots"] == 5  # version 1 plus every 10th version
+    assert stats["stored_chars"] < len(versions[0]) * 6
+
+
+@pytest.mark.asyncio
+async def test_service_edits_with_deltas():
+    service = RealtimeCollaborationService(InMemoryBackplane())
+    await service.create_session("session-1", "teacher")
+    await service.join_session("session-1", "teacher")
+    await service.share_document("session-1", "teacher", "doc-1", "Stretch, then run.")
+    await service.lock_document("session-1", "teacher", "doc-1")
+
+    document = await service.edit_document(
+        "session-1", "teacher", "doc-1", delta=[7, " well", 7, -4, "sprint."], base_version=1
+    )
+    assert document["content"] == "Stretch well, then sprint."
+    assert document["version"] == 2
+
+    # Full-content edits are still accepted and stored as deltas
+    await service.edit_document("session-1", "teacher", "doc-1", "Stretch well, then sprint twice.")
+    history = await service.get_document_history("session-1", "doc-1")
+    assert "delta" in history[-1]
+    assert (await service.get_document_version("session-1", "doc-1", 2))["content"] == "Stretch well, then sprint."
+
+    # A delta against a stale version is rejected as a conflict
+    with pytest.raises(HTTPException) as exc:
+        await service.edit_document("session-1", "teacher", "doc-1", delta=["x"], base_version=1)
+    assert exc.value.status_code == 409
+
+    # Malformed deltas and unknown versions keep their client error codes
+    with pytest.raises(HTTPException) as exc:
+        await service.edit_document("session-1", "teacher", "doc-1", delta=[500, "x"])
+    assert exc.value.status_code == 400
+    with pytest.raises(HTTPException) as exc:
+        await service.get_document_version("session-1", "doc-1", 99)
+    assert exc.value.status_code == 404
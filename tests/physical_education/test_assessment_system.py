@@ -440,4 +440,50 @@ class TestAssessmentSystem(unittest.TestCase):
         
         invalid_data = valid_data.copy()
         invalid_data['components']['endurance']['score'] = 150  # Score above maximum
-        self.assertFalse(await self.assessment_system._validate_assessment_data(invalid_data)) 
\ No newline at end of file
+        self.assertFalse(await self.assessment_system._validate_assessment_data(invalid_data)) 
+
+class TestBulkStudentDataSave(unittest.TestCase):
+    """save_student_data writes trends with a fixed number of statements per chunk."""
+
+    def setUp(self):
+        self.assessment_system = AssessmentSystem()
+        self.assessment_system.skill_activity_cache.clear()
+        self.assessment_system.assessment_history = {"recent_assessments": [], "trends": {}, "statistics": {}}
+        self.assessment_system.performance_trends = {
+            str(student_id): {
+                "running": {"daily_scores": [{"score": 0.8, "date": "2024-03-01T10:00:00"}]}
+            }
+            for student_id in range(1, 1201)
+        }
+        self.db = MagicMock()
+        self.assessment_system.db = self.db
+
+        def query(*columns):
+            result = MagicMock()
+            if len(columns) == 2:  # Activity.id, Activity.name
+                result.order_by.return_value.all.return_value = [(7, "Running Drills"), (8, "Jumping")]
+            else:  # Existing SkillAssessment lookup
+                result.filter.return_value.all.return_value = [
+                    (99, 1, 7, datetime(2024, 3, 1, 10, 0, 0))
+                ]
+            return result
+        self.db.query.side_effect = query
+
+    def test_trends_are_saved_in_chunks(self):
+        with patch.object(self.assessment_system, "_safe_commit") as commit, \
+                patch.object(self.assessment_system, "_migrate_existing_assessments"):
+            self.assessment_system.save_student_data()
+
+        # One activity lookup, one existence query and at most two writes per chunk
+        activity_queries = [c for c in self.db.query.call_args_list if len(c.args) == 2]
+        self.assertEqual(len(activity_queries), 1)
+        self.assertEqual(len(self.db.query.call_args_list), 1 + 3)
+        self.assertEqual(commit.call_count, 3)
+
+        written = [c.args[1] for c in self.db.execute.call_args_list]
+        self.assertEqual(sum(len(rows) for rows in written), 1200)
+        self.assertIn([{"id": 99, "overall_score": 0.8, "assessment_metadata": {
+            "performance_trend": {"daily_scores": [{"score": 0.8, "date": "2024-03-01T10:00:00"}]},
+            "skill": "running"
+        }}], written)
+        self.assertEqual(self.assessment_system.last_save_stats["skill_assessments"]["updated"], 1)
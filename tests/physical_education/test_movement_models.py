@@ -180,6 +180,43 @@ class TestMovementModels(unittest.TestCase):
         self.assertIn("speed", result)
         self.assertIn("range_of_motion", result)
 
+    def test_vectorized_sequence_metrics(self):
+        """Test vectorized sequence metrics against per-landmark reference values."""
+        from types import SimpleNamespace
+        rng = np.random.default_rng(42)
+        coords = rng.random((6, 33, 3)).astype(np.float32)
+        start = datetime(2024, 1, 1)
+        frames = [
+            {
+                'landmarks': SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y, z=z) for x, y, z in coords[f]]),
+                'timestamp': start + timedelta(milliseconds=33 * f),
+                'processed': False
+            }
+            for f in range(6)
+        ]
+        
+        positions, timestamps = self.movement_models._build_landmark_tensor(frames)
+        self.assertEqual(positions.shape, (6, 33, 3))
+        self.assertEqual(positions.dtype, np.float32)
+        self.assertTrue(positions.flags['C_CONTIGUOUS'])
+        
+        metrics = self.movement_models.compute_sequence_metrics(positions, timestamps)
+        
+        jerk = sum(
+            np.linalg.norm((coords[i + 1, p] - coords[i, p]) - (coords[i, p] - coords[i - 1, p]))
+            for i in range(1, 5) for p in range(33)
+        )
+        speed = np.mean([
+            np.linalg.norm(coords[i, p] - coords[i - 1, p]) / 0.033
+            for i in range(1, 6) for p in range(33)
+        ])
+        rom = np.mean([np.linalg.norm(coords[:, p].max(axis=0) - coords[:, p].min(axis=0)) for p in range(33)])
+        
+        self.assertAlmostEqual(metrics['smoothness'], 1.0 / (1.0 + jerk / 4), places=4)
+        self.assertAlmostEqual(metrics['consistency'], 1.0 / (1.0 + np.var(coords, axis=0).mean()), places=4)
+        self.assertAlmostEqual(metrics['speed'], speed, places=3)
+        self.assertAlmostEqual(metrics['range_of_motion'], rom, places=4)
+
     def test_sequence_buffer_management(self):
         """Test sequence buffer management."""
         # Mock pose_model.process to return pose landmarks
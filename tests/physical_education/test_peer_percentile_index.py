@@ -0,0 +1,60 @@
+"""
+Tests for the incremental peer score index used by AssessmentSystem.
+"""
+
+import random
+
+import pytest
+
+from app.services.physical_education.peer_percentile_index import PeerPercentileIndex
+
+
+def linear_percentile(values, q):
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def test_index_matches_full_scan_after_incremental_updates():
+    rng = random.Random(2)
+    index = PeerPercentileIndex()
+    latest = {}
+    for _ in range(3000):
+        student = f"student-{rng.randrange(200)}"
+        age_group = rng.choice(["elementary", "middle"])
+        skill = rng.choice(["running", "jumping"])
+        score = round(rng.random(), 3)
+        index.update(student, age_group, skill, score)
+        latest[(student, skill)] = (age_group, score)
+
+    for age_group in ("elementary", "middle"):
+        for skill in ("running", "jumping"):
+            peers = [score for (_, s), (group, score) in latest.items() if s == skill and group == age_group]
+            comparison = index.comparison(age_group, skill, 0.42)
+            assert comparison["peer_count"] == len(peers)
+            assert comparison["percentile"] == pytest.approx(linear_percentile(peers, 42))
+            assert comparison["average_peer_score"] == pytest.approx(sum(peers) / len(peers))
+            assert comparison["top_peer_score"] == max(peers)
+            assert comparison["percentile_rank"] == pytest.approx(
+                100 * sum(score <= 0.42 for score in peers) / len(peers)
+            )
+
+
+def test_students_move_between_groups_and_can_be_removed():
+    index = PeerPercentileIndex()
+    index.update("a", "elementary", "running", 0.5)
+    index.update("b", "elementary", "running", 0.7)
+    index.update("a", "middle", "running", 0.9)
+
+    assert index.count("elementary", "running") == 1
+    assert index.comparison("middle", "running", 0.9)["peer_count"] == 1
+    assert index.latest_score("a", "running") == 0.9
+
+    index.remove_student("b")
+    assert index.comparison("elementary", "running", 0.5) == {}
+
+    index.rebuild([("c", "middle", "running", 0.1), ("c", "middle", "running", 0.3)])
+    assert index.count("middle", "running") == 1
+    assert index.latest_score("c", "running") == 0.3
@@ -0,0 +1,92 @@
+"""
+Tests for vectorized activity recommendation scoring.
+"""
+
+import random
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.models.physical_education.pe_enums.pe_types import DifficultyLevel
+from app.services.physical_education.recommendation_scoring import (
+    SCORE_COMPONENTS,
+    rank_activities,
+    top_k
+)
+
+TYPES = ["cardio", "strength", "flexibility", "team_sports"]
+
+
+def reference_components(activity, performances, pe_preferences, adaptation_preferences, progressions, performed_types):
+    """Per-activity loop equivalent to the original ActivityManager helpers."""
+    relevant = [p.score for p in performances if p.activity_id == activity.id]
+    if relevant:
+        trend = 1 + (relevant[-1] - relevant[0]) / len(relevant) * 0.5 if len(relevant) > 1 else 1.0
+        performance = min(1.0, sum(relevant) / len(relevant) * trend)
+    else:
+        performance = 0.5
+
+    pe = next((p.preference_score for p in pe_preferences if p.activity_id == activity.id), 0.0)
+    adaptation = next(
+        (p.preference_score for p in adaptation_preferences if p.activity_type == activity.activity_type), 0.0
+    )
+    if pe > 0 and adaptation > 0:
+        preference = pe * 0.7 + adaptation * 0.3
+    else:
+        preference = pe or adaptation or 0.5
+
+    progression = next((p for p in progressions if p.activity_id == activity.id), None)
+    levels = {DifficultyLevel.BEGINNER: 0.3, DifficultyLevel.INTERMEDIATE: 0.6, DifficultyLevel.ADVANCED: 0.9}
+    progression_score = 0.5 if progression is None else min(
+        1.0, levels.get(progression.current_level, 0.5) * (1 + progression.improvement_rate * 0.5)
+    )
+
+    diversity = 1 - performed_types.count(activity.activity_type) / len(performed_types) if performed_types else 0.5
+    return [performance, preference, progression_score, diversity]
+
+
+@pytest.fixture
+def history():
+    rng = random.Random(5)
+    activities = [SimpleNamespace(id=i, activity_type=rng.choice(TYPES)) for i in range(400)]
+    performances = [
+        SimpleNamespace(activity_id=rng.randrange(60), score=rng.random()) for _ in range(300)
+    ]
+    pe_preferences = [
+        SimpleNamespace(activity_id=rng.randrange(400), preference_score=rng.random()) for _ in range(40)
+    ]
+    adaptation_preferences = [SimpleNamespace(activity_type="cardio", preference_score=0.8)]
+    progressions = [
+        SimpleNamespace(
+            activity_id=i,
+            current_level=rng.choice(list(DifficultyLevel)),
+            improvement_rate=rng.uniform(-0.5, 0.5)
+        )
+        for i in range(0, 400, 7)
+    ]
+    performed_types = [activities[p.activity_id].activity_type for p in performances]
+    return activities, performances, pe_preferences, adaptation_preferences, progressions, performed_types
+
+
+def test_vectorized_scores_match_per_activity_loop(history):
+    activities = history[0]
+    top, scores, components = rank_activities(*history, limit=10)
+
+    expected = np.array([reference_components(activity, *history[1:]) for activity in activities])
+    np.testing.assert_allclose(components, expected)
+    np.testing.assert_allclose(scores, expected @ np.array([0.3, 0.3, 0.2, 0.2]))
+
+    ranked = sorted(range(len(activities)), key=lambda i: scores[i], reverse=True)
+    assert top == ranked[:10]
+    assert components.shape == (len(activities), len(SCORE_COMPONENTS))
+
+
+def test_top_k_breaks_ties_in_catalog_order():
+    scores = np.array([0.2, 0.9, 0.5, 0.9, 0.5, 0.5, 0.1])
+    assert top_k(scores, 4).tolist() == [1, 3, 2, 4]
+    assert top_k(scores, 10).tolist() == [1, 3, 2, 4, 5, 0, 6]
+    assert top_k(scores, 0).tolist() == []
+
+    top, scores, _ = rank_activities([], [], [], [], [], [], limit=5)
+    assert top == [] and len(scores) == 0
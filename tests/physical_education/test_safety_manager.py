@@ -462,4 +462,41 @@ async def test_database_interaction(safety_manager, db_session):
     
     # Test rollback on error - verify transaction management
     # Verify session is still usable and not broken
-    assert db_session.is_active 
\ No newline at end of file
+    assert db_session.is_active 
+
+@pytest.mark.asyncio
+async def test_bulk_update_incidents_prefetches_and_groups_by_columns():
+    """Bulk updates use one IN prefetch and one executemany per changed-column set per chunk."""
+    from unittest.mock import MagicMock, patch
+
+    original_instance = SafetyManager._instance
+    SafetyManager._instance = None
+    try:
+        manager = SafetyManager(MagicMock())
+        db = MagicMock()
+        db.query.return_value.filter.return_value.all.side_effect = [[(1,), (2,)], [(4,)]]
+        updates = [
+            {"id": 1, "data": {"severity": "low"}},
+            {"id": 2, "data": {"severity": "low"}},
+            {"id": 3, "data": {"severity": "low"}},
+            {"id": 4, "data": {"severity": "low", "follow_up_notes": "Cleared"}},
+            {"id": 5, "data": {"not_a_column": 1}},
+            {"id": 6, "data": {}}
+        ]
+        with patch("app.services.physical_education.safety_manager.get_db", return_value=iter([db])):
+            result = await manager.bulk_update_safety_incidents(updates, chunk_size=3)
+    finally:
+        SafetyManager._instance = original_instance
+
+    assert db.query.call_count == 2  # One prefetch per chunk of ids 1-3 and 4
+    assert db.commit.call_count == 2
+    executed = [call.args[1] for call in db.execute.call_args_list]
+    assert executed == [
+        [{"id": 1, "severity": "low"}, {"id": 2, "severity": "low"}],
+        [{"id": 4, "severity": "low", "follow_up_notes": "Cleared"}]
+    ]
+    assert result["success"] == 3
+    assert result["failure"] == 3
+    assert result["results"][3] == {"status": "not_found"}
+    assert result["results"][5]["status"] == "invalid"
+    assert result["results"][6]["status"] == "invalid"
@@ -204,6 +204,22 @@ async def test_extract_frames(video_processor, temp_video_file):
     assert len(frames) > 0
     assert all(isinstance(frame, np.ndarray) for frame in frames)
 
+@pytest.mark.asyncio
+async def test_stream_frame_windows(video_processor, temp_video_file):
+    """Test streaming processed frames in bounded windows - real implementation."""
+    expected = len(await video_processor.extract_frames(temp_video_file))
+    
+    window_sizes = []
+    async for window in video_processor.stream_frame_windows(temp_video_file, window_size=8, max_frames_in_flight=12):
+        assert all(isinstance(frame, dict) and "features" in frame for frame in window)
+        window_sizes.append(len(window))
+    
+    assert sum(window_sizes) == expected
+    assert all(size == 8 for size in window_sizes[:-1])
+    assert 0 < window_sizes[-1] <= 8
+    # Streaming must not populate the frame cache
+    assert video_processor.cache["frames"] == {}
+
 @pytest.mark.asyncio
 async def test_process_frames(video_processor, sample_frames):
     """Test processing video frames - real implementation."""
@@ -218,6 +234,29 @@ async def test_process_frames(video_processor, sample_frames):
             pytest.fail(f"Frame processing failed - Models should be pre-downloaded in Dockerfile. Rebuild image.")
         raise
 
+@pytest.mark.asyncio
+async def test_extract_features_parallel_matches_sequential(video_processor):
+    """Test chunked pool extraction keeps optical flow ordering - real implementation."""
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (120, 160, 3), dtype=np.uint8) for _ in range(7)]
+    
+    sequential = [video_processor.extract_features_sync(frame) for frame in frames]
+    
+    del video_processor.previous_frame
+    await video_processor.update_processing_config({"feature_executor": "thread", "feature_workers": 3, "feature_chunk_size": 2})
+    parallel = await video_processor.extract_features_parallel(frames)
+    
+    assert len(parallel) == len(sequential)
+    assert parallel[0]["flow"] is None
+    for expected, actual in zip(sequential[1:], parallel[1:]):
+        np.testing.assert_allclose(actual["flow"], expected["flow"])
+        assert len(actual["keypoints"]) == len(expected["keypoints"])
+    
+    timings = video_processor.get_feature_timings()
+    assert timings["frames"] == len(frames)
+    assert set(timings["stages"]) == {"grayscale", "edges", "keypoints", "flow"}
+    video_processor.feature_executor.shutdown()
+
 def test_extract_features(video_processor, sample_frame):
     """Test extracting features from a frame - real implementation."""
         
@@ -399,15 +438,6 @@ async def test_manage_frame_cache(video_processor):
     
     assert "test" in video_processor.frame_cache
 
-@pytest.mark.asyncio
-async def test_manage_batch_cache(video_processor):
-    """Test managing batch cache - real implementation."""
-    
-    video_processor.batch_cache["test"] = {"data": "test", "timestamp": datetime.now()}
-    await video_processor.manage_batch_cache()
-    
-    assert "test" in video_processor.batch_cache
-
 @pytest.mark.asyncio
 async def test_optimize_memory_usage(video_processor):
     """Test optimizing memory usage - real implementation."""
@@ -426,6 +456,43 @@ async def test_get_cache_stats(video_processor):
     assert "misses" in stats
     assert "evictions" in stats
 
+@pytest.mark.asyncio
+async def test_feature_cache_is_content_addressed_and_byte_bounded(video_processor):
+    """Test frame feature cache keys, compact storage and byte budget - real implementation."""
+    rng = np.random.default_rng(1)
+    frames = [rng.integers(0, 255, (120, 160, 3), dtype=np.uint8) for _ in range(4)]
+    
+    first = await video_processor.process_frames(frames)
+    second = await video_processor.process_frames([frame.copy() for frame in frames])
+    
+    stats = await video_processor.get_cache_stats()
+    assert stats["feature_cache"]["misses"] == 4
+    assert stats["feature_cache"]["hits"] == 4
+    assert 0 < stats["feature_cache"]["bytes_held"] <= stats["feature_cache"]["max_bytes"]
+    for cached_entry in video_processor.feature_cache.values():
+        assert "data" not in cached_entry and "flow" not in cached_entry
+    for original, restored in zip(first, second):
+        np.testing.assert_array_equal(original["features"]["edges"], restored["features"]["edges"])
+        assert len(original["features"]["keypoints"]) == len(restored["features"]["keypoints"])
+    
+    # Shrinking the budget evicts least recently used entries
+    key = next(iter(video_processor.feature_cache))
+    entry = video_processor.feature_cache.get(key)
+    video_processor.feature_cache.max_bytes = video_processor.feature_cache.bytes_held // 2
+    video_processor.feature_cache[key] = entry
+    assert video_processor.feature_cache.bytes_held <= video_processor.feature_cache.max_bytes
+    assert video_processor.feature_cache.get_stats()["evictions"] > 0
+
+def test_frame_and_analysis_caches_are_byte_bounded(video_processor, sample_frame):
+    """Test the per-frame pose and feature caches use digests and byte budgets - real implementation."""
+    assert video_processor._frame_key(sample_frame) == video_processor._frame_key(sample_frame.copy())
+    for cache in (video_processor.frame_cache, video_processor.analysis_cache):
+        cache.max_bytes = 4096
+        for i in range(8):
+            cache[f"frame-{i}"] = {"features": np.zeros(1024, dtype=np.uint8)}
+        assert cache.bytes_held <= cache.max_bytes
+        assert "frame-0" not in cache and "frame-7" in cache
+
 @pytest.mark.asyncio
 async def test_analyze_motion(video_processor, sample_frames):
     """Test motion analysis - real implementation."""